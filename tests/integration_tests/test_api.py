@@ -34,6 +34,7 @@ from tests.integration_tests.utils import (
     generate_data,
     get_weights,
     image_feature,
+    number_feature,
     run_api_experiment,
     sequence_feature,
     text_feature,
@@ -710,6 +711,36 @@ def test_api_save_torchscript(tmpdir):
         assert output_df[col].equals(output_df_expected[col])
 
 
+@pytest.mark.parametrize("data_format", ["csv", "parquet"])
+def test_api_predict_to_file(tmpdir, data_format):
+    """Tests that predictions written chunk after chunk are the same as predictions of the whole dataset."""
+    input_features = [category_feature(encoder={"vocab_size": 5}), number_feature()]
+    output_features = [category_feature(name="class", decoder={"vocab_size": 5}, output_feature=True)]
+
+    data_csv = generate_data(input_features, output_features, os.path.join(tmpdir, "dataset.csv"), num_examples=50)
+    config = {
+        "input_features": input_features,
+        "output_features": output_features,
+        TRAINER: {"epochs": 1},
+    }
+    model = The FlowModel(config)
+    model.train(dataset=data_csv, output_directory=tmpdir)
+
+    dataset = data_csv
+    if data_format == "parquet":
+        dataset = os.path.join(tmpdir, "dataset.parquet")
+        read_csv(data_csv).to_parquet(dataset)
+    output_df_expected, _ = model.predict(dataset, return_type=pd.DataFrame)
+
+    output_path = os.path.join(tmpdir, "predictions", f"predictions.{data_format}")
+    assert model.predict_to_file(dataset, output_path, chunk_size=16, batch_size=8) == output_path
+    output_df = read_csv(output_path) if data_format == "csv" else pd.read_parquet(output_path)
+
+    assert len(output_df) == len(output_df_expected)
+    assert output_df["class_predictions"].tolist() == output_df_expected["class_predictions"].astype(str).tolist()
+    assert (output_df["class_probability"].astype(float) - output_df_expected["class_probability"]).abs().max() < 1e-6
+
+
 def test_saved_weights_in_checkpoint(tmpdir):
     image_dest_folder = os.path.join(tmpdir, "generated_images")
     input_features = [
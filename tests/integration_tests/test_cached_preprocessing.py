@@ -1,12 +1,24 @@
+import copy
 import os
+from unittest import mock
 
 import numpy as np
+import pandas as pd
 import pytest
 
 from theflow.api import The FlowModel
-from theflow.constants import MODEL_ECD, MODEL_GBM, PREPROCESSING, PROC_COLUMN, TRAINER
+from theflow.constants import MODEL_ECD, MODEL_GBM, NAME, PREPROCESSING, PROC_COLUMN, TRAINER
+from theflow.data import preprocessing
+from theflow.data.dataframe.tensor_array import is_tensor_series
 from tests.integration_tests.test_gbm import category_feature
-from tests.integration_tests.utils import binary_feature, generate_data, number_feature, run_test_suite, text_feature
+from tests.integration_tests.utils import (
+    binary_feature,
+    generate_data,
+    image_feature,
+    number_feature,
+    run_test_suite,
+    text_feature,
+)
 
 
 @pytest.mark.slow
@@ -96,7 +108,7 @@ def test_onehot_encoding_preprocessing(model_type, cache_encoder_embeddings, tmp
     # GBMs always cache embeddings, ECD will not by default, but will if set to `cache_encoder_embeddings=true`
     expected_cache_encoder_embeddings = (cache_encoder_embeddings or False) if model_type == MODEL_ECD else True
     if expected_cache_encoder_embeddings:
-        assert proc_series.values.dtype == "object"
+        assert is_tensor_series(proc_series)
         data = np.stack(proc_series.values)
         assert data.shape == (num_examples, vocab_size)
 
@@ -108,6 +120,29 @@ def test_onehot_encoding_preprocessing(model_type, cache_encoder_embeddings, tmp
         assert data.shape == (num_examples,)
 
 
+def test_text_embedding_preprocessing(tmpdir):
+    # Processed text columns are tensor columns, which are batched without stacking their rows
+    input_features = [text_feature(encoder={"type": "tf_idf"}, preprocessing={"cache_encoder_embeddings": True})]
+    output_features = [binary_feature()]
+    num_examples = 100
+    dataset_fp = generate_data(input_features, output_features, os.path.join(tmpdir, "dataset.csv"), num_examples)
+    config = {"input_features": input_features, "output_features": output_features}
+
+    theflow_model = The FlowModel(config, backend="local")
+    with mock.patch.object(
+        preprocessing, "embed_fixed_features", wraps=preprocessing.embed_fixed_features
+    ) as embed_fixed_features:
+        proc_dataset = theflow_model.preprocess(training_set=dataset_fp)
+    assert embed_fixed_features.called
+
+    feature_name = input_features[0][NAME]
+    assert proc_dataset.training_set_metadata[feature_name][PREPROCESSING]["cache_encoder_embeddings"]
+    proc_df = theflow_model.backend.df_engine.compute(proc_dataset.training_set.to_df())
+    data = np.stack(proc_df[input_features[0][PROC_COLUMN]].values)
+    assert data.shape == (num_examples, proc_dataset.training_set_metadata[feature_name]["vocab_size"])
+    assert data.dtype == np.float32
+
+
 def test_hf_text_embedding_tied(tmpdir):
     input_features = [
         text_feature(
@@ -133,3 +168,66 @@ def test_hf_text_embedding_tied(tmpdir):
 
     config = {"input_features": input_features, "output_features": output_features, TRAINER: {"epochs": 1}}
     run_test_suite(config, dataset, "local")
+
+
+def test_column_cache(tmpdir):
+    input_features = [number_feature(), category_feature(encoder={"vocab_size": 5}), binary_feature(), number_feature()]
+    output_features = [binary_feature()]
+    df = pd.read_csv(generate_data(input_features, output_features, os.path.join(tmpdir, "dataset.csv")))
+    backend = {"type": "local", "cache_dir": os.path.join(tmpdir, "cache")}
+
+    def preprocess(input_features, cache_columns=True):
+        config = {
+            "input_features": copy.deepcopy(input_features),
+            "output_features": copy.deepcopy(output_features),
+            PREPROCESSING: {"cache_columns": cache_columns},
+        }
+        model = The FlowModel(config, backend=backend)
+        with mock.patch.object(preprocessing, "build_data", wraps=preprocessing.build_data) as build_data:
+            proc_dataset = model.preprocess(dataset=df)
+        processed = {feature[NAME] for call in build_data.call_args_list for feature in call.args[1]}
+        proc_df = model.backend.df_engine.compute(proc_dataset.training_set.to_df())
+        return processed, proc_df, proc_dataset.training_set_metadata
+
+    processed, _, _ = preprocess(input_features[:3])
+    assert processed == {feature[NAME] for feature in input_features[:3] + output_features}
+
+    # Change the preprocessing of one feature and add another one, only those two are processed.
+    input_features[0][PREPROCESSING] = {"normalization": "minmax"}
+    processed, proc_df, metadata = preprocess(input_features)
+    assert processed == {input_features[0][NAME], input_features[3][NAME]}
+
+    _, expected_proc_df, expected_metadata = preprocess(input_features, cache_columns=False)
+    pd.testing.assert_frame_equal(proc_df[expected_proc_df.columns], expected_proc_df)
+    for feature in input_features + output_features:
+        assert metadata[feature[NAME]] == expected_metadata[feature[NAME]]
+
+
+def test_column_cache_images_not_in_memory(tmpdir):
+    input_features = [
+        image_feature(os.path.join(tmpdir, "images"), preprocessing={"in_memory": False}),
+        number_feature(),
+    ]
+    output_features = [binary_feature()]
+    data_csv = generate_data(input_features, output_features, os.path.join(tmpdir, "dataset.csv"), num_examples=20)
+    backend = {"type": "local", "cache_dir": os.path.join(tmpdir, "cache")}
+    os.makedirs(backend["cache_dir"])
+
+    def train(input_features):
+        config = {
+            "input_features": copy.deepcopy(input_features),
+            "output_features": copy.deepcopy(output_features),
+            PREPROCESSING: {"cache_columns": True},
+            TRAINER: {"epochs": 1, "batch_size": 8},
+        }
+        model = The FlowModel(config, backend=backend)
+        with mock.patch.object(preprocessing, "build_data", wraps=preprocessing.build_data) as build_data:
+            model.train(dataset=data_csv, output_directory=os.path.join(tmpdir, "results"))
+        return {feature[NAME] for call in build_data.call_args_list for feature in call.args[1]}
+
+    train(input_features)
+
+    # The images are written to the HDF5 file of the new dataset checksum, so they are processed again
+    input_features[1][PREPROCESSING] = {"normalization": "minmax"}
+    processed = train(input_features)
+    assert input_features[0][NAME] in processed
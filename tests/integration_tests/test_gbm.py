@@ -287,6 +287,30 @@ def test_loss_decreases(tmpdir, local_backend):
     assert train_losses[last_entry - 1] <= train_losses[0]
 
 
+def test_dataset_chunk_size(tmpdir, local_backend):
+    """Test that constructing the LightGBM datasets in chunks trains the same model as in a single matrix."""
+    input_features = [number_feature(), category_feature(encoder={"type": "onehot"}), binary_feature()]
+    output_features = [binary_feature()]
+    dataset_filename = generate_data(
+        input_features, output_features, os.path.join(tmpdir, "training.csv"), num_examples=100
+    )
+
+    probabilities = []
+    for dataset_chunk_size in [None, 16]:
+        config = {
+            MODEL_TYPE: "gbm",
+            INPUT_FEATURES: input_features,
+            OUTPUT_FEATURES: output_features,
+            TRAINER: {"num_boost_round": 2, "feature_pre_filter": False, "dataset_chunk_size": dataset_chunk_size},
+        }
+        model = The FlowModel(config, backend=local_backend)
+        model.train(dataset=dataset_filename, output_directory=tmpdir, skip_save_processed_input=True)
+        preds, _ = model.predict(dataset=dataset_filename, output_directory=tmpdir)
+        probabilities.append(np.stack(preds[output_features[0]["name"] + "_probabilities"]))
+
+    assert np.array_equal(probabilities[0], probabilities[1])
+
+
 def test_save_load(tmpdir, local_backend):
     input_features = [number_feature(), category_feature(encoder={"reduce_output": "sum"})]
     output_features = [binary_feature()]
@@ -1380,3 +1380,34 @@ def test_llm_used_tokens(tmpdir):
         "5": 207,
         "6": 0,
     }
+
+
+@pytest.mark.llm
+def test_llm_batched_generation(tmpdir):
+    """Test that generating for a batch of left-padded prompts gives the same predictions as one prompt at a time."""
+    input_features = [text_feature(name="input", encoder={"type": "passthrough"})]
+    output_features = [text_feature(output_feature=True, name="output", decoder={"type": "text_extractor"})]
+    # Prompts of very different lengths, so that batches need padding.
+    dataset = pd.DataFrame(
+        {
+            "input": [" ".join(["word"] * (i % 7 + 1)) + f" {i}" for i in range(12)],
+            "output": ["a"] * 12,
+        }
+    )
+
+    config = {
+        MODEL_TYPE: MODEL_LLM,
+        BASE_MODEL: TEST_MODEL_NAME,
+        GENERATION: {"do_sample": False, "max_new_tokens": MAX_NEW_TOKENS_TEST_DEFAULT},
+        INPUT_FEATURES: input_features,
+        OUTPUT_FEATURES: output_features,
+    }
+    model = The FlowModel(config)
+    model.train(dataset=dataset, output_directory=str(tmpdir), skip_save_processed_input=True)
+
+    single_preds, _ = model.predict(dataset=dataset, batch_size=1, output_directory=str(tmpdir))
+    batched_preds, _ = model.predict(dataset=dataset, batch_size=5, output_directory=str(tmpdir))
+
+    assert batched_preds["output_response"].tolist() == single_preds["output_response"].tolist()
+    for single, batched in zip(single_preds["output_predictions"], batched_preds["output_predictions"]):
+        assert list(batched) == list(single)
@@ -40,6 +40,7 @@ from theflow.data.concatenate_datasets import concatenate_df
 from theflow.data.preprocessing import handle_features_with_prompt_config, preprocess_for_prediction
 from theflow.schema.llms.prompt import PromptConfig
 from theflow.schema.model_types.base import ModelConfig
+from theflow.utils import strings_utils
 from tests.integration_tests.utils import (
     assert_preprocessed_dataset_shape_and_dtype_for_feature,
     audio_feature,
@@ -563,6 +564,20 @@ def test_seq_features_max_sequence_length(
     assert all(len(x) == sequence_length_expected for x in all_df[proc_column_name])
 
 
+def test_text_features_tokenized_once(tmpdir):
+    input_features = [text_feature(), text_feature(preprocessing={"tokenizer": "space_punct"})]
+    output_features = [binary_feature()]
+    data_csv = generate_data(input_features, output_features, os.path.join(tmpdir, "dataset.csv"), NUM_EXAMPLES)
+    config = {INPUT_FEATURES: input_features, OUTPUT_FEATURES: output_features}
+
+    theflow_model = The FlowModel(config, backend=LocalTestBackend())
+    with mock.patch.object(strings_utils, "tokenize_column", wraps=strings_utils.tokenize_column) as tokenize_column:
+        theflow_model.preprocess(dataset=data_csv)
+
+    # Each column is tokenized to build its vocabulary, and the tokens are reused to build its data.
+    assert tokenize_column.call_count == len(input_features)
+
+
 def test_column_feature_type_mismatch_fill():
     """Tests that we are able to fill missing values even in columns where the column dtype and desired feature
     dtype do not match."""
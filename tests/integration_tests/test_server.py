@@ -320,3 +320,51 @@ def test_server_integration_with_audio(single_record, tmpdir):
         model_output, _ = model.predict(dataset=data_df)
         model_output = model_output.to_dict("split")
         assert model_output == server_response
+
+
+@pytest.mark.parametrize("max_batch_size", [1, 4])
+def test_server_integration_with_inference_pipeline(max_batch_size, tmpdir):
+    input_features = [
+        text_feature(encoder={"type": "embed", "min_len": 1}),
+        number_feature(normalization="zscore"),
+    ]
+    output_features = [category_feature(decoder={"vocab_size": 4}), number_feature()]
+
+    np.random.seed(123)  # reproducible synthetic data
+    rel_path = generate_data(input_features, output_features, os.path.join(tmpdir, "dataset.csv"), num_examples=50)
+
+    model = train_and_predict_model(input_features, output_features, data_csv=rel_path, output_directory=tmpdir)
+
+    app = server(model, max_batch_size=max_batch_size, use_inference_pipeline=True)
+    client = TestClient(app)
+
+    response = client.post("/predict")
+    assert response.status_code == 400
+    assert ALL_FEATURES_PRESENT_ERROR in str(response.json())
+
+    data_df = read_csv(rel_path)
+    model_output, _ = model.predict(dataset=data_df)
+
+    # One-off predictions, form values are sent as strings.
+    for i in range(3):
+        data, files = convert_to_form(data_df.T.to_dict()[i])
+        server_response = client.post("/predict", data=data, files=files)
+        assert server_response.status_code == 200
+        server_response = server_response.json()
+
+        for feature in output_features:
+            name = feature["name"]
+            assert server_response[f"{name}_predictions"] == pytest.approx(
+                model_output[f"{name}_predictions"][i], abs=1e-5
+            )
+        name = output_features[0]["name"]
+        assert server_response[f"{name}_probabilities"] == pytest.approx(
+            list(model_output[f"{name}_probabilities"][i]), abs=1e-5
+        )
+
+    # Batch prediction
+    files = convert_to_batch_form(data_df)
+    server_response = client.post("/batch_predict", files=files)
+    assert server_response.status_code == 200
+    server_response = server_response.json()
+    assert len(data_df) == len(server_response["data"])
@@ -1,6 +1,7 @@
 import logging
 import os
 import shutil
+from types import SimpleNamespace
 from unittest import mock
 
 import numpy as np
@@ -8,6 +9,7 @@ import pandas as pd
 import pytest
 import torch
 from packaging.version import parse as parse_version
+from torch.utils.tensorboard import SummaryWriter
 
 from theflow.api import The FlowModel
 from theflow.callbacks import Callback
@@ -18,11 +20,17 @@ from theflow.constants import (
     EVAL_BATCH_SIZE,
     INPUT_FEATURES,
     MAX_BATCH_SIZE_DATASET_FRACTION,
+    NAME,
     OUTPUT_FEATURES,
+    PROC_COLUMN,
     TRAINER,
 )
 from theflow.distributed import init_dist_strategy
-from theflow.globals import MODEL_FILE_NAME
+from theflow.globals import MODEL_FILE_NAME, TRAINING_CHECKPOINTS_DIR_PATH, TRAINING_PROGRESS_TRACKER_FILE_NAME
+from theflow.models import predictor
+from theflow.trainers.trainer import Trainer
+from theflow.utils.checkpoint_utils import CheckpointManager
+from theflow.utils.data_utils import load_json
 from tests.integration_tests.utils import (
     binary_feature,
     category_feature,
@@ -418,3 +426,179 @@ def test_enable_gradient_checkpointing(tmpdir, caplog):
     # Check that the warning is emitted when the model does not support gradient checkpointing
     # but does not prevent training from starting.
     assert "Gradient checkpointing is currently only supported for model_type: llm. Skipping..." in caplog.text
+
+
+def test_low_overhead_logging(tmpdir):
+    """Buffering the step losses on the device writes the same step summaries as syncing every step."""
+    input_features = [number_feature(), category_feature(encoder={"vocab_size": 3})]
+    output_features = [binary_feature()]
+
+    csv_filename = os.path.join(tmpdir, "training.csv")
+    data_csv = generate_data(input_features, output_features, csv_filename, num_examples=100)
+
+    config = {
+        INPUT_FEATURES: input_features,
+        OUTPUT_FEATURES: output_features,
+        TRAINER: {EPOCHS: 2, BATCH_SIZE: 8, "steps_per_checkpoint": 5, "steps_per_log_sync": 3},
+    }
+    model = The FlowModel(config, backend=LocalTestBackend(), logging_level=logging.INFO)
+
+    step_losses = []
+    train_step = Trainer.train_step
+
+    def record_train_step(self, inputs, *args, **kwargs):
+        loss, all_losses, used_tokens = train_step(self, inputs, *args, **kwargs)
+        step_losses.append(loss.item())
+        # The values computed from the host arrays of the batch are passed along with the batch.
+        assert kwargs["host_batch_info"] == {"batch_size": len(next(iter(inputs.values())))}
+        return loss, all_losses, used_tokens
+
+    def get_host_batch_info(self, batch):
+        return {"batch_size": len(batch[input_features[0][PROC_COLUMN]])}
+
+    with mock.patch.object(Trainer, "train_step", record_train_step), mock.patch.object(
+        Trainer, "get_host_batch_info", get_host_batch_info
+    ), mock.patch.object(Trainer, "get_step_stats", return_value={"test/stat": torch.ones(())}), mock.patch.object(
+        Trainer, "write_step_summary"
+    ) as write_step_summary:
+        model.train(dataset=data_csv, output_directory=tmpdir)
+
+    logged_losses = [
+        (call.kwargs["step"], float(call.kwargs["combined_loss"])) for call in write_step_summary.call_args_list
+    ]
+    assert logged_losses == list(enumerate(step_losses))
+    # Tensor step statistics are read along with the losses.
+    for call in write_step_summary.call_args_list:
+        stat = call.kwargs["step_stats"]["test/stat"]
+        assert stat.device.type == "cpu" and stat.dtype == torch.float32 and stat.item() == 1
+
+
+@pytest.mark.parametrize("prefetch_depth", [None, 2])
+def test_prediction_prefetch_depth(prefetch_depth, tmpdir):
+    """Prediction prefetches as many batches as the trainer, none by default."""
+    input_features = [number_feature()]
+    output_features = [binary_feature()]
+    data_csv = generate_data(input_features, output_features, os.path.join(tmpdir, "training.csv"), num_examples=50)
+
+    trainer_config = {EPOCHS: 1, BATCH_SIZE: 8}
+    if prefetch_depth is not None:
+        trainer_config["prefetch_depth"] = prefetch_depth
+    config = {INPUT_FEATURES: input_features, OUTPUT_FEATURES: output_features, TRAINER: trainer_config}
+    model = The FlowModel(config, backend=LocalTestBackend(), logging_level=logging.INFO)
+
+    model.train(dataset=data_csv, output_directory=tmpdir)
+    with mock.patch.object(predictor, "PrefetchBatcher", wraps=predictor.PrefetchBatcher) as prefetch_batcher:
+        model.predict(dataset=data_csv)
+    prefetch_batcher.assert_called_once()
+    assert prefetch_batcher.call_args.args[1] == (prefetch_depth or 0)
+
+
+def test_bucketing(tmpdir):
+    """Training batches are trimmed to the longest text of the batch and still cover the whole training set."""
+    input_features = [text_feature(encoder={"type": "embed", "reduce_output": "mean"})]
+    output_features = [binary_feature()]
+
+    csv_filename = os.path.join(tmpdir, "training.csv")
+    data_csv = generate_data(input_features, output_features, csv_filename, num_examples=100)
+
+    config = {
+        INPUT_FEATURES: input_features,
+        OUTPUT_FEATURES: output_features,
+        TRAINER: {EPOCHS: 2, BATCH_SIZE: 8, "bucketing_field": input_features[0][NAME]},
+    }
+    model = The FlowModel(config, backend=LocalTestBackend(), logging_level=logging.INFO)
+
+    batch_shapes = []
+    train_step = Trainer.train_step
+
+    def record_train_step(self, inputs, *args, **kwargs):
+        batch_shapes.append(tuple(inputs[input_features[0][NAME]].shape))
+        return train_step(self, inputs, *args, **kwargs)
+
+    with mock.patch.object(Trainer, "train_step", record_train_step):
+        training_set = model.train(dataset=data_csv, output_directory=tmpdir).preprocessed_data.training_set
+
+    max_sequence_length = training_set.get(input_features[0][PROC_COLUMN]).shape[1]
+    assert any(shape[1] < max_sequence_length for shape in batch_shapes)
+    assert sum(shape[0] for shape in batch_shapes) == 2 * len(training_set)
+
+
+@pytest.mark.parametrize("sharded_checkpoint", [False, True])
+def test_async_checkpoint(tmpdir, sharded_checkpoint):
+    input_features = [number_feature(), category_feature(encoder={"vocab_size": 3})]
+    output_features = [binary_feature()]
+
+    csv_filename = os.path.join(tmpdir, "training.csv")
+    data_csv = generate_data(input_features, output_features, csv_filename, num_examples=100)
+
+    config = {
+        INPUT_FEATURES: input_features,
+        OUTPUT_FEATURES: output_features,
+        TRAINER: {
+            EPOCHS: 2,
+            BATCH_SIZE: 8,
+            "steps_per_checkpoint": 5,
+            "async_checkpoint": True,
+            "sharded_checkpoint": sharded_checkpoint,
+        },
+    }
+    checkpoint_steps = []
+
+    class CheckpointStepsCallback(Callback):
+        """Records the step of the latest checkpoint on disk when callbacks reading checkpoints are invoked."""
+
+        def _record(self, trainer, progress_tracker, save_path):
+            latest_checkpoint_path = os.path.join(save_path, TRAINING_CHECKPOINTS_DIR_PATH, "latest.ckpt")
+            state = torch.load(latest_checkpoint_path)
+            progress = load_json(os.path.join(save_path, TRAINING_PROGRESS_TRACKER_FILE_NAME))
+            checkpoint_step = state.get("state", state)["global_step"]
+            checkpoint_steps.append((checkpoint_step, progress["steps"], progress_tracker.steps))
+
+        def on_trainer_train_setup(self, trainer, save_path, is_coordinator):
+            self.save_path = save_path
+
+        def on_checkpoint(self, trainer, progress_tracker):
+            self._record(trainer, progress_tracker, self.save_path)
+
+        def on_trainer_train_teardown(self, trainer, progress_tracker, save_path, is_coordinator):
+            self._record(trainer, progress_tracker, save_path)
+
+    model = The FlowModel(
+        config, backend=LocalTestBackend(), logging_level=logging.INFO, callbacks=[CheckpointStepsCallback()]
+    )
+
+    with mock.patch.object(SummaryWriter, "add_scalar", autospec=True) as add_scalar, mock.patch.object(
+        CheckpointManager, "save_best", autospec=True, side_effect=CheckpointManager.save_best
+    ) as save_best:
+        _, _, output_dir = model.train(dataset=data_csv, output_directory=tmpdir)
+
+    # Checkpoints and the progress pointing to them are written before callbacks are invoked
+    assert checkpoint_steps
+    for checkpoint_step, progress_step, callback_step in checkpoint_steps:
+        assert checkpoint_step == progress_step == callback_step
+
+    # Every checkpoint was flushed at the end of training, and every save reported its stall time
+    save_path = os.path.join(output_dir, MODEL_FILE_NAME)
+    progress_tracker = load_json(os.path.join(save_path, TRAINING_PROGRESS_TRACKER_FILE_NAME))
+    assert os.path.exists(os.path.join(save_path, TRAINING_CHECKPOINTS_DIR_PATH, "latest.ckpt"))
+    assert os.path.exists(os.path.join(save_path, TRAINING_CHECKPOINTS_DIR_PATH, "best.ckpt"))
+    assert os.path.isdir(os.path.join(save_path, TRAINING_CHECKPOINTS_DIR_PATH, "shards")) == sharded_checkpoint
+    stall_times = [call.args[2] for call in add_scalar.call_args_list if call.args[1] == "checkpoint/stall_time"]
+    assert len(stall_times) == progress_tracker["checkpoint_number"] + save_best.call_count
+    assert progress_tracker["checkpoint_number"] > 0 and save_best.call_count > 0
+
+
+def test_wait_for_checkpoint_before_callbacks():
+    class EvalEndCallback(Callback):
+        def on_eval_end(self, trainer, progress_tracker, save_path):
+            pass
+
+    checkpoint_manager = mock.Mock()
+    trainer = SimpleNamespace(callbacks=[Callback(), EvalEndCallback()])
+
+    # Checkpoints are only flushed for hooks that a callback implements, as it may read them
+    Trainer.wait_for_checkpoint_before_callbacks(trainer, checkpoint_manager, "on_save_best_checkpoint")
+    Trainer.wait_for_checkpoint_before_callbacks(trainer, checkpoint_manager, "on_epoch_end")
+    checkpoint_manager.wait_for_pending_save.assert_not_called()
+    Trainer.wait_for_checkpoint_before_callbacks(trainer, checkpoint_manager, "on_eval_end")
+    checkpoint_manager.wait_for_pending_save.assert_called_once()
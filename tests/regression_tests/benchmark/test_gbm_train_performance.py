@@ -0,0 +1,93 @@
+"""Benchmarks the boosting rounds per second of GBM training, against refitting a new model at every train step."""
+import logging
+import time
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+from theflow.api import The FlowModel
+from theflow.constants import INPUT_FEATURES, MODEL_GBM, MODEL_TYPE, OUTPUT_FEATURES, TRAINER
+from theflow.trainers.trainer_lightgbm import LightGBMTrainer
+from theflow.utils.gbm_utils import store_predictions
+
+logger = logging.getLogger(__name__)
+
+NUM_ROWS = 200_000
+NUM_FEATURES = 20
+NUM_BOOST_ROUND = 100
+BOOSTING_ROUNDS_PER_CHECKPOINT = 5
+
+
+def _refit_train_step(
+    self, params, lgb_train, eval_sets, eval_names, init_model, boost_rounds_per_train_step, evals_result
+):
+    """Train step fitting a new scikit-learn model on the raw data of the datasets, starting from `init_model`."""
+    train_logits = torch.zeros(lgb_train.label.size)
+    callbacks = [store_predictions(train_logits), lgb.early_stopping(boost_rounds_per_train_step, verbose=False)]
+    gbm = lgb.LGBMClassifier(n_estimators=boost_rounds_per_train_step, **params).fit(
+        X=lgb_train.get_data(),
+        y=lgb_train.get_label(),
+        init_model=init_model,
+        eval_set=[(ds.get_data(), ds.get_label()) for ds in eval_sets],
+        eval_names=eval_names,
+        callbacks=callbacks,
+    )
+    evals_result.update(gbm.evals_result_)
+    return gbm
+
+
+def _train_rounds_per_sec(dataset, tmpdir, monkeypatch, train_step):
+    """Trains a GBM and returns the number of boosting rounds per second of its train steps."""
+    config = {
+        MODEL_TYPE: MODEL_GBM,
+        INPUT_FEATURES: [{"name": f"x{i}", "type": "number"} for i in range(NUM_FEATURES)],
+        OUTPUT_FEATURES: [{"name": "y", "type": "binary"}],
+        TRAINER: {
+            "num_boost_round": NUM_BOOST_ROUND,
+            "boosting_rounds_per_checkpoint": BOOSTING_ROUNDS_PER_CHECKPOINT,
+            "evaluate_training_set": True,
+            "skip_all_evaluation": True,
+        },
+    }
+
+    train_step_times = []
+
+    def timed_train_step(self, *args):
+        start = time.perf_counter()
+        gbm = train_step(self, *args)
+        train_step_times.append(time.perf_counter() - start)
+        return gbm
+
+    model = The FlowModel(config, logging_level=logging.WARNING)
+    with monkeypatch.context() as m:
+        m.setattr(LightGBMTrainer, "train_step", timed_train_step)
+        model.train(
+            dataset=dataset,
+            output_directory=str(tmpdir),
+            skip_save_processed_input=True,
+            skip_save_model=True,
+            skip_save_progress=True,
+            skip_save_log=True,
+        )
+
+    assert len(train_step_times) == NUM_BOOST_ROUND // BOOSTING_ROUNDS_PER_CHECKPOINT
+    return NUM_BOOST_ROUND / sum(train_step_times)
+
+
+@pytest.mark.benchmark
+def test_gbm_train_boost_rounds_per_sec(tmpdir, monkeypatch):
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(NUM_ROWS, NUM_FEATURES))
+    dataset = pd.DataFrame({f"x{i}": features[:, i] for i in range(NUM_FEATURES)})
+    dataset["y"] = features[:, 0] + features[:, 1] * features[:, 2] + rng.normal(size=NUM_ROWS) > 0
+
+    rounds_per_sec = _train_rounds_per_sec(dataset, tmpdir.mkdir("persistent"), monkeypatch, LightGBMTrainer.train_step)
+    logger.info(f"persistent booster: {rounds_per_sec:.1f} boosting rounds/sec")
+
+    refit_rounds_per_sec = _train_rounds_per_sec(dataset, tmpdir.mkdir("refit"), monkeypatch, _refit_train_step)
+    logger.info(f"refit per train step: {refit_rounds_per_sec:.1f} boosting rounds/sec")
+
+    assert rounds_per_sec > refit_rounds_per_sec
@@ -0,0 +1,76 @@
+"""Benchmarks batch reads of out-of-memory image features from the preprocessed HDF5 file.
+
+Compares the steps/sec of the persistent `HDF5Reader` against opening the file for every batch, which is what
+`PandasDataset.get` used to do.
+"""
+import logging
+import os
+import time
+
+import h5py
+import numpy as np
+import pytest
+
+from theflow.data.hdf5_reader import HDF5Reader
+from theflow.utils.fs_utils import download_h5
+
+logger = logging.getLogger(__name__)
+
+NUM_ROWS = 2048
+IMAGE_SHAPE = (3, 32, 32)
+BATCH_SIZE = 64
+NUM_EPOCHS = 2
+
+
+def _read_per_batch(data_fp, name, idx):
+    indices = np.empty((3, len(idx)), dtype=np.int64)
+    indices[0, :] = idx
+    indices[1, :] = np.arange(len(idx))
+    indices = indices[:, np.argsort(indices[0])]
+    with download_h5(data_fp) as h5_file:
+        data = h5_file[name][indices[0, :], :, :]
+    indices[2, :] = np.arange(len(idx))
+    indices = indices[:, np.argsort(indices[1])]
+    return data[indices[2, :]]
+
+
+def _steps_per_sec(read_fn, batches):
+    start = time.perf_counter()
+    for batch in batches:
+        read_fn(batch)
+    return len(batches) / (time.perf_counter() - start)
+
+
+@pytest.mark.benchmark
+def test_hdf5_reader_steps_per_sec(tmpdir):
+    data_fp = os.path.join(tmpdir, "images.hdf5")
+    rng = np.random.default_rng(0)
+    data = rng.random((NUM_ROWS,) + IMAGE_SHAPE, dtype=np.float32)
+    with h5py.File(data_fp, "w") as f:
+        f.create_dataset("contiguous", data=data)
+        f.create_dataset("chunked", data=data, chunks=(BATCH_SIZE,) + IMAGE_SHAPE)
+
+    batches = [
+        batch for _ in range(NUM_EPOCHS) for batch in np.array_split(rng.permutation(NUM_ROWS), NUM_ROWS // BATCH_SIZE)
+    ]
+
+    results = {"per_batch_open": _steps_per_sec(lambda idx: _read_per_batch(data_fp, "contiguous", idx), batches)}
+
+    reader = HDF5Reader(data_fp)
+    results["persistent"] = _steps_per_sec(lambda idx: reader.read("contiguous", idx), batches)
+    results["persistent_mmap"] = _steps_per_sec(lambda idx: reader.read("contiguous", idx, use_mmap=True), batches)
+    results["persistent_chunk_cache"] = _steps_per_sec(
+        lambda idx: reader.read("chunked", idx, cache_size_bytes=data.nbytes), batches
+    )
+
+    for idx in batches[:4]:
+        expected = data[idx]
+        np.testing.assert_array_equal(_read_per_batch(data_fp, "contiguous", idx), expected)
+        np.testing.assert_array_equal(reader.read("contiguous", idx), expected)
+        np.testing.assert_array_equal(reader.read("contiguous", idx, use_mmap=True), expected)
+        np.testing.assert_array_equal(reader.read("chunked", idx, cache_size_bytes=data.nbytes), expected)
+    reader.close()
+
+    for name, steps_per_sec in results.items():
+        logger.info(f"{name}: {steps_per_sec:.1f} steps/sec")
+    assert results["persistent"] > results["per_batch_open"]
@@ -0,0 +1,63 @@
+"""Benchmarks single-row prediction latency of `The FlowModel.predict` against the `InferencePipeline`."""
+import logging
+import os
+import time
+
+import numpy as np
+import pytest
+
+from theflow.api import The FlowModel
+from theflow.constants import BATCH_SIZE, TRAINER
+from theflow.utils.data_utils import read_csv
+from tests.integration_tests.utils import (
+    category_feature,
+    generate_data,
+    LocalTestBackend,
+    number_feature,
+    text_feature,
+)
+
+logger = logging.getLogger(__name__)
+
+NUM_REQUESTS = 50
+
+
+def _p50_ms(predict_fn, records):
+    latencies = []
+    for record in records:
+        start = time.perf_counter()
+        predict_fn(record)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.median(latencies))
+
+
+@pytest.mark.benchmark
+def test_inference_pipeline_single_row_latency(tmpdir):
+    input_features = [text_feature(encoder={"type": "embed", "min_len": 1}), number_feature()]
+    output_features = [category_feature(decoder={"vocab_size": 4}), number_feature()]
+    data_csv = generate_data(input_features, output_features, os.path.join(tmpdir, "dataset.csv"), num_examples=100)
+
+    config = {
+        "input_features": input_features,
+        "output_features": output_features,
+        TRAINER: {"epochs": 1, BATCH_SIZE: 128},
+    }
+    model = The FlowModel(config, backend=LocalTestBackend())
+    model.train(dataset=data_csv, skip_save_processed_input=True, skip_save_progress=True, output_directory=tmpdir)
+    pipeline = model.to_inference_pipeline(device="cpu")
+
+    records = read_csv(data_csv).head(NUM_REQUESTS).to_dict("records")
+    for record in records[:5]:
+        expected, _ = model.predict(dataset=[record], data_format=dict)
+        preds, _ = pipeline.predict([record])
+        for feature in output_features:
+            column = f"{feature['name']}_predictions"
+            assert preds[column][0] == pytest.approx(expected[column][0], abs=1e-5)
+
+    results = {
+        "model_predict": _p50_ms(lambda record: model.predict(dataset=[record], data_format=dict), records),
+        "inference_pipeline": _p50_ms(lambda record: pipeline.predict([record]), records),
+    }
+    for name, p50_ms in results.items():
+        logger.info(f"{name}: p50 {p50_ms:.2f} ms")
+    assert results["inference_pipeline"] < results["model_predict"]
@@ -0,0 +1,83 @@
+"""Benchmarks the generation throughput of a small local causal LM for increasing prediction batch sizes."""
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+from tokenizers import models, pre_tokenizers, Tokenizer
+from transformers import LlamaConfig, LlamaForCausalLM, PreTrainedTokenizerFast
+
+from theflow.api import The FlowModel
+from theflow.constants import BASE_MODEL, GENERATION, INPUT_FEATURES, MODEL_LLM, MODEL_TYPE, OUTPUT_FEATURES
+
+logger = logging.getLogger(__name__)
+
+VOCAB = [f"w{i}" for i in range(256)]
+NUM_PROMPTS = 64
+MAX_NEW_TOKENS = 16
+BATCH_SIZES = [1, 4, 16, 64]
+
+
+def _save_tiny_causal_lm(model_dir):
+    """Saves a randomly initialized Llama model and a word-level tokenizer, so that nothing is downloaded."""
+    special_tokens = ["<pad>", "<s>", "</s>", "<unk>"]
+    vocab = {token: i for i, token in enumerate(special_tokens + VOCAB)}
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, pad_token="<pad>", bos_token="<s>", eos_token="</s>", unk_token="<unk>"
+    ).save_pretrained(model_dir)
+
+    torch.manual_seed(0)
+    model_config = LlamaConfig(
+        vocab_size=len(vocab),
+        hidden_size=64,
+        intermediate_size=128,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        max_position_embeddings=512,
+        pad_token_id=vocab["<pad>"],
+        bos_token_id=vocab["<s>"],
+        eos_token_id=vocab["</s>"],
+    )
+    LlamaForCausalLM(model_config).save_pretrained(model_dir)
+
+
+@pytest.mark.benchmark
+def test_llm_generate_throughput(tmpdir):
+    model_dir = str(tmpdir.mkdir("model"))
+    _save_tiny_causal_lm(model_dir)
+
+    rng = np.random.default_rng(0)
+    dataset = pd.DataFrame(
+        {
+            "prompt": [" ".join(rng.choice(VOCAB, rng.integers(4, 128))) for _ in range(NUM_PROMPTS)],
+            "response": ["w0"] * NUM_PROMPTS,
+        }
+    )
+    config = {
+        MODEL_TYPE: MODEL_LLM,
+        BASE_MODEL: model_dir,
+        GENERATION: {"do_sample": False, "max_new_tokens": MAX_NEW_TOKENS, "min_new_tokens": MAX_NEW_TOKENS},
+        INPUT_FEATURES: [{"name": "prompt", "type": "text"}],
+        OUTPUT_FEATURES: [{"name": "response", "type": "text"}],
+    }
+    model = The FlowModel(config, logging_level=logging.WARNING)
+    model.train(dataset=dataset, output_directory=str(tmpdir), skip_save_processed_input=True)
+
+    tokens_per_sec = {}
+    reference_preds = None
+    for batch_size in BATCH_SIZES:
+        start = time.perf_counter()
+        preds, _ = model.predict(dataset=dataset, batch_size=batch_size, output_directory=str(tmpdir))
+        tokens_per_sec[batch_size] = NUM_PROMPTS * MAX_NEW_TOKENS / (time.perf_counter() - start)
+        logger.info(f"batch size {batch_size}: {tokens_per_sec[batch_size]:.1f} tokens/sec")
+
+        # Batching must not change the generated text.
+        if reference_preds is None:
+            reference_preds = preds["response_response"].tolist()
+        assert preds["response_response"].tolist() == reference_preds
+
+    assert tokens_per_sec[BATCH_SIZES[-1]] > tokens_per_sec[BATCH_SIZES[0]]
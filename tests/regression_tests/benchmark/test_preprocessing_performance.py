@@ -0,0 +1,123 @@
+"""Benchmarks preprocessing of synthetic datasets on the local backend, with the pandas engine mapping features
+serially and in parallel worker processes, the storage of processed columns of vectors, and the encoding of
+dates and H3 indexes."""
+import copy
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from theflow.api import The FlowModel
+from theflow.backend import LOCAL_BACKEND
+from theflow.constants import BACKEND, COLUMN, INPUT_FEATURES, OUTPUT_FEATURES, PROC_COLUMN, TRAINER
+from theflow.data.dataframe.tensor_array import to_tensor_series
+from theflow.data.dataset_synthesizer import build_synthetic_dataset_df
+from theflow.features.date_feature import DateFeatureMixin
+from theflow.features.h3_feature import H3FeatureMixin
+from theflow.utils.dataframe_utils import to_numpy_dataset
+
+logger = logging.getLogger(__name__)
+
+NUM_ROWS = 50_000
+
+CONFIG = {
+    INPUT_FEATURES: [
+        {"name": "text", "type": "text", "vocab_size": 1000, "max_len": 32},
+        {"name": "set", "type": "set", "vocab_size": 100, "max_len": 10},
+        {"name": "bag", "type": "bag", "vocab_size": 100, "max_len": 10},
+        {"name": "date", "type": "date"},
+        {"name": "h3", "type": "h3"},
+        {"name": "number", "type": "number"},
+    ],
+    OUTPUT_FEATURES: [{"name": "category", "type": "category", "vocab_size": 10}],
+    TRAINER: {"epochs": 1},
+}
+
+
+def _preprocess(dataset, parallelism):
+    """Preprocesses the dataset and returns the preprocessed training set and the rows per second."""
+    config = {**copy.deepcopy(CONFIG), BACKEND: {"type": "local", "processor": {"parallelism": parallelism}}}
+    model = The FlowModel(config, logging_level=logging.WARNING)
+    start = time.perf_counter()
+    preprocessed_data = model.preprocess(dataset=dataset, skip_save_processed_input=True)
+    rows_per_sec = len(dataset) / (time.perf_counter() - start)
+    return preprocessed_data.training_set.dataset, rows_per_sec
+
+
+@pytest.mark.benchmark
+def test_preprocessing_rows_per_sec():
+    dataset = build_synthetic_dataset_df(NUM_ROWS, copy.deepcopy(CONFIG))
+
+    serial_dataset, serial_rows_per_sec = _preprocess(dataset, None)
+    logger.info(f"serial: {serial_rows_per_sec:.1f} rows/sec")
+
+    num_workers = os.cpu_count()
+    parallel_dataset, parallel_rows_per_sec = _preprocess(dataset, num_workers)
+    logger.info(f"parallel, {num_workers} workers: {parallel_rows_per_sec:.1f} rows/sec")
+
+    assert serial_dataset.keys() == parallel_dataset.keys()
+    for name, values in serial_dataset.items():
+        np.testing.assert_array_equal(values, parallel_dataset[name])
+    if num_workers >= 4:
+        assert parallel_rows_per_sec > serial_rows_per_sec
+
+
+@pytest.mark.benchmark
+def test_tensor_column_memory_and_stacking_time():
+    matrix = np.random.default_rng(0).integers(0, 1000, size=(NUM_ROWS, 32), dtype=np.int16)
+    # Processed columns of vectors used to hold one array per row
+    object_df = pd.DataFrame({"text": pd.Series([row.copy() for row in matrix], dtype=object)})
+    tensor_df = pd.DataFrame({"text": to_tensor_series(matrix)})
+
+    object_bytes = object_df["text"].memory_usage(deep=True)
+    tensor_bytes = tensor_df["text"].memory_usage(deep=True)
+    logger.info(f"object column: {object_bytes / 1e6:.1f} MB, tensor column: {tensor_bytes / 1e6:.1f} MB")
+
+    start = time.perf_counter()
+    object_dataset = to_numpy_dataset(object_df)
+    object_time = time.perf_counter() - start
+    start = time.perf_counter()
+    tensor_dataset = to_numpy_dataset(tensor_df)
+    tensor_time = time.perf_counter() - start
+    logger.info(f"to_numpy_dataset: object column {object_time:.4f}s, tensor column {tensor_time:.4f}s")
+
+    np.testing.assert_array_equal(object_dataset["text"], tensor_dataset["text"])
+    assert tensor_bytes < object_bytes
+    assert tensor_time < object_time
+
+
+@pytest.mark.benchmark
+def test_date_encoding_rows_per_sec():
+    dates = pd.Series(pd.date_range("2000-01-01", periods=NUM_ROWS, freq="17min").strftime("%Y-%m-%d %H:%M:%S"))
+    preprocessing_parameters = {"fill_value": "", "datetime_format": None}
+
+    start = time.perf_counter()
+    row_dates = np.array([DateFeatureMixin.date_to_list(d, None, preprocessing_parameters) for d in dates])
+    row_rows_per_sec = NUM_ROWS / (time.perf_counter() - start)
+    start = time.perf_counter()
+    column_dates = DateFeatureMixin.dates_to_matrix(dates, None, preprocessing_parameters, LOCAL_BACKEND)
+    column_rows_per_sec = NUM_ROWS / (time.perf_counter() - start)
+    logger.info(f"dates per row: {row_rows_per_sec:.1f} rows/sec, columnwise: {column_rows_per_sec:.1f} rows/sec")
+
+    np.testing.assert_array_equal(column_dates, row_dates.astype(np.int16))
+    assert column_rows_per_sec > row_rows_per_sec
+
+
+@pytest.mark.benchmark
+def test_h3_encoding_rows_per_sec():
+    input_df = pd.DataFrame({"h3": np.random.default_rng(0).integers(0, 2**63 - 1, size=NUM_ROWS)})
+
+    start = time.perf_counter()
+    row_cells = np.array([H3FeatureMixin.h3_to_list(v) for v in input_df["h3"].map(int)], dtype=np.uint8)
+    row_rows_per_sec = NUM_ROWS / (time.perf_counter() - start)
+    proc_df = {}
+    start = time.perf_counter()
+    H3FeatureMixin.add_feature_data({COLUMN: "h3", PROC_COLUMN: "h3"}, input_df, proc_df, {}, {}, LOCAL_BACKEND, True)
+    column_rows_per_sec = NUM_ROWS / (time.perf_counter() - start)
+    logger.info(f"H3 per row: {row_rows_per_sec:.1f} rows/sec, columnwise: {column_rows_per_sec:.1f} rows/sec")
+
+    np.testing.assert_array_equal(proc_df["h3"].array.tensor, row_cells)
+    assert column_rows_per_sec > row_rows_per_sec
@@ -3,12 +3,14 @@ import logging
 import os
 import tempfile
 from typing import Dict, List
+from unittest import mock
 
 import pytest
 import torch
 
 from theflow.api import The FlowModel
 from theflow.constants import IMAGENET1K
+from theflow.data.batcher.random_access import RandomAccessBatcher
 from theflow.data.dataset_synthesizer import cli_synthesize_dataset
 from theflow.error import ConfigValidationError
 from theflow.features.image_feature import ImageAugmentation
@@ -340,3 +342,55 @@ def test_load_model_with_augmentation_pipeline(
     with tempfile.TemporaryDirectory() as tmp_dir:
         model.save(tmp_dir)
         The FlowModel.load(tmp_dir)
+
+
+# tests that seeded runs with augmentation train on the same batches with the default prefetch depth
+def test_seeded_training_with_augmentation_pipeline_is_reproducible(train_data_rgb):
+    train_fp, input_features, output_features = train_data_rgb
+    test_input_features = copy.deepcopy(input_features)
+    test_input_features[0].update(
+        {
+            "encoder": {"type": "stacked_cnn"},
+            "preprocessing": {"width": 32, "height": 32},
+            "augmentation": [{"type": "random_horizontal_flip"}, {"type": "random_rotate", "degree": 45}],
+        }
+    )
+    config = {
+        "input_features": test_input_features,
+        "output_features": output_features,
+        # Dropout draws from the global torch random generator during the training step
+        "combiner": {"type": "concat", "dropout": 0.5},
+        "trainer": {"epochs": 2, "batch_size": 4},
+    }
+    assert The FlowModel(config).config_obj.trainer.prefetch_depth == 0
+
+    def train():
+        batches = []
+        next_batch = RandomAccessBatcher.next_batch
+
+        def recording_next_batch(self):
+            batch = next_batch(self)
+            batches.append({name: torch.as_tensor(values).clone() for name, values in batch.items()})
+            return batch
+
+        with mock.patch.object(RandomAccessBatcher, "next_batch", recording_next_batch):
+            model = The FlowModel(copy.deepcopy(config), logging_level=logging.WARNING)
+            with tempfile.TemporaryDirectory() as tmpdir:
+                model.train(
+                    dataset=train_fp,
+                    skip_save_processed_input=True,
+                    skip_save_model=True,
+                    output_directory=os.path.join(tmpdir, "output"),
+                    random_seed=1919,
+                )
+        return batches, model.model.state_dict()
+
+    batches, state_dict = train()
+    other_batches, other_state_dict = train()
+
+    assert len(batches) == len(other_batches) > 0
+    for batch, other_batch in zip(batches, other_batches):
+        for name, values in batch.items():
+            assert torch.equal(values, other_batch[name])
+    for name, value in state_dict.items():
+        assert torch.equal(value, other_state_dict[name])
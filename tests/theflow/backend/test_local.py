@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from theflow.backend import LocalBackend
+
+
+def _create_transform_fn(num_calls):
+    class TransformFn:
+        def __call__(self, df: pd.DataFrame) -> pd.DataFrame:
+            num_calls.append(len(df))
+            df["vector"] = [np.full(3, x, dtype=np.float32) for x in df["x"]]
+            df["y"] = df["x"] * 2
+            return df
+
+    return TransformFn
+
+
+@pytest.mark.parametrize("max_in_flight_batches", [1, 2, 8])
+@pytest.mark.parametrize("batch_size", [1, 7, 100, 1000])
+def test_batch_transform(batch_size, max_in_flight_batches):
+    df = pd.DataFrame({"x": np.arange(100), "s": [str(i) for i in range(100)]}, index=np.arange(100)[::-1])
+
+    num_calls = []
+    out_df = LocalBackend.batch_transform(
+        df, batch_size, _create_transform_fn(num_calls), max_in_flight_batches=max_in_flight_batches
+    )
+
+    assert num_calls == [len(batch) for batch in np.array_split(np.arange(100), range(batch_size, 100, batch_size))]
+    assert list(out_df.columns) == ["x", "s", "vector", "y"]
+    pd.testing.assert_index_equal(out_df.index, pd.RangeIndex(100))
+    np.testing.assert_array_equal(out_df["x"], np.arange(100))
+    np.testing.assert_array_equal(out_df["s"], [str(i) for i in range(100)])
+    np.testing.assert_array_equal(
+        np.stack(out_df["vector"]), np.repeat(np.arange(100, dtype=np.float32), 3).reshape(-1, 3)
+    )
+    np.testing.assert_array_equal(out_df["y"], np.arange(100) * 2)
+    assert out_df["y"].dtype == np.int64
+
+
+def test_batch_transform_promotes_dtypes():
+    class TransformFn:
+        def __call__(self, df: pd.DataFrame) -> pd.DataFrame:
+            # Missing values in the second batch only
+            return pd.DataFrame({"y": df["x"].where(df["x"] != 3)})
+
+    df = pd.DataFrame({"x": np.arange(4)})
+    out_df = LocalBackend.batch_transform(df, 2, TransformFn)
+
+    pd.testing.assert_frame_equal(out_df, pd.DataFrame({"y": [0.0, 1.0, 2.0, np.nan]}))
@@ -13,10 +13,10 @@ from typing import Any, Dict, List, Optional
 import pytest
 import yaml
 
+from tests.integration_tests.utils import binary_feature, text_feature
 from theflow.constants import COMBINER, TYPE
 from theflow.error import ConfigValidationError
 from theflow.schema.model_types.base import ModelConfig
-from tests.integration_tests.utils import binary_feature, text_feature
 
 
 def test_passthrough_number_decoder():
@@ -546,3 +546,24 @@ def test_check_llm_text_encoder_is_not_used_with_ecd():
         ModelConfig.from_dict(config)
 
     assert str(excinfo.value) == "Please use the `model_type: llm` for text-to-text models."
+
+
+@pytest.mark.parametrize(
+    "bucketing_field,valid",
+    [
+        pytest.param("text_in", True, id="text"),
+        pytest.param("binary_in", False, id="not_sequence"),
+        pytest.param("binary_out", False, id="output_feature"),
+        pytest.param("missing", False, id="missing"),
+    ],
+)
+def test_check_bucketing_field(bucketing_field: str, valid: bool):
+    config = {
+        "input_features": [text_feature(name="text_in"), binary_feature(name="binary_in")],
+        "output_features": [binary_feature(name="binary_out")],
+        "trainer": {"bucketing_field": bucketing_field},
+    }
+
+    expectation = contextlib.nullcontext() if valid else pytest.raises(ConfigValidationError)
+    with expectation:
+        ModelConfig.from_dict(config)
@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+from theflow.backend import initialize_backend
+from theflow.data.dataframe.pandas import PANDAS, PandasEngine
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {"a": rng.integers(0, 100, size=1000), "b": [f"token_{i}" for i in range(1000)]},
+        index=rng.permutation(1000),
+    )
+
+
+@pytest.mark.parametrize("parallelism", [None, 1, 2, 3])
+def test_parallel_map_matches_serial(df, parallelism):
+    engine = PandasEngine(parallelism=parallelism, min_rows_per_worker=10)
+
+    pd.testing.assert_series_equal(
+        engine.map_objects(df["b"], lambda x: x.split("_")), df["b"].map(lambda x: x.split("_"))
+    )
+    pd.testing.assert_series_equal(
+        engine.apply_objects(df, lambda row: f"{row['b']}:{row['a']}"),
+        df.apply(lambda row: f"{row['b']}:{row['a']}", axis=1),
+    )
+    pd.testing.assert_series_equal(engine.map_partitions(df["a"], lambda series: series * 2), df["a"] * 2)
+
+
+def _map_chunk_info(min_rows_per_worker):
+    """Returns the pid of the process mapping the chunk of every row of a series of 100 rows, and the chunk's size."""
+    series = pd.Series(range(100))
+    chunk_info = PandasEngine(parallelism=4, min_rows_per_worker=min_rows_per_worker).map_partitions(
+        series, lambda chunk: pd.Series([(os.getpid(), len(chunk))] * len(chunk), index=chunk.index)
+    )
+    pids, chunk_sizes = zip(*chunk_info)
+    return set(pids), list(chunk_sizes)
+
+
+def test_parallel_map_workers():
+    # Worker processes may map several chunks each, so only the chunks are checked, not which worker mapped them
+    pids, chunk_sizes = _map_chunk_info(min_rows_per_worker=10)
+    assert chunk_sizes == [25] * 100
+    assert os.getpid() not in pids
+
+    # Inputs with less than min_rows_per_worker rows per worker are mapped with fewer workers, or serially
+    pids, chunk_sizes = _map_chunk_info(min_rows_per_worker=50)
+    assert chunk_sizes == [50] * 100
+    assert os.getpid() not in pids
+    pids, chunk_sizes = _map_chunk_info(min_rows_per_worker=1000)
+    assert chunk_sizes == [100] * 100
+    assert pids == {os.getpid()}
+
+
+@pytest.mark.timeout(60)
+def test_parallel_map_after_multithreaded_torch_op(df):
+    # Starts the OpenMP thread pool of torch in the parent before the workers are forked
+    num_threads = torch.get_num_threads()
+    torch.set_num_threads(4)
+    try:
+        x = torch.rand(512, 512)
+        x @ x
+
+        def matmul_chunk(chunk):
+            y = torch.rand(len(chunk), 512)
+            return pd.Series((y @ y.T).diagonal().numpy(), index=chunk.index)
+
+        result = PandasEngine(parallelism=2, min_rows_per_worker=10).map_partitions(df["a"], matmul_chunk)
+    finally:
+        torch.set_num_threads(num_threads)
+    assert result.index.equals(df.index)
+
+
+def test_local_backend_processor():
+    assert initialize_backend("local").df_engine is PANDAS
+
+    backend = initialize_backend({"type": "local", "processor": {"type": "pandas", "parallelism": 4}})
+    assert isinstance(backend.df_engine, PandasEngine)
+    assert backend.df_engine.parallelism == 4
+
+    with pytest.raises(ValueError):
+        initialize_backend({"type": "local", "processor": {"type": "dask"}})
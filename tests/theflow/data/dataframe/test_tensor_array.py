@@ -0,0 +1,81 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from theflow.data.dataframe.tensor_array import is_tensor_series, TensorArray, TensorDtype, to_tensor_series
+from theflow.utils.dataframe_utils import from_numpy_dataset, to_numpy_dataset, to_scalar_df
+
+
+@pytest.fixture
+def values():
+    return np.arange(24, dtype=np.int16).reshape(8, 3)
+
+
+def test_tensor_series_rows(values):
+    series = to_tensor_series(values, index=np.arange(8)[::-1], name="x")
+
+    assert series.dtype == TensorDtype((3,), np.int16)
+    assert series.dtype == pd.api.types.pandas_dtype("tensor[int16][3]")
+    assert np.shares_memory(series.array.tensor, values)
+    for row, expected in zip(series, values):
+        assert isinstance(row, np.ndarray)
+        np.testing.assert_array_equal(row, expected)
+    np.testing.assert_array_equal(series.loc[0], values[-1])
+
+
+def test_tensor_series_dataframe_ops(values):
+    series = to_tensor_series(values, name="x")
+    df = pd.DataFrame({"x": series, "y": pd.Series(np.arange(6.0), index=np.arange(2, 8))})
+
+    # Rows missing from one of the columns are masked, and can be dropped
+    assert df["x"].isna().sum() == 0
+    assert df["y"].isna().sum() == 2
+    df = df.dropna().astype({"x": series.dtype})
+    assert is_tensor_series(df["x"])
+    np.testing.assert_array_equal(df["x"].array.tensor, values[2:])
+
+    sampled = df.sample(frac=1, random_state=0)
+    np.testing.assert_array_equal(sampled["x"].array.tensor, values[sampled.index])
+    concatenated = pd.concat([df.iloc[:2], df.iloc[2:]])
+    np.testing.assert_array_equal(concatenated["x"].array.tensor, values[2:])
+
+    unpickled = pickle.loads(pickle.dumps(df))
+    assert unpickled["x"].dtype == series.dtype
+    np.testing.assert_array_equal(unpickled["x"].array.tensor, values[2:])
+
+
+def test_tensor_series_parquet(tmpdir):
+    values = np.random.default_rng(0).random((5, 2, 3), dtype=np.float32)
+    df = pd.DataFrame({"x": to_tensor_series(values), "y": np.arange(5)})
+    path = str(tmpdir.join("tensor.parquet"))
+
+    df.to_parquet(path, engine="pyarrow")
+    read_df = pd.read_parquet(path)
+    assert read_df["x"].dtype == TensorDtype((2, 3), np.float32)
+    np.testing.assert_array_equal(read_df["x"].array.tensor, values)
+
+
+def test_tensor_array_from_sequence():
+    array = TensorArray._from_sequence([np.ones(2), None, np.zeros(2)], dtype="tensor[float32][2]")
+
+    np.testing.assert_array_equal(array.isna(), [False, True, False])
+    np.testing.assert_array_equal(array[0], np.ones(2, dtype=np.float32))
+    assert pd.isna(array[1])
+    with pytest.raises(ValueError):
+        array.tensor
+
+
+def test_numpy_dataset_round_trip(values):
+    dataset = {"x": values, "y": np.arange(8)}
+
+    df = from_numpy_dataset(dataset)
+    assert is_tensor_series(df["x"])
+    numpy_dataset = to_numpy_dataset(df)
+    assert np.shares_memory(numpy_dataset["x"], df["x"].array.tensor)
+    np.testing.assert_array_equal(numpy_dataset["x"], values)
+    np.testing.assert_array_equal(numpy_dataset["y"], dataset["y"])
+
+    expected_df = to_scalar_df(pd.DataFrame({"x": list(values), "y": dataset["y"]}))
+    pd.testing.assert_frame_equal(to_scalar_df(df), expected_df)
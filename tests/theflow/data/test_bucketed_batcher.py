@@ -0,0 +1,105 @@
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from theflow.constants import NAME, PREPROCESSING, TEXT, TYPE
+from theflow.data.batcher.bucketed import BucketedBatcher, get_padding_idx, get_sequence_lengths
+from theflow.data.dataset.pandas import PandasDataset
+from theflow.utils.strings_utils import SpecialSymbol
+
+NUM_ROWS = 100
+MAX_LENGTH = 20
+PAD = SpecialSymbol.PADDING.value
+
+
+def _make_dataset(padding="right", pad=PAD, training_set_metadata=None):
+    lengths = np.random.RandomState(0).randint(1, MAX_LENGTH + 1, size=NUM_ROWS)
+    tokens = np.full((NUM_ROWS, MAX_LENGTH), pad, dtype=np.int32)
+    for i, length in enumerate(lengths):
+        if padding == "right":
+            tokens[i, :length] = 10 + i
+        else:
+            tokens[i, MAX_LENGTH - length :] = 10 + i
+    df = pd.DataFrame({"text_proc": list(tokens), "row_proc": np.arange(NUM_ROWS)})
+    features = {
+        "text_proc": {NAME: "text", TYPE: TEXT, PREPROCESSING: {"padding": padding}},
+        "row_proc": {NAME: "row", TYPE: "number", PREPROCESSING: {}},
+    }
+    return PandasDataset(df, features, None, training_set_metadata), lengths
+
+
+def _consume(batcher):
+    batches = []
+    while not batcher.last_batch():
+        batches.append(batcher.next_batch())
+    return batches
+
+
+def test_get_sequence_lengths():
+    dataset, lengths = _make_dataset()
+    np.testing.assert_array_equal(get_sequence_lengths(dataset.get("text_proc")), lengths)
+
+
+@pytest.mark.parametrize(
+    "feature_metadata,pad",
+    [
+        ({}, PAD),
+        # Pad token id of a pretrained tokenizer.
+        ({"pad_idx": 1}, 1),
+        # Vocabulary of a sequence feature.
+        ({"str2idx": {"<UNK>": 0, "<PAD>": 3}, PREPROCESSING: {"padding_symbol": "<PAD>"}}, 3),
+    ],
+)
+def test_get_sequence_lengths_padding_idx(feature_metadata, pad):
+    dataset, lengths = _make_dataset(pad=pad, training_set_metadata={"text": feature_metadata})
+    assert get_padding_idx(feature_metadata) == pad
+    np.testing.assert_array_equal(dataset.get_sequence_lengths("text_proc"), lengths)
+
+
+@pytest.mark.parametrize("padding", ["right", "left"])
+def test_bucketed_batcher(padding):
+    dataset, lengths = _make_dataset(padding)
+    with dataset.initialize_batcher(batch_size=8, bucketing_field="text", bucketing_trim=True) as batcher:
+        assert isinstance(batcher, BucketedBatcher)
+        for epoch in range(2):
+            batcher.set_epoch(epoch, 8)
+            batches = _consume(batcher)
+            assert len(batches) == batcher.steps_per_epoch
+
+            rows = np.concatenate([batch["row_proc"] for batch in batches])
+            assert sorted(rows) == list(range(NUM_ROWS))
+
+            for batch in batches:
+                batch_lengths = lengths[batch["row_proc"]]
+                # 10 buckets of 10 samples over 20 lengths: each batch only spans a few lengths.
+                assert batch_lengths.max() - batch_lengths.min() <= 6
+                # Trimmed to the longest sequence, without dropping any token.
+                assert batch["text_proc"].shape == (len(batch["row_proc"]), batch_lengths.max())
+                np.testing.assert_array_equal(get_sequence_lengths(batch["text_proc"]), batch_lengths)
+
+
+def test_bucketed_batcher_distributed():
+    dataset, _ = _make_dataset()
+    rows_by_rank = []
+    steps_by_rank = []
+    for rank in range(3):
+        distributed = mock.Mock(size=mock.Mock(return_value=3), rank=mock.Mock(return_value=rank))
+        with dataset.initialize_batcher(batch_size=4, distributed=distributed, bucketing_field="text") as batcher:
+            batches = _consume(batcher)
+            rows_by_rank.append(np.concatenate([batch["row_proc"] for batch in batches]))
+            steps_by_rank.append(batcher.steps_per_epoch)
+            # Without trimming, batches keep their full length.
+            assert all(batch["text_proc"].shape[1] == MAX_LENGTH for batch in batches)
+
+    # Every rank runs the same number of steps over its own shard of the dataset.
+    assert len(set(steps_by_rank)) == 1
+    assert set(np.concatenate(rows_by_rank)) == set(range(NUM_ROWS))
+
+
+def test_bucketed_batcher_invalid_field():
+    dataset, _ = _make_dataset()
+    with pytest.raises(ValueError):
+        with dataset.initialize_batcher(bucketing_field="row"):
+            pass
@@ -3,10 +3,11 @@ import uuid
 from typing import List
 from unittest import mock
 
+import pandas as pd
 import pytest
 
 from theflow.constants import INPUT_FEATURES, OUTPUT_FEATURES
-from theflow.data.cache.util import calculate_checksum
+from theflow.data.cache.util import calculate_checksum, calculate_column_checksum
 from theflow.schema.model_types.base import ModelConfig
 from theflow.types import FeatureConfigDict, ModelConfigDict
 from theflow.utils.misc_utils import merge_dict
@@ -111,6 +112,29 @@ def test_proc_col_checksum_consistency_same_preprocessing_different_types():
     assert config.input_features[0].proc_column != config.input_features[1].proc_column
 
 
+def test_calculate_column_checksum():
+    config = ModelConfig.from_dict(
+        {
+            "input_features": [
+                {"name": "num1", "type": "number"},
+                {"name": "num2", "type": "number", "preprocessing": {"normalization": "zscore"}},
+            ],
+            "output_features": [{"name": "bin1", "type": "binary"}],
+        }
+    ).to_dict()
+    num1, num2 = config[INPUT_FEATURES]
+    column = pd.Series([1.0, 2.0, 3.0])
+
+    checksum = calculate_column_checksum(column, num1, config, False)
+    assert checksum == calculate_column_checksum(column.copy(), num1, config, False)
+    # Changes to the column, to the feature preprocessing or to how the data is saved invalidate the checksum.
+    assert checksum != calculate_column_checksum(pd.Series([1.0, 2.0, 4.0]), num1, config, False)
+    assert checksum != calculate_column_checksum(column, num2, config, False)
+    assert checksum != calculate_column_checksum(column, num1, config, True)
+    # Columns holding unhashable values are not cached.
+    assert calculate_column_checksum(pd.Series([[1], [2]]), num1, config, False) is None
+
+
 @pytest.mark.distributed
 def test_checksum_determinism(ray_cluster_2cpu):
     """Tests that checksums are deterministic across different processes (no unordered hash maps)."""
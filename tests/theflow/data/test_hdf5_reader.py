@@ -0,0 +1,85 @@
+import os
+import pickle
+
+import h5py
+import numpy as np
+import pytest
+
+from theflow.data.hdf5_reader import get_contiguous_ranges, HDF5Reader
+
+NUM_ROWS = 100
+ROW_SHAPE = (3, 4, 5)
+
+
+@pytest.fixture
+def h5_path(tmpdir):
+    path = os.path.join(tmpdir, "data.hdf5")
+    data = np.arange(NUM_ROWS * np.prod(ROW_SHAPE), dtype=np.float32).reshape((NUM_ROWS,) + ROW_SHAPE)
+    with h5py.File(path, "w") as f:
+        f.create_dataset("contiguous", data=data)
+        f.create_dataset("chunked", data=data, chunks=(8,) + ROW_SHAPE, compression="gzip")
+    return path
+
+
+@pytest.fixture
+def expected():
+    return np.arange(NUM_ROWS * np.prod(ROW_SHAPE), dtype=np.float32).reshape((NUM_ROWS,) + ROW_SHAPE)
+
+
+def test_get_contiguous_ranges():
+    assert get_contiguous_ranges(np.array([], dtype=np.int64)).shape == (0, 2)
+    np.testing.assert_array_equal(
+        get_contiguous_ranges(np.array([0, 1, 2, 5, 7, 8])),
+        np.array([[0, 3], [5, 6], [7, 9]]),
+    )
+
+
+@pytest.mark.parametrize("name", ["contiguous", "chunked"])
+@pytest.mark.parametrize("cache_size_bytes", [0, 1024, 1 << 20])
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_hdf5_reader_read(h5_path, expected, name, cache_size_bytes, use_mmap):
+    reader = HDF5Reader(h5_path)
+    rng = np.random.default_rng(42)
+    for _ in range(5):
+        # Unsorted indices with duplicates must be returned in request order.
+        indices = rng.integers(0, NUM_ROWS, size=32)
+        np.testing.assert_array_equal(
+            reader.read(name, indices, cache_size_bytes=cache_size_bytes, use_mmap=use_mmap), expected[indices]
+        )
+    reader.close()
+
+
+def test_hdf5_reader_cache_is_bounded(h5_path, expected):
+    reader = HDF5Reader(h5_path)
+    block_bytes = 8 * expected[0].nbytes
+    indices = np.arange(NUM_ROWS)
+    np.testing.assert_array_equal(reader.read("chunked", indices, cache_size_bytes=2 * block_bytes), expected[indices])
+
+    cache = reader._caches["chunked"]
+    assert cache.block_rows == 8
+    assert cache.size_bytes <= 2 * block_bytes
+
+    # The last blocks read are still cached.
+    misses = cache.misses
+    reader.read("chunked", np.array([NUM_ROWS - 1]), cache_size_bytes=2 * block_bytes)
+    assert cache.misses == misses
+    assert cache.hits == 1
+
+
+def test_hdf5_reader_keeps_file_open(h5_path):
+    reader = HDF5Reader(h5_path)
+    reader.read("contiguous", np.array([0]))
+    h5_file = reader._file
+    reader.read("contiguous", np.array([1]))
+    assert reader._file is h5_file
+    reader.close()
+    assert reader._file is None
+
+
+def test_hdf5_reader_pickle(h5_path, expected):
+    reader = HDF5Reader(h5_path)
+    reader.read("contiguous", np.array([0]))
+
+    unpickled = pickle.loads(pickle.dumps(reader))
+    assert unpickled._file is None
+    np.testing.assert_array_equal(unpickled.read("contiguous", np.array([3, 1])), expected[[3, 1]])
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+import torch
+
+from theflow.data.batcher.base import Batcher
+from theflow.data.batcher.prefetch import batch_array_to_tensor, PrefetchBatcher
+
+NUM_ROWS = 10
+
+
+class ArrayBatcher(Batcher):
+    """Serves consecutive batches of rows of in-memory arrays."""
+
+    def __init__(self, data, batch_size, fail_at_step=None):
+        self.data = data
+        self.batch_size = batch_size
+        self.fail_at_step = fail_at_step
+        self.steps_per_epoch = -(-NUM_ROWS // batch_size)
+        self.index = 0
+
+    def next_batch(self):
+        if self.fail_at_step is not None and self.index // self.batch_size == self.fail_at_step:
+            raise ValueError("bad batch")
+        idx = np.arange(self.index, min(self.index + self.batch_size, NUM_ROWS))
+        self.index += len(idx)
+        return {name: values[idx] for name, values in self.data.items()}
+
+    def last_batch(self):
+        return self.index >= NUM_ROWS
+
+    def set_epoch(self, epoch, batch_size):
+        self.index = 0
+        self.batch_size = batch_size
+
+
+@pytest.fixture
+def data():
+    return {
+        "x": np.arange(NUM_ROWS * 2, dtype=np.float32).reshape(NUM_ROWS, 2),
+        "y": np.arange(NUM_ROWS, dtype=np.int64),
+        "meta": np.array([str(i) for i in range(NUM_ROWS)], dtype=object),
+    }
+
+
+def _consume(batcher):
+    batches = []
+    while not batcher.last_batch():
+        batches.append(batcher.next_batch())
+    return batches
+
+
+@pytest.mark.parametrize("prefetch_depth", [0, 1, 3])
+def test_prefetch_batcher(data, prefetch_depth):
+    with PrefetchBatcher(ArrayBatcher(data, batch_size=4), prefetch_depth, ["x", "y"], "cpu") as batcher:
+        assert batcher.steps_per_epoch == 3
+        for epoch in range(2):
+            batcher.set_epoch(epoch, 4)
+            batches = _consume(batcher)
+            assert len(batches) == 3
+            assert batcher.last_batch()
+
+            torch.testing.assert_close(torch.cat([batch["x"] for batch in batches]), torch.from_numpy(data["x"]))
+            torch.testing.assert_close(torch.cat([batch["y"] for batch in batches]), torch.from_numpy(data["y"]))
+            # Columns that are not requested are returned unchanged.
+            assert list(np.concatenate([batch["meta"] for batch in batches])) == list(data["meta"])
+
+        with pytest.raises(StopIteration):
+            batcher.next_batch()
+
+
+@pytest.mark.parametrize("prefetch_depth", [0, 2])
+def test_prefetch_batcher_host_fn(data, prefetch_depth):
+    def host_fn(batch):
+        # Called before the columns are moved to the device.
+        assert isinstance(batch["y"], np.ndarray)
+        return {"y_sum": int(batch["y"].sum())}
+
+    with PrefetchBatcher(ArrayBatcher(data, batch_size=4), prefetch_depth, ["y"], "cpu", host_fn=host_fn) as batcher:
+        batches = _consume(batcher)
+    assert [batch["y_sum"] for batch in batches] == [int(batch["y"].sum()) for batch in batches] == [6, 22, 17]
+
+
+def test_prefetch_batcher_close_mid_epoch(data):
+    batcher = PrefetchBatcher(ArrayBatcher(data, batch_size=1), 2, ["x"], "cpu")
+    batcher.next_batch()
+    batcher.close()
+    assert batcher._thread is None
+
+    # The epoch restarts from the first row.
+    batcher.set_epoch(1, 5)
+    batches = _consume(batcher)
+    assert [len(batch["x"]) for batch in batches] == [5, 5]
+    batcher.close()
+
+
+@pytest.mark.parametrize("prefetch_depth", [0, 2])
+def test_prefetch_batcher_propagates_errors(data, prefetch_depth):
+    with PrefetchBatcher(ArrayBatcher(data, batch_size=4, fail_at_step=1), prefetch_depth, ["x"], "cpu") as batcher:
+        batcher.next_batch()
+        with pytest.raises(ValueError, match="bad batch"):
+            batcher.next_batch()
+
+
+def test_batch_array_to_tensor():
+    fresh = np.arange(6, dtype=np.float32)
+    tensor = batch_array_to_tensor(fresh, "cpu")
+    # Freshly allocated arrays are wrapped without copying.
+    assert tensor.data_ptr() == fresh.ctypes.data
+
+    dataset = np.arange(12, dtype=np.float32).reshape(3, 4)
+    for view in [dataset[1:], dataset[:, ::2]]:
+        tensor = batch_array_to_tensor(view, "cpu")
+        tensor += 1
+        torch.testing.assert_close(tensor, torch.from_numpy(view + 1))
+    # Views are copied, so the dataset is left untouched.
+    np.testing.assert_array_equal(dataset, np.arange(12, dtype=np.float32).reshape(3, 4))
+
+    read_only = np.arange(3)
+    read_only.flags.writeable = False
+    assert batch_array_to_tensor(read_only, "cpu").data_ptr() != read_only.ctypes.data
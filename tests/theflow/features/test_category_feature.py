@@ -1,14 +1,19 @@
 from copy import deepcopy
 from typing import Dict
 
+import numpy as np
+import pandas as pd
 import pytest
 import torch
 
+from theflow.backend import LOCAL_BACKEND
 from theflow.constants import ENCODER, ENCODER_OUTPUT, TYPE
-from theflow.features.category_feature import CategoryInputFeature
-from theflow.schema.features.category_feature import ECDCategoryInputFeatureConfig
+from theflow.features.category_feature import CategoryFeatureMixin, CategoryInputFeature, CategoryOutputFeature
+from theflow.schema.features.category_feature import ECDCategoryInputFeatureConfig, ECDCategoryOutputFeatureConfig
 from theflow.schema.utils import load_config_with_kwargs
+from theflow.utils.dataframe_utils import from_numpy_dataset
 from theflow.utils.misc_utils import merge_dict
+from theflow.utils.strings_utils import UNKNOWN_SYMBOL
 from theflow.utils.torch_utils import get_torch_device
 
 BATCH_SIZE = 2
@@ -55,3 +60,58 @@ def test_category_input_feature(
 
     encoder_output = input_feature_obj(input_tensor)
     assert encoder_output[ENCODER_OUTPUT].shape == (BATCH_SIZE, *input_feature_obj.output_shape)
+
+
+@pytest.mark.parametrize("with_unknown_symbol", [True, False])
+def test_category_feature_data(with_unknown_symbol: bool):
+    idx2str = [UNKNOWN_SYMBOL, "a", "b", "c"] if with_unknown_symbol else ["a", "b", "c"]
+    metadata = {
+        "idx2str": idx2str,
+        "str2idx": {s: i for i, s in enumerate(idx2str)},
+        "str2freq": {s: i for i, s in enumerate(idx2str)},
+        "vocab_size": len(idx2str),
+    }
+    column = pd.Series([" a", "b ", "c", "d", "a"], index=[4, 3, 2, 1, 0], name="category")
+
+    indices = CategoryFeatureMixin.feature_data(LOCAL_BACKEND, column, metadata)
+
+    # Unknown symbols map to the unknown symbol if any, or else to the most frequent symbol
+    fallback_idx = metadata["str2idx"][UNKNOWN_SYMBOL if with_unknown_symbol else "c"]
+    expected = [metadata["str2idx"][s] for s in ["a", "b", "c"]] + [fallback_idx, metadata["str2idx"]["a"]]
+    assert indices.dtype == np.int8
+    assert indices.index.equals(column.index)
+    np.testing.assert_array_equal(indices.to_numpy(), expected)
+
+
+@pytest.mark.parametrize("per_class_probabilities", [True, False])
+def test_category_postprocess_predictions(per_class_probabilities: bool):
+    idx2str = ["a", "b", "c", "d"]
+    output_config, _ = load_config_with_kwargs(
+        ECDCategoryOutputFeatureConfig,
+        {
+            "name": "category",
+            "type": "category",
+            "input_size": 8,
+            "num_classes": len(idx2str),
+            "top_k": 2,
+            "per_class_probabilities": per_class_probabilities,
+        },
+    )
+    output_feature = CategoryOutputFeature(output_config, {})
+    probabilities = np.array([[0.1, 0.2, 0.3, 0.4], [0.5, 0.1, 0.3, 0.1]], dtype=np.float32)
+    predictions = from_numpy_dataset(
+        {"category_predictions": probabilities.argmax(axis=1), "category_probabilities": probabilities}
+    )
+
+    predictions = output_feature.postprocess_predictions(predictions, {"idx2str": idx2str})
+
+    assert predictions["category_predictions"].tolist() == ["d", "a"]
+    np.testing.assert_array_equal(predictions["category_probability"], probabilities.max(axis=1))
+    assert predictions["category_probabilities"].tolist() == probabilities.tolist()
+    per_class_cols = [f"category_probabilities_{label}" for label in idx2str]
+    if per_class_probabilities:
+        np.testing.assert_array_equal(predictions[per_class_cols].to_numpy(), probabilities.astype(np.float64))
+        assert "category_predictions_top_k" not in predictions
+    else:
+        assert not set(per_class_cols) & set(predictions.columns)
+        assert predictions["category_predictions_top_k"].tolist() == [["d", "c"], ["a", "c"]]
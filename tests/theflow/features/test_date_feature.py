@@ -2,10 +2,13 @@ from copy import deepcopy
 from datetime import date, datetime
 from typing import Any, List
 
+import numpy as np
+import pandas as pd
 import pytest
 import torch
 from dateutil.parser import parse
 
+from theflow.backend import LOCAL_BACKEND
 from theflow.constants import ENCODER_OUTPUT, FILL_WITH_CONST, MISSING_VALUE_STRATEGY
 from theflow.features import date_feature
 from theflow.features.date_feature import DateInputFeature
@@ -180,3 +183,32 @@ def test_date_object_to_list(date_obj, date_obj_vec, fill_value):
         date_obj, None, preprocessing_parameters={MISSING_VALUE_STRATEGY: FILL_WITH_CONST, "fill_value": fill_value}
     )
     assert computed_date_vec == date_obj_vec
+
+
+@pytest.mark.parametrize("datetime_format", [None, "%Y-%m-%d %H:%M:%S"])
+@pytest.mark.parametrize(
+    "values",
+    [
+        pytest.param(["2022-06-25 09:30:59", "1999-12-31 23:59:59", "2022-06-25", "2012abc-02"], id="strings"),
+        pytest.param(["2012-02-26T13:51:50.417-07:00", "2012-02-26T13:51:50.417-05:00"], id="time zones"),
+        pytest.param(["01/02/2020", "12/31/1999"], id="month first"),
+        pytest.param(["13/05/2020", "01/02/2020"], id="day first"),
+        pytest.param(["5 Jan 2021", "6 Feb 2022 10:00", "1600-01-01 00:00:00"], id="month names"),
+        pytest.param([datetime(2022, 6, 25, 9, 30, 59), date(2021, 3, 4)], id="objects"),
+        pytest.param(pd.to_datetime(["2022-06-25 09:30:59", "2021-03-04 00:00:00"]), id="datetime64"),
+        pytest.param([1691600953, 1691600953443], id="timestamps"),
+    ],
+)
+def test_dates_to_matrix(values, datetime_format, fill_value):
+    """Test that dates encoded columnwise are the same as dates encoded one by one."""
+    preprocessing_parameters = {MISSING_VALUE_STRATEGY: FILL_WITH_CONST, "fill_value": fill_value}
+    column = pd.Series(values, index=np.arange(len(values)) * 2)
+
+    dates = date_feature.DateInputFeature.dates_to_matrix(
+        column, datetime_format, preprocessing_parameters, LOCAL_BACKEND
+    )
+
+    expected = [
+        date_feature.DateInputFeature.date_to_list(v, datetime_format, preprocessing_parameters) for v in column
+    ]
+    np.testing.assert_array_equal(dates, np.array(expected).astype(np.int16))
@@ -1,3 +1,10 @@
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+from theflow.backend import LOCAL_BACKEND
+from theflow.constants import COLUMN, PROC_COLUMN
 from theflow.features import h3_feature
 
 
@@ -66,3 +73,32 @@ def test_h3_to_list():
         7,
         7,
     ]
+
+
+@pytest.fixture(scope="module")
+def h3_values():
+    rng = np.random.default_rng(0)
+    return np.concatenate([[0, 576495936675512319, 622236723497533439], rng.integers(0, 2**63 - 1, size=100)])
+
+
+@pytest.mark.parametrize("dtype", [np.int64, object])
+def test_h3_add_feature_data(h3_values, dtype):
+    input_df = pd.DataFrame({"h3": pd.Series(h3_values, dtype=dtype)})
+    proc_df = {}
+
+    h3_feature.H3FeatureMixin.add_feature_data(
+        {COLUMN: "h3", PROC_COLUMN: "h3_proc"}, input_df, proc_df, {}, {}, LOCAL_BACKEND, True
+    )
+
+    expected = [h3_feature.H3FeatureMixin.h3_to_list(int(v)) for v in h3_values]
+    np.testing.assert_array_equal(proc_df["h3_proc"].array.tensor, np.array(expected, dtype=np.uint8))
+
+
+def test_h3_preprocessing_module(h3_values):
+    module = torch.jit.script(h3_feature._H3Preprocessing({"preprocessing": {"computed_fill_value": 0}}))
+
+    outputs = module(torch.from_numpy(h3_values))
+
+    expected = [h3_feature.H3FeatureMixin.h3_to_list(int(v)) for v in h3_values]
+    assert outputs.dtype == torch.uint8
+    np.testing.assert_array_equal(outputs.numpy(), np.array(expected, dtype=np.uint8))
@@ -1,9 +1,14 @@
+import os
 from copy import deepcopy
+from functools import partial
 from typing import Dict
 
+import h5py
+import numpy as np
 import pytest
 import torch
 
+from tests.integration_tests.utils import image_feature
 from theflow.constants import (
     BFILL,
     CROP_OR_PAD,
@@ -14,12 +19,12 @@ from theflow.constants import (
     LOGITS,
     TYPE,
 )
-from theflow.features.image_feature import _ImagePreprocessing, ImageInputFeature, ImageOutputFeature
+from theflow.features.image_feature import _ImagePreprocessing, ImageFeatureMixin, ImageInputFeature, ImageOutputFeature
 from theflow.schema.features.image_feature import ImageInputFeatureConfig, ImageOutputFeatureConfig
 from theflow.schema.utils import load_config_with_kwargs
+from theflow.utils.image_utils import get_gray_default_image
 from theflow.utils.misc_utils import merge_dict
 from theflow.utils.torch_utils import get_torch_device
-from tests.integration_tests.utils import image_feature
 
 BATCH_SIZE = 2
 DEVICE = get_torch_device()
@@ -313,3 +318,43 @@ def test_image_preproc_module_class_map(height, width):
 
     assert res.shape == torch.Size((2, height, width))
     assert torch.all(res.ge(0)) and torch.all(res.le(7))
+
+
+@pytest.mark.parametrize("chunk_rows", [None, 4])
+@pytest.mark.parametrize("num_processes", [1, 2])
+def test_write_images_to_hdf5(tmpdir, num_processes, chunk_rows):
+    num_images, num_channels, height, width = 10, 3, 8, 6
+    images = [np.full((height, width, num_channels), i, dtype=np.uint8) for i in range(num_images)]
+    # Entries that cannot be read are replaced with the default image and counted as failures.
+    images[3] = None
+    images[7] = None
+
+    read_image_fn = partial(
+        ImageFeatureMixin._read_image_if_bytes_obj_and_resize,
+        img_width=width,
+        img_height=height,
+        should_resize=False,
+        num_channels=num_channels,
+        resize_method=INTERPOLATE,
+        user_specified_num_channels=True,
+        standardize_image=None,
+        channel_class_map=torch.Tensor([]),
+    )
+    default_image = get_gray_default_image(num_channels, height, width)
+
+    with h5py.File(os.path.join(tmpdir, "images.hdf5"), "w") as h5_file:
+        image_dataset = h5_file.create_dataset(
+            "images",
+            (num_images, num_channels, height, width),
+            dtype=np.float32,
+            chunks=(chunk_rows, num_channels, height, width) if chunk_rows else None,
+        )
+        num_failed = ImageFeatureMixin._write_images_to_hdf5(
+            image_dataset, images, read_image_fn, default_image, num_processes=num_processes, feature_name="img"
+        )
+        data = image_dataset[()]
+
+    assert num_failed == 2
+    for i, img in enumerate(images):
+        expected = default_image if img is None else np.full((num_channels, height, width), i / 255, dtype=np.float32)
+        np.testing.assert_allclose(data[i], expected)
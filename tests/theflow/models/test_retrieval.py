@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from theflow.backend import LOCAL_BACKEND
+from theflow.models import retrieval
+from theflow.models.retrieval import EmbeddingCache, row_str_hash, SemanticRetrieval
+from theflow.vector_index import FAISS_HNSW
+
+pytest.importorskip("faiss")
+
+
+class FakeSentenceTransformer:
+    """Embeds every string as its character counts, recording the strings it encodes."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def to(self, device):
+        return self
+
+    def encode(self, row_strs, batch_size, show_progress_bar):
+        self.encoded.extend(row_strs)
+        return np.array([[row_str.count(c) for c in "0123456789"] for row_str in row_strs], dtype=np.float32)
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    model = FakeSentenceTransformer()
+    monkeypatch.setattr(retrieval, "get_semantic_retrieval_model", lambda model_name: model)
+    return model
+
+
+def test_embedding_cache(tmpdir):
+    cache = EmbeddingCache(str(tmpdir), "model_a")
+    keys = [row_str_hash(s) for s in ["a", "b", "c"]]
+    cache.put(keys[:2], np.eye(2, dtype=np.float32))
+
+    # A new cache object reads the embeddings back from disk.
+    cached = EmbeddingCache(str(tmpdir), "model_a").get(keys)
+    assert list(cached) == keys[:2]
+    np.testing.assert_array_equal(cached[keys[1]], [0, 1])
+
+    # Embeddings are keyed by model.
+    assert EmbeddingCache(str(tmpdir), "model_b").get(keys) == {}
+
+    # Only the requested embeddings are read, across shards.
+    cache.put(keys[2:], np.full((1, 2), 2, dtype=np.float32))
+    cached = EmbeddingCache(str(tmpdir), "model_a").get(keys[1:])
+    assert sorted(cached) == sorted(keys[1:])
+    np.testing.assert_array_equal(cached[keys[2]], [2, 2])
+
+
+def test_semantic_retrieval_embedding_cache(fake_model, tmpdir):
+    df = pd.DataFrame({"text": [str(i) * (i + 1) for i in range(10)], "label": list(range(10))})
+
+    model = SemanticRetrieval("fake", embedding_cache_directory=str(tmpdir))
+    # Skips batch size tuning, which also calls the model.
+    model.best_batch_size = 4
+    model.create_dataset_index(df, LOCAL_BACKEND, columns_to_index=["text"])
+    assert len(fake_model.encoded) == 10
+
+    # Re-indexing with a new model object only encodes the new rows.
+    fake_model.encoded.clear()
+    new_df = pd.concat([df, pd.DataFrame({"text": ["1000", "1000"], "label": [10, 11]})], ignore_index=True)
+    model = SemanticRetrieval("fake", embedding_cache_directory=str(tmpdir), index_type=FAISS_HNSW)
+    model.best_batch_size = 4
+    model.create_dataset_index(new_df, LOCAL_BACKEND, columns_to_index=["text"])
+    assert fake_model.encoded == ['{"text": "1000"}']
+
+    # Queries are not added to the cache.
+    num_cache_files = len(os.listdir(model.embedding_cache.directory))
+    results = model.search(df[["text"]].iloc[[3, 5]], LOCAL_BACKEND, k=1, return_data=True)
+    assert [result[0]["label"] for result in results] == [3, 5]
+    assert len(os.listdir(model.embedding_cache.directory)) == num_cache_files
@@ -1,5 +1,6 @@
 import pytest
 import torch
+from torchmetrics.classification import BinaryAUROC, BinaryCalibrationError, MulticlassAUROC, MulticlassCalibrationError
 
 from theflow.distributed import init_dist_strategy
 from theflow.modules import metric_modules
@@ -301,3 +302,81 @@ def test_char_error_rate():
             ["this is the prediction", "there is an other sample"], ["this is the reference", "there is another one"]
         )
         assert torch.isclose(torch.tensor(0.3415), metric.compute(), rtol=0.5)
+
+
+@pytest.mark.parametrize("num_metric_bins", [None, 1000])
+def test_roc_auc_metric_binned(num_metric_bins):
+    preds = torch.rand(1000)
+    target = (preds + 0.5 * torch.rand(1000) > 0.75).int()
+    metric = metric_modules.BinaryAUROCMetric(task="binary", num_metric_bins=num_metric_bins)
+    with metric.sync_context():
+        metric.update(preds, target)
+        assert torch.isclose(metric.compute(), BinaryAUROC()(preds, target), atol=0.001)
+
+
+def test_category_roc_auc_metric_binned():
+    preds = torch.softmax(torch.randn(1000, 4), dim=1)
+    target = torch.randint(4, (1000,))
+    metric = metric_modules.CategoryAUROCMetric(num_classes=4, num_metric_bins=1000)
+    with metric.sync_context():
+        metric.update(preds, target)
+        assert torch.isclose(metric.compute(), MulticlassAUROC(num_classes=4)(preds, target), atol=0.001)
+
+
+@pytest.mark.parametrize("num_metric_bins", [None, 10])
+def test_calibration_error_metrics(num_metric_bins):
+    n_bins = num_metric_bins or metric_modules.DEFAULT_CALIBRATION_NUM_BINS
+    preds = torch.rand(1000)
+    target = (torch.rand(1000) < preds).int()
+    metric = metric_modules.BinaryCalibrationErrorMetric(num_metric_bins=num_metric_bins)
+    with metric.sync_context():
+        metric.update(preds, target)
+        assert torch.isclose(metric.compute(), BinaryCalibrationError(n_bins=n_bins)(preds, target))
+
+    preds = torch.softmax(torch.randn(1000, 4), dim=1)
+    target = torch.randint(4, (1000,))
+    metric = metric_modules.CategoryCalibrationErrorMetric(num_metric_bins=num_metric_bins)
+    with metric.sync_context():
+        metric.update(preds, target)
+        assert torch.isclose(metric.compute(), MulticlassCalibrationError(num_classes=4, n_bins=n_bins)(preds, target))
+
+
+class _TwoWorkerStrategy:
+    """Distributed strategy gathering the states of a metric with the states of another worker's metric."""
+
+    def __init__(self, other_worker_metric):
+        self.other_worker_states = iter(getattr(other_worker_metric, name) for name in other_worker_metric._reductions)
+
+    def gather_all_tensors_fn(self):
+        return lambda tensor, group=None: [tensor, next(self.other_worker_states)]
+
+    def is_available(self):
+        return True
+
+
+@pytest.mark.parametrize(
+    "metric_fn",
+    [
+        lambda: metric_modules.BinaryAUROCMetric(task="binary", num_metric_bins=100),
+        lambda: metric_modules.CategoryAUROCMetric(num_classes=4, num_metric_bins=100),
+        lambda: metric_modules.BinaryCalibrationErrorMetric(num_metric_bins=10),
+        lambda: metric_modules.CategoryCalibrationErrorMetric(num_metric_bins=10),
+    ],
+)
+def test_binned_metrics_sync(metric_fn, monkeypatch):
+    metric = metric_fn()
+    if isinstance(metric, (metric_modules.CategoryAUROCMetric, metric_modules.CategoryCalibrationErrorMetric)):
+        preds = torch.softmax(torch.randn(1000, 4), dim=1)
+        target = torch.randint(4, (1000,))
+    else:
+        preds = torch.rand(1000)
+        target = (preds + 0.5 * torch.rand(1000) > 0.75).int()
+    metric.update(preds, target)
+    expected = metric.compute()
+
+    # Summing the binned states of the workers gives the metric of a single worker updated with all the data.
+    worker_metric, other_worker_metric = metric_fn(), metric_fn()
+    worker_metric.update(preds[:400], target[:400])
+    other_worker_metric.update(preds[400:], target[400:])
+    monkeypatch.setattr(metric_modules, "get_current_dist_strategy", lambda: _TwoWorkerStrategy(other_worker_metric))
+    assert torch.isclose(worker_metric.compute(), expected)
@@ -0,0 +1,86 @@
+import asyncio
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from theflow.serve import PredictBatcher, server
+
+try:
+    from starlette.testclient import TestClient
+except ImportError:
+    TestClient = None
+
+
+class FakeModel:
+    """Predicts `x + 1` for every entry and fails on entries with `x < 0`."""
+
+    config = {"input_features": [{"name": "x", "column": "x", "type": "number"}]}
+
+    def __init__(self):
+        self.model = SimpleNamespace(input_features={})
+        self.batch_sizes = []
+
+    def predict(self, dataset, data_format=None):
+        self.batch_sizes.append(len(dataset))
+        if any(float(entry["x"]) < 0 for entry in dataset):
+            raise ValueError("negative input")
+        return pd.DataFrame({"x_predictions": [float(entry["x"]) + 1 for entry in dataset]}), None
+
+
+async def _predict_concurrently(batcher, xs):
+    return await asyncio.gather(*[batcher.predict({"x": x}) for x in xs], return_exceptions=True)
+
+
+def test_predict_batcher_coalesces_requests():
+    model = FakeModel()
+    batcher = PredictBatcher(model, max_batch_size=4, max_wait_ms=1000)
+
+    results = asyncio.run(_predict_concurrently(batcher, list(range(10))))
+
+    assert results == [{"x_predictions": x + 1.0} for x in range(10)]
+    assert model.batch_sizes == [4, 4, 2]
+    metrics = batcher.metrics()
+    assert metrics["num_requests"] == 10
+    assert metrics["num_batches"] == 3
+    assert metrics["batch_size"]["max"] == 4
+    assert metrics["queue_depth"] == 0
+
+
+def test_predict_batcher_isolates_failures():
+    model = FakeModel()
+    batcher = PredictBatcher(model, max_batch_size=8, max_wait_ms=1000)
+
+    results = asyncio.run(_predict_concurrently(batcher, [0, -1, 2]))
+
+    assert results[0] == {"x_predictions": 1.0}
+    assert isinstance(results[1], ValueError)
+    assert results[2] == {"x_predictions": 3.0}
+    # The failed batch is retried one entry at a time.
+    assert model.batch_sizes == [3, 1, 1, 1]
+
+
+@pytest.mark.skipif(TestClient is None, reason="serving dependencies are not installed")
+def test_server_with_batching():
+    client = TestClient(server(FakeModel(), max_batch_size=8, max_batch_wait_ms=1))
+
+    response = client.post("/predict", data={"x": "1"})
+    assert response.status_code == 200
+    assert response.json() == {"x_predictions": 2.0}
+
+    response = client.post("/predict", data={"x": "-1"})
+    assert response.status_code == 500
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.json()["num_requests"] == 2
+
+
+@pytest.mark.skipif(TestClient is None, reason="serving dependencies are not installed")
+def test_server_without_batching_has_no_metrics():
+    client = TestClient(server(FakeModel()))
+
+    response = client.post("/predict", data={"x": "1"})
+    assert response.status_code == 200
+    assert response.json() == {"x_predictions": 2.0}
+    assert client.get("/metrics").status_code == 404
@@ -0,0 +1,203 @@
+import os
+import threading
+from collections import OrderedDict
+
+import torch
+
+from theflow.distributed.base import LocalStrategy
+from theflow.globals import MODEL_WEIGHTS_FILE_NAME
+from theflow.utils.checkpoint_utils import CheckpointManager, copy_state_to_cpu, MultiNodeCheckpoint
+from theflow.utils.sharded_checkpoint_utils import split_tensors
+
+
+def _create_checkpoint_manager(directory, **kwargs):
+    model = torch.nn.Linear(4, 2)
+    optimizer = torch.optim.Adam(model.parameters())
+    model(torch.randn(3, 4)).sum().backward()
+    optimizer.step()
+    checkpoint = MultiNodeCheckpoint(LocalStrategy(), model, optimizer)
+    return CheckpointManager(checkpoint, str(directory), torch.device("cpu"), **kwargs)
+
+
+def test_copy_state_to_cpu():
+    state = {
+        "weights": OrderedDict(w=torch.ones(2)),
+        "steps": [torch.zeros(1), 3],
+        "betas": (0.9, 0.99),
+    }
+
+    copied = copy_state_to_cpu(state)
+    state["weights"]["w"].add_(1)
+    state["steps"][0].add_(1)
+
+    assert isinstance(copied["weights"], OrderedDict)
+    assert torch.equal(copied["weights"]["w"], torch.ones(2))
+    assert torch.equal(copied["steps"][0], torch.zeros(1))
+    assert copied["steps"][1] == 3
+    assert copied["betas"] == (0.9, 0.99)
+
+
+def test_async_save(tmpdir):
+    checkpoint_manager = _create_checkpoint_manager(tmpdir, async_save=True)
+    model = checkpoint_manager.checkpoint.model
+    expected_weight = model.weight.detach().clone()
+
+    # Block the write of the checkpoint until the model is updated, to check that the snapshotted state is written
+    write_state = checkpoint_manager.checkpoint.write_state
+    write_started = threading.Event()
+    model_updated = threading.Event()
+
+    def blocked_write_state(state, save_path):
+        write_started.set()
+        model_updated.wait()
+        write_state(state, save_path)
+
+    checkpoint_manager.checkpoint.write_state = blocked_write_state
+    checkpoint_manager.save(1)
+    write_started.wait()
+    with torch.no_grad():
+        model.weight.add_(1)
+    model_updated.set()
+
+    checkpoint_manager.close()
+    state = torch.load(os.path.join(tmpdir, "latest.ckpt"))
+    assert state["global_step"] == 1
+    assert torch.equal(state[MODEL_WEIGHTS_FILE_NAME]["weight"], expected_weight)
+    # The snapshot and the wait for the write in close() are counted once
+    assert checkpoint_manager.pop_stall_time() > 0
+    assert checkpoint_manager.pop_stall_time() == 0
+
+
+def test_async_save_on_saved_after_write(tmpdir):
+    checkpoint_manager = _create_checkpoint_manager(tmpdir, async_save=True)
+    checkpoint = checkpoint_manager.checkpoint
+    events = []
+
+    write_state = checkpoint.write_state
+    write_allowed = threading.Event()
+
+    def blocked_write_state(state, save_path):
+        write_allowed.wait()
+        write_state(state, save_path)
+        events.append("written")
+
+    checkpoint.write_state = blocked_write_state
+    checkpoint.distributed.barrier = lambda: events.append("barrier")
+    checkpoint_manager.save(1, on_saved=lambda: events.append("on_saved"))
+    # Ranks are only synchronized, and progress only recorded, once the checkpoint is written
+    assert events == []
+
+    write_allowed.set()
+    checkpoint_manager.wait_for_pending_save()
+    assert events == ["written", "barrier", "on_saved"]
+    assert os.path.exists(os.path.join(tmpdir, "latest.ckpt"))
+
+    # Nothing is left to wait for
+    checkpoint_manager.close()
+    assert events == ["written", "barrier", "on_saved"]
+
+
+def test_async_save_matches_sync(tmpdir):
+    checkpoint_manager = _create_checkpoint_manager(tmpdir.mkdir("async"), async_save=True)
+    checkpoint_manager.save(1)
+    checkpoint_manager.save_best(1)
+    checkpoint_manager.save(2)
+    best_state = checkpoint_manager.get_best_checkpoint_state_for_inference(torch.device("cpu"))
+    checkpoint_manager.close()
+
+    sync_checkpoint_manager = _create_checkpoint_manager(tmpdir.mkdir("sync"))
+    sync_checkpoint_manager.checkpoint.model.load_state_dict(checkpoint_manager.checkpoint.model.state_dict())
+    sync_checkpoint_manager.checkpoint.optimizer.load_state_dict(checkpoint_manager.checkpoint.optimizer.state_dict())
+    sync_checkpoint_manager.save(2)
+
+    for name, value in sync_checkpoint_manager.checkpoint.model.state_dict().items():
+        assert torch.equal(best_state[name], value)
+    async_state = torch.load(os.path.join(tmpdir, "async", "latest.ckpt"))
+    sync_state = torch.load(os.path.join(tmpdir, "sync", "latest.ckpt"))
+    assert async_state["global_step"] == sync_state["global_step"] == 2
+    for name, value in sync_state[MODEL_WEIGHTS_FILE_NAME].items():
+        assert torch.equal(async_state[MODEL_WEIGHTS_FILE_NAME][name], value)
+    for name, value in sync_state["optim_state"]["state"][0].items():
+        assert torch.equal(async_state["optim_state"]["state"][0][name], value)
+
+
+def _create_sharded_checkpoint_manager(directory, max_shard_size=1, **kwargs):
+    checkpoint_manager = _create_checkpoint_manager(directory, **kwargs)
+    checkpoint_manager.checkpoint.model.register_buffer("scale", torch.ones(4))
+    # One tensor per shard
+    checkpoint_manager.checkpoint.max_shard_size = max_shard_size
+    return checkpoint_manager
+
+
+def _train_step(checkpoint):
+    checkpoint.model(torch.randn(3, 4)).sum().backward()
+    checkpoint.optimizer.step()
+
+
+def test_sharded_save_and_load(tmpdir):
+    checkpoint_manager = _create_sharded_checkpoint_manager(tmpdir.mkdir("sharded"))
+    checkpoint_manager.save(1)
+    checkpoint_manager.save_best(1)
+    expected_state = checkpoint_manager.checkpoint.get_state(1)
+
+    # The indices only hold plain values, which torch>=2.6 loads by default.
+    for name in ["latest.ckpt", "best.ckpt"]:
+        index = torch.load(os.path.join(checkpoint_manager.directory, name), weights_only=True)
+        assert sorted(index["shards"]) == sorted(split_tensors(expected_state)[1])
+
+    restored_manager = _create_sharded_checkpoint_manager(tmpdir.mkdir("restored"))
+    restored_manager.directory = checkpoint_manager.directory
+    assert restored_manager.restore_or_initialize() == 1
+    for name, value in expected_state[MODEL_WEIGHTS_FILE_NAME].items():
+        assert torch.equal(restored_manager.checkpoint.model.state_dict()[name], value)
+    for name, value in expected_state["optim_state"]["state"][0].items():
+        assert torch.equal(restored_manager.checkpoint.optimizer.state_dict()["state"][0][name], value)
+
+    best_state = checkpoint_manager.get_best_checkpoint_state_for_inference(torch.device("cpu"))
+    assert sorted(best_state) == sorted(expected_state[MODEL_WEIGHTS_FILE_NAME])
+    for name, value in expected_state[MODEL_WEIGHTS_FILE_NAME].items():
+        assert torch.equal(best_state[name], value)
+
+
+def test_sharded_save_reuses_unchanged_shards(tmpdir):
+    checkpoint_manager = _create_sharded_checkpoint_manager(tmpdir, async_save=True)
+    checkpoint = checkpoint_manager.checkpoint
+    checkpoint_manager.save(1)
+    checkpoint_manager.wait_for_pending_save()
+    shards = torch.load(os.path.join(tmpdir, "latest.ckpt"))["shards"]
+    assert len(set(shards.values())) == len(shards)
+
+    _train_step(checkpoint)
+    checkpoint_manager.save(2)
+    checkpoint_manager.close()
+    new_shards = torch.load(os.path.join(tmpdir, "latest.ckpt"))["shards"]
+    assert new_shards.keys() == shards.keys()
+    for key, shard_file in new_shards.items():
+        # Only the shard of the buffer, left unchanged by the train step, is reused
+        assert (shard_file == shards[key]) == (key == f"{MODEL_WEIGHTS_FILE_NAME}/scale")
+
+    # Shards no longer referenced by any checkpoint are removed
+    assert sorted(os.listdir(os.path.join(tmpdir, "shards"))) == sorted(set(new_shards.values()))
+
+    checkpoint.load(os.path.join(tmpdir, "latest.ckpt"))
+    assert checkpoint.global_step == 2
+
+
+def test_sharded_save_does_not_reuse_stale_shards(tmpdir):
+    checkpoint_manager = _create_sharded_checkpoint_manager(tmpdir)
+    checkpoint = checkpoint_manager.checkpoint
+    checkpoint_manager.save(1)
+    checkpoint_manager.save_best(1)
+
+    _train_step(checkpoint)
+    checkpoint_manager.save(2)
+    checkpoint_manager.save_best(2)
+    expected_state = checkpoint.get_state(2)
+
+    # The shards of step 1 are no longer referenced, and the best checkpoint reuses the shards of step 2
+    shards = torch.load(os.path.join(tmpdir, "best.ckpt"))["shards"]
+    assert shards == torch.load(os.path.join(tmpdir, "latest.ckpt"))["shards"]
+    assert sorted(os.listdir(os.path.join(tmpdir, "shards"))) == sorted(set(shards.values()))
+    best_state = checkpoint_manager.get_best_checkpoint_state_for_inference(torch.device("cpu"))
+    for name, value in expected_state[MODEL_WEIGHTS_FILE_NAME].items():
+        assert torch.equal(best_state[name], value)
@@ -15,6 +15,7 @@
 import functools
 import json
 import logging
+import os
 
 import numpy as np
 import pandas as pd
@@ -29,7 +30,9 @@ from theflow.utils.data_utils import (
     figure_data_format_dataset,
     get_abs_path,
     hash_dict,
+    load_dataset_chunks,
     NumpyEncoder,
+    open_dataset_writer,
     PANDAS_DF,
     read_csv,
     read_html,
@@ -201,6 +204,21 @@ def test_chunking(dataset_1k_url, nrows):
     assert reader_fn[format](dataset_1k_url, nrows=nrows).shape[0] == (nrows if nrows else 1000)
 
 
+@pytest.mark.parametrize("data_format", ["csv", "tsv", "jsonl", "parquet"])
+def test_dataset_chunks_round_trip(tmpdir, data_format):
+    df = pd.DataFrame({"id": [str(i) for i in range(10)], "text": [f"row {i}" for i in range(10)]})
+    data_fp = os.path.join(tmpdir, f"dataset.{data_format}")
+
+    with open_dataset_writer(data_fp) as write_fn:
+        for start in range(0, len(df), 4):
+            write_fn(df.iloc[start : start + 4])
+    chunks = list(load_dataset_chunks(data_fp, chunk_size=3))
+
+    assert [len(chunk) for chunk in chunks] == [3, 3, 3, 1]
+    result = pd.concat(chunks, ignore_index=True).astype(str)
+    pd.testing.assert_frame_equal(result, df)
+
+
 @pytest.mark.parametrize(
     "df_lib", [pytest.param(pd, id="pandas"), pytest.param(dd, marks=pytest.mark.distributed, id="dask")]
 )
@@ -3,7 +3,13 @@ import pandas as pd
 import pytest
 
 from theflow.backend import create_backend, LOCAL_BACKEND
-from theflow.utils.dataframe_utils import to_numpy_dataset, to_scalar_df
+from theflow.utils.dataframe_utils import (
+    from_numpy_dataset,
+    get_scalar_column_names,
+    to_numpy_dataset,
+    to_scalar_array,
+    to_scalar_df,
+)
 
 try:
     import dask.dataframe as dd
@@ -80,3 +86,18 @@ def test_to_scalar_df():
     scalar_df = to_scalar_df(df)
     assert scalar_df.columns.tolist() == expected_df.columns.tolist()
     assert scalar_df.equals(expected_df)
+
+
+def test_to_scalar_array():
+    dataset = {
+        "bin": np.array([True, False, True]),
+        "cat_encoded": np.array([[1, 2, 3], [4, 5, 6], [7, 8, 9]]),
+        "num": np.array([42.5, 28.0, 99.25]),
+    }
+    expected_df = to_scalar_df(from_numpy_dataset(dataset))
+
+    scalar_array = to_scalar_array(dataset)
+    assert scalar_array.dtype == np.float32
+    assert scalar_array.flags["C_CONTIGUOUS"]
+    assert get_scalar_column_names(dataset) == expected_df.columns.tolist()
+    np.testing.assert_array_equal(scalar_array, expected_df.to_numpy(dtype=np.float32))
@@ -2,9 +2,10 @@ import datetime
 from contextlib import nullcontext as does_not_raise
 from typing import Any, ContextManager
 
+import pandas as pd
 import pytest
 
-from theflow.utils.date_utils import convert_number_to_datetime
+from theflow.utils.date_utils import convert_number_to_datetime, parse_datetime_column
 
 
 @pytest.fixture(scope="module")
@@ -47,3 +48,26 @@ def test_convert_number_to_datetime(reference_datetime: datetime.datetime, times
         assert dt.hour == reference_datetime.hour
         assert dt.minute == reference_datetime.minute
         assert dt.second == reference_datetime.second
+
+
+@pytest.mark.parametrize(
+    "values,datetime_format,expected_parsed",
+    [
+        pytest.param(["2023-08-09 13:09:13", "2023-08-09", None], None, [True, False, False], id="guessed format"),
+        pytest.param(["2023-08-09", "2023-08-09 13:09:13"], "%Y-%m-%d", [True, False], id="format"),
+        pytest.param(["13/08/2023", "09/08/2023"], None, [False, False], id="day first"),
+        pytest.param(["2023-08-09T13:09:13+02:00"], None, [False], id="time zone"),
+        pytest.param(["1691600953"], None, [False], id="timestamp"),
+        pytest.param([1691600953], None, [False], id="numeric timestamp"),
+    ],
+)
+def test_parse_datetime_column(values, datetime_format, expected_parsed):
+    """Ensure that only values parsed the same way as by `parse_datetime` are parsed columnwise.
+
+    Args:
+        values: Values of the column to parse
+        datetime_format: Optional format of the values
+        expected_parsed: Whether every value is expected to be parsed
+    """
+    datetimes = parse_datetime_column(pd.Series(values), datetime_format)
+    assert datetimes.notna().tolist() == expected_parsed
@@ -1,20 +1,31 @@
+import functools
+from types import SimpleNamespace
+from unittest import mock
+
 import pytest
 import torch
-from transformers import AutoConfig, AutoModelForCausalLM
+from transformers import AutoConfig, AutoModelForCausalLM, LlamaConfig, LlamaForCausalLM
 
-from theflow.constants import LOGITS, PREDICTIONS, PROBABILITIES
+from theflow.constants import IGNORE_INDEX_TOKEN_ID, LOGITS, PREDICTIONS, PROBABILITIES
+from theflow.models.llm import LLM
 from theflow.modules.training_hooks import NEFTuneHook
 from theflow.utils.llm_utils import (
     add_left_padding,
     create_attention_mask,
+    create_packed_attention_mask,
     FALLBACK_CONTEXT_LEN,
     find_last_matching_index,
     generate_merged_ids,
     get_context_len,
+    get_merged_lengths,
+    get_packing_layout,
     get_realigned_target_and_prediction_tensors_for_inference,
     has_padding_token,
+    merge_and_left_pad,
+    pack_sequences,
     pad_target_tensor_for_fine_tuning,
     remove_left_padding,
+    unpack_sequences,
 )
 from theflow.utils.tokenizers import HFTokenizer
 
@@ -230,6 +241,215 @@ def test_pad_target_tensor_for_fine_tuning():
     assert torch.equal(expected_target[of_name], updated_targets[of_name])
 
 
+# Same special token IDs as the OPT tokenizer: PAD is 1, BOS and EOS are 2.
+FAKE_TOKENIZER = SimpleNamespace(pad_token_id=1, bos_token_id=2, eos_token_id=2)
+
+
+def _random_left_padded_ids(generator, batch_size, max_length):
+    """Returns rows of random token ids, some of them starting with a BOS token, left-padded to the same length."""
+    rows = []
+    for _ in range(batch_size):
+        length = int(torch.randint(1, max_length + 1, (1,), generator=generator))
+        row = torch.randint(3, 50, (length,), generator=generator)
+        if torch.rand(1, generator=generator) < 0.5:
+            row[int(torch.randint(0, length, (1,), generator=generator))] = FAKE_TOKENIZER.bos_token_id
+        rows.append(add_left_padding(row, max_length, FAKE_TOKENIZER.pad_token_id))
+    return torch.stack(rows)
+
+
+def _reference_generate_merged_ids(input_ids, target_ids, tokenizer, max_sequence_length=None):
+    """Per-row implementation of `generate_merged_ids`."""
+    merged_input_and_targets = []
+    eos_tensor = torch.tensor([tokenizer.eos_token_id])
+    for input_id_sample, target_id_sample in zip(input_ids, target_ids):
+        input_id_sample_no_padding = remove_left_padding(input_id_sample, tokenizer)[0]
+        target_id_sample_no_padding = remove_left_padding(target_id_sample, tokenizer)[0]
+        target_id_sample_no_padding = torch.cat((target_id_sample_no_padding, eos_tensor), dim=-1)
+        merged_sample_ids = torch.cat((input_id_sample_no_padding, target_id_sample_no_padding), dim=-1)
+        if max_sequence_length and merged_sample_ids.shape[0] > max_sequence_length:
+            merged_sample_ids = merged_sample_ids[:max_sequence_length]
+        merged_input_and_targets.append(merged_sample_ids)
+
+    max_length = max(merged_sample_ids.shape[0] for merged_sample_ids in merged_input_and_targets)
+    attention_masks = []
+    for i, merged_sample_ids in enumerate(merged_input_and_targets):
+        merged_input_and_targets[i] = add_left_padding(merged_sample_ids, max_length)
+        attention_masks.append(create_attention_mask(merged_input_and_targets[i], tokenizer))
+    return torch.stack(merged_input_and_targets), torch.stack(attention_masks)
+
+
+def _reference_pad_target_tensor_for_fine_tuning(targets, prediction_length, model_inputs):
+    """Per-row implementation of `pad_target_tensor_for_fine_tuning`."""
+    updated_targets = []
+    for idx, target in enumerate(targets):
+        target = target[(target != IGNORE_INDEX_TOKEN_ID).nonzero()[0] :]  # noqa E203
+        last_matching_index = find_last_matching_index(model_inputs[idx], target)
+        if last_matching_index == -1:
+            updated_targets.append(torch.full((prediction_length,), IGNORE_INDEX_TOKEN_ID))
+        else:
+            padding = torch.full((last_matching_index,), IGNORE_INDEX_TOKEN_ID)
+            updated_targets.append(torch.cat((padding, target), dim=-1)[:prediction_length])
+    return torch.stack(updated_targets)
+
+
+@pytest.mark.parametrize("max_sequence_length", [None, 4, 12, 40])
+@pytest.mark.parametrize("seed", range(5))
+def test_generate_merged_ids_matches_per_row_merge(seed, max_sequence_length):
+    generator = torch.Generator().manual_seed(seed)
+    input_ids = _random_left_padded_ids(generator, 8, 16)
+    target_ids = _random_left_padded_ids(generator, 8, 10)
+
+    merged_ids, attention_masks = generate_merged_ids(input_ids, target_ids, FAKE_TOKENIZER, max_sequence_length)
+    expected_ids, expected_masks = _reference_generate_merged_ids(
+        input_ids, target_ids, FAKE_TOKENIZER, max_sequence_length
+    )
+
+    assert torch.equal(merged_ids, expected_ids)
+    assert torch.equal(attention_masks, expected_masks)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_merge_and_left_pad_targets_matches_per_row_padding(seed):
+    generator = torch.Generator().manual_seed(seed)
+    target_ids = _random_left_padded_ids(generator, 8, 10)
+
+    targets = merge_and_left_pad([target_ids], FAKE_TOKENIZER, IGNORE_INDEX_TOKEN_ID)
+
+    expected_rows = [
+        torch.cat([remove_left_padding(target, FAKE_TOKENIZER)[0], torch.tensor([FAKE_TOKENIZER.eos_token_id])])
+        for target in target_ids
+    ]
+    max_length = max(len(row) for row in expected_rows)
+    expected = torch.stack([add_left_padding(row, max_length, IGNORE_INDEX_TOKEN_ID) for row in expected_rows])
+    assert torch.equal(targets, expected)
+
+
+@pytest.mark.parametrize("max_sequence_length", [None, 6, 12, 20])
+@pytest.mark.parametrize("seed", range(5))
+def test_pad_target_tensor_for_fine_tuning_matches_per_row_padding(seed, max_sequence_length):
+    of_name = "out_1"
+    generator = torch.Generator().manual_seed(seed)
+    input_ids = _random_left_padded_ids(generator, 8, 16)
+    target_ids = _random_left_padded_ids(generator, 8, 10)
+
+    # Targets and model inputs as built during fine-tuning, where long rows may be truncated.
+    model_inputs, _ = generate_merged_ids(input_ids, target_ids, FAKE_TOKENIZER, max_sequence_length)
+    # Rows that do not match the model inputs at all.
+    model_inputs[-2:] = torch.randint(60, 70, model_inputs[-2:].shape, generator=generator)
+    targets = merge_and_left_pad([target_ids], FAKE_TOKENIZER, IGNORE_INDEX_TOKEN_ID)
+    predictions = {of_name: {PREDICTIONS: torch.zeros_like(model_inputs)}}
+
+    expected = _reference_pad_target_tensor_for_fine_tuning(targets, model_inputs.shape[1], model_inputs)
+    updated_targets = pad_target_tensor_for_fine_tuning({of_name: targets}, predictions, model_inputs, of_name)
+
+    assert torch.equal(updated_targets[of_name], expected)
+
+
+@pytest.mark.parametrize("max_sequence_length", [8, 20, 64])
+@pytest.mark.parametrize("seed", range(5))
+def test_get_packing_layout(seed, max_sequence_length):
+    generator = torch.Generator().manual_seed(seed)
+    lengths = torch.randint(1, 9, (16,), generator=generator)
+
+    rows, offsets, num_rows, row_length = get_packing_layout(lengths, max_sequence_length)
+
+    row_lengths = torch.zeros(num_rows, dtype=torch.long).index_add_(0, rows, lengths)
+    assert row_length == row_lengths.max() <= max_sequence_length
+    for row in range(num_rows):
+        # Sequences of a row follow each other without overlapping.
+        row_offsets, order = offsets[rows == row].sort()
+        assert torch.equal(row_offsets[1:], row_offsets[:-1] + lengths[rows == row][order][:-1])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_pack_and_unpack_sequences(seed):
+    generator = torch.Generator().manual_seed(seed)
+    input_ids = _random_left_padded_ids(generator, 8, 16)
+    target_ids = _random_left_padded_ids(generator, 8, 10)
+    merged_ids, _ = generate_merged_ids(input_ids, target_ids, FAKE_TOKENIZER, 20)
+    lengths = get_merged_lengths([input_ids, target_ids], FAKE_TOKENIZER, 20)
+    rows, offsets, num_rows, row_length = get_packing_layout(lengths, 20)
+
+    packed_ids = pack_sequences(merged_ids, lengths, rows, offsets, num_rows, row_length, FAKE_TOKENIZER.pad_token_id)
+
+    assert packed_ids.shape == (num_rows, row_length)
+    assert (packed_ids != FAKE_TOKENIZER.pad_token_id).sum() == lengths.sum()
+    for i, (row, offset, length) in enumerate(zip(rows, offsets, lengths)):
+        assert torch.equal(packed_ids[row, offset : offset + length], merged_ids[i, -length:])
+    assert torch.equal(unpack_sequences(packed_ids, lengths, rows, offsets, merged_ids.shape[1]), merged_ids)
+
+    # Trailing dimensions, e.g. logits, are packed along with the tokens.
+    logits = torch.randn(merged_ids.shape + (3,), generator=generator)
+    packed_logits = pack_sequences(logits, lengths, rows, offsets, num_rows, row_length)
+    unpacked_logits = unpack_sequences(packed_logits, lengths, rows, offsets, merged_ids.shape[1])
+    is_token = torch.arange(merged_ids.shape[1]) >= (merged_ids.shape[1] - lengths).unsqueeze(1)
+    assert torch.equal(unpacked_logits[is_token], logits[is_token])
+    assert not unpacked_logits[~is_token].any()
+
+
+def test_packed_forward_matches_forward_of_each_sequence():
+    torch.manual_seed(0)
+    model = LlamaForCausalLM(
+        LlamaConfig(vocab_size=64, hidden_size=32, intermediate_size=64, num_hidden_layers=2, num_attention_heads=4)
+    ).eval()
+    generator = torch.Generator().manual_seed(0)
+    input_ids = _random_left_padded_ids(generator, 6, 12)
+    target_ids = _random_left_padded_ids(generator, 6, 6)
+    merged_ids, _ = generate_merged_ids(input_ids, target_ids, FAKE_TOKENIZER)
+    lengths = get_merged_lengths([input_ids, target_ids], FAKE_TOKENIZER)
+    rows, offsets, num_rows, row_length = get_packing_layout(lengths, 24)
+
+    max_length = merged_ids.shape[1]
+    position_ids = torch.arange(max_length) - (max_length - lengths).unsqueeze(1)
+    sequence_ids = torch.arange(1, len(lengths) + 1).unsqueeze(1).expand(-1, max_length)
+    packed_ids, packed_position_ids, packed_sequence_ids = (
+        pack_sequences(tensor, lengths, rows, offsets, num_rows, row_length, pad_value)
+        for tensor, pad_value in ((merged_ids, FAKE_TOKENIZER.pad_token_id), (position_ids, 0), (sequence_ids, 0))
+    )
+    attention_mask = create_packed_attention_mask(packed_sequence_ids, model.dtype)
+    with torch.no_grad():
+        packed_logits = model(
+            input_ids=packed_ids, attention_mask=attention_mask, position_ids=packed_position_ids
+        ).logits
+        logits = unpack_sequences(packed_logits, lengths, rows, offsets, max_length)
+
+        assert num_rows < len(lengths)
+        for i, length in enumerate(lengths):
+            expected_logits = model(input_ids=merged_ids[i : i + 1, -length:]).logits[0]
+            assert torch.allclose(logits[i, -length:], expected_logits, atol=1e-5)
+
+
+def test_packed_forward_with_host_packing_layout():
+    torch.manual_seed(0)
+    generator = torch.Generator().manual_seed(0)
+    input_ids = _random_left_padded_ids(generator, 6, 12)
+    target_ids = _random_left_padded_ids(generator, 6, 6)
+    llm = SimpleNamespace(
+        model=LlamaForCausalLM(
+            LlamaConfig(vocab_size=64, hidden_size=32, intermediate_size=64, num_hidden_layers=2, num_attention_heads=4)
+        ).eval(),
+        tokenizer=FAKE_TOKENIZER,
+        global_max_sequence_length=24,
+        model_inputs=generate_merged_ids(input_ids, target_ids, FAKE_TOKENIZER, 24)[0],
+        packing_layout=None,
+    )
+    llm.get_packing_layout = functools.partial(LLM.get_packing_layout, llm)
+
+    with torch.no_grad():
+        expected_logits = LLM._packed_forward(llm, input_ids, target_ids)
+        expected_padding_ratio = llm.padding_ratio
+
+        # The layout computed by the trainer on the host is used once, instead of reading the lengths from the device.
+        llm.packing_layout = LLM.get_packing_layout(llm, input_ids, target_ids)
+        with mock.patch.object(llm, "get_packing_layout") as get_packing_layout:
+            logits = LLM._packed_forward(llm, input_ids, target_ids)
+        get_packing_layout.assert_not_called()
+
+    assert llm.packing_layout is None
+    assert torch.equal(logits, expected_logits)
+    assert isinstance(llm.padding_ratio, float) and llm.padding_ratio == expected_padding_ratio
+
+
 def test_get_realigned_target_and_prediction_tensors_for_inference(tokenizer):
     of_name = "out_1"
     vocab_size = 8
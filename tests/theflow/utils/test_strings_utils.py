@@ -1,4 +1,5 @@
-from collections import defaultdict
+from collections import Counter, defaultdict
+from unittest import mock
 
 import numpy as np
 import pandas as pd
@@ -194,6 +195,81 @@ def test_build_sequence_matrix():
     ).any()
 
 
+@pytest.mark.parametrize("padding", ["right", "left"])
+@pytest.mark.parametrize("length_limit", [3, 12])
+def test_build_sequence_matrix_matches_per_row_vectors(padding, length_limit):
+    sequences = pd.Series(
+        ["The cat sat", "", "a dog and a cat and a bird", "unseen words only", "Cat"], index=[4, 2, 0, 1, 3]
+    )
+    vocabulary = strings_utils.create_vocabulary(sequences[:3], tokenizer_type="space", lowercase=True)
+    tokenizer = strings_utils.get_tokenizer("space", None, None)
+
+    sequence_matrix = strings_utils.build_sequence_matrix(
+        sequences, vocabulary.str2idx, tokenizer_type="space", length_limit=length_limit, padding=padding
+    )
+
+    assert sequence_matrix.index.tolist() == sequences.index.tolist()
+    format_dtype = strings_utils.int_type(len(vocabulary.str2idx) - 1)
+    pad_idx = vocabulary.str2idx[strings_utils.PADDING_SYMBOL]
+    for sequence, row in zip(sequences, sequence_matrix):
+        vector = strings_utils._get_sequence_vector(sequence, tokenizer, "space", format_dtype, vocabulary.str2idx)
+        expected = np.full(length_limit, pad_idx, dtype=format_dtype)
+        limit = min(len(vector), length_limit)
+        if padding == "right":
+            expected[:limit] = vector[:limit]
+        else:
+            expected[length_limit - limit :] = vector[:limit]
+        assert row.dtype == format_dtype
+        np.testing.assert_array_equal(row, expected)
+
+
+def test_build_sequence_matrix_reuses_vocabulary_tokenization():
+    num_calls = 0
+
+    class CountingTokenizer:
+        def __init__(self, **kwargs):
+            pass
+
+        def __call__(self, text):
+            nonlocal num_calls
+            num_calls += 1
+            return text.split()
+
+    sequences = pd.Series(["a b c", "c b a", "d"])
+    with mock.patch.object(strings_utils, "get_tokenizer_from_registry", return_value=CountingTokenizer):
+        with strings_utils.reuse_tokenized_columns():
+            vocabulary = strings_utils.create_vocabulary(sequences, tokenizer_type="space")
+            # Missing value handling replaces the column with a copy before the sequence matrix is built.
+            reused = strings_utils.build_sequence_matrix(
+                sequences.copy(), vocabulary.str2idx, tokenizer_type="space", length_limit=5
+            )
+            assert num_calls == len(sequences)
+
+            # The tokens are only reused once.
+            retokenized = strings_utils.build_sequence_matrix(
+                sequences, vocabulary.str2idx, tokenizer_type="space", length_limit=5
+            )
+            assert num_calls == 2 * len(sequences)
+
+        # Nothing is kept outside of the context.
+        strings_utils.create_vocabulary(sequences, tokenizer_type="space")
+        strings_utils.build_sequence_matrix(sequences, vocabulary.str2idx, tokenizer_type="space", length_limit=5)
+        assert num_calls == 4 * len(sequences)
+
+    np.testing.assert_array_equal(np.stack(reused), np.stack(retokenized))
+
+
+def test_tokenized_column_counts():
+    tokenizer = strings_utils.get_tokenizer("space", None, None)
+    column = pd.Series(["a b a", "", "b c", "c c c d"])
+    tokenized = strings_utils.tokenize_column(column, tokenizer, lowercase=True)
+
+    assert tokenized.lengths.tolist() == [3, 0, 2, 4]
+    assert tokenized.unique_tokens.tolist() == ["a", "b", "c", "d"]
+    assert tokenized.unit_counts() == Counter({"a": 2, "b": 2, "c": 4, "d": 1})
+    assert tokenized.document_counts() == Counter({"a": 1, "b": 2, "c": 2, "d": 1})
+
+
 @pytest.mark.parametrize(
     "pretrained_model_name_or_path",
     [
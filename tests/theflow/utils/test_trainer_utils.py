@@ -2,6 +2,7 @@ from collections import OrderedDict
 from typing import Union
 
 import pytest
+import torch
 
 from theflow.constants import AUTO, BATCH_SIZE, COMBINED, LOSS
 from theflow.features.category_feature import CategoryOutputFeature
@@ -365,3 +366,40 @@ def test_get_rendered_batch_size_grad_accum(
     rendered_batch_size, rendered_grad_accum = trainer_utils.get_rendered_batch_size_grad_accum(config, num_workers)
     assert rendered_batch_size == expected_batch_size
     assert rendered_grad_accum == expected_grad_accum
+
+
+def test_step_summary_buffer():
+    buffer = trainer_utils.StepSummaryBuffer()
+    assert buffer.flush() == []
+
+    for step in range(3):
+        buffer.append(
+            step,
+            torch.tensor(step + 0.5, requires_grad=True),
+            {"out": torch.tensor(float(step), dtype=torch.float64)},
+            learning_rate=0.1 * step,
+            step_stats={"tokens/tokens_per_sec": 100.0, "tokens/padding_ratio": torch.tensor(step / 4)},
+        )
+    assert len(buffer) == 3
+
+    steps = buffer.flush()
+    assert len(buffer) == 0
+    assert [step for step, _, _, _ in steps] == [0, 1, 2]
+    for step, combined_loss, all_losses, step_info in steps:
+        assert combined_loss.dtype == torch.float32
+        assert not combined_loss.requires_grad
+        assert combined_loss.item() == step + 0.5
+        assert all_losses["out"].item() == float(step)
+        assert step_info["learning_rate"] == 0.1 * step
+        # Tensor step statistics are copied to the host along with the losses.
+        padding_ratio = step_info["step_stats"]["tokens/padding_ratio"]
+        assert padding_ratio.dtype == torch.float32 and padding_ratio.item() == step / 4
+        assert step_info["step_stats"]["tokens/tokens_per_sec"] == 100.0
+
+
+def test_memory_sampler():
+    sampler = trainer_utils.MemorySampler(interval_s=0.01)
+    sampler.start()
+    assert sampler.memory_used_mb > 0
+    sampler.stop()
+    assert sampler._thread is None
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+import torch
+
+from theflow.vector_index import ALL_INDICES, FAISS, FAISS_HNSW, FAISS_IVF, get_vector_index_cls
+
+faiss = pytest.importorskip("faiss")  # noqa
+
+NUM_EMBEDDINGS = 200
+EMBEDDING_SIZE = 16
+
+INDEX_PARAMETERS = {
+    FAISS: {},
+    FAISS_IVF: {"nlist": 4, "nprobe": 4},
+    FAISS_HNSW: {"m": 8, "ef_construction": 64, "ef_search": 64},
+}
+
+
+@pytest.fixture
+def embeddings():
+    return np.random.default_rng(0).normal(size=(NUM_EMBEDDINGS, EMBEDDING_SIZE)).astype(np.float32)
+
+
+@pytest.mark.parametrize("index_type", ALL_INDICES)
+def test_vector_index(index_type, embeddings, tmpdir):
+    index_cls = get_vector_index_cls(index_type)
+    index = index_cls.from_embeddings(embeddings, **INDEX_PARAMETERS[index_type])
+
+    queries = embeddings[:50]
+    results = index.search_many(queries, 3)
+    assert len(results) == len(queries)
+    # Every query is its own nearest neighbor.
+    assert [result[0] for result in results] == list(range(len(queries)))
+    assert index.search(queries[7], 3) == results[7]
+
+    path = str(tmpdir.join("test.index"))
+    index.save(path)
+    loaded_index = index_cls.from_path(path, **INDEX_PARAMETERS[index_type])
+    assert loaded_index.search_many(queries, 3) == results
+
+
+def test_vector_index_approximate_recall(embeddings):
+    exact_results = get_vector_index_cls(FAISS).from_embeddings(embeddings).search_many(embeddings, 10)
+    for index_type in [FAISS_IVF, FAISS_HNSW]:
+        index = get_vector_index_cls(index_type).from_embeddings(embeddings, **INDEX_PARAMETERS[index_type])
+        results = index.search_many(embeddings, 10)
+        recall = np.mean([len(set(r) & set(e)) / len(e) for r, e in zip(results, exact_results)])
+        assert recall > 0.9
+
+
+def test_vector_index_ivf_clamps_nlist(embeddings):
+    # More clusters than embeddings cannot be trained.
+    index = get_vector_index_cls(FAISS_IVF).from_embeddings(embeddings[:5], nlist=100)
+    assert index.index.nlist == 5
+    assert index.search(embeddings[0], 2)[0] == 0
+
+
+@pytest.mark.parametrize("index_type", ALL_INDICES)
+def test_vector_index_search_batch_size(index_type, embeddings, tmpdir):
+    # Queries are searched one at a time by default.
+    index = get_vector_index_cls(index_type).from_embeddings(embeddings, **INDEX_PARAMETERS[index_type])
+    assert index.search_batch_size == 1
+
+    # Batches that do not divide the queries evenly return the same results.
+    batched_index = get_vector_index_cls(index_type).from_embeddings(
+        embeddings, search_batch_size=7, **INDEX_PARAMETERS[index_type]
+    )
+    assert batched_index.search_batch_size == 7
+    assert batched_index.search_many(embeddings, 3) == index.search_many(embeddings, 3)
+
+    path = str(tmpdir.join("test.index"))
+    batched_index.save(path)
+    assert get_vector_index_cls(index_type).from_path(path, search_batch_size=7).search_batch_size == 7
+
+
+def test_vector_index_search_large_batches_with_torch():
+    # Realistic sizes, searched after torch has run a parallel op, so that both OpenMP runtimes are loaded and used.
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(20000, 128)).astype(np.float32)
+    query_indices = rng.choice(len(embeddings), 4096, replace=False)
+    queries = embeddings[query_indices]
+    torch.from_numpy(embeddings) @ torch.from_numpy(queries).T
+
+    index = get_vector_index_cls(FAISS).from_embeddings(embeddings, search_batch_size=1024)
+    results = index.search_many(queries, 5)
+    assert [result[0] for result in results] == query_indices.tolist()
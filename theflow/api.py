@@ -19,6 +19,7 @@
     Date created: 5/21/2019
     Python Version: 3+
 """
+import contextlib
 import copy
 import dataclasses
 import logging
@@ -59,7 +60,12 @@ from theflow.constants import (
 from theflow.data.cache.types import CacheableDataset
 from theflow.data.dataset.base import Dataset
 from theflow.data.postprocessing import convert_predictions, postprocess
-from theflow.data.preprocessing import load_metadata, preprocess_for_prediction, preprocess_for_training
+from theflow.data.preprocessing import (
+    load_metadata,
+    preprocess_for_prediction,
+    preprocess_for_prediction_in_chunks,
+    preprocess_for_training,
+)
 from theflow.datasets import load_dataset_uris
 from theflow.features.feature_registries import update_config_with_metadata, update_config_with_model
 from theflow.globals import (
@@ -73,8 +79,9 @@ from theflow.globals import (
 )
 from theflow.models.base import BaseModel
 from theflow.models.calibrator import Calibrator
-from theflow.models.inference import InferenceModule, save_theflow_model_for_inference
+from theflow.models.inference import InferenceModule, InferencePipeline, save_theflow_model_for_inference
 from theflow.models.predictor import (
+    BasePredictor,
     calculate_overall_stats,
     print_evaluation_stats,
     save_evaluation_stats,
@@ -88,11 +95,13 @@ from theflow.utils import metric_utils
 from theflow.utils.backward_compatibility import upgrade_config_dict_to_latest_version
 from theflow.utils.config_utils import get_preprocessing_params
 from theflow.utils.data_utils import (
+    DEFAULT_DATASET_CHUNK_SIZE,
     figure_data_format,
     generate_kfold_splits,
     load_dataset,
     load_json,
     load_yaml,
+    open_dataset_writer,
     save_json,
 )
 from theflow.utils.dataset_utils import generate_dataset_statistics
@@ -857,6 +866,11 @@ class The FlowModel:
 
         self.model = self._online_trainer.train_online(training_dataset)
 
+    def _create_predictor(self, batch_size: int) -> BasePredictor:
+        """Returns a predictor of the model prefetching batches like the trainer, see `trainer.prefetch_depth`."""
+        prefetch_depth = getattr(self.config_obj.trainer, "prefetch_depth", 0)
+        return self.backend.create_predictor(self.model, batch_size=batch_size, prefetch_depth=prefetch_depth)
+
     def _tune_batch_size(self, trainer, dataset, random_seed: int = default_random_seed):
         """Sets AUTO batch-size-related parameters based on the trainer, backend type, and number of workers.
 
@@ -1150,7 +1164,7 @@ class The FlowModel:
         )
 
         logger.debug("Predicting")
-        with self.backend.create_predictor(self.model, batch_size=batch_size) as predictor:
+        with self._create_predictor(batch_size) as predictor:
             with self.model.use_generation_config(generation_config):
                 predictions = predictor.batch_predict(
                     dataset,
@@ -1186,6 +1200,83 @@ class The FlowModel:
             logger.info(f"Finished predicting in: {(time.time() - start_time):.2f}s.")
             return converted_postproc_predictions, output_directory
 
+    def predict_to_file(
+        self,
+        dataset: Union[str, dict, pd.DataFrame],
+        output_path: str,
+        data_format: Optional[str] = None,
+        chunk_size: int = DEFAULT_DATASET_CHUNK_SIZE,
+        batch_size: int = 128,
+        generation_config: Optional[dict] = None,
+        callbacks: Optional[List[Callback]] = None,
+    ) -> str:
+        """Using a trained model, make predictions from the provided dataset chunk after chunk, and append the
+        postprocessed predictions of every chunk to an output file.
+
+        Unlike `predict`, the dataset is never loaded, preprocessed or predicted all at once: only one chunk and its
+        predictions are held in memory at a time, so that datasets larger than memory can be scored.
+
+        # Inputs
+
+        :param dataset: (Union[str, dict, pandas.DataFrame]): source containing the entire dataset to be predicted.
+            Csv, tsv, jsonl and parquet files are read chunk after chunk, other formats are loaded entirely first.
+        :param output_path: (str) path of the csv, tsv, jsonl or parquet file the predictions are written to, in
+            the format of its extension.
+        :param data_format: (str, default: `None`) format to interpret data sources. Will be inferred automatically
+            if not specified.
+        :param chunk_size: (int, default: `100000`) maximum number of rows read, preprocessed and predicted at once.
+        :param batch_size: (int, default: 128) size of batch to use when making predictions.
+        :param generation_config: (Dict, default: `None`) config for the generation of the
+            predictions. If `None`, the config that was used during model training is
+            used. This is only used if the model type is LLM. Otherwise, this parameter is
+            ignored.
+        :param callbacks: (Optional[List[Callback]], default: None) optional list of callbacks to use during this
+            predict operation. Any callbacks already registered to the model will be preserved.
+
+        # Return
+
+        :return: (str) `output_path` the predictions were written to.
+        """
+        self._check_initialization()
+
+        start_time = time.time()
+        output_directory = os.path.dirname(output_path)
+        if output_directory and self.backend.is_coordinator():
+            makedirs(output_directory, exist_ok=True)
+
+        chunks = preprocess_for_prediction_in_chunks(
+            self.config_obj.to_dict(),
+            dataset=dataset,
+            training_set_metadata=self.training_set_metadata,
+            data_format=data_format,
+            chunk_size=chunk_size,
+            include_outputs=False,
+            backend=self.backend,
+            callbacks=self.callbacks + (callbacks or []),
+        )
+        num_rows = 0
+        with contextlib.ExitStack() as stack:
+            predictor = stack.enter_context(self._create_predictor(batch_size))
+            stack.enter_context(self.model.use_generation_config(generation_config))
+            write_fn = stack.enter_context(open_dataset_writer(output_path)) if self.backend.is_coordinator() else None
+            for chunk, _ in chunks:
+                predictions = predictor.batch_predict(chunk)
+                postproc_predictions = postprocess(
+                    predictions,
+                    self.model.output_features,
+                    self.training_set_metadata,
+                    backend=self.backend,
+                    skip_save_unprocessed_output=True,
+                )
+                if write_fn is not None:
+                    postproc_predictions = self.backend.df_engine.compute(postproc_predictions)
+                    write_fn(postproc_predictions)
+                    num_rows += len(postproc_predictions)
+                    logger.debug(f"Wrote predictions of {num_rows} rows to {output_path}")
+
+        logger.info(f"Finished predicting {num_rows} rows to {output_path} in: {(time.time() - start_time):.2f}s.")
+        return output_path
+
     def evaluate(
         self,
         dataset: Optional[Union[str, dict, pd.DataFrame]] = None,
@@ -2035,6 +2126,31 @@ class The FlowModel:
             )
             return torch.jit.script(inference_module)
 
+    def to_inference_pipeline(self, device: Optional[TorchDevice] = None) -> InferencePipeline:
+        """Returns a pipeline predicting on raw inputs through the torchscript inference stages.
+
+        Predictions skip the dataset preprocessing of `predict`, which makes the pipeline suited for low-latency
+        online inference on small batches. Preprocessing runs on CPU while the model runs on `device`.
+
+        # Inputs
+
+        :param device (TorchDevice, optional): The device the predictor stage runs on. If None, the default device
+            is used.
+
+        # Returns
+
+        :return: An `InferencePipeline` whose `predict` method takes a DataFrame, a dict of columns or a list of
+            records.
+        """
+        if device is None:
+            device = DEVICE
+
+        self._check_initialization()
+        inference_module = InferenceModule.from_theflow_model(
+            self.model, self.config_obj.to_dict(), self.training_set_metadata, device=device
+        )
+        return InferencePipeline(inference_module)
+
     def save_torchscript(
         self,
         save_path: str,
@@ -18,6 +18,7 @@ from __future__ import annotations
 
 import time
 from abc import ABC, abstractmethod
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from typing import Any, Callable, Generator, TYPE_CHECKING
@@ -33,7 +34,7 @@ from theflow.backend.utils.storage import StorageManager
 from theflow.constants import MODEL_LLM
 from theflow.data.cache.manager import CacheManager
 from theflow.data.dataframe.base import DataFrameEngine
-from theflow.data.dataframe.pandas import PANDAS
+from theflow.data.dataframe.pandas import PANDAS, PandasEngine
 from theflow.data.dataset.base import DatasetManager
 from theflow.data.dataset.pandas import PandasDatasetManager
 from theflow.distributed import init_dist_strategy
@@ -43,7 +44,6 @@ from theflow.schema.trainer import BaseTrainerConfig
 from theflow.types import HyperoptConfigDict
 from theflow.utils.audio_utils import read_audio_from_path
 from theflow.utils.batch_size_tuner import BatchSizeEvaluator
-from theflow.utils.dataframe_utils import from_batches, to_batches
 from theflow.utils.fs_utils import get_bytes_obj_from_path
 from theflow.utils.misc_utils import get_from_registry
 from theflow.utils.system_utils import Resources
@@ -53,6 +53,9 @@ from theflow.utils.types import DataFrame, Series
 if TYPE_CHECKING:
     from theflow.trainers.base import BaseTrainer
 
+# Number of batches sliced ahead of, and written behind, the batch being transformed by the local `batch_transform`.
+DEFAULT_MAX_IN_FLIGHT_BATCHES = 2
+
 
 @DeveloperAPI
 class Backend(ABC):
@@ -190,13 +193,91 @@ class LocalPreprocessingMixin:
         return pd.Series(result, index=column.index, name=column.name)
 
     @staticmethod
-    def batch_transform(df: DataFrame, batch_size: int, transform_fn: Callable, name: str | None = None) -> DataFrame:
+    def batch_transform(
+        df: DataFrame,
+        batch_size: int,
+        transform_fn: Callable,
+        name: str | None = None,
+        max_in_flight_batches: int = DEFAULT_MAX_IN_FLIGHT_BATCHES,
+    ) -> DataFrame:
+        """Applies `transform_fn` to every `batch_size` length batch of `df` and returns the result.
+
+        Batches are transformed in order on the calling thread, while a thread slices the next `max_in_flight_batches`
+        batches from `df` and another writes the transformed batches into an output preallocated from the first one, so
+        at most `2 * max_in_flight_batches + 1` batches are held in memory besides `df` and the output.
+        """
         name = name or "Batch Transform"
-        batches = to_batches(df, batch_size)
+        batch_starts = iter(range(0, len(df), batch_size))
         transform = transform_fn()
-        out_batches = [transform(batch.reset_index(drop=True)) for batch in tqdm(batches, desc=name)]
-        out_df = from_batches(out_batches).reset_index(drop=True)
-        return out_df
+        output = None
+        with ThreadPoolExecutor(max_workers=1) as slice_executor, ThreadPoolExecutor(max_workers=1) as write_executor:
+            sliced = deque()
+            written = deque()
+
+            def slice_next_batch():
+                start = next(batch_starts, None)
+                if start is not None:
+                    sliced.append(
+                        (start, slice_executor.submit(lambda: df[start : start + batch_size].reset_index(drop=True)))
+                    )
+
+            for _ in range(max_in_flight_batches):
+                slice_next_batch()
+            with tqdm(total=len(df) // batch_size + (len(df) % batch_size > 0), desc=name) as progress_bar:
+                while sliced:
+                    start, batch = sliced.popleft()
+                    batch = batch.result()
+                    slice_next_batch()
+                    out_batch = transform(batch)
+                    if len(out_batch) != len(batch):
+                        raise ValueError(
+                            f"Expected {name} to return a batch of {len(batch)} rows, but found {len(out_batch)} rows"
+                        )
+                    if output is None:
+                        output = _BatchTransformOutput(out_batch, len(df))
+                    written.append(write_executor.submit(output.write, start, out_batch))
+                    while len(written) > max_in_flight_batches:
+                        written.popleft().result()
+                    progress_bar.update()
+            for future in written:
+                future.result()
+
+        if output is None:
+            return df.reset_index(drop=True)
+        return output.to_df()
+
+
+class _BatchTransformOutput:
+    """Output dataframe of the local `batch_transform`, with columns preallocated from the dtypes of the first
+    transformed batch and filled in batch by batch."""
+
+    def __init__(self, first_batch: pd.DataFrame, num_rows: int):
+        self.dtypes = first_batch.dtypes
+        self.columns = {
+            c: np.empty(num_rows, dtype=dtype if isinstance(dtype, np.dtype) else object)
+            for c, dtype in self.dtypes.items()
+        }
+
+    def write(self, start: int, batch: pd.DataFrame):
+        if list(batch.columns) != list(self.columns):
+            raise ValueError(
+                f"Expected transformed batch columns {list(self.columns)}, but found {list(batch.columns)}"
+            )
+        for c, values in batch.items():
+            values = values.to_numpy()
+            column = self.columns[c]
+            if column.dtype != object and values.dtype != column.dtype:
+                # Promote the column like `pd.concat` would, e.g. to floats when a batch of integers has missing values
+                self.columns[c] = column = column.astype(np.result_type(column.dtype, values.dtype))
+            column[start : start + len(values)] = values
+
+    def to_df(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                c: column if isinstance(self.dtypes[c], np.dtype) else pd.Series(column, dtype=self.dtypes[c])
+                for c, column in self.columns.items()
+            }
+        )
 
 
 class LocalTrainingMixin:
@@ -257,8 +338,17 @@ class LocalBackend(LocalPreprocessingMixin, LocalTrainingMixin, Backend):
             cls._shared_instance = cls()
         return cls._shared_instance
 
-    def __init__(self, **kwargs) -> None:
+    def __init__(self, processor: dict[str, Any] | None = None, **kwargs) -> None:
         super().__init__(dataset_manager=PandasDatasetManager(self), **kwargs)
+        processor_kwargs = dict(processor or {})
+        processor_type = processor_kwargs.pop("type", "pandas")
+        if processor_type != "pandas":
+            raise ValueError(f"Local backend only supports the pandas processor, found: {processor_type}")
+        self._df_engine = PandasEngine(**processor_kwargs) if processor_kwargs else PANDAS
+
+    @property
+    def df_engine(self) -> DataFrameEngine:
+        return self._df_engine
 
     @property
     def num_nodes(self) -> int:
@@ -44,6 +44,7 @@ from theflow.backend.base import Backend, RemoteTrainingMixin
 from theflow.constants import CPU_RESOURCES_PER_TRIAL, EXECUTOR, MODEL_ECD, MODEL_LLM, NAME, PROC_COLUMN
 from theflow.data.dataframe.base import DataFrameEngine
 from theflow.data.dataframe.dask import tensor_extension_casting
+from theflow.data.dataframe.tensor_array import is_tensor_series
 from theflow.data.dataset.ray import RayDataset, RayDatasetManager, RayDatasetShard
 from theflow.distributed import (
     DistributedStrategy,
@@ -861,7 +862,9 @@ class RayPredictor(BasePredictor):
             def _prepare_batch(self, batch: pd.DataFrame) -> Dict[str, np.ndarray]:
                 res = {}
                 for c in self.features.keys():
-                    if batch[c].values.dtype == "object":
+                    if is_tensor_series(batch[c]):
+                        res[c] = batch[c].array.tensor
+                    elif batch[c].values.dtype == "object":
                         # Ensure columns stacked instead of turned into np.array([np.array, ...], dtype=object) objects
                         res[c] = np.stack(batch[c].values)
                     else:
@@ -112,6 +112,20 @@ def check_training_runway(config: "ModelConfig") -> None:  # noqa: F821
             )
 
 
+@register_config_check
+def check_bucketing_field(config: "ModelConfig") -> None:  # noqa: F821
+    """Checks that the trainer bucketing field is a text or sequence input feature."""
+    if config.model_type != MODEL_ECD or config.trainer.bucketing_field is None:
+        return
+
+    bucketing_field = config.trainer.bucketing_field
+    input_feature_types = {input_feature.name: input_feature.type for input_feature in config.input_features}
+    if input_feature_types.get(bucketing_field) not in {SEQUENCE, TEXT}:
+        raise ConfigValidationError(
+            f"trainer.bucketing_field '{bucketing_field}' must be the name of a {SEQUENCE} or {TEXT} input feature."
+        )
+
+
 @register_config_check
 def check_gbm_horovod_incompatibility(config: "ModelConfig") -> None:  # noqa: F821
     """Checks that GBM model type isn't being used with the horovod backend.
@@ -660,6 +674,16 @@ def check_qlora_requirements(config: "ModelConfig") -> None:  # noqa: F821
         raise ConfigValidationError("Fine-tuning and LLM with quantization requires using the 'lora' adapter")
 
 
+@register_config_check
+def check_sequence_packing_requirements(config: "ModelConfig") -> None:  # noqa: F821
+    """Checks that sequence packing is only enabled when fine-tuning an LLM with a text output feature."""
+    if config.model_type != MODEL_LLM or config.trainer.type == "none":
+        return
+
+    if config.trainer.enable_sequence_packing and config.output_features[0].type != TEXT:
+        raise ConfigValidationError("trainer.enable_sequence_packing is only supported with a text output feature.")
+
+
 @register_config_check
 def check_qlora_merge_and_unload_compatibility(config: "ModelConfig") -> None:  # noqa: F821
     """Checks that model.merge_and_unload() is supported by underlying model.save_pretrained() when merging QLoRA
@@ -52,6 +52,7 @@ CLASS_WEIGHTS = "class_weights"
 USED_TOKENS = "used_tokens"
 LOSS = "loss"
 ROC_AUC = "roc_auc"
+CALIBRATION_ERROR = "calibration_error"
 EVAL_LOSS = "eval_loss"
 TRAIN_MEAN_LOSS = "train_mean_loss"
 SEQUENCE_SOFTMAX_CROSS_ENTROPY = "sequence_softmax_cross_entropy"
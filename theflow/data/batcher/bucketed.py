@@ -13,160 +13,127 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+import logging
+from typing import Any, Dict, List
+
 import numpy as np
+import torch
 
+from theflow.api_annotations import DeveloperAPI
+from theflow.constants import PREPROCESSING
 from theflow.data.batcher.base import Batcher
+from theflow.utils.strings_utils import SpecialSymbol
+
+logger = logging.getLogger(__name__)
+
+
+@DeveloperAPI
+def get_sequence_lengths(sequences: np.ndarray, padding_idx: int = SpecialSymbol.PADDING.value) -> np.ndarray:
+    """Returns the number of non-padding tokens in each row of a matrix of padded token ids."""
+    return np.count_nonzero(sequences != padding_idx, axis=1)
 
 
+@DeveloperAPI
+def get_padding_idx(feature_metadata: Dict[str, Any]) -> int:
+    """Returns the id of the padding token of a text or sequence feature from its training set metadata."""
+    # Text features record it, e.g. the pad token id of a pretrained tokenizer. Sequence features only record their
+    # vocabulary, which maps the padding symbol to its id.
+    if feature_metadata.get("pad_idx") is not None:
+        return feature_metadata["pad_idx"]
+    padding_symbol = feature_metadata.get(PREPROCESSING, {}).get("padding_symbol")
+    return feature_metadata.get("str2idx", {}).get(padding_symbol, SpecialSymbol.PADDING.value)
+
+
+@DeveloperAPI
 class BucketedBatcher(Batcher):
+    """Batches together samples whose `bucketing_field` sequences have similar lengths.
+
+    Every epoch, the samples yielded by `sampler` are sorted by `lengths` and split into `buckets` buckets of equal
+    size, each bucket is split into batches, and the batches are served in random order if the sampler shuffles. As the
+    sampler shards the dataset across workers like for the `RandomAccessBatcher`, every worker gets the same number of
+    samples and runs the same number of steps.
+
+    If `should_trim`, the padding of the `bucketing_field` column of each batch is trimmed to the longest sequence of
+    the batch, from the side given by `trim_side`.
+    """
+
     def __init__(
         self,
         dataset,
-        bucketing_field,
-        batch_size=128,
-        buckets=10,
-        should_shuffle=True,
-        ignore_last=False,
-        should_trim=False,
-        trim_side="right",
+        sampler,
+        bucketing_field: str,
+        lengths: np.ndarray,
+        batch_size: int = 128,
+        buckets: int = 10,
+        ignore_last: bool = False,
+        should_trim: bool = False,
+        trim_side: str = "right",
+        augmentation_pipeline=None,
     ):
-        self.should_shuffle = should_shuffle
-        self.bucketing_field = bucketing_field
-        self.should_trim = should_trim
-        self.trim_side = trim_side
+        if trim_side not in {"left", "right"}:
+            raise ValueError(f"Invalid trim side: {trim_side}")
 
-        # store our dataset as well
         self.dataset = dataset
-
-        field = dataset.get_dataset()[bucketing_field]
-        field_lengths = np.apply_along_axis(lambda x: np.sign(x).sum(), 1, field)
-        sorted_idcs = np.argsort(field_lengths)
-        self.buckets_idcs = []
-        datapoints_per_bucket = len(field) // buckets
-        for b in range(buckets):
-            start = datapoints_per_bucket * b
-            end = datapoints_per_bucket * (b + 1) if b < buckets - 1 else len(sorted_idcs)
-            self.buckets_idcs.append(sorted_idcs[start:end])
-
-        if should_shuffle:
-            self.shuffle(self.buckets_idcs)
-
+        self.sampler = sampler
+        self.bucketing_field = bucketing_field
+        self.lengths = lengths
+        self.buckets = buckets
         self.ignore_last = ignore_last
-        self.batch_size = batch_size
-        self.total_size = min(map(len, dataset.get_dataset().values()))
-        self.bucket_sizes = np.array([x for x in map(len, self.buckets_idcs)])
-        self.steps_per_epoch = self._compute_steps_per_epoch()
-        self.indices = np.array([0] * buckets)
-        self.step = 0
-        self.epoch = 0
-
-    def shuffle(self, buckets_idcs):
-        for i in range(len(buckets_idcs)):
-            np.random.shuffle(buckets_idcs[i])
+        self.should_trim = should_trim
+        self.trim_side = trim_side
+        self.augmentation_pipeline = augmentation_pipeline
+        self.set_epoch(sampler.epoch, batch_size)
 
-    def next_batch(self):
+    def next_batch(self) -> Dict[str, np.ndarray]:
         if self.last_batch():
-            if self.should_shuffle:
-                self.shuffle(self.buckets_idcs)
-            self.set_epoch(self.epoch + 1)
-
-        if self.ignore_last:
-            idcs_below_size = self.indices + self.batch_size < self.bucket_sizes
-        else:
-            idcs_below_size = self.indices < self.bucket_sizes
-        i = np.random.choice(np.arange(0, len(self.buckets_idcs))[idcs_below_size])
-
-        selected_bucket = self.buckets_idcs[i]
-        selected_idcs = selected_bucket[self.indices[i] : self.indices[i] + self.batch_size]
-
-        sub_batch = {}
-        for key in self.dataset.get_dataset():
-            if key == self.bucketing_field and self.should_trim:
-                selected_samples = self.dataset.get(key, selected_idcs)
-                max_length = np.sign(selected_samples).sum(axis=1).max()
-                if self.trim_side == "right":
-                    sub_batch[key] = selected_samples[:, :max_length]
-                elif self.trim_side == "left":
-                    sub_batch[key] = selected_samples[:, -max_length:]
-                else:
-                    raise ValueError("Invalid trim side:", self.trim_side)
+            raise StopIteration()
 
+        indices = self.batches[self.step]
+        sub_batch = {feature_name: self.dataset.get(feature_name, indices) for feature_name in self.dataset.features}
+
+        if self.should_trim:
+            max_length = max(int(self.lengths[indices].max()), 1)
+            sequences = sub_batch[self.bucketing_field]
+            if self.trim_side == "right":
+                sub_batch[self.bucketing_field] = sequences[:, :max_length]
             else:
-                sub_batch[key] = self.dataset.get(key, selected_idcs)
+                sub_batch[self.bucketing_field] = sequences[:, -max_length:]
+
+        if self.augmentation_pipeline:
+            for feature_name, augmentations in self.augmentation_pipeline.items():
+                sub_batch[feature_name] = augmentations(torch.tensor(sub_batch[feature_name]))
 
-        self.indices[i] += self.batch_size
         self.step += 1
         return sub_batch
 
-    def last_batch(self):
-        return not np.any(self.indices < self.bucket_sizes) or (
-            self.ignore_last and not np.any(self.indices + self.batch_size < self.bucket_sizes)
-        )
+    def last_batch(self) -> bool:
+        return self.step >= len(self.batches)
 
-    def set_epoch(self, epoch, batch_size):
-        self.indices = np.array([0] * len(self.buckets_idcs))
-        self.step = 0
-        self.epoch = epoch
+    def set_epoch(self, epoch: int, batch_size: int):
         self.batch_size = batch_size
-        self.steps_per_epoch = self._compute_steps_per_epoch()
-
-    def _compute_steps_per_epoch(self) -> int:
-        return int(np.sum(np.ceil(self.bucket_sizes / self.batch_size)).item())
-
-
-# dynamic_length_encoders = {
-#     'rnn',
-#     'embed'
-# }
-#
-# todo future: reintroduce the bucketed batcher
-# def initialize_batcher(dataset, batch_size=128, bucketing_field=None,
-#                        input_features=None, preprocessing=None,
-#                        should_shuffle=True, ignore_last=False, distributed=None):
-#     if distributed:
-#         batcher = DistributedBatcher(
-#             dataset,
-#             distributed.rank(),
-#             distributed,
-#             batch_size,
-#             should_shuffle=should_shuffle,
-#             ignore_last=ignore_last
-#         )
-#     elif bucketing_field is not None:
-#         bucketing_feature = [
-#             feature for feature in input_features if
-#             feature[NAME] == bucketing_field
-#         ]
-#         if not bucketing_feature:
-#             raise ValueError(
-#                 'Bucketing field {} not present in input features'.format(
-#                     bucketing_field
-#                 )
-#             )
-#         else:
-#             bucketing_feature = bucketing_feature[0]
-#         should_trim = bucketing_feature[
-#                           'encoder'] in dynamic_length_encoders
-#         if 'preprocessing' in bucketing_feature:
-#             trim_side = bucketing_feature['preprocessing']['padding']
-#         else:
-#             trim_side = preprocessing[bucketing_feature[TYPE]]['padding']
-#
-#         batcher = BucketedBatcher(
-#             dataset,
-#             bucketing_field=bucketing_field,
-#             batch_size=batch_size,
-#             buckets=10,
-#             ignore_last=ignore_last,
-#             should_shuffle=should_shuffle,
-#             should_trim=should_trim,
-#             trim_side=trim_side
-#         )
-#     else:
-#         batcher = Batcher(
-#             dataset,
-#             batch_size,
-#             should_shuffle=should_shuffle,
-#             ignore_last=ignore_last
-#         )
-#     return batcher
+        self.step = 0
+        self.sampler.set_epoch(epoch)
+        self.batches = self._make_batches()
+        self.steps_per_epoch = len(self.batches)
+
+    def _make_batches(self) -> List[np.ndarray]:
+        indices = np.fromiter(iter(self.sampler), dtype=np.int64, count=len(self.sampler))
+        # A stable sort keeps the sampler's random order among samples of the same length.
+        indices = indices[np.argsort(self.lengths[indices], kind="stable")]
+
+        batches = []
+        for bucket in np.array_split(indices, max(min(self.buckets, len(indices)), 1)):
+            batches.extend(np.split(bucket, range(self.batch_size, len(bucket), self.batch_size)))
+        batches = [batch for batch in batches if len(batch) > 0]
+
+        if self.ignore_last and self.batch_size > 1:
+            num_batches = len(batches)
+            batches = [batch for batch in batches if len(batch) > 1]
+            if len(batches) < num_batches:
+                logger.info(f"Dropped {num_batches - len(batches)} batches that only had 1 sample.")
+
+        if self.sampler.shuffle:
+            # Deterministic across workers, based on the epoch and seed like the sampler.
+            order = np.random.RandomState(seed=self.sampler.random_seed + self.sampler.epoch).permutation(len(batches))
+            batches = [batches[i] for i in order]
+        return batches
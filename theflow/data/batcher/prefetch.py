@@ -0,0 +1,187 @@
+#! /usr/bin/env python
+# Copyright (c) 2023 Predibase, Inc., 2020 Uber Technologies, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import contextlib
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+import torch
+
+from theflow.api_annotations import DeveloperAPI
+from theflow.data.batcher.base import Batcher
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the epoch in the prefetch queue.
+_END = object()
+
+# How often a blocked background thread checks whether it has been stopped.
+_PUT_TIMEOUT_S = 0.1
+
+
+@DeveloperAPI
+def batch_array_to_tensor(
+    array: Union[np.ndarray, torch.Tensor], device: Union[str, torch.device], non_blocking: bool = False
+) -> torch.Tensor:
+    """Returns the array of a batch column as a tensor on `device`.
+
+    Arrays freshly allocated by the batcher (owning their data, contiguous and writable) are wrapped without copying,
+    anything else, e.g. a view into the dataset, is copied once so that the model cannot modify the dataset in place.
+    With `non_blocking`, the tensor is copied into pinned memory and transferred asynchronously.
+    """
+    if isinstance(array, torch.Tensor):
+        tensor = array
+    else:
+        array = np.asarray(array)
+        if array.base is not None or not array.flags.c_contiguous or not array.flags.writeable:
+            array = np.array(array, copy=True, order="C")
+        tensor = torch.from_numpy(array)
+
+    if non_blocking and tensor.device.type == "cpu":
+        tensor = tensor.pin_memory()
+    return tensor.to(device, non_blocking=non_blocking)
+
+
+@DeveloperAPI
+class PrefetchBatcher(Batcher):
+    """Wraps a batcher to assemble batches in a background thread ahead of the training or prediction step.
+
+    Up to `prefetch_depth` batches are kept ready, `0` assembles every batch synchronously when it is requested. The
+    arrays of `columns` are returned as tensors on `device`. On CUDA they are copied once into pinned memory and
+    transferred with `non_blocking=True` on a side stream, which the current stream waits on before the batch is
+    returned, so that the transfer overlaps with the computation on the previous batch. The entries returned by
+    `host_fn`, called with each batch before its columns are moved, are added to the batch: this computes values of the
+    host arrays ahead of time, without reading them back from the device.
+
+    Must be closed (or used as a context manager) to stop the background thread when the epoch is not consumed to the
+    end.
+    """
+
+    def __init__(
+        self,
+        batcher: Batcher,
+        prefetch_depth: int,
+        columns: Iterable[str],
+        device: Union[str, torch.device],
+        host_fn: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    ):
+        self.batcher = batcher
+        self.prefetch_depth = prefetch_depth
+        self.columns = list(columns)
+        self.device = torch.device(device)
+        self.host_fn = host_fn
+        self._stream = (
+            torch.cuda.Stream(self.device) if self.device.type == "cuda" and torch.cuda.is_available() else None
+        )
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # Item taken from the queue by `last_batch` and not yet returned by `next_batch`.
+        self._next: Any = None
+
+    @property
+    def steps_per_epoch(self) -> int:
+        return self.batcher.steps_per_epoch
+
+    def next_batch(self) -> Dict[str, Any]:
+        if self.last_batch():
+            raise StopIteration()
+
+        batch, event = self._next
+        self._next = None
+        if event is not None:
+            stream = torch.cuda.current_stream(self.device)
+            stream.wait_event(event)
+            for column in self.columns:
+                # The tensors were allocated on the side stream and are used on the current one.
+                batch[column].record_stream(stream)
+        return batch
+
+    def last_batch(self) -> bool:
+        if self.prefetch_depth <= 0:
+            if self._next is None and not self.batcher.last_batch():
+                self._next = self._prepare(self.batcher.next_batch())
+            return self._next is None
+
+        if self._next is None:
+            self._start()
+            self._next = self._queue.get()
+        if isinstance(self._next, Exception):
+            raise self._next
+        return self._next is _END
+
+    def set_epoch(self, epoch: int, batch_size: int):
+        self.close()
+        self.batcher.set_epoch(epoch, batch_size)
+
+    def close(self):
+        """Stops the background thread and drops the prefetched batches."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self._queue = None
+        self._next = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._queue = queue.Queue(maxsize=self.prefetch_depth)
+        self._thread = threading.Thread(target=self._run, name="PrefetchBatcher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            while not self._stop.is_set() and not self.batcher.last_batch():
+                if not self._put(self._prepare(self.batcher.next_batch())):
+                    return
+            self._put(_END)
+        except Exception as e:
+            # Surfaced to the consumer by `last_batch`.
+            self._put(e)
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=_PUT_TIMEOUT_S)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _prepare(self, batch: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[torch.cuda.Event]]:
+        batch = dict(batch)
+        if self.host_fn is not None:
+            batch.update(self.host_fn(batch))
+        stream_context = torch.cuda.stream(self._stream) if self._stream is not None else contextlib.nullcontext()
+        with stream_context:
+            for column in self.columns:
+                batch[column] = batch_array_to_tensor(batch[column], self.device, non_blocking=self._stream is not None)
+
+        event = None
+        if self._stream is not None:
+            event = torch.cuda.Event()
+            event.record(self._stream)
+        return batch, event
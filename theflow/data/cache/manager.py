@@ -1,13 +1,16 @@
 import logging
 import os
-from typing import Optional
+import pickle
+import uuid
+from typing import Any, Dict, Optional, Tuple
 
 from theflow.constants import CHECKSUM, META, TEST, TRAINING, VALIDATION
 from theflow.data.cache.types import alphanum, CacheableDataset
 from theflow.data.cache.util import calculate_checksum
 from theflow.data.dataset.base import DatasetManager
 from theflow.utils import data_utils
-from theflow.utils.fs_utils import delete, path_exists
+from theflow.utils.fs_utils import delete, get_default_cache_location, makedirs, open_file, path_exists, rename
+from theflow.utils.types import Series
 
 logger = logging.getLogger(__name__)
 
@@ -91,6 +94,43 @@ class DatasetCache:
         return self.cache_map.get(cached_obj_name)
 
 
+class ColumnCache:
+    """Caches the metadata and processed column of each feature separately.
+
+    Entries are keyed by `calculate_column_checksum`, i.e. by the feature's input column and config, so that changing
+    the preprocessing of one feature, or adding a feature, only requires the affected features to be processed again.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Series]]]:
+        """Returns the feature metadata and processed columns cached under `key`, or None on a cache miss."""
+        cache_path = self._get_cache_path(key)
+        if not path_exists(cache_path):
+            return None
+
+        try:
+            with open_file(cache_path, "rb") as f:
+                entry = pickle.load(f)
+        except Exception:
+            logger.exception(f"Failed to load cached feature column at {cache_path}")
+            return None
+        return entry[META], entry["columns"]
+
+    def put(self, key: str, feature_metadata: Dict[str, Any], proc_cols: Dict[str, Series]):
+        cache_path = self._get_cache_path(key)
+        makedirs(self.cache_dir, exist_ok=True)
+        # Written to a temporary file first so that readers never see a partially written entry.
+        tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+        with open_file(tmp_path, "wb") as f:
+            pickle.dump({META: feature_metadata, "columns": proc_cols}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        rename(tmp_path, cache_path)
+
+    def _get_cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{alphanum(key)}.pkl")
+
+
 class CacheManager:
     def __init__(
         self,
@@ -127,6 +167,10 @@ class CacheManager:
             }
             return DatasetCache(config, key, cache_map, self._dataset_manager)
 
+    def get_column_cache(self) -> ColumnCache:
+        cache_dir = self._cache_dir if self._cache_dir is not None else get_default_cache_location()
+        return ColumnCache(os.path.join(cache_dir, "columns"))
+
     def get_cache_key(self, dataset: CacheableDataset, config: dict) -> str:
         return calculate_checksum(dataset, config)
 
@@ -1,7 +1,22 @@
+import hashlib
+from typing import Optional
+
+import pandas as pd
+
 import theflow
-from theflow.constants import DEFAULTS, INPUT_FEATURES, OUTPUT_FEATURES, PREPROCESSING, PROC_COLUMN, TYPE
+from theflow.constants import (
+    DEFAULTS,
+    ENCODER,
+    INPUT_FEATURES,
+    MODEL_TYPE,
+    NAME,
+    OUTPUT_FEATURES,
+    PREPROCESSING,
+    PROC_COLUMN,
+    TYPE,
+)
 from theflow.data.cache.types import CacheableDataset
-from theflow.types import ModelConfigDict
+from theflow.types import FeatureConfigDict, ModelConfigDict
 from theflow.utils.data_utils import hash_dict
 
 
@@ -32,3 +47,37 @@ def calculate_checksum(original_dataset: CacheableDataset, config: ModelConfigDi
         info["prompt"] = config["prompt"]
 
     return hash_dict(info, max_length=None).decode("ascii")
+
+
+def calculate_column_checksum(
+    column: pd.Series, feature_config: FeatureConfigDict, config: ModelConfigDict, skip_save_processed_input: bool
+) -> Optional[str]:
+    """Calculates a checksum for the input column of a feature and the feature config.
+
+    The checksum is used to cache the processed column of each feature separately, so that changing the preprocessing of
+    one feature only invalidates the cached column of that feature. Returns None if the column holds values that cannot
+    be hashed, e.g. lists, or if preprocessing the feature writes data outside of its processed column, e.g. images not
+    held in memory which are written to an HDF5 file of the whole dataset, in which case the feature is not cached.
+    """
+    if not feature_config.get(PREPROCESSING, {}).get("in_memory", True) and not skip_save_processed_input:
+        return None
+
+    try:
+        column_checksum = hashlib.sha1(pd.util.hash_pandas_object(column).values).hexdigest()
+    except TypeError:
+        return None
+
+    info = {
+        "theflow_version": theflow.globals.LUDWIG_VERSION,
+        "column_checksum": column_checksum,
+        "feature_name": feature_config[NAME],
+        "feature_proc_column": feature_config[PROC_COLUMN],
+        "feature_type": feature_config[TYPE],
+        "feature_preprocessing": feature_config.get(PREPROCESSING, {}),
+        "is_input_feature": ENCODER in feature_config,
+        "skip_save_processed_input": skip_save_processed_input,
+        "model_type": config.get(MODEL_TYPE),
+        # The prompt template is used to compute the metadata of text features.
+        "prompt": config.get("prompt"),
+    }
+    return hash_dict(info, max_length=None).decode("ascii")
@@ -13,20 +13,84 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+import logging
+import multiprocessing
 import os
+import threading
+from typing import Callable, Optional, Tuple
 
 import numpy as np
 import pandas as pd
+import torch
 
 from theflow.data.dataframe.base import DataFrameEngine
 from theflow.globals import PREDICTIONS_SHAPES_FILE_NAME
 from theflow.utils.data_utils import load_json, save_json, split_by_slices
 from theflow.utils.dataframe_utils import flatten_df, unflatten_df
 
+logger = logging.getLogger(__name__)
+
+# Inputs with fewer rows per worker than this are mapped serially, as forking the workers would take longer.
+DEFAULT_MIN_ROWS_PER_WORKER = 1000
+
+# The chunk function and data of the running parallel map, inherited by the forked workers so that neither has to be
+# pickled. Only one parallel map runs at a time: concurrent maps, and maps nested in the workers, which inherit the held
+# lock, fall back to serial.
+_parallel_map_lock = threading.Lock()
+_parallel_map_state: Optional[Tuple[Callable, pd.DataFrame]] = None
+
+
+def _init_worker():
+    # The OpenMP thread pool of torch does not survive forking: once the parent has run a parallel torch op, a forked
+    # worker running one waits forever for threads that only exist in the parent. Single-threaded ops skip the pool.
+    torch.set_num_threads(1)
+
+
+def _map_chunk(bounds: Tuple[int, int]):
+    chunk_fn, data = _parallel_map_state
+    start, stop = bounds
+    return chunk_fn(data.iloc[start:stop])
+
 
 class PandasEngine(DataFrameEngine):
-    def __init__(self, **kwargs):
+    def __init__(
+        self, parallelism: Optional[int] = None, min_rows_per_worker: int = DEFAULT_MIN_ROWS_PER_WORKER, **kwargs
+    ):
+        """Dataframe engine running on in-memory pandas dataframes.
+
+        Args:
+            parallelism: number of worker processes mapping `map_objects`, `apply_objects` and `map_partitions` over
+                contiguous chunks of rows. If `None` or 1, functions are mapped serially in the current process.
+            min_rows_per_worker: inputs are split into chunks of at least this many rows, so small inputs are mapped
+                serially.
+        """
         super().__init__()
+        self._min_rows_per_worker = min_rows_per_worker
+        self.set_parallelism(parallelism)
+
+    def _map_chunks(self, data, chunk_fn: Callable):
+        """Returns `chunk_fn` applied to `data`, mapped over contiguous chunks of rows by forked worker processes.
+
+        The results of the chunks are concatenated in order, so the result is the same as `chunk_fn(data)` for functions
+        mapping rows independently. Torch ops run single-threaded in the workers, which keeps them from deadlocking on
+        the thread pool inherited from the parent. Other native thread pools are not reset, so `chunk_fn` should not
+        rely on libraries that are not fork-safe.
+        """
+        global _parallel_map_state
+
+        num_workers = min(self._parallelism or 1, len(data) // self._min_rows_per_worker)
+        if num_workers < 2 or not _parallel_map_lock.acquire(blocking=False):
+            return chunk_fn(data)
+
+        try:
+            _parallel_map_state = (chunk_fn, data)
+            bounds = np.linspace(0, len(data), num_workers + 1, dtype=np.int64)
+            with multiprocessing.get_context("fork").Pool(num_workers, initializer=_init_worker) as pool:
+                results = pool.map(_map_chunk, list(zip(bounds[:-1], bounds[1:])), chunksize=1)
+        finally:
+            _parallel_map_state = None
+            _parallel_map_lock.release()
+        return pd.concat(results)
 
     def df_like(self, df, proc_cols):
         # df argument unused for pandas, which can instantiate df directly
@@ -49,16 +113,16 @@ class PandasEngine(DataFrameEngine):
         return df
 
     def map_objects(self, series, map_fn, meta=None):
-        return series.map(map_fn)
+        return self._map_chunks(series, lambda chunk: chunk.map(map_fn))
 
     def map_batches(self, df, map_fn, enable_tensor_extension_casting=True):
         return map_fn(df)
 
     def map_partitions(self, series, map_fn, meta=None):
-        return map_fn(series)
+        return self._map_chunks(series, map_fn)
 
     def apply_objects(self, df, apply_fn, meta=None):
-        return df.apply(apply_fn, axis=1)
+        return self._map_chunks(df, lambda chunk: chunk.apply(apply_fn, axis=1))
 
     def reduce_objects(self, series, reduce_fn):
         return reduce_fn(series)
@@ -108,8 +172,15 @@ class PandasEngine(DataFrameEngine):
     def partitioned(self):
         return False
 
+    @property
+    def parallelism(self):
+        return self._parallelism
+
     def set_parallelism(self, parallelism):
-        pass
+        if parallelism is not None and parallelism > 1 and "fork" not in multiprocessing.get_all_start_methods():
+            logger.warning("Parallel pandas processing requires the fork start method, mapping serially instead.")
+            parallelism = None
+        self._parallelism = parallelism
 
 
 PANDAS = PandasEngine()
@@ -0,0 +1,244 @@
+#! /usr/bin/env python
+# Copyright (c) 2023 Predibase, Inc., 2020 Uber Technologies, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Pandas extension type storing a column of equally shaped arrays as one contiguous array.
+
+Processed features like dates, H3 cells and token sequences are vectors of the same length for every row. Stored as an
+object column, every row is a separate small `np.ndarray`, which costs a Python object per row, and a copy to stack them
+back into a matrix for batching. A `TensorArray` instead holds the matrix itself, while its rows still read as
+`np.ndarray`s, so code indexing or iterating the column keeps working.
+"""
+
+import numbers
+import re
+from typing import Any, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pandas.api.extensions import ExtensionArray, ExtensionDtype, register_extension_dtype
+from pandas.api.indexers import check_array_indexer
+
+from theflow.api_annotations import DeveloperAPI
+
+
+@DeveloperAPI
+@register_extension_dtype
+class TensorDtype(ExtensionDtype):
+    """Dtype of a `TensorArray` whose rows are arrays of `shape` and `subtype`, named e.g. `tensor[int16][9]`."""
+
+    type = np.ndarray
+    kind = "O"
+    _metadata = ("shape", "subtype")
+    _name_pattern = re.compile(r"^tensor\[(?P<subtype>\w+)\]\[(?P<shape>[\d, ]*)\]$")
+
+    def __init__(self, shape: Tuple[int, ...], subtype: np.dtype):
+        self.shape = tuple(int(d) for d in shape)
+        self.subtype = np.dtype(subtype)
+
+    @property
+    def name(self) -> str:
+        return f"tensor[{self.subtype}][{', '.join(str(d) for d in self.shape)}]"
+
+    @classmethod
+    def construct_from_string(cls, string: str) -> "TensorDtype":
+        if not isinstance(string, str):
+            raise TypeError(f"'construct_from_string' expects a string, got {type(string)}")
+        match = cls._name_pattern.match(string)
+        if match is None:
+            raise TypeError(f"Cannot construct a 'TensorDtype' from '{string}'")
+        shape = tuple(int(d) for d in match.group("shape").split(",") if d.strip())
+        return cls(shape, match.group("subtype"))
+
+    @classmethod
+    def construct_array_type(cls):
+        return TensorArray
+
+    def __from_arrow__(self, array) -> "TensorArray":
+        """Returns the `TensorArray` of a (chunked) pyarrow array of fixed size lists, e.g. read from parquet."""
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks() if array.num_chunks else pa.array([], type=array.type)
+        values = array
+        for _ in self.shape:
+            values = values.flatten()
+        values = values.to_numpy(zero_copy_only=False).astype(self.subtype, copy=False)
+        mask = array.is_null().to_numpy(zero_copy_only=False) if array.null_count else None
+        return TensorArray(values.reshape((len(array),) + self.shape), mask=mask)
+
+
+@DeveloperAPI
+class TensorArray(ExtensionArray):
+    """Column of equally shaped arrays, stored as a single array with one more leading dimension for the rows.
+
+    Missing rows, e.g. introduced when aligning columns of different indices, are tracked by a boolean mask.
+    """
+
+    def __init__(self, values: np.ndarray, mask: Optional[np.ndarray] = None):
+        values = np.asarray(values)
+        if values.ndim < 2:
+            raise ValueError(f"Expected an array of at least 2 dimensions, but found shape {values.shape}")
+        self._values = values
+        self._mask = mask if mask is not None and mask.any() else None
+        self._dtype = TensorDtype(values.shape[1:], values.dtype)
+
+    @classmethod
+    def _from_sequence(cls, scalars, *, dtype=None, copy: bool = False) -> "TensorArray":
+        if isinstance(scalars, TensorArray):
+            array = scalars.copy() if copy else scalars
+            if dtype is not None and dtype != array.dtype:
+                array = array.astype(dtype)
+            return array
+        if isinstance(dtype, str):
+            dtype = TensorDtype.construct_from_string(dtype)
+
+        rows = list(scalars)
+        mask = np.array([_is_missing(row) for row in rows], dtype=bool)
+        valid_rows = [np.asarray(row) for row, missing in zip(rows, mask) if not missing]
+        if dtype is None:
+            if not valid_rows:
+                raise ValueError("Cannot infer the shape of a TensorArray without any non-missing row")
+            shape, subtype = valid_rows[0].shape, np.result_type(*valid_rows)
+        else:
+            shape, subtype = dtype.shape, dtype.subtype
+
+        values = np.zeros((len(rows),) + shape, dtype=subtype)
+        if valid_rows:
+            values[~mask] = np.stack(valid_rows)
+        return cls(values, mask=mask)
+
+    @classmethod
+    def _from_factorized(cls, values, original: "TensorArray") -> "TensorArray":
+        return cls._from_sequence(values, dtype=original.dtype)
+
+    @classmethod
+    def _concat_same_type(cls, to_concat: Sequence["TensorArray"]) -> "TensorArray":
+        values = np.concatenate([array._values for array in to_concat])
+        mask = None
+        if any(array._mask is not None for array in to_concat):
+            mask = np.concatenate([array.isna() for array in to_concat])
+        return cls(values, mask=mask)
+
+    @property
+    def dtype(self) -> TensorDtype:
+        return self._dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self._values.nbytes + (self._mask.nbytes if self._mask is not None else 0)
+
+    @property
+    def tensor(self) -> np.ndarray:
+        """Returns the array of all the rows, without copying them."""
+        if self._mask is not None:
+            raise ValueError("Cannot get the tensor of a TensorArray with missing rows")
+        return self._values
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __getitem__(self, item):
+        if isinstance(item, numbers.Integral):
+            if self._mask is not None and self._mask[item]:
+                return self.dtype.na_value
+            return self._values[item]
+        item = check_array_indexer(self, item)
+        return TensorArray(self._values[item], mask=self._mask[item] if self._mask is not None else None)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other) -> np.ndarray:
+        if isinstance(other, (pd.Series, pd.Index, pd.DataFrame)):
+            return NotImplemented
+        other_values = other._values if isinstance(other, TensorArray) else np.asarray(other)
+        equal = self._values == other_values
+        return equal.reshape(len(self), -1).all(axis=1) & ~self.isna()
+
+    def __array__(self, dtype=None) -> np.ndarray:
+        # Rows are the elements of the column, as for an object column of arrays
+        rows = np.empty(len(self), dtype=object)
+        for i in range(len(self)):
+            rows[i] = self[i]
+        return rows if dtype is None else rows.astype(dtype)
+
+    def __arrow_array__(self, type=None) -> pa.Array:
+        """Returns the column as nested pyarrow fixed size lists, e.g. to write it to parquet."""
+        if self._mask is not None:
+            rows = [None if missing else row.tolist() for row, missing in zip(self._values, self._mask)]
+            return pa.array(rows, type=type)
+        array = pa.array(np.ascontiguousarray(self._values).reshape(-1))
+        for size in reversed(self.dtype.shape):
+            array = pa.FixedSizeListArray.from_arrays(array, size)
+        return array
+
+    def isna(self) -> np.ndarray:
+        if self._mask is None:
+            return np.zeros(len(self), dtype=bool)
+        return self._mask.copy()
+
+    def take(self, indices, allow_fill: bool = False, fill_value: Any = None) -> "TensorArray":
+        indices = np.asarray(indices, dtype=np.intp)
+        if not allow_fill:
+            return TensorArray(self._values[indices], mask=self._mask[indices] if self._mask is not None else None)
+
+        if fill_value is not None and not _is_missing(fill_value):
+            raise ValueError(f"Only missing values can be used to fill a TensorArray, but found {fill_value}")
+        if (indices < -1).any():
+            raise ValueError("Invalid value in 'indices': must be all >= -1 when 'allow_fill' is True")
+        fill = indices == -1
+        if len(self) == 0:
+            if not fill.all():
+                raise IndexError("cannot do a non-empty take from an empty axes.")
+            return TensorArray(np.zeros((len(indices),) + self.dtype.shape, dtype=self.dtype.subtype), mask=fill)
+        safe_indices = np.where(fill, 0, indices)
+        mask = fill | self.isna()[safe_indices]
+        return TensorArray(self._values[safe_indices], mask=mask)
+
+    def copy(self) -> "TensorArray":
+        return TensorArray(self._values.copy(), mask=self._mask.copy() if self._mask is not None else None)
+
+    def astype(self, dtype, copy: bool = True):
+        dtype = pd.api.types.pandas_dtype(dtype)
+        if isinstance(dtype, TensorDtype):
+            if dtype == self.dtype:
+                return self.copy() if copy else self
+            if dtype.shape != self.dtype.shape:
+                raise ValueError(f"Cannot cast a TensorArray of shape {self.dtype.shape} to shape {dtype.shape}")
+            return TensorArray(self._values.astype(dtype.subtype), mask=self._mask)
+        if isinstance(dtype, np.dtype) and dtype.kind in "OUS":
+            # Numpy would cast the elements of the rows instead of the rows themselves
+            rows = self.__array__()
+            return rows if dtype == object else np.array([str(row) for row in rows], dtype=dtype)
+        return super().astype(dtype, copy=copy)
+
+    def _values_for_factorize(self) -> Tuple[np.ndarray, Any]:
+        return np.array([tuple(row.reshape(-1)) for row in self._values], dtype=object), None
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (np.ndim(value) == 0 and pd.isna(value))
+
+
+@DeveloperAPI
+def to_tensor_series(values: np.ndarray, index: Optional[pd.Index] = None, name: Optional[str] = None) -> pd.Series:
+    """Returns a series of the rows of `values`, stored as a `TensorArray` without copying them."""
+    return pd.Series(TensorArray(values), index=index, name=name, copy=False)
+
+
+@DeveloperAPI
+def is_tensor_series(series: Any) -> bool:
+    """Returns whether the series is a column of arrays stored as a `TensorArray`."""
+    return isinstance(getattr(series, "dtype", None), TensorDtype)
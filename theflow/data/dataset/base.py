@@ -20,6 +20,8 @@ import contextlib
 from abc import ABC, abstractmethod
 from typing import Iterable
 
+import numpy as np
+
 from theflow.data.batcher.base import Batcher
 from theflow.distributed import DistributedStrategy
 from theflow.features.base_feature import BaseFeature
@@ -41,6 +43,8 @@ class Dataset(ABC):
         random_seed: int = default_random_seed,
         ignore_last: bool = False,
         distributed: DistributedStrategy = None,
+        bucketing_field: str | None = None,
+        bucketing_trim: bool = False,
     ) -> Batcher:
         raise NotImplementedError()
 
@@ -52,6 +56,11 @@ class Dataset(ABC):
     def to_scalar_df(self, features: Iterable[BaseFeature] | None = None) -> DataFrame:
         raise NotImplementedError()
 
+    def to_scalar_array(
+        self, features: Iterable[BaseFeature] | None = None, dtype: np.dtype = np.float32
+    ) -> tuple[np.ndarray, list[str]]:
+        raise NotImplementedError()
+
     @property
     def in_memory_size_bytes(self) -> int:
         raise NotImplementedError()
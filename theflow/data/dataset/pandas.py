@@ -17,22 +17,31 @@
 from __future__ import annotations
 
 import contextlib
+import copy
 from typing import Iterable, TYPE_CHECKING
 
 import numpy as np
 from pandas import DataFrame
 
-from theflow.constants import PREPROCESSING, TRAINING
+from theflow.constants import NAME, PREPROCESSING, SEQUENCE, TEXT, TRAINING, TYPE
 from theflow.data.batcher.base import Batcher
+from theflow.data.batcher.bucketed import BucketedBatcher, get_padding_idx, get_sequence_lengths
 from theflow.data.batcher.random_access import RandomAccessBatcher
 from theflow.data.dataset.base import Dataset, DatasetManager
+from theflow.data.hdf5_reader import HDF5Reader
 from theflow.data.sampler import DistributedSampler
 from theflow.distributed import DistributedStrategy
 from theflow.features.base_feature import BaseFeature
+from theflow.types import TrainingSetMetadataDict
 from theflow.utils.data_utils import DATA_TRAIN_HDF5_FP, load_hdf5, save_hdf5
-from theflow.utils.dataframe_utils import from_numpy_dataset, to_numpy_dataset, to_scalar_df
+from theflow.utils.dataframe_utils import (
+    from_numpy_dataset,
+    get_scalar_column_names,
+    to_numpy_dataset,
+    to_scalar_array,
+    to_scalar_df,
+)
 from theflow.utils.defaults import default_random_seed
-from theflow.utils.fs_utils import download_h5
 from theflow.utils.misc_utils import get_proc_features
 
 if TYPE_CHECKING:
@@ -40,24 +49,40 @@ if TYPE_CHECKING:
 
 
 class PandasDataset(Dataset):
-    def __init__(self, dataset, features, data_hdf5_fp):
+    def __init__(self, dataset, features, data_hdf5_fp, training_set_metadata: TrainingSetMetadataDict | None = None):
         self.features = features
+        # Used for the padding token ids of the sequence columns.
+        self.training_set_metadata = training_set_metadata or {}
         self.data_hdf5_fp = data_hdf5_fp
+        self._hdf5_reader = HDF5Reader(data_hdf5_fp) if data_hdf5_fp is not None else None
 
         if isinstance(dataset, str):
             dataset = load_hdf5(dataset)
         self.dataset = to_numpy_dataset(dataset)
         self.size = len(list(self.dataset.values())[0])
+        # Sequence lengths of the columns used for bucketing, computed once
+        self._sequence_lengths: dict[str, np.ndarray] = {}
 
     def to_df(self, features: Iterable[BaseFeature] | None = None) -> DataFrame:
         """Convert the dataset to a Pandas DataFrame."""
-        if features:
-            return from_numpy_dataset({feature.feature_name: self.dataset[feature.proc_column] for feature in features})
-        return from_numpy_dataset(self.dataset)
+        return from_numpy_dataset(self.get_columns(features))
 
     def to_scalar_df(self, features: Iterable[BaseFeature] | None = None) -> DataFrame:
         return to_scalar_df(self.to_df(features))
 
+    def to_scalar_array(
+        self, features: Iterable[BaseFeature] | None = None, dtype: np.dtype = np.float32
+    ) -> tuple[np.ndarray, list[str]]:
+        """Convert the dataset to a C-contiguous 2D array of the columns of `to_scalar_df`, with their names."""
+        columns = self.get_columns(features)
+        return to_scalar_array(columns, dtype=dtype), get_scalar_column_names(columns)
+
+    def get_columns(self, features: Iterable[BaseFeature] | None = None) -> dict[str, np.ndarray]:
+        """Returns the columns of the features keyed by feature name, or all the columns keyed by proc column."""
+        if features:
+            return {feature.feature_name: self.dataset[feature.proc_column] for feature in features}
+        return self.dataset
+
     def get(self, proc_column, idx=None):
         if idx is None:
             idx = range(self.size)
@@ -70,22 +95,36 @@ class PandasDataset(Dataset):
         if self.features[proc_column][PREPROCESSING]["in_memory"]:
             return self.dataset[proc_column][idx]
 
-        sub_batch = self.dataset[proc_column][idx]
-
-        indices = np.empty((3, len(sub_batch)), dtype=np.int64)
-        indices[0, :] = sub_batch
-        indices[1, :] = np.arange(len(sub_batch))
-        indices = indices[:, np.argsort(indices[0])]
-
-        with download_h5(self.data_hdf5_fp) as h5_file:
-            im_data = h5_file[proc_column + "_data"][indices[0, :], :, :]
-        indices[2, :] = np.arange(len(sub_batch))
-        indices = indices[:, np.argsort(indices[1])]
-        return im_data[indices[2, :]]
+        preprocessing = self.features[proc_column][PREPROCESSING]
+        return self._hdf5_reader.read(
+            proc_column + "_data",
+            self.dataset[proc_column][idx],
+            cache_size_bytes=int(preprocessing.get("hdf5_cache_size_mb", 0) * 1024 * 1024),
+            use_mmap=preprocessing.get("hdf5_mmap", False),
+        )
 
     def get_dataset(self) -> dict[str, np.ndarray]:
         return self.dataset
 
+    def get_sequence_lengths(self, proc_column: str) -> np.ndarray:
+        """Returns the number of non-padding tokens of each row of a text or sequence column."""
+        if proc_column not in self._sequence_lengths:
+            feature_metadata = self.training_set_metadata.get(self.features[proc_column][NAME], {})
+            self._sequence_lengths[proc_column] = get_sequence_lengths(
+                self.get(proc_column), padding_idx=get_padding_idx(feature_metadata)
+            )
+        return self._sequence_lengths[proc_column]
+
+    def take(self, indices: np.ndarray) -> PandasDataset:
+        """Returns a dataset made of the rows at `indices`, in that order."""
+        dataset = copy.copy(self)
+        dataset.dataset = {proc_column: values[indices] for proc_column, values in self.dataset.items()}
+        dataset.size = len(indices)
+        dataset._sequence_lengths = {
+            proc_column: lengths[indices] for proc_column, lengths in self._sequence_lengths.items()
+        }
+        return dataset
+
     def __len__(self):
         return self.size
 
@@ -107,26 +146,55 @@ class PandasDataset(Dataset):
         ignore_last: bool = False,
         distributed: DistributedStrategy = None,
         augmentation_pipeline=None,
+        bucketing_field: str | None = None,
+        bucketing_trim: bool = False,
     ) -> Batcher:
         sampler = DistributedSampler(
             len(self), shuffle=should_shuffle, random_seed=random_seed, distributed=distributed
         )
-        batcher = RandomAccessBatcher(
-            self,
-            sampler,
-            batch_size=batch_size,
-            ignore_last=ignore_last,
-            augmentation_pipeline=augmentation_pipeline,
-        )
+        if bucketing_field is None:
+            batcher = RandomAccessBatcher(
+                self,
+                sampler,
+                batch_size=batch_size,
+                ignore_last=ignore_last,
+                augmentation_pipeline=augmentation_pipeline,
+            )
+        else:
+            proc_column = self._get_bucketing_proc_column(bucketing_field)
+            batcher = BucketedBatcher(
+                self,
+                sampler,
+                bucketing_field=proc_column,
+                lengths=self.get_sequence_lengths(proc_column),
+                batch_size=batch_size,
+                ignore_last=ignore_last,
+                should_trim=bucketing_trim,
+                trim_side=self.features[proc_column][PREPROCESSING].get("padding", "right"),
+                augmentation_pipeline=augmentation_pipeline,
+            )
         yield batcher
 
+    def _get_bucketing_proc_column(self, bucketing_field: str) -> str:
+        for proc_column, feature in self.features.items():
+            if feature[NAME] == bucketing_field:
+                if feature[TYPE] not in {SEQUENCE, TEXT}:
+                    raise ValueError(
+                        f"Bucketing field '{bucketing_field}' must be a {SEQUENCE} or {TEXT} feature, "
+                        f"found {feature[TYPE]}"
+                    )
+                return proc_column
+        raise ValueError(f"Bucketing field '{bucketing_field}' is not a feature of the dataset")
+
 
 class PandasDatasetManager(DatasetManager):
     def __init__(self, backend: Backend):
         self.backend: Backend = backend
 
     def create(self, dataset, config, training_set_metadata) -> Dataset:
-        return PandasDataset(dataset, get_proc_features(config), training_set_metadata.get(DATA_TRAIN_HDF5_FP))
+        return PandasDataset(
+            dataset, get_proc_features(config), training_set_metadata.get(DATA_TRAIN_HDF5_FP), training_set_metadata
+        )
 
     def save(self, cache_path, dataset, config, training_set_metadata, tag) -> Dataset:
         save_hdf5(cache_path, dataset)
@@ -35,6 +35,7 @@ from theflow.api_annotations import DeveloperAPI
 from theflow.backend.base import Backend
 from theflow.constants import NAME
 from theflow.data.batcher.base import Batcher
+from theflow.data.dataframe.tensor_array import is_tensor_series
 from theflow.data.dataset.base import Dataset, DatasetManager
 from theflow.distributed import DistributedStrategy
 from theflow.features.base_feature import BaseFeature
@@ -49,6 +50,12 @@ from theflow.utils.types import DataFrame
 
 logger = logging.getLogger(__name__)
 
+
+def _warn_bucketing_unsupported(bucketing_field: Optional[str]):
+    if bucketing_field is not None:
+        logger.warning(f"Bucketing by '{bucketing_field}' is not supported by Ray datasets and will be ignored.")
+
+
 _ray_230 = version.parse(ray.__version__) >= version.parse("2.3.0")
 
 
@@ -138,7 +145,10 @@ class RayDataset(Dataset):
         ignore_last=False,
         distributed=None,
         augmentation_pipeline=None,
+        bucketing_field=None,
+        bucketing_trim=False,
     ):
+        _warn_bucketing_unsupported(bucketing_field)
         yield RayDatasetBatcher(
             self.ds.repeat().iter_datasets(),
             self.features,
@@ -276,7 +286,10 @@ class RayDatasetShard(Dataset):
         ignore_last: bool = False,
         distributed: DistributedStrategy = None,
         augmentation_pipeline=None,
+        bucketing_field: Optional[str] = None,
+        bucketing_trim: bool = False,
     ):
+        _warn_bucketing_unsupported(bucketing_field)
         yield RayDatasetBatcher(
             self.epoch_iter,
             self.features,
@@ -397,7 +410,9 @@ class RayDatasetBatcher(Batcher):
     def _prepare_batch(self, batch: pd.DataFrame) -> Dict[str, np.ndarray]:
         res = {}
         for c in self.columns:
-            if batch[c].values.dtype == "object":
+            if is_tensor_series(batch[c]):
+                res[c] = batch[c].array.tensor
+            elif batch[c].values.dtype == "object":
                 # Ensure columns stacked instead of turned into np.array([np.array, ...], dtype=object) objects
                 res[c] = np.stack(batch[c].values)
             else:
@@ -0,0 +1,245 @@
+#! /usr/bin/env python
+# Copyright (c) 2023 Predibase, Inc., 2019 Uber Technologies, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import logging
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import h5py
+import numpy as np
+from fsspec.core import split_protocol
+
+from theflow.api_annotations import DeveloperAPI
+from theflow.utils.fs_utils import get_fs_and_path, has_remote_protocol
+
+logger = logging.getLogger(__name__)
+
+# Target size of a cached block of rows when the HDF5 dataset is not chunked.
+DEFAULT_BLOCK_SIZE_BYTES = 1 << 20
+
+
+@DeveloperAPI
+class HDF5Reader:
+    """Persistent reader for the out-of-memory feature data stored in a preprocessed HDF5 file.
+
+    The file is opened once per process and kept open between batches. Remote files are downloaded once to a local
+    temporary directory for the lifetime of the reader. The handle is re-opened transparently after a fork, so a single
+    reader can be shared with worker processes.
+
+    Rows can be served from:
+        - a memory map of the file, when the dataset is stored contiguously and uncompressed,
+        - an LRU cache of row blocks (aligned to the HDF5 chunks when the dataset is chunked),
+        - coalesced contiguous range reads otherwise.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self._pid: Optional[int] = None
+        self._file: Optional[h5py.File] = None
+        self._local_path: Optional[str] = None
+        self._tmpdir: Optional[str] = None
+        self._memmaps: Dict[str, Optional[np.memmap]] = {}
+        self._caches: Dict[str, "_BlockCache"] = {}
+
+    def read(self, name: str, indices: np.ndarray, cache_size_bytes: int = 0, use_mmap: bool = False) -> np.ndarray:
+        """Returns the rows of dataset `name` at `indices`, in the order in which they are requested.
+
+        # Inputs
+        :param name: (str) name of the HDF5 dataset.
+        :param indices: (np.ndarray) row indices to read, may be unsorted and contain duplicates.
+        :param cache_size_bytes: (int) maximum size of the LRU block cache for this dataset, 0 disables caching.
+        :param use_mmap: (bool) whether to memory map the dataset when it is stored contiguously and uncompressed.
+
+        # Return
+        :return: (np.ndarray) array of shape `(len(indices),) + row_shape`.
+        """
+        h5_file = self._open()
+        dataset = h5_file[name]
+        indices = np.asarray(indices, dtype=np.int64)
+
+        if use_mmap:
+            memmap = self._get_memmap(name, dataset)
+            if memmap is not None:
+                return np.asarray(memmap[indices])
+
+        # h5py requires increasing, unique indices, so read each distinct row once and scatter afterwards.
+        unique_indices, inverse = np.unique(indices, return_inverse=True)
+        if cache_size_bytes > 0:
+            cache = self._get_cache(name, dataset, cache_size_bytes)
+            data = cache.read(dataset, unique_indices)
+        else:
+            data = read_coalesced(dataset, unique_indices)
+        return data[inverse]
+
+    def close(self):
+        if self._file is not None and self._pid == os.getpid():
+            self._file.close()
+            if self._tmpdir is not None:
+                shutil.rmtree(self._tmpdir, ignore_errors=True)
+        self._reset()
+
+    def __getstate__(self):
+        # Open handles and caches are process-local, they are re-created lazily after unpickling.
+        return {"url": self.url}
+
+    def __setstate__(self, state):
+        self.__init__(state["url"])
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def _reset(self):
+        self._pid = None
+        self._file = None
+        self._local_path = None
+        self._tmpdir = None
+        self._memmaps = {}
+        self._caches = {}
+
+    def _open(self) -> h5py.File:
+        if self._file is not None and self._pid == os.getpid():
+            return self._file
+
+        # Handles inherited from a parent process must not be used (or closed) by a forked child.
+        self._reset()
+        if has_remote_protocol(self.url):
+            self._tmpdir = tempfile.mkdtemp()
+            self._local_path = os.path.join(self._tmpdir, os.path.basename(self.url))
+            fs, path = get_fs_and_path(self.url)
+            fs.get(path, self._local_path)
+        else:
+            _, self._local_path = split_protocol(self.url)
+        self._file = h5py.File(self._local_path, "r")
+        self._pid = os.getpid()
+        return self._file
+
+    def _get_memmap(self, name: str, dataset: h5py.Dataset) -> Optional[np.memmap]:
+        if name not in self._memmaps:
+            self._memmaps[name] = None
+            offset = dataset.id.get_offset()
+            if dataset.chunks is None and dataset.compression is None and offset is not None:
+                self._memmaps[name] = np.memmap(
+                    self._local_path, dtype=dataset.dtype, mode="r", offset=offset, shape=dataset.shape
+                )
+            else:
+                logger.warning(
+                    f"HDF5 dataset `{name}` is chunked or compressed and cannot be memory mapped, "
+                    "falling back to regular reads."
+                )
+        return self._memmaps[name]
+
+    def _get_cache(self, name: str, dataset: h5py.Dataset, cache_size_bytes: int) -> "_BlockCache":
+        cache = self._caches.get(name)
+        if cache is None or cache.capacity_bytes != cache_size_bytes:
+            cache = _BlockCache(_get_block_rows(dataset), cache_size_bytes)
+            self._caches[name] = cache
+        return cache
+
+
+def _get_block_rows(dataset: h5py.Dataset) -> int:
+    if dataset.chunks is not None:
+        return dataset.chunks[0]
+    row_bytes = max(1, int(np.prod(dataset.shape[1:], dtype=np.int64)) * dataset.dtype.itemsize)
+    return max(1, DEFAULT_BLOCK_SIZE_BYTES // row_bytes)
+
+
+def get_contiguous_ranges(sorted_indices: np.ndarray) -> np.ndarray:
+    """Returns the `[start, stop)` bounds of the runs of consecutive values in `sorted_indices`, as a `(n, 2)`
+    array."""
+    if len(sorted_indices) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    breaks = np.flatnonzero(np.diff(sorted_indices) != 1) + 1
+    starts = sorted_indices[np.concatenate(([0], breaks))]
+    stops = sorted_indices[np.concatenate((breaks - 1, [len(sorted_indices) - 1]))] + 1
+    return np.stack([starts, stops], axis=1)
+
+
+def read_coalesced(dataset: h5py.Dataset, sorted_indices: np.ndarray) -> np.ndarray:
+    """Reads the rows at `sorted_indices` (increasing and unique) issuing one slice read per contiguous run."""
+    out = np.empty((len(sorted_indices),) + dataset.shape[1:], dtype=dataset.dtype)
+    pos = 0
+    for start, stop in get_contiguous_ranges(sorted_indices):
+        dataset.read_direct(out, source_sel=np.s_[start:stop], dest_sel=np.s_[pos : pos + stop - start])
+        pos += stop - start
+    return out
+
+
+class _BlockCache:
+    """LRU cache of fixed-size blocks of rows of a single HDF5 dataset, bounded in bytes."""
+
+    def __init__(self, block_rows: int, capacity_bytes: int):
+        self.block_rows = block_rows
+        self.capacity_bytes = capacity_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._blocks: "OrderedDict[int, np.ndarray]" = OrderedDict()
+
+    def read(self, dataset: h5py.Dataset, sorted_indices: np.ndarray) -> np.ndarray:
+        block_ids = sorted_indices // self.block_rows
+        needed_blocks = np.unique(block_ids)
+        blocks = self._get_blocks(dataset, needed_blocks)
+
+        out = np.empty((len(sorted_indices),) + dataset.shape[1:], dtype=dataset.dtype)
+        bounds = np.searchsorted(block_ids, needed_blocks, side="right")
+        start = 0
+        for block_id, stop in zip(needed_blocks.tolist(), bounds.tolist()):
+            out[start:stop] = blocks[block_id][sorted_indices[start:stop] - block_id * self.block_rows]
+            start = stop
+        return out
+
+    def _get_blocks(self, dataset: h5py.Dataset, block_ids: np.ndarray) -> Dict[int, np.ndarray]:
+        blocks = {}
+        missing = []
+        for block_id in block_ids.tolist():
+            block = self._blocks.get(block_id)
+            if block is None:
+                missing.append(block_id)
+            else:
+                self._blocks.move_to_end(block_id)
+                blocks[block_id] = block
+                self.hits += 1
+        self.misses += len(missing)
+
+        # Adjacent missing blocks are fetched with a single read.
+        for first, last in get_contiguous_ranges(np.asarray(missing, dtype=np.int64)):
+            start, stop = self._row_range(first, last, len(dataset))
+            data = dataset[start:stop]
+            for block_id in range(first, last):
+                block_start, block_stop = self._row_range(block_id, block_id + 1, len(dataset))
+                block = data[block_start - start : block_stop - start]
+                blocks[block_id] = block
+                self._put(block_id, block)
+        return blocks
+
+    def _row_range(self, first_block: int, last_block: int, num_rows: int) -> Tuple[int, int]:
+        return first_block * self.block_rows, min(last_block * self.block_rows, num_rows)
+
+    def _put(self, block_id: int, block: np.ndarray):
+        if block.nbytes > self.capacity_bytes:
+            return
+        # Copy so the cached block does not keep the whole coalesced read alive.
+        block = block.copy()
+        self._blocks[block_id] = block
+        self.size_bytes += block.nbytes
+        while self.size_bytes > self.capacity_bytes:
+            _, evicted = self._blocks.popitem(last=False)
+            self.size_bytes -= evicted.nbytes
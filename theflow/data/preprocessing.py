@@ -17,7 +17,7 @@ import contextlib
 import logging
 import warnings
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -55,8 +55,9 @@ from theflow.constants import (
     TYPE,
     VALIDATION,
 )
-from theflow.data.cache.manager import DatasetCache
+from theflow.data.cache.manager import ColumnCache, DatasetCache
 from theflow.data.cache.types import wrap
+from theflow.data.cache.util import calculate_column_checksum
 from theflow.data.concatenate_datasets import concatenate_df, concatenate_files, concatenate_splits
 from theflow.data.dataset.base import Dataset
 from theflow.data.prompt import format_input_with_prompt, index_column
@@ -77,6 +78,7 @@ from theflow.utils.data_utils import (
     DATA_TRAIN_PARQUET_FP,
     DATA_VALIDATION_PARQUET_FP,
     DATAFRAME_FORMATS,
+    DEFAULT_DATASET_CHUNK_SIZE,
     DICT_FORMATS,
     EXCEL_FORMATS,
     FEATHER_FORMATS,
@@ -87,6 +89,7 @@ from theflow.utils.data_utils import (
     HTML_FORMATS,
     JSON_FORMATS,
     JSONL_FORMATS,
+    load_dataset_chunks,
     ORC_FORMATS,
     override_in_memory_flag,
     PARQUET_FORMATS,
@@ -1242,6 +1245,21 @@ def build_dataset(
             feature_configs.append(feature)
             feature_hashes.add(feature[PROC_COLUMN])
 
+    # Features whose processed column is found in the column cache are not processed again
+    column_cache_keys = {}
+    cached_features = {}
+    if global_preprocessing_parameters.get("cache_columns") and mode == "training" and not df_engine.partitioned:
+        column_cache = backend.cache.get_column_cache()
+        feature_configs, cached_features, column_cache_keys = _load_cached_feature_columns(
+            config,
+            feature_configs,
+            dataset_df,
+            synthesized_dataset_cols,
+            metadata,
+            column_cache,
+            skip_save_processed_input,
+        )
+
     dataset_cols = {}
     for feature_config in feature_configs:
         col_name = feature_config[COLUMN]
@@ -1277,21 +1295,34 @@ def build_dataset(
     for callback in callbacks or []:
         callback.on_build_metadata_start(dataset_df, mode)
 
-    logger.debug("build metadata")
-    metadata: TrainingSetMetadataDict = build_metadata(
-        config, metadata, feature_name_to_preprocessing_parameters, dataset_cols, feature_configs, backend
-    )
+    # Text columns tokenized to build their vocabulary are not tokenized again to build their data.
+    with strings_utils.reuse_tokenized_columns():
+        logger.debug("build metadata")
+        metadata: TrainingSetMetadataDict = build_metadata(
+            config, metadata, feature_name_to_preprocessing_parameters, dataset_cols, feature_configs, backend
+        )
+        for feature_name, (feature_metadata, _) in cached_features.items():
+            metadata[feature_name] = feature_metadata
 
-    check_global_max_sequence_length_fits_prompt_template(metadata, global_preprocessing_parameters)
+        check_global_max_sequence_length_fits_prompt_template(metadata, global_preprocessing_parameters)
 
-    for callback in callbacks or []:
-        callback.on_build_metadata_end(dataset_df, mode)
+        for callback in callbacks or []:
+            callback.on_build_metadata_end(dataset_df, mode)
 
-    for callback in callbacks or []:
-        callback.on_build_data_start(dataset_df, mode)
+        for callback in callbacks or []:
+            callback.on_build_data_start(dataset_df, mode)
 
-    logger.debug("build data")
-    proc_cols = build_data(dataset_cols, feature_configs, metadata, backend, skip_save_processed_input)
+        logger.debug("build data")
+        proc_cols = build_data(dataset_cols, feature_configs, metadata, backend, skip_save_processed_input)
+
+    if column_cache_keys:
+        for feature_config in feature_configs:
+            key = column_cache_keys.get(feature_config[NAME])
+            if key is not None:
+                proc_column = feature_config[PROC_COLUMN]
+                column_cache.put(key, metadata[feature_config[NAME]], {proc_column: proc_cols[proc_column]})
+    for _, cached_proc_cols in cached_features.values():
+        proc_cols.update(cached_proc_cols)
 
     for callback in callbacks or []:
         callback.on_build_data_end(dataset_df, mode)
@@ -1471,6 +1502,46 @@ def merge_preprocessing(
     return merge_dict(global_preprocessing_parameters[feature_config[TYPE]], feature_config[PREPROCESSING])
 
 
+def _load_cached_feature_columns(
+    config: ModelConfigDict,
+    feature_configs: List[FeatureConfigDict],
+    dataset_df: DataFrame,
+    synthesized_dataset_cols: Dict[str, Series],
+    metadata: Optional[TrainingSetMetadataDict],
+    column_cache: ColumnCache,
+    skip_save_processed_input: bool,
+) -> Tuple[List[FeatureConfigDict], Dict[str, Tuple[Dict, Dict[str, Series]]], Dict[str, str]]:
+    """Looks up the metadata and processed column of each feature in the column cache.
+
+    Returns the configs of the features that still need to be processed, the cached metadata and processed columns of
+    the other features by feature name, and the cache keys under which the processed features should be stored.
+    """
+    metadata = metadata or {}
+    uncached_feature_configs = []
+    cached_features = {}
+    column_cache_keys = {}
+    for feature_config in feature_configs:
+        feature_name = feature_config[NAME]
+        if feature_name in metadata:
+            # Metadata computed elsewhere takes precedence over the cache
+            uncached_feature_configs.append(feature_config)
+            continue
+
+        col_name = feature_config[COLUMN]
+        column = synthesized_dataset_cols[col_name] if col_name in synthesized_dataset_cols else dataset_df[col_name]
+        key = calculate_column_checksum(column, feature_config, config, skip_save_processed_input)
+        cached = column_cache.get(key) if key is not None else None
+        if cached is not None:
+            cached_features[feature_name] = cached
+        else:
+            uncached_feature_configs.append(feature_config)
+            if key is not None:
+                column_cache_keys[feature_name] = key
+
+    logger.info(f"Loaded {len(cached_features)} of {len(feature_configs)} processed feature columns from the cache")
+    return uncached_feature_configs, cached_features, column_cache_keys
+
+
 def build_preprocessing_parameters(
     dataset_cols: Dict[str, Series],
     feature_configs: List[FeatureConfigDict],
@@ -2368,6 +2439,53 @@ def preprocess_for_prediction(
     return dataset, training_set_metadata
 
 
+def preprocess_for_prediction_in_chunks(
+    config,
+    dataset,
+    training_set_metadata,
+    data_format=None,
+    chunk_size=DEFAULT_DATASET_CHUNK_SIZE,
+    include_outputs=True,
+    backend=LOCAL_BACKEND,
+    callbacks=None,
+) -> Iterator[Tuple[Dataset, TrainingSetMetadataDict]]:
+    """Reads and preprocesses the dataset chunk after chunk, so that only one chunk is held in memory at once.
+
+    Args:
+        config: Config dictionary corresponding to The Flow Model
+        dataset: Dataset to be processed
+        training_set_metadata: Train set metadata for the input features, used to preprocess every chunk
+        data_format: Format of the data
+        chunk_size: Maximum number of rows of every chunk
+        include_outputs: Whether to include outputs
+        backend: Type of backend to use for preprocessing
+        callbacks: Any callbacks passed in
+
+    Returns:
+        Iterator of processed datasets of every chunk along with updated training set metadata
+    """
+    if dataset is None:
+        raise ValueError("No training data is provided!")
+    if training_set_metadata is None:
+        raise ValueError("Training set metadata is required to preprocess a dataset in chunks")
+    if isinstance(training_set_metadata, str):
+        training_set_metadata = load_metadata(training_set_metadata)
+
+    # preload theflow and HF datasets
+    dataset, _, _, _ = load_dataset_uris(dataset, None, None, None, backend)
+    for chunk in load_dataset_chunks(dataset, data_format=data_format, chunk_size=chunk_size):
+        yield preprocess_for_prediction(
+            config,
+            dataset=chunk,
+            training_set_metadata=training_set_metadata,
+            data_format="df",
+            split=FULL,
+            include_outputs=include_outputs,
+            backend=backend,
+            callbacks=callbacks,
+        )
+
+
 def _get_cache_hit_message(cache: DatasetCache) -> str:
     return (
         "Found cached dataset and meta.json with the same filename of the dataset.\n"
@@ -1,3 +1,4 @@
+import hashlib
 import json
 import logging
 import os
@@ -12,6 +13,7 @@ if TYPE_CHECKING:
 from theflow.models.retrieval import df_checksum, get_retrieval_model, RetrievalModel
 from theflow.utils.fs_utils import get_default_cache_location, makedirs, path_exists
 from theflow.utils.types import DataFrame, Series
+from theflow.vector_index import FAISS
 
 logger = logging.getLogger(__name__)
 
@@ -80,6 +82,9 @@ def index_column(
     retrieval_model = get_retrieval_model(
         retrieval_config["type"],
         model_name=retrieval_config["model_name"],
+        embedding_cache_directory=os.path.join(get_default_cache_location(), "embeddings"),
+        index_type=retrieval_config.get("index_type", FAISS),
+        index_parameters=retrieval_config.get("index_parameters"),
     )
 
     index_name = retrieval_config["index_name"]
@@ -100,6 +105,10 @@ def index_column(
         # If it does, load it and return immediately
         index_hash = df_checksum(df)
         index_name = f"embedding_index_{index_hash}"
+        if retrieval_config.get("index_type", FAISS) != FAISS:
+            # Approximate indices built with different parameters must not be loaded in place of each other.
+            index_spec = json.dumps([retrieval_config["index_type"], retrieval_config.get("index_parameters")])
+            index_name += f"_{hashlib.sha1(index_spec.encode('utf-8')).hexdigest()}"
         if path_exists(os.path.join(index_cache_directory, index_name)):
             logger.info(
                 f"Index for this DataFrame with name '{index_name}' already exists. "
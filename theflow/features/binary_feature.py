@@ -269,6 +269,7 @@ class BinaryOutputFeature(BinaryFeatureMixin, OutputFeature):
         **kwargs,
     ):
         self.threshold = output_feature_config.threshold
+        self.num_metric_bins = output_feature_config.num_metric_bins
         super().__init__(output_feature_config, output_features, **kwargs)
         self.decoder_obj = self.initialize_decoder(output_feature_config.decoder)
         self._setup_loss()
@@ -394,4 +395,4 @@ class BinaryOutputFeature(BinaryFeatureMixin, OutputFeature):
 
     def metric_kwargs(self) -> dict:
         """Returns arguments that are used to instantiate an instance of each metric class."""
-        return {"task": "binary"}
+        return {"task": "binary", "num_metric_bins": self.num_metric_bins}
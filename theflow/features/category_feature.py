@@ -14,9 +14,10 @@
 # limitations under the License.
 # ==============================================================================
 import logging
-from typing import Any, Dict, List, Union
+from typing import Dict, List, Union
 
 import numpy as np
+import pandas as pd
 import torch
 
 from theflow.constants import (
@@ -50,6 +51,7 @@ from theflow.types import (
     TrainingSetMetadataDict,
 )
 from theflow.utils import calibration, output_feature_utils
+from theflow.utils.dataframe_utils import to_numpy_dataset
 from theflow.utils.eval_utils import ConfusionMatrix
 from theflow.utils.math_utils import int_type, softmax
 from theflow.utils.strings_utils import create_vocabulary_single_token, UNKNOWN_SYMBOL
@@ -194,45 +196,49 @@ class CategoryFeatureMixin(BaseFeatureMixin):
 
     @staticmethod
     def feature_data(backend, column, metadata):
-        def __replace_token_with_idx(value: Any, metadata: TrainingSetMetadataDict, fallback_symbol_idx: int) -> int:
-            stripped_value = value.strip()
-            if stripped_value in metadata["str2idx"]:
-                return metadata["str2idx"][stripped_value]
-            logger.warning(
-                f"""
-                Encountered unknown symbol '{stripped_value}' for '{column.name}' during category
-                feature preprocessing. This should never happen during training. If this happens during
-                inference, this may be an indication that not all possible symbols were present in your
-                training set. Consider re-splitting your data to ensure full representation, or setting
-                preprocessing.most_common parameter to be smaller than this feature's total vocabulary
-                size, {len(metadata["str2idx"])}, which will ensure that the model is architected and
-                trained with an UNKNOWN symbol. Returning the index for the most frequent symbol,
-                {metadata["idx2str"][fallback_symbol_idx]}, instead.
-                """
-            )
-            return fallback_symbol_idx
+        str2idx = metadata["str2idx"]
+        # Values are looked up all at once in the hash table of an index of the vocabulary
+        vocab = pd.Index(list(str2idx.keys()))
+        vocab_idx = np.fromiter(str2idx.values(), dtype=np.int64, count=len(str2idx))
 
         # No unknown symbol in Metadata from preprocessing means that all values
         # should be mappable to vocabulary
-        if UNKNOWN_SYMBOL not in metadata["str2idx"]:
+        if UNKNOWN_SYMBOL not in str2idx:
             # If no unknown is defined, just use the most popular token's index as the fallback index
             most_popular_token = max(metadata["str2freq"], key=metadata["str2freq"].get)
-            most_popular_token_idx = metadata["str2idx"].get(most_popular_token)
-            return backend.df_engine.map_objects(
-                column,
-                lambda x: __replace_token_with_idx(x, metadata, most_popular_token_idx),
-                meta=(column.name, int),
-            ).astype(int_type(metadata["vocab_size"]))
+            fallback_symbol_idx = str2idx.get(most_popular_token)
+            warn_unknown = True
         else:
-            return backend.df_engine.map_objects(
-                column,
-                lambda x: (
-                    metadata["str2idx"][x.strip()]
-                    if x.strip() in metadata["str2idx"]
-                    else metadata["str2idx"][UNKNOWN_SYMBOL]
-                ),
-                meta=(column.name, int),
-            ).astype(int_type(metadata["vocab_size"]))
+            fallback_symbol_idx = str2idx[UNKNOWN_SYMBOL]
+            warn_unknown = False
+
+        def __replace_tokens_with_idx(values: pd.Series) -> pd.Series:
+            stripped_values = values.str.strip()
+            positions = vocab.get_indexer(stripped_values)
+            unknown = positions == -1
+            if warn_unknown and unknown.any():
+                for stripped_value in stripped_values[unknown].unique():
+                    logger.warning(
+                        f"""
+                        Encountered unknown symbol '{stripped_value}' for '{column.name}' during category
+                        feature preprocessing. This should never happen during training. If this happens during
+                        inference, this may be an indication that not all possible symbols were present in your
+                        training set. Consider re-splitting your data to ensure full representation, or setting
+                        preprocessing.most_common parameter to be smaller than this feature's total vocabulary
+                        size, {len(str2idx)}, which will ensure that the model is architected and
+                        trained with an UNKNOWN symbol. Returning the index for the most frequent symbol,
+                        {metadata["idx2str"][fallback_symbol_idx]}, instead.
+                        """
+                    )
+            return pd.Series(
+                np.where(unknown, fallback_symbol_idx, vocab_idx[positions]), index=values.index, name=values.name
+            )
+
+        return backend.df_engine.map_partitions(
+            column,
+            __replace_tokens_with_idx,
+            meta=(column.name, int),
+        ).astype(int_type(metadata["vocab_size"]))
 
     @staticmethod
     def add_feature_data(
@@ -332,6 +338,8 @@ class CategoryOutputFeature(CategoryFeatureMixin, OutputFeature):
     ):
         self.num_classes = output_feature_config.num_classes
         self.top_k = output_feature_config.top_k
+        self.num_metric_bins = output_feature_config.num_metric_bins
+        self.per_class_probabilities = output_feature_config.per_class_probabilities
 
         # TODO(travis): make this more general to other cumulative loss functions
         self.use_cumulative_probs = isinstance(output_feature_config.loss, CORNLossConfig)
@@ -383,7 +391,7 @@ class CategoryOutputFeature(CategoryFeatureMixin, OutputFeature):
         return torch.Size([1])
 
     def metric_kwargs(self):
-        return {"top_k": self.top_k, "num_classes": self.num_classes}
+        return {"top_k": self.top_k, "num_classes": self.num_classes, "num_metric_bins": self.num_metric_bins}
 
     @staticmethod
     def update_config_with_metadata(feature_config, feature_metadata, *args, **kwargs):
@@ -499,26 +507,35 @@ class CategoryOutputFeature(CategoryFeatureMixin, OutputFeature):
                 predictions[predictions_col] = predictions[predictions_col].map(lambda pred: metadata["idx2str"][pred])
 
         probabilities_col = f"{self.feature_name}_{PROBABILITIES}"
+        top_k_col = f"{self.feature_name}_predictions_top_k"
         if probabilities_col in predictions:
             prob_col = f"{self.feature_name}_{PROBABILITY}"
-            predictions[prob_col] = predictions[probabilities_col].map(max)
-            predictions[probabilities_col] = predictions[probabilities_col].map(lambda pred: pred.tolist())
+            # Rows of probabilities stacked into a single matrix, sliced by column instead of indexed per row
+            probabilities = to_numpy_dataset(predictions[[probabilities_col]])[probabilities_col]
+            if len(probabilities) == 0:
+                probabilities = np.zeros((0, len(metadata.get("idx2str", []))), dtype=np.float32)
+            predictions[prob_col] = probabilities.max(axis=1, initial=-np.inf)
+            predictions[probabilities_col] = pd.Series(probabilities.tolist(), index=predictions.index, dtype=object)
             if "idx2str" in metadata:
-                for i, label in enumerate(metadata["idx2str"]):
-                    key = f"{probabilities_col}_{label}"
-
-                    # Use default param to force a capture before the loop completes, see:
-                    # https://stackoverflow.com/questions/2295290/what-do-lambda-function-closures-capture
-                    predictions[key] = predictions[probabilities_col].map(
-                        lambda prob, i=i: prob[i],
+                if self.per_class_probabilities:
+                    # Same float64 values as the elements of the probabilities lists
+                    class_probabilities = pd.DataFrame(
+                        np.asarray(probabilities, dtype=np.float64),
+                        columns=[f"{probabilities_col}_{label}" for label in metadata["idx2str"]],
+                        index=predictions.index,
                     )
+                    predictions = pd.concat([predictions, class_probabilities], axis=1)
+                elif len(predictions):
+                    # Indices of the top k probabilities, in decreasing order, mapped to their labels below
+                    top_k = min(self.top_k, probabilities.shape[1])
+                    top_k_idx = np.argpartition(-probabilities, top_k - 1, axis=1)[:, :top_k]
+                    order = np.argsort(-np.take_along_axis(probabilities, top_k_idx, axis=1), axis=1, kind="stable")
+                    predictions[top_k_col] = list(np.take_along_axis(top_k_idx, order, axis=1))
 
-        top_k_col = f"{self.feature_name}_predictions_top_k"
         if top_k_col in predictions:
             if "idx2str" in metadata:
-                predictions[top_k_col] = predictions[top_k_col].map(
-                    lambda pred_top_k: [metadata["idx2str"][pred] for pred in pred_top_k]
-                )
+                labels = np.asarray(metadata["idx2str"], dtype=object)
+                predictions[top_k_col] = predictions[top_k_col].map(lambda pred_top_k: labels[pred_top_k].tolist())
 
         return predictions
 
@@ -18,9 +18,11 @@ from datetime import date, datetime
 from typing import Dict, List
 
 import numpy as np
+import pandas as pd
 import torch
 
 from theflow.constants import COLUMN, DATE, PROC_COLUMN
+from theflow.data.dataframe.tensor_array import to_tensor_series
 from theflow.features.base_feature import BaseFeatureMixin, InputFeature
 from theflow.schema.features.date_feature import DateInputFeatureConfig
 from theflow.types import (
@@ -30,7 +32,12 @@ from theflow.types import (
     PreprocessingConfigDict,
     TrainingSetMetadataDict,
 )
-from theflow.utils.date_utils import create_vector_from_datetime_obj, parse_datetime
+from theflow.utils.date_utils import (
+    create_vector_from_datetime_obj,
+    create_vectors_from_datetimes,
+    parse_datetime,
+    parse_datetime_column,
+)
 from theflow.utils.types import DataFrame, TorchscriptPreprocessingInput
 
 logger = logging.getLogger(__name__)
@@ -103,6 +110,24 @@ class DateFeatureMixin(BaseFeatureMixin):
 
         return create_vector_from_datetime_obj(datetime_obj)
 
+    @staticmethod
+    def dates_to_matrix(column: pd.Series, datetime_format, preprocessing_parameters, backend) -> np.ndarray:
+        """Returns the vectors of `date_to_list` of the column as the rows of a matrix.
+
+        Values are parsed and encoded columnwise, and only the values that cannot be parsed this way are encoded one by
+        one with `date_to_list`.
+        """
+        datetimes = parse_datetime_column(column, datetime_format)
+        parsed = datetimes.notna().to_numpy()
+        dates = np.empty((len(column), DATE_VECTOR_LENGTH), dtype=np.int16)
+        dates[parsed] = create_vectors_from_datetimes(datetimes[parsed]).astype(np.int16)
+        if not parsed.all():
+            date_lists = backend.df_engine.map_objects(
+                column[~parsed], lambda x: DateFeatureMixin.date_to_list(x, datetime_format, preprocessing_parameters)
+            )
+            dates[~parsed] = np.array(date_lists.to_list(), dtype=np.int16).reshape(-1, DATE_VECTOR_LENGTH)
+        return dates
+
     @staticmethod
     def add_feature_data(
         feature_config: FeatureConfigDict,
@@ -114,8 +139,17 @@ class DateFeatureMixin(BaseFeatureMixin):
         skip_save_processed_input: bool,
     ) -> None:
         datetime_format = preprocessing_parameters["datetime_format"]
+        column = input_df[feature_config[COLUMN]]
+        if isinstance(column, pd.Series):
+            # Stored as a single matrix rather than one array per row
+            proc_df[feature_config[PROC_COLUMN]] = to_tensor_series(
+                DateFeatureMixin.dates_to_matrix(column, datetime_format, preprocessing_parameters, backend),
+                index=column.index,
+            )
+            return proc_df
+
         proc_df[feature_config[PROC_COLUMN]] = backend.df_engine.map_objects(
-            input_df[feature_config[COLUMN]],
+            column,
             lambda x: np.array(
                 DateFeatureMixin.date_to_list(x, datetime_format, preprocessing_parameters), dtype=np.int16
             ),
@@ -16,13 +16,15 @@ import logging
 from typing import List
 
 import numpy as np
+import pandas as pd
 import torch
 
 from theflow.constants import COLUMN, H3, PROC_COLUMN
+from theflow.data.dataframe.tensor_array import to_tensor_series
 from theflow.features.base_feature import BaseFeatureMixin, InputFeature
 from theflow.schema.features.h3_feature import H3InputFeatureConfig
 from theflow.types import FeatureMetadataDict, ModelConfigDict, PreprocessingConfigDict, TrainingSetMetadataDict
-from theflow.utils.h3_util import h3_to_components
+from theflow.utils.h3_util import h3_array_to_matrix, h3_tensor_to_matrix, h3_to_components
 from theflow.utils.types import TorchscriptPreprocessingInput
 
 logger = logging.getLogger(__name__)
@@ -47,22 +49,7 @@ class _H3Preprocessing(torch.nn.Module):
             raise ValueError(f"Unsupported input: {v}")
 
         v = torch.nan_to_num(v, nan=self.computed_fill_value)
-        v = v.long()
-
-        outputs: List[torch.Tensor] = []
-        for v_i in v:
-            components = h3_to_components(v_i)
-            header: List[int] = [
-                components.mode,
-                components.edge,
-                components.resolution,
-                components.base_cell,
-            ]
-            cells_padding: List[int] = [self.h3_padding_value] * (self.max_h3_resolution - len(components.cells))
-            output = torch.tensor(header + components.cells + cells_padding, dtype=torch.uint8, device=v.device)
-            outputs.append(output)
-
-        return torch.stack(outputs)
+        return h3_tensor_to_matrix(v, self.max_h3_resolution, self.h3_padding_value)
 
 
 class H3FeatureMixin(BaseFeatureMixin):
@@ -106,10 +93,18 @@ class H3FeatureMixin(BaseFeatureMixin):
         skip_save_processed_input,
     ):
         column = input_df[feature_config[COLUMN]]
+        if isinstance(column, pd.Series):
+            if column.dtype == object:
+                # Only the 64 bits of the index are decoded
+                column = backend.df_engine.map_objects(column, lambda x: int(x) & 0xFFFFFFFFFFFFFFFF)
+            # Decoded all at once, and stored as a single matrix rather than one array per row
+            cells = h3_array_to_matrix(column.to_numpy(dtype=np.uint64), MAX_H3_RESOLUTION, H3_PADDING_VALUE)
+            proc_df[feature_config[PROC_COLUMN]] = to_tensor_series(cells, index=column.index)
+            return proc_df
+
         if column.dtype == object:
             column = backend.df_engine.map_objects(column, int)
         column = backend.df_engine.map_objects(column, H3FeatureMixin.h3_to_list)
-
         proc_df[feature_config[PROC_COLUMN]] = backend.df_engine.map_objects(
             column, lambda x: np.array(x, dtype=np.uint8)
         )
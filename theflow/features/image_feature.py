@@ -19,7 +19,9 @@ import warnings
 from collections import Counter
 from dataclasses import dataclass
 from functools import partial
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from itertools import islice
+from multiprocessing.pool import Pool
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import numpy as np
 import torch
@@ -98,6 +100,9 @@ from theflow.utils.types import Series, TorchscriptPreprocessingInput
 IMAGENET1K_MEAN = [0.485, 0.456, 0.406]
 IMAGENET1K_STD = [0.229, 0.224, 0.225]
 
+# upper bound on the size of a batch of decoded images held in memory while writing in_memory: false features
+IMAGE_HDF5_WRITE_BATCH_BYTES = 256 * 1024 * 1024
+
 
 logger = logging.getLogger(__name__)
 
@@ -562,6 +567,56 @@ class ImageFeatureMixin(BaseFeatureMixin):
 
         return img.numpy()
 
+    @staticmethod
+    def _write_images_to_hdf5(
+        image_dataset,
+        img_entries: Iterable,
+        read_image_fn: Callable,
+        default_image: np.ndarray,
+        num_processes: int,
+        feature_name: str,
+    ) -> int:
+        """Decodes the images in `img_entries` and writes them to `image_dataset` in order, one batch of rows at a
+        time.
+
+        With `num_processes > 1` images are decoded by a process pool while the previous batch is written, so at most
+        two batches are held in memory. Batches are aligned to the HDF5 chunks so that each chunk is written (and
+        compressed) once. Images that cannot be read are replaced by `default_image`.
+
+        :return: the number of images that could not be read.
+        """
+        row_bytes = int(np.prod(image_dataset.shape[1:])) * image_dataset.dtype.itemsize
+        batch_size = max(1, IMAGE_HDF5_WRITE_BATCH_BYTES // max(1, row_bytes))
+        if image_dataset.chunks is not None:
+            chunk_rows = image_dataset.chunks[0]
+            batch_size = max(1, batch_size // chunk_rows) * chunk_rows
+
+        entries_it = iter(img_entries)
+        entry_batches = iter(lambda: list(islice(entries_it, batch_size)), [])
+
+        num_failed_image_reads = 0
+        start = 0
+        pool = Pool(num_processes, initializer=_init_image_preprocessing_worker) if num_processes > 1 else None
+        try:
+            for entries, images in _decode_image_batches(entry_batches, read_image_fn, pool):
+                batch = np.empty((len(images),) + image_dataset.shape[1:], dtype=image_dataset.dtype)
+                for i, (img_entry, res) in enumerate(zip(entries, images)):
+                    if isinstance(res, np.ndarray):
+                        batch[i] = res
+                    else:
+                        logger.warning(
+                            f"Failed to read image {img_entry} while preprocessing feature `{feature_name}`. "
+                        )
+                        batch[i] = default_image
+                        num_failed_image_reads += 1
+                image_dataset[start : start + len(batch)] = batch
+                start += len(batch)
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+        return num_failed_image_reads
+
     @staticmethod
     def _read_image_with_pretrained_transform(
         img_entry: Union[bytes, torch.Tensor, np.ndarray],
@@ -980,19 +1035,24 @@ class ImageFeatureMixin(BaseFeatureMixin):
             num_failed_image_reads = 0
 
             data_fp = backend.cache.get_cache_path(wrap(metadata.get(SRC)), metadata.get(CHECKSUM), TRAINING)
+            image_shape = (num_images, num_channels, height, width)
+            chunk_rows = preprocessing_parameters.get("hdf5_chunk_rows")
             with upload_h5(data_fp) as h5_file:
-                # todo future add multiprocessing/multithreading
                 image_dataset = h5_file.create_dataset(
-                    feature_config[PROC_COLUMN] + "_data", (num_images, num_channels, height, width), dtype=np.float32
+                    feature_config[PROC_COLUMN] + "_data",
+                    image_shape,
+                    dtype=np.float32,
+                    chunks=(min(chunk_rows, num_images),) + image_shape[1:] if chunk_rows and num_images else None,
+                    compression=preprocessing_parameters.get("hdf5_compression"),
+                )
+                num_failed_image_reads = ImageFeatureMixin._write_images_to_hdf5(
+                    image_dataset,
+                    abs_path_column,
+                    read_image_if_bytes_obj_and_resize,
+                    default_image,
+                    num_processes=preprocessing_parameters.get("num_processes", 1),
+                    feature_name=name,
                 )
-                for i, img_entry in enumerate(abs_path_column):
-                    res = read_image_if_bytes_obj_and_resize(img_entry)
-                    if isinstance(res, np.ndarray):
-                        image_dataset[i, :height, :width, :] = res
-                    else:
-                        logger.warning(f"Failed to read image {img_entry} while preprocessing feature `{name}`. ")
-                        image_dataset[i, :height, :width, :] = default_image
-                        num_failed_image_reads += 1
                 h5_file.flush()
 
             proc_df[feature_config[PROC_COLUMN]] = np.arange(num_images)
@@ -1006,6 +1066,31 @@ class ImageFeatureMixin(BaseFeatureMixin):
         return proc_df
 
 
+def _init_image_preprocessing_worker():
+    # Parallelism comes from the pool, avoid oversubscribing the cores with intra-op threads.
+    torch.set_num_threads(1)
+
+
+def _decode_image_batches(
+    entry_batches: Iterator[List], read_image_fn: Callable, pool: Optional[Pool]
+) -> Iterator[Tuple[List, List[Optional[np.ndarray]]]]:
+    """Yields `(entries, images)` for each batch of entries, decoding the next batch in `pool` while the caller
+    consumes the current one."""
+    if pool is None:
+        for entries in entry_batches:
+            yield entries, [read_image_fn(img_entry) for img_entry in entries]
+        return
+
+    pending = None
+    for entries in entry_batches:
+        result = pool.map_async(read_image_fn, entries)
+        if pending is not None:
+            yield pending[0], pending[1].get()
+        pending = (entries, result)
+    if pending is not None:
+        yield pending[0], pending[1].get()
+
+
 class ImageInputFeature(ImageFeatureMixin, InputFeature):
     def __init__(self, input_feature_config: ImageInputFeatureConfig, encoder_obj=None, **kwargs):
         super().__init__(input_feature_config, **kwargs)
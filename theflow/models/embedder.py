@@ -6,6 +6,7 @@ import torch
 
 from theflow.api_annotations import DeveloperAPI
 from theflow.constants import ENCODER_OUTPUT, MODEL_ECD, NAME, PROC_COLUMN, TYPE
+from theflow.data.dataframe.tensor_array import is_tensor_series
 from theflow.features.feature_registries import get_input_type_registry
 from theflow.features.feature_utils import The FlowFeatureDict
 from theflow.models.base import BaseModel
@@ -123,7 +124,9 @@ def _prepare_batch(
     batch = {}
     for feature in features:
         c = feature[PROC_COLUMN]
-        if df[c].values.dtype == "object":
+        if is_tensor_series(df[c]):
+            batch[c] = df[c].array.tensor
+        elif df[c].values.dtype == "object":
             # Ensure columns stacked instead of turned into np.array([np.array, ...], dtype=object) objects
             batch[c] = np.stack(df[c].values)
         else:
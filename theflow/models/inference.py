@@ -1,12 +1,13 @@
 import logging
 import os
-from typing import Any, Dict, Optional, TYPE_CHECKING, Union
+import threading
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING, Union
 
 import pandas as pd
 import torch
 from torch import nn
 
-from theflow.constants import NAME, POSTPROCESSOR, PREDICTOR, PREPROCESSOR, TYPE
+from theflow.constants import COLUMN, NAME, NUMBER, POSTPROCESSOR, PREDICTOR, PREPROCESSOR, TYPE
 from theflow.data.postprocessing import convert_dict_to_df
 from theflow.data.preprocessing import load_metadata
 from theflow.features.feature_registries import get_input_type_registry
@@ -144,6 +145,58 @@ class InferenceModule(nn.Module):
         )
 
 
+class InferencePipeline:
+    """Predicts on raw inputs by running them through the stages of an `InferenceModule`.
+
+    This skips the dataset building, metadata and batcher setup of `The FlowModel.predict`, which dominate the latency
+    of small requests. The preprocessor and postprocessor stages run on CPU in the calling thread, so concurrent
+    callers preprocess in parallel while the predictor stage, which may live on another device, runs one batch at a
+    time.
+
+    The output columns are those of the torchscript postprocessors, e.g. `<feature>_predictions` and
+    `<feature>_probabilities`, which is a subset of the columns returned by `The FlowModel.predict`.
+    """
+
+    def __init__(self, inference_module: InferenceModule):
+        self.inference_module = inference_module
+        self.config = inference_module.config
+        self._number_columns = [f[COLUMN] for f in self.config["input_features"] if f[TYPE] == NUMBER]
+        self._predictor_lock = threading.Lock()
+
+    def predict(
+        self,
+        dataset: Union[pd.DataFrame, Dict[str, List[Any]], List[Dict[str, Any]]],
+        data_format: Optional[Any] = None,
+    ) -> Tuple[pd.DataFrame, None]:
+        """Predicts on a batch of raw inputs with an interface similar to The FlowModel.predict.
+
+        # Inputs
+
+        :param dataset: (Union[pd.DataFrame, Dict[str, List[Any]], List[Dict[str, Any]]]) the raw inputs, either a
+            DataFrame, a dict of columns or a list of records. Image and audio inputs may be file paths or tensors.
+        :param data_format: ignored, accepted for compatibility with `The FlowModel.predict`.
+
+        # Return
+
+        :return: (Tuple[pd.DataFrame, None]) the predictions and `None` in place of the output directory.
+        """
+        if not isinstance(dataset, pd.DataFrame):
+            dataset = pd.DataFrame(dataset)
+        for column in self._number_columns:
+            # Request payloads (e.g. form fields) carry numbers as strings.
+            if dataset[column].dtype == object:
+                dataset[column] = pd.to_numeric(dataset[column])
+
+        inputs = to_inference_module_input_from_dataframe(dataset, self.config, load_paths=True)
+        preproc_inputs = self.inference_module.preprocessor_forward(inputs)
+        with self._predictor_lock:
+            predictions_flattened = self.inference_module.predictor_forward(preproc_inputs)
+        for k, v in predictions_flattened.items():
+            predictions_flattened[k] = v.cpu()
+        preds = self.inference_module.postprocessor_forward(predictions_flattened)
+        return convert_dict_to_df(preds), None
+
+
 class _InferencePreprocessor(nn.Module):
     """Wraps preprocessing modules into a single nn.Module.
 
@@ -9,6 +9,7 @@ from transformers import AutoConfig, GenerationConfig
 
 from theflow.accounting.used_tokens import get_used_tokens_for_llm
 from theflow.constants import IGNORE_INDEX_TOKEN_ID, LOGITS, MODEL_LLM, PREDICTIONS, TEXT, USED_TOKENS
+from theflow.data.batcher.prefetch import batch_array_to_tensor
 from theflow.features.base_feature import ModuleWrapper, OutputFeature
 from theflow.features.feature_utils import The FlowFeatureDict
 from theflow.features.text_feature import TextOutputFeature
@@ -21,15 +22,20 @@ from theflow.utils.augmentation_utils import AugmentationPipelines
 from theflow.utils.data_utils import clear_data_cache
 from theflow.utils.llm_quantization_utils import convert_quantized_linear_to_linear
 from theflow.utils.llm_utils import (
-    add_left_padding,
+    create_packed_attention_mask,
     generate_merged_ids,
     get_context_len,
+    get_merged_lengths,
+    get_packing_layout,
     get_realigned_target_and_prediction_tensors_for_inference,
     initialize_adapter,
     load_pretrained_from_config,
+    merge_and_left_pad,
+    pack_sequences,
     pad_target_tensor_for_fine_tuning,
     remove_left_padding,
     to_device,
+    unpack_sequences,
 )
 from theflow.utils.logging_utils import log_once
 from theflow.utils.output_feature_utils import set_output_feature_tensor
@@ -152,6 +158,15 @@ class LLM(BaseModel):
 
         self.attention_masks = None
 
+        # When fine-tuning, concatenate the examples of a batch into as few rows of at most
+        # `global_max_sequence_length` tokens as possible instead of padding each of them to the longest one.
+        self.enable_sequence_packing = getattr(self.config_obj.trainer, "enable_sequence_packing", False)
+        # Packing layout of the next training batch computed on the host by the trainer, see `get_packing_layout`.
+        self.packing_layout: Optional[Tuple[torch.Tensor, torch.Tensor, torch.Tensor, int, int]] = None
+
+        # Fraction of the tokens processed by the model during the last forward pass that were padding.
+        self.padding_ratio = None
+
         clear_data_cache()
 
     def create_feature_dict(self) -> DictWrapper:
@@ -266,14 +281,19 @@ class LLM(BaseModel):
             input_ids, target_ids, self.tokenizer, self.global_max_sequence_length
         )
 
-        # Wrap with flash attention backend for faster generation
-        with (
-            torch.backends.cuda.sdp_kernel(enable_flash=True, enable_math=False, enable_mem_efficient=False)
-            if (torch.cuda.is_available() and self.curr_device.type == "cuda")
-            else contextlib.nullcontext()
-        ):
-            # TODO (jeffkinnison): Determine why the 8-bit `SCB` and `CB` matrices are deleted in the forward pass
-            model_outputs = self.model(input_ids=self.model_inputs, attention_mask=self.attention_masks).get(LOGITS)
+        if self.enable_sequence_packing and self.training and self.output_feature_type == TEXT:
+            model_outputs = self._packed_forward(input_ids, target_ids)
+        else:
+            self.padding_ratio = 1 - self.attention_masks.sum() / self.attention_masks.numel()
+
+            # Wrap with flash attention backend for faster generation
+            with (
+                torch.backends.cuda.sdp_kernel(enable_flash=True, enable_math=False, enable_mem_efficient=False)
+                if (torch.cuda.is_available() and self.curr_device.type == "cuda")
+                else contextlib.nullcontext()
+            ):
+                # TODO (jeffkinnison): Determine why the 8-bit `SCB` and `CB` matrices are deleted in the forward pass
+                model_outputs = self.model(input_ids=self.model_inputs, attention_mask=self.attention_masks).get(LOGITS)
 
         if self.output_feature_type != TEXT:
             # Pass generated tokens through decoder after averaging the token probabilities
@@ -305,6 +325,56 @@ class LLM(BaseModel):
         outputs[USED_TOKENS] = get_used_tokens_for_llm(self.model_inputs, self.tokenizer)
         return outputs
 
+    def _packed_forward(self, input_ids: torch.Tensor, target_ids: torch.Tensor) -> torch.Tensor:
+        """Runs the model on the merged inputs packed into rows of at most `global_max_sequence_length` tokens.
+
+        Each example keeps its own position ids and only attends to its own previous tokens, so its logits match those
+        of an unpacked forward pass. The logits are copied back to the left-padded layout of `self.model_inputs`, which
+        keeps the loss, the metrics and the masking of the prompt tokens unchanged.
+        """
+        packing_layout, self.packing_layout = self.packing_layout, None
+        if packing_layout is None:
+            # Reads the lengths back from the device, which waits for it to finish the previous steps.
+            packing_layout = self.get_packing_layout(input_ids, target_ids)
+        lengths, rows, offsets, num_rows, row_length = packing_layout
+        self.padding_ratio = 1 - lengths.sum().item() / (num_rows * row_length)
+
+        # The layout is copied asynchronously from pinned memory, so that the host does not wait for the device.
+        device = self.model_inputs.device
+        lengths, rows, offsets = (
+            batch_array_to_tensor(tensor, device, non_blocking=device.type == "cuda")
+            for tensor in (lengths, rows, offsets)
+        )
+        max_length = self.model_inputs.shape[1]
+        position_ids = torch.arange(max_length, device=lengths.device) - (max_length - lengths).unsqueeze(1)
+        sequence_ids = torch.arange(1, len(lengths) + 1, device=lengths.device).unsqueeze(1).expand(-1, max_length)
+        packed_inputs, packed_position_ids, packed_sequence_ids = (
+            pack_sequences(tensor, lengths, rows, offsets, num_rows, row_length, pad_value)
+            for tensor, pad_value in (
+                (self.model_inputs, self.tokenizer.pad_token_id),
+                (position_ids, 0),
+                (sequence_ids, 0),
+            )
+        )
+        attention_mask = create_packed_attention_mask(packed_sequence_ids, self.model.dtype)
+
+        packed_outputs = self.model(
+            input_ids=packed_inputs, attention_mask=attention_mask, position_ids=packed_position_ids
+        ).get(LOGITS)
+        return unpack_sequences(packed_outputs, lengths, rows, offsets, max_length)
+
+    def get_packing_layout(
+        self, input_ids: torch.Tensor, target_ids: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, int, int]:
+        """Returns the merged length of each example of a batch on the host, followed by the layout of its packed rows
+        as returned by `get_packing_layout`.
+
+        The trainer calls it on the host arrays of each training batch and sets `packing_layout` before the forward
+        pass.
+        """
+        lengths = get_merged_lengths([input_ids, target_ids], self.tokenizer, self.global_max_sequence_length).cpu()
+        return (lengths,) + get_packing_layout(lengths, self.global_max_sequence_length)
+
     def generate(
         self,
         inputs: Union[
@@ -312,41 +382,52 @@ class LLM(BaseModel):
         ],
         mask=None,
     ) -> Dict[str, torch.Tensor]:
-        """Generates tokens using the model."""
+        """Generates tokens using the model.
+
+        All the prompts of the batch are left-padded to the length of the longest one and generated for in a single call
+        to the model, with an attention mask that hides the padding.
+        """
         log_once(f"For generating text, using: {self.generation}")
         input_ids, _ = self._unpack_inputs(inputs)
 
         with torch.no_grad():
-            input_lengths = []
-            sequences_list = []
+            prompts = []
             for input_ids_sample in input_ids:
-                input_ids_sample_no_padding = remove_left_padding(input_ids_sample, self.tokenizer)
+                input_ids_sample_no_padding = remove_left_padding(input_ids_sample, self.tokenizer)[0]
 
-                if input_ids_sample_no_padding.shape[1] > self.max_input_length:
+                if input_ids_sample_no_padding.shape[0] > self.max_input_length:
                     logger.warning(
-                        f"Input length {input_ids_sample_no_padding.shape[1]} is "
+                        f"Input length {input_ids_sample_no_padding.shape[0]} is "
                         f"greater than max input length {self.max_input_length}. Truncating."
                     )
-                    input_ids_sample_no_padding = input_ids_sample_no_padding[:, -self.max_input_length :]  # noqa E203
-
-                input_lengths.append(input_ids_sample_no_padding.shape[1])
-
-                # Wrap with flash attention backend for faster generation
-                with (
-                    torch.backends.cuda.sdp_kernel(enable_flash=True, enable_math=False, enable_mem_efficient=False)
-                    if (torch.cuda.is_available() and self.curr_device.type == "cuda")
-                    else contextlib.nullcontext()
-                ):
-                    # Generate text using the model
-                    model_outputs = self.model.generate(
-                        input_ids=input_ids_sample_no_padding,
-                        attention_mask=mask,
-                        generation_config=self.generation,
-                        return_dict_in_generate=True,
-                        output_scores=True,
-                    )
+                    input_ids_sample_no_padding = input_ids_sample_no_padding[-self.max_input_length :]  # noqa E203
+
+                prompts.append(input_ids_sample_no_padding)
+
+            input_lengths = [len(prompt) for prompt in prompts]
+            batch_input_ids, attention_mask = self._left_pad_prompts(prompts)
 
-                sequences_list.append(model_outputs.sequences[0])
+            # Wrap with flash attention backend for faster generation. Flash attention does not support attention
+            # masks, so it is only used when none of the prompts are padded.
+            with (
+                torch.backends.cuda.sdp_kernel(enable_flash=True, enable_math=False, enable_mem_efficient=False)
+                if (
+                    torch.cuda.is_available()
+                    and self.curr_device.type == "cuda"
+                    and min(input_lengths) == max(input_lengths)
+                )
+                else contextlib.nullcontext()
+            ):
+                # Generate text using the model
+                model_outputs = self.model.generate(
+                    input_ids=batch_input_ids,
+                    attention_mask=attention_mask,
+                    generation_config=self.generation,
+                    return_dict_in_generate=True,
+                    output_scores=True,
+                )
+
+            sequences_list = self._remove_batch_padding(model_outputs.sequences, input_lengths)
 
             # Extract the predictions, probabilities and logits from the model outputs
             # through the forward pass of the output feature
@@ -358,6 +439,44 @@ class LLM(BaseModel):
 
         return outputs
 
+    def _left_pad_prompts(self, prompts: List[torch.Tensor]) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Left-pads the prompts to the length of the longest one.
+
+        Returns the padded input ids and an attention mask that is 1 for the tokens of the prompts and 0 for padding.
+        """
+        max_length = max(len(prompt) for prompt in prompts)
+        input_ids = prompts[0].new_full((len(prompts), max_length), self.tokenizer.pad_token_id)
+        attention_mask = prompts[0].new_zeros((len(prompts), max_length))
+        for i, prompt in enumerate(prompts):
+            input_ids[i, max_length - len(prompt) :] = prompt  # noqa E203
+            attention_mask[i, max_length - len(prompt) :] = 1  # noqa E203
+        return input_ids, attention_mask
+
+    def _remove_batch_padding(self, sequences: torch.Tensor, input_lengths: List[int]) -> List[torch.Tensor]:
+        """Returns the sequence generated for each prompt of a left-padded batch as if it had been generated alone.
+
+        Removes the left padding of each prompt and the padding appended after the EOS token to the sequences that
+        finished before the others.
+        """
+        eos_token_id = self.generation.eos_token_id
+        if eos_token_id is None:
+            eos_token_id = self.tokenizer.eos_token_id
+        eos_token_ids = torch.tensor(
+            [] if eos_token_id is None else np.atleast_1d(eos_token_id).tolist(),
+            dtype=sequences.dtype,
+            device=sequences.device,
+        )
+
+        padded_input_length = max(input_lengths)
+        sequences_list = []
+        for sequence, input_length in zip(sequences, input_lengths):
+            sequence = sequence[padded_input_length - input_length :]  # noqa E203
+            eos_idxs = torch.where(torch.isin(sequence[input_length:], eos_token_ids))[0]
+            if len(eos_idxs) != 0:
+                sequence = sequence[: input_length + eos_idxs[0] + 1]
+            sequences_list.append(sequence)
+        return sequences_list
+
     def is_merge_and_unload_set(self) -> bool:
         """Check if the "adapter" configuration section exists and, if affirmative, that it contains the
         "postprocessor" subsection and the "merge_adapter_into_base_model" and "progressbar" directives.
@@ -676,29 +795,10 @@ class LLM(BaseModel):
         """
         # Remove left padding from target tensors since we also do this for the model's forward pass when we
         # concatenate the input_ids with the target_ids. We also need to add the pad token to the end of the
-        # target tensors.
-        targets_without_padding = []
-        lengths = []
-
-        eos_token_tensor = torch.tensor([self.tokenizer.eos_token_id])
-        for target in targets[of_name]:
-            target = remove_left_padding(target, self.tokenizer)[0]
-            target = torch.cat([target, eos_token_tensor.to(device=target.device)], dim=-1).unsqueeze(0)
-            targets_without_padding.append(target)
-            lengths.append(target.shape[1])
-
-        # We need all target tensors to have the same length for the loss computation. We pad the target
-        # tensors with -100 since we want to negate all tokens that are not target_ids during the softmax
+        # target tensors. We need all target tensors to have the same length for the loss computation, so we pad the
+        # target tensors with -100 since we want to negate all tokens that are not target_ids during the softmax
         # cross entropy loss computation. This ensures that the loss is computed only for the target tokens.
-        max_length = max(lengths)
-        for i, target in enumerate(targets_without_padding):
-            targets_without_padding[i] = add_left_padding(
-                targets_without_padding[i][0],
-                max_length,
-                IGNORE_INDEX_TOKEN_ID,
-            )
-
-        targets[of_name] = torch.stack(targets_without_padding, dim=0).to(
+        targets[of_name] = merge_and_left_pad([targets[of_name]], self.tokenizer, IGNORE_INDEX_TOKEN_ID).to(
             dtype=targets[of_name].dtype,
             device=targets[of_name].device,
         )
@@ -13,7 +13,10 @@ import torch
 from torch import nn
 
 from theflow.constants import COMBINED, LAST_HIDDEN, LOGITS, MODEL_ECD, MODEL_GBM, MODEL_LLM
+from theflow.data.batcher.bucketed import get_sequence_lengths
+from theflow.data.batcher.prefetch import batch_array_to_tensor, PrefetchBatcher
 from theflow.data.dataset.base import Dataset
+from theflow.data.dataset.pandas import PandasDataset
 from theflow.data.utils import convert_to_dict
 from theflow.distributed.base import DistributedStrategy, LocalStrategy
 from theflow.globals import is_progressbar_disabled, PREDICTIONS_PARQUET_FILE_NAME, TEST_STATISTICS_FILE_NAME
@@ -90,6 +93,7 @@ class Predictor(BasePredictor):
         report_tqdm_to_ray: bool = False,
         model: Optional[BaseModel] = None,
         remote: bool = False,
+        prefetch_depth: int = 0,
         **kwargs,
     ):
         """
@@ -99,11 +103,14 @@ class Predictor(BasePredictor):
         :param report_tqdm_to_ray: whether to report tqdm progress to Ray
         :param model: The Flow BaseModel before being wrapped for distributed training.
             Used to call The Flow helper functions.
+        :param prefetch_depth: number of batches assembled and moved to the device ahead of time by `batch_predict`,
+            0 assembles every batch synchronously
         """
         model = model or dist_model
         assert isinstance(model, BaseModel)
 
         self._batch_size = batch_size
+        self._prefetch_depth = prefetch_depth
         self._distributed = distributed if distributed is not None else LocalStrategy()
         self.report_tqdm_to_ray = report_tqdm_to_ray
 
@@ -138,13 +145,15 @@ class Predictor(BasePredictor):
                 }
                 progress_bar = The FlowProgressBar(self.report_tqdm_to_ray, progress_bar_config, self.is_coordinator())
                 predictions = defaultdict(list)
-                while not batcher.last_batch():
-                    batch = batcher.next_batch()
-                    preds = self._predict(batch)
-                    self._accumulate_preds(
-                        preds, predictions, exclude_pred_set={LAST_HIDDEN} if collect_logits else EXCLUDE_PRED_SET
-                    )
-                    progress_bar.update(1)
+                input_columns = [i_feat.proc_column for i_feat in self.model.input_features.values()]
+                with PrefetchBatcher(batcher, self._prefetch_depth, input_columns, self.device) as prefetching_batcher:
+                    while not prefetching_batcher.last_batch():
+                        batch = prefetching_batcher.next_batch()
+                        preds = self._predict(batch)
+                        self._accumulate_preds(
+                            preds, predictions, exclude_pred_set={LAST_HIDDEN} if collect_logits else EXCLUDE_PRED_SET
+                        )
+                        progress_bar.update(1)
 
                 progress_bar.close()
 
@@ -182,7 +191,7 @@ class Predictor(BasePredictor):
             predictions: dictionary of predictions
         """
         inputs = {
-            i_feat.feature_name: torch.from_numpy(np.array(batch[i_feat.proc_column], copy=True)).to(self.device)
+            i_feat.feature_name: batch_array_to_tensor(batch[i_feat.proc_column], self.device)
             for i_feat in self.model.input_features.values()
         }
 
@@ -251,15 +260,11 @@ class Predictor(BasePredictor):
                         f"memory used: {psutil.Process(os.getpid()).memory_info()[0] / 1e6:0.2f}MB"
                     )
                     inputs = {
-                        i_feat.feature_name: torch.from_numpy(np.array(batch[i_feat.proc_column], copy=True)).to(
-                            self.device
-                        )
+                        i_feat.feature_name: batch_array_to_tensor(batch[i_feat.proc_column], self.device)
                         for i_feat in self.model.input_features.values()
                     }
                     targets = {
-                        o_feat.feature_name: torch.from_numpy(np.array(batch[o_feat.proc_column], copy=True)).to(
-                            self.device
-                        )
+                        o_feat.feature_name: batch_array_to_tensor(batch[o_feat.proc_column], self.device)
                         for o_feat in self.model.output_features.values()
                     }
 
@@ -317,9 +322,7 @@ class Predictor(BasePredictor):
                     batch = batcher.next_batch()
 
                     inputs = {
-                        i_feat.feature_name: torch.from_numpy(np.array(batch[i_feat.proc_column], copy=True)).to(
-                            self.device
-                        )
+                        i_feat.feature_name: batch_array_to_tensor(batch[i_feat.proc_column], self.device)
                         for i_feat in self.model.input_features.values()
                     }
                     outputs = self._predict_on_inputs(inputs)
@@ -341,6 +344,22 @@ class Predictor(BasePredictor):
 
 @register_predictor([MODEL_LLM])
 class LlmPredictor(Predictor):
+    def batch_predict(self, dataset: Dataset, dataset_name: str = None, collect_logits: bool = False):
+        if not isinstance(dataset, PandasDataset) or len(dataset) == 0:
+            return super().batch_predict(dataset, dataset_name=dataset_name, collect_logits=collect_logits)
+
+        # Prompts are generated for in batches of similar lengths to minimize padding, longest first so that running
+        # out of memory happens early, and the predictions are put back in the order of the dataset.
+        input_feature = next(iter(self.model.input_features.values()))
+        lengths = get_sequence_lengths(
+            dataset.get(input_feature.proc_column), padding_idx=self.model.tokenizer.pad_token_id
+        )
+        order = np.argsort(-lengths, kind="stable")
+        predictions = super().batch_predict(
+            dataset.take(order), dataset_name=dataset_name, collect_logits=collect_logits
+        )
+        return predictions.set_axis(order).sort_index()
+
     def _predict_on_inputs(self, inputs: Dict) -> Dict:
         return self.dist_model.generate(inputs)
 
@@ -397,15 +416,11 @@ class LlmFineTunePredictor(Predictor):
                         f"memory used: {psutil.Process(os.getpid()).memory_info()[0] / 1e6:0.2f}MB"
                     )
                     inputs = {
-                        i_feat.feature_name: torch.from_numpy(np.array(batch[i_feat.proc_column], copy=True)).to(
-                            self.device
-                        )
+                        i_feat.feature_name: batch_array_to_tensor(batch[i_feat.proc_column], self.device)
                         for i_feat in self.model.input_features.values()
                     }
                     targets = {
-                        o_feat.feature_name: torch.from_numpy(np.array(batch[o_feat.proc_column], copy=True)).to(
-                            self.device
-                        )
+                        o_feat.feature_name: batch_array_to_tensor(batch[o_feat.proc_column], self.device)
                         for o_feat in self.model.output_features.values()
                     }
 
@@ -1,6 +1,8 @@
 import hashlib
 import json
+import logging
 import os
+import uuid
 from abc import ABC, abstractmethod
 from typing import Any, Callable, Dict, List, Optional, Type, TYPE_CHECKING, Union
 
@@ -16,8 +18,11 @@ if TYPE_CHECKING:
     from theflow.backend.base import Backend
 
 from theflow.utils.batch_size_tuner import BatchSizeEvaluator
+from theflow.utils.fs_utils import makedirs
 from theflow.utils.torch_utils import get_torch_device
 
+logger = logging.getLogger(__name__)
+
 
 def df_checksum(df: pd.DataFrame) -> str:
     return hashlib.sha1(pd.util.hash_pandas_object(df).values).hexdigest()
@@ -29,6 +34,67 @@ def df_to_row_strs(df: pd.DataFrame) -> List[str]:
     return row_strs
 
 
+def row_str_hash(row_str: str) -> str:
+    return hashlib.sha1(row_str.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """On-disk cache of embeddings, content-addressed by the hash of the encoded row string.
+
+    Embeddings of each model are stored in their own subdirectory of `cache_directory`, as one shard per indexed dataset
+    written once by `put` and never modified, so concurrent writers never corrupt each other's entries. Shards are not
+    held in memory: `get` only reads the keys of every shard, and memory maps its embeddings to copy the requested ones.
+    """
+
+    def __init__(self, cache_directory: str, model_name: str):
+        self.model_name = model_name
+        self.directory = os.path.join(cache_directory, hashlib.sha1(model_name.encode("utf-8")).hexdigest())
+
+    def get(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Returns the cached embeddings of `keys`, keys without an embedding in the cache are omitted."""
+        missing = set(keys)
+        embeddings = {}
+        for shard_name in self._shard_names():
+            if not missing:
+                break
+            shard_keys = np.load(os.path.join(self.directory, f"{shard_name}.keys.npy")).tolist()
+            positions = {key: i for i, key in enumerate(shard_keys) if key in missing}
+            if not positions:
+                continue
+            shard_embeddings = np.load(os.path.join(self.directory, f"{shard_name}.embeddings.npy"), mmap_mode="r")
+            for key, i in positions.items():
+                embeddings[key] = np.array(shard_embeddings[i])
+            missing.difference_update(positions)
+        return embeddings
+
+    def put(self, keys: List[str], embeddings: np.ndarray):
+        """Adds the embeddings of `keys` to the cache as a new shard, named by the hash of its keys."""
+        if not keys:
+            return
+        makedirs(self.directory, exist_ok=True)
+        shard_name = hashlib.sha1("".join(keys).encode("utf-8")).hexdigest()
+        # The keys are written last, so that only shards with complete embeddings are visible to readers.
+        self._save(f"{shard_name}.embeddings.npy", np.asarray(embeddings))
+        self._save(f"{shard_name}.keys.npy", np.array(keys))
+
+    def _save(self, file_name: str, array: np.ndarray):
+        path = os.path.join(self.directory, file_name)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        # open file to prevent np.save from appending the .npy extension to the temporary file
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, path)
+
+    def _shard_names(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            file_name[: -len(".keys.npy")]
+            for file_name in os.listdir(self.directory)
+            if file_name.endswith(".keys.npy")
+        )
+
+
 class RetrievalModel(ABC):
     @abstractmethod
     def create_dataset_index(self, df: pd.DataFrame, backend: "Backend", columns_to_index: Optional[List[str]] = None):
@@ -110,11 +176,27 @@ class SemanticRetrieval(RetrievalModel):
     """Semantic retrieval model.
 
     Uses a sentence transformer model to encode the dataset and retrieve the top k most similar results to the query.
+
+    If `embedding_cache_directory` is set, embeddings of the indexed dataset are cached on disk by row content and model
+    name, so that only rows that were never encoded before are passed to the model. `index_type` selects the vector
+    index from the `vector_index_registry` and `index_parameters` are passed to it when it is built or loaded.
     """
 
-    def __init__(self, model_name, **kwargs):
+    def __init__(
+        self,
+        model_name,
+        embedding_cache_directory: Optional[str] = None,
+        index_type: str = FAISS,
+        index_parameters: Optional[Dict[str, Any]] = None,
+        **kwargs,
+    ):
         self.model_name = model_name
         self.model = get_semantic_retrieval_model(self.model_name)
+        self.embedding_cache = (
+            EmbeddingCache(embedding_cache_directory, self.model_name) if embedding_cache_directory else None
+        )
+        self.index_type = index_type
+        self.index_parameters = index_parameters or {}
         self.index: VectorIndex = None
         self.index_data: pd.DataFrame = None
 
@@ -127,11 +209,27 @@ class SemanticRetrieval(RetrievalModel):
         df_to_index = df[columns_to_index]
         row_strs = df_to_row_strs(df_to_index)
 
-        embeddings = self._encode(row_strs, backend)
-        self.index = get_vector_index_cls(FAISS).from_embeddings(embeddings)
+        embeddings = self._encode_cached(row_strs, backend)
+        self.index = get_vector_index_cls(self.index_type).from_embeddings(embeddings, **self.index_parameters)
         # Save the entire df so we can return the full row when searching
         self.index_data = df
 
+    def _encode_cached(self, row_strs: List[str], backend: "Backend") -> np.ndarray:
+        """Encodes `row_strs`, only passing the rows missing from the embedding cache to the model."""
+        if self.embedding_cache is None:
+            return self._encode(row_strs, backend)
+
+        keys = [row_str_hash(row_str) for row_str in row_strs]
+        cached = self.embedding_cache.get(keys)
+        # Duplicated rows are only encoded once.
+        missing = {key: row_str for key, row_str in zip(keys, row_strs) if key not in cached}
+        logger.info(f"Found {len(keys) - len(missing)} of {len(keys)} embeddings in the embedding cache")
+        if missing:
+            missing_embeddings = self._encode(list(missing.values()), backend)
+            self.embedding_cache.put(list(missing.keys()), missing_embeddings)
+            cached.update(zip(missing.keys(), missing_embeddings))
+        return np.stack([cached[key] for key in keys]).astype(np.float32)
+
     def _encode(self, row_strs: List[str], backend: "Backend") -> np.ndarray:
         # only do this step once
         if self.best_batch_size is None:
@@ -151,11 +249,10 @@ class SemanticRetrieval(RetrievalModel):
     ) -> Union[List[int], List[Dict[str, Any]]]:
         row_strs = df_to_row_strs(df)
 
+        # Only the indexed dataset is cached, caching queries would grow the cache with every search.
         query_vectors = self._encode(row_strs, backend)
         results = []
-        # TODO(geoffrey): figure out why self.index.search segfaults with larger batch sizes
-        for query_vector in tqdm(query_vectors, total=query_vectors.shape[0]):
-            indices = self.index.search(query_vector.reshape(1, -1), k)
+        for indices in self.index.search_many(query_vectors, k):
             if return_data:
                 result = self.index_data.iloc[indices].to_dict(orient="records")
             else:
@@ -172,7 +269,7 @@ class SemanticRetrieval(RetrievalModel):
 
     def load_index(self, name: str, cache_directory: str):
         index_file_path = os.path.join(cache_directory, name + ".index")
-        self.index = get_vector_index_cls(FAISS).from_path(index_file_path)
+        self.index = get_vector_index_cls(self.index_type).from_path(index_file_path, **self.index_parameters)
 
         index_data_file_path = os.path.join(cache_directory, name + "_data.csv")
         self.index_data = pd.read_csv(index_data_file_path)
@@ -15,7 +15,7 @@
 import logging
 from abc import ABC, abstractmethod
 from contextlib import contextmanager
-from typing import Any, Callable, Generator, Optional, Type
+from typing import Any, Callable, Generator, Optional, Tuple, Type
 
 import torch
 from torch import Tensor, tensor
@@ -42,6 +42,7 @@ from theflow.constants import (  # RESPONSE,
     ACCURACY_MICRO,
     BINARY,
     BINARY_WEIGHTED_CROSS_ENTROPY,
+    CALIBRATION_ERROR,
     CATEGORY,
     CATEGORY_DISTRIBUTION,
     CORN,
@@ -102,6 +103,9 @@ from theflow.utils.torch_utils import sequence_length_2D
 
 logger = logging.getLogger(__name__)
 
+# Number of confidence bins of the calibration error when the output feature does not set `num_metric_bins`.
+DEFAULT_CALIBRATION_NUM_BINS = 15
+
 
 class The FlowMetric(Metric, ABC):
     @classmethod
@@ -157,10 +161,14 @@ class RecallMetric(BinaryRecall, The FlowMetric):
 
 @register_metric(ROC_AUC, [BINARY], MAXIMIZE, PROBABILITIES)
 class BinaryAUROCMetric(BinaryAUROC, The FlowMetric):
-    """Area under the receiver operating curve."""
+    """Area under the receiver operating curve.
 
-    def __init__(self, **kwargs):
-        super().__init__()
+    With `num_metric_bins`, the curve is computed from the confusion matrices at that many evenly spaced thresholds, in
+    constant memory, instead of from all the predictions and targets.
+    """
+
+    def __init__(self, num_metric_bins: Optional[int] = None, **kwargs):
+        super().__init__(thresholds=num_metric_bins)
 
     def update(self, preds: Tensor, target: Tensor) -> None:
         super().update(preds, target.type(torch.int8))
@@ -168,10 +176,14 @@ class BinaryAUROCMetric(BinaryAUROC, The FlowMetric):
 
 @register_metric(ROC_AUC, [CATEGORY, CATEGORY_DISTRIBUTION], MAXIMIZE, PROBABILITIES)
 class CategoryAUROCMetric(MulticlassAUROC, The FlowMetric):
-    """Area under the receiver operating curve."""
+    """Area under the receiver operating curve.
 
-    def __init__(self, num_classes: int, **kwargs):
-        super().__init__(num_classes=num_classes)
+    With `num_metric_bins`, the curves are computed from the confusion matrices at that many evenly spaced thresholds,
+    in constant memory, instead of from all the predictions and targets.
+    """
+
+    def __init__(self, num_classes: int, num_metric_bins: Optional[int] = None, **kwargs):
+        super().__init__(num_classes=num_classes, thresholds=num_metric_bins)
 
     def update(self, preds: Tensor, target: Tensor) -> None:
         if len(target.shape) > 1:
@@ -179,6 +191,56 @@ class CategoryAUROCMetric(MulticlassAUROC, The FlowMetric):
         super().update(preds, target)
 
 
+class CalibrationErrorMetric(The FlowMetric):
+    """Abstract class for the expected calibration error, the mean gap between the confidence and the accuracy of
+    the predictions, weighted by the number of predictions in each confidence bin.
+
+    Only the number of predictions and the sums of their confidences and accuracies are kept for each bin, so the memory
+    is constant and the states of workers are merged by summing them.
+    """
+
+    def __init__(self, num_metric_bins: Optional[int] = None, **kwargs):
+        super().__init__()
+        self.num_bins = num_metric_bins or DEFAULT_CALIBRATION_NUM_BINS
+        self.add_state("bin_counts", default=torch.zeros(self.num_bins, dtype=torch.float64), dist_reduce_fx="sum")
+        self.add_state("bin_confidences", default=torch.zeros(self.num_bins, dtype=torch.float64), dist_reduce_fx="sum")
+        self.add_state("bin_accuracies", default=torch.zeros(self.num_bins, dtype=torch.float64), dist_reduce_fx="sum")
+
+    def update(self, preds: Tensor, target: Tensor) -> None:
+        confidences, accuracies = self.get_confidences_and_accuracies(preds, target)
+        confidences = confidences.double().flatten()
+        bins = torch.clamp((confidences * self.num_bins).long(), 0, self.num_bins - 1)
+        self.bin_counts += torch.bincount(bins, minlength=self.num_bins)
+        self.bin_confidences += torch.bincount(bins, weights=confidences, minlength=self.num_bins)
+        self.bin_accuracies += torch.bincount(bins, weights=accuracies.double().flatten(), minlength=self.num_bins)
+
+    def compute(self) -> Tensor:
+        return ((self.bin_accuracies - self.bin_confidences).abs().sum() / self.bin_counts.sum()).float()
+
+    @abstractmethod
+    def get_confidences_and_accuracies(self, preds: Tensor, target: Tensor) -> Tuple[Tensor, Tensor]:
+        raise NotImplementedError()
+
+
+@register_metric(CALIBRATION_ERROR, [BINARY], MINIMIZE, PROBABILITIES)
+class BinaryCalibrationErrorMetric(CalibrationErrorMetric):
+    """Expected calibration error of the probabilities of the positive class."""
+
+    def get_confidences_and_accuracies(self, preds: Tensor, target: Tensor) -> Tuple[Tensor, Tensor]:
+        return preds, target
+
+
+@register_metric(CALIBRATION_ERROR, [CATEGORY, CATEGORY_DISTRIBUTION], MINIMIZE, PROBABILITIES)
+class CategoryCalibrationErrorMetric(CalibrationErrorMetric):
+    """Expected calibration error of the probabilities of the predicted classes."""
+
+    def get_confidences_and_accuracies(self, preds: Tensor, target: Tensor) -> Tuple[Tensor, Tensor]:
+        if len(target.shape) > 1:
+            target = torch.argmax(target, dim=1)
+        confidences, predictions = preds.max(dim=1)
+        return confidences, predictions == target
+
+
 @register_metric(SPECIFICITY, [BINARY], MAXIMIZE, PROBABILITIES)
 class SpecificityMetric(BinarySpecificity, The FlowMetric):
     """Specificity metric."""
@@ -453,7 +515,7 @@ class CategoryAccuracyMicro(MulticlassAccuracy, The FlowMetric):
 @register_metric(HITS_AT_K, [CATEGORY, CATEGORY_DISTRIBUTION], MAXIMIZE, LOGITS)
 class HitsAtKMetric(MulticlassAccuracy, The FlowMetric):
     def __init__(self, num_classes: int, top_k: int, **kwargs):
-        super().__init__(num_classes=num_classes, top_k=top_k, **kwargs)
+        super().__init__(num_classes=num_classes, top_k=top_k)
 
     def update(self, preds: Tensor, target: Tensor) -> None:
         if len(target.shape) > 1:
@@ -119,6 +119,15 @@ class BinaryOutputFeatureConfig(BinaryOutputFeatureConfigMixin, BaseOutputFeatur
         parameter_metadata=FEATURE_METADATA[BINARY]["dependencies"],
     )
 
+    num_metric_bins: int = schema_utils.PositiveInteger(
+        default=None,
+        allow_none=True,
+        description="Number of probability bins used to compute the roc_auc and calibration_error metrics in constant "
+        "memory, by accumulating counts per bin that are summed across workers. If null, roc_auc is computed exactly "
+        "from all the predictions of an evaluation, which are kept in memory, and calibration_error uses 15 bins.",
+        parameter_metadata=FEATURE_METADATA[BINARY]["num_metric_bins"],
+    )
+
     preprocessing: BasePreprocessingConfig = PreprocessingDataclassField(feature_type="binary_output")
 
     reduce_dependencies: str = schema_utils.ReductionOptions(
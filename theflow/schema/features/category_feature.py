@@ -130,6 +130,24 @@ class CategoryOutputFeatureConfig(CategoryOutputFeatureConfigMixin, BaseOutputFe
         parameter_metadata=FEATURE_METADATA[CATEGORY]["dependencies"],
     )
 
+    num_metric_bins: int = schema_utils.PositiveInteger(
+        default=None,
+        allow_none=True,
+        description="Number of probability bins used to compute the roc_auc and calibration_error metrics in constant "
+        "memory, by accumulating counts per bin that are summed across workers. If null, roc_auc is computed exactly "
+        "from all the predictions of an evaluation, which are kept in memory, and calibration_error uses 15 bins.",
+        parameter_metadata=FEATURE_METADATA[CATEGORY]["num_metric_bins"],
+    )
+
+    per_class_probabilities: bool = schema_utils.Boolean(
+        default=True,
+        description="Whether to output a `<name>_probabilities_<label>` column with the probability of every class "
+        "when postprocessing predictions. If false, these columns are skipped, which is much faster for categories of "
+        "many classes, and the labels of the top_k most probable classes are output in a `<name>_predictions_top_k` "
+        "column instead.",
+        parameter_metadata=FEATURE_METADATA[CATEGORY]["per_class_probabilities"],
+    )
+
     preprocessing: BasePreprocessingConfig = PreprocessingDataclassField(feature_type="category_output")
 
     reduce_dependencies: str = schema_utils.ReductionOptions(
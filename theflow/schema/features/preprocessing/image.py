@@ -127,10 +127,41 @@ class ImagePreprocessingConfig(BasePreprocessingConfig):
         parameter_metadata=FEATURE_METADATA[IMAGE][PREPROCESSING]["in_memory"],
     )
 
+    hdf5_cache_size_mb: int = schema_utils.NonNegativeInteger(
+        default=0,
+        allow_none=False,
+        description="Size in megabytes of the per-process LRU cache of image blocks read from the preprocessed HDF5 "
+        "file when in_memory is false. Blocks are aligned to the HDF5 chunks. 0 disables the cache.",
+        parameter_metadata=FEATURE_METADATA[IMAGE][PREPROCESSING]["hdf5_cache_size_mb"],
+    )
+
+    hdf5_mmap: bool = schema_utils.Boolean(
+        default=False,
+        description="If true and in_memory is false, memory map the preprocessed HDF5 image data instead of reading "
+        "it through h5py. Only applies when the data is stored contiguously and uncompressed.",
+        parameter_metadata=FEATURE_METADATA[IMAGE][PREPROCESSING]["hdf5_mmap"],
+    )
+
+    hdf5_chunk_rows: Optional[int] = schema_utils.PositiveInteger(
+        default=None,
+        allow_none=True,
+        description="Number of images per HDF5 chunk when in_memory is false. If None, images are stored "
+        "contiguously, which allows memory mapping them with hdf5_mmap.",
+        parameter_metadata=FEATURE_METADATA[IMAGE][PREPROCESSING]["hdf5_chunk_rows"],
+    )
+
+    hdf5_compression: Optional[str] = schema_utils.StringOptions(
+        ["gzip", "lzf"],
+        default=None,
+        allow_none=True,
+        description="Compression filter applied to the HDF5 image data when in_memory is false.",
+        parameter_metadata=FEATURE_METADATA[IMAGE][PREPROCESSING]["hdf5_compression"],
+    )
+
     num_processes: int = schema_utils.PositiveInteger(
         default=1,
         allow_none=False,
-        description="Specifies the number of processes to run for preprocessing images.",
+        description="Specifies the number of processes to run for preprocessing images when in_memory is false.",
         parameter_metadata=FEATURE_METADATA[IMAGE][PREPROCESSING]["num_processes"],
     )
 
@@ -4,6 +4,7 @@ from theflow.error import ConfigValidationError
 from theflow.schema import utils as schema_utils
 from theflow.schema.metadata import LLM_METADATA
 from theflow.schema.utils import theflow_dataclass
+from theflow.vector_index import ALL_INDICES, FAISS
 
 
 @DeveloperAPI
@@ -60,6 +61,28 @@ class RetrievalConfig(schema_utils.BaseMarshmallowConfig):
         parameter_metadata=LLM_METADATA["prompt"]["retrieval"]["k"],
     )
 
+    index_type: str = schema_utils.StringOptions(
+        ALL_INDICES,
+        default=FAISS,
+        description=(
+            "The vector index used by semantic retrieval. 'faiss' performs an exact search, 'faiss_ivf' and "
+            "'faiss_hnsw' are approximate indices that trade some recall for faster search on large datasets."
+        ),
+        parameter_metadata=LLM_METADATA["prompt"]["retrieval"]["index_type"],
+    )
+
+    index_parameters: dict = schema_utils.Dict(
+        default=None,
+        allow_none=True,
+        description=(
+            "Parameters used to build and search the vector index, e.g. `nlist` and `nprobe` for 'faiss_ivf' or "
+            "`m`, `ef_construction` and `ef_search` for 'faiss_hnsw'. `search_batch_size` sets the number of "
+            "queries searched in a single call, which defaults to 1 as larger batches have been seen to crash faiss "
+            "when it is loaded along with torch."
+        ),
+        parameter_metadata=LLM_METADATA["prompt"]["retrieval"]["index_parameters"],
+    )
+
 
 @DeveloperAPI
 class RetrievalConfigField(schema_utils.DictMarshmallowField):
@@ -55,6 +55,15 @@ class PreprocessingConfig(schema_utils.BaseMarshmallowConfig):
         parameter_metadata=PREPROCESSING_METADATA["global_max_sequence_length"],
     )
 
+    cache_columns: bool = schema_utils.Boolean(
+        default=False,
+        description="Whether to cache the processed column of each feature separately, keyed by the contents of its "
+        "input column and its preprocessing config. When the preprocessed dataset cannot be reused because a feature "
+        "was added or its preprocessing changed, only the affected features are processed again. Only used by the "
+        "local backend.",
+        parameter_metadata=PREPROCESSING_METADATA["cache_columns"],
+    )
+
 
 @DeveloperAPI
 class PreprocessingField(schema_utils.DictMarshmallowField):
@@ -232,6 +232,48 @@ class ECDTrainerConfig(BaseTrainerConfig):
         parameter_metadata=TRAINER_METADATA[MODEL_ECD]["steps_per_checkpoint"],
     )
 
+    steps_per_log_sync: int = schema_utils.PositiveInteger(
+        default=1,
+        description=(
+            "How often the per-step training losses are copied from the device to log them. Values greater than 1 "
+            "enable low-overhead logging: losses are buffered on the device and written every `steps_per_log_sync` "
+            "steps and at every checkpoint, and the memory usage is sampled on a background timer. The logged values "
+            "are the same, only the progress bar loss is refreshed less often."
+        ),
+        parameter_metadata=TRAINER_METADATA[MODEL_ECD]["steps_per_log_sync"],
+    )
+
+    async_checkpoint: bool = schema_utils.Boolean(
+        default=False,
+        description=(
+            "Whether to write checkpoints in a background thread. Training only stalls to copy the model, optimizer "
+            "and scheduler state to CPU memory, and for the previous checkpoint to finish writing, as at most one "
+            "checkpoint is written at a time. Checkpoint files are still replaced atomically, and all writes are "
+            "flushed at the end of training."
+        ),
+        parameter_metadata=TRAINER_METADATA[MODEL_ECD]["async_checkpoint"],
+    )
+
+    checkpoint_pin_memory: bool = schema_utils.Boolean(
+        default=False,
+        description=(
+            "Whether to copy the state of models trained on GPU into pinned CPU memory for asynchronous checkpoints, "
+            "which is faster to copy to but slower to allocate. Only used if `async_checkpoint` is true."
+        ),
+        parameter_metadata=TRAINER_METADATA[MODEL_ECD]["checkpoint_pin_memory"],
+    )
+
+    sharded_checkpoint: bool = schema_utils.Boolean(
+        default=False,
+        description=(
+            "Whether to save checkpoints as an index and safetensors shards, instead of a single file. Shards of "
+            "tensors left unchanged since the previous checkpoint, like the buffers of frozen modules, are not "
+            "rewritten, the best weights are memory-mapped without reading the optimizer state, and the shards are "
+            "read in parallel when resuming training."
+        ),
+        parameter_metadata=TRAINER_METADATA[MODEL_ECD]["sharded_checkpoint"],
+    )
+
     effective_batch_size: Union[int, str] = schema_utils.OneOfOptionsField(
         default=AUTO,
         allow_none=False,
@@ -453,6 +495,29 @@ class ECDTrainerConfig(BaseTrainerConfig):
         parameter_metadata=TRAINER_METADATA[MODEL_ECD]["enable_gradient_checkpointing"],
     )
 
+    prefetch_depth: int = schema_utils.NonNegativeInteger(
+        default=0,
+        description="Number of batches assembled and transferred to the device in a background thread ahead of the "
+        "training and prediction steps. 0 assembles each batch synchronously. Image augmentations draw from the "
+        "global torch random generator, so seeded runs using augmentation are only reproducible with 0.",
+        parameter_metadata=TRAINER_METADATA[MODEL_ECD]["prefetch_depth"],
+    )
+
+    bucketing_field: str = schema_utils.String(
+        default=None,
+        allow_none=True,
+        description="Name of a text or sequence input feature to bucket training batches by. When set, samples with a "
+        "similar number of tokens in this feature are batched together. Only supported by the local backend.",
+        parameter_metadata=TRAINER_METADATA[MODEL_ECD]["bucketing_field"],
+    )
+
+    bucketing_trim: bool = schema_utils.Boolean(
+        default=True,
+        description="Whether to trim the padding of the `bucketing_field` of each training batch to the longest "
+        "sequence of the batch. Only use with encoders that accept inputs shorter than `max_sequence_length`.",
+        parameter_metadata=TRAINER_METADATA[MODEL_ECD]["bucketing_trim"],
+    )
+
     layers_to_freeze_regex: str = schema_utils.String(
         default=None,
         allow_none=True,
@@ -825,6 +890,24 @@ class GBMTrainerConfig(BaseTrainerConfig):
         parameter_metadata=TRAINER_METADATA[MODEL_GBM]["feature_pre_filter"],
     )
 
+    bin_construct_sample_cnt: int = schema_utils.PositiveInteger(
+        default=200000,
+        description="Number of rows sampled to construct the feature bins in the GBM trainer.",
+        parameter_metadata=TRAINER_METADATA[MODEL_GBM]["bin_construct_sample_cnt"],
+    )
+
+    dataset_chunk_size: int = schema_utils.PositiveInteger(
+        default=None,
+        allow_none=True,
+        description=(
+            "Number of rows at a time to add to the LightGBM datasets after binning the features from a sample of "
+            "`bin_construct_sample_cnt` rows. Bounds the peak memory of dataset construction on wide tables. If null, "
+            "the datasets are constructed from a single float32 matrix of all the rows. Only supported by the local "
+            "backend."
+        ),
+        parameter_metadata=TRAINER_METADATA[MODEL_GBM]["dataset_chunk_size"],
+    )
+
     def can_tune_batch_size(self) -> bool:
         return False
 
@@ -969,6 +1052,15 @@ class FineTuneTrainerConfig(ECDTrainerConfig):
         ],
     )
 
+    enable_sequence_packing: bool = schema_utils.Boolean(
+        default=False,
+        description="Whether to concatenate the examples of each training batch into as few rows of at most "
+        "`global_max_sequence_length` tokens as possible, with a block-diagonal attention mask, instead of padding "
+        "them to the longest example. Only supported for text output features and base models that accept 4D "
+        "attention masks, such as Llama or Mistral.",
+        parameter_metadata=TRAINER_METADATA[MODEL_LLM]["enable_sequence_packing"],
+    )
+
 
 @DeveloperAPI
 def get_model_type_jsonschema(model_type: str = MODEL_ECD):
@@ -14,12 +14,16 @@
 # limitations under the License.
 # ==============================================================================
 import argparse
+import asyncio
 import io
 import json
 import logging
 import os
 import sys
 import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Union
 
 import pandas as pd
 import torch
@@ -56,17 +60,160 @@ ALL_FEATURES_PRESENT_ERROR = {"error": "entry must contain all input features"}
 COULD_NOT_RUN_INFERENCE_ERROR = {"error": "Unexpected Error: could not run inference on model"}
 
 
-def server(model, allowed_origins=None):
+@dataclass
+class PredictBatcherStats:
+    """Running statistics of the batches formed by a `PredictBatcher`."""
+
+    num_requests: int = 0
+    num_batches: int = 0
+    last_batch_size: int = 0
+    max_batch_size: int = 0
+    total_wait_ms: float = 0.0
+    max_wait_ms: float = 0.0
+
+    def record_batch(self, wait_times_ms: List[float]):
+        self.num_requests += len(wait_times_ms)
+        self.num_batches += 1
+        self.last_batch_size = len(wait_times_ms)
+        self.max_batch_size = max(self.max_batch_size, len(wait_times_ms))
+        self.total_wait_ms += sum(wait_times_ms)
+        self.max_wait_ms = max(self.max_wait_ms, *wait_times_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "num_requests": self.num_requests,
+            "num_batches": self.num_batches,
+            "batch_size": {
+                "last": self.last_batch_size,
+                "mean": self.num_requests / self.num_batches if self.num_batches else 0.0,
+                "max": self.max_batch_size,
+            },
+            "wait_time_ms": {
+                "mean": self.total_wait_ms / self.num_requests if self.num_requests else 0.0,
+                "max": self.max_wait_ms,
+            },
+        }
+
+
+class PredictBatcher:
+    """Coalesces concurrent single-row predictions into batched calls to `model.predict`.
+
+    Requests are queued and a background task collects them until `max_batch_size` requests are pending or `max_wait_ms`
+    milliseconds have passed since the first one arrived. The batch is predicted in a worker thread, so the event loop
+    keeps accepting requests meanwhile, and each caller receives its own row of the results. If the batched prediction
+    fails, the requests of the batch are retried one at a time so that a single bad entry only fails its own request.
+    """
+
+    def __init__(self, model, max_batch_size: int, max_wait_ms: float):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000
+        self.stats = PredictBatcherStats()
+        self._queue = None
+        self._loop = None
+        self._worker = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def predict(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Returns the prediction for a single entry, raising the exception of its prediction if it failed."""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((entry, future, time.monotonic()))
+        return await future
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"queue_depth": self.queue_depth, **self.stats.to_dict()}
+
+    def _ensure_worker(self):
+        # The queue and worker are bound to the event loop serving the requests.
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            requests = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait_s
+            while len(requests) < self.max_batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0 and self._queue.empty():
+                    break
+                try:
+                    requests.append(await asyncio.wait_for(self._queue.get(), max(timeout, 0)))
+                except asyncio.TimeoutError:
+                    break
+
+            now = time.monotonic()
+            self.stats.record_batch([(now - enqueued_at) * 1000 for _, _, enqueued_at in requests])
+            results = await self._loop.run_in_executor(None, self._predict, [entry for entry, _, _ in requests])
+            for (_, future, _), result in zip(requests, results):
+                if future.done():
+                    # The caller went away.
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _predict(self, entries: List[Dict[str, Any]]) -> List[Union[Dict[str, Any], Exception]]:
+        try:
+            resp, _ = self.model.predict(dataset=entries, data_format=dict)
+            return resp.to_dict("records")
+        except Exception:
+            if len(entries) == 1:
+                return [sys.exc_info()[1]]
+            logger.exception(f"Failed to run predict on a batch of {len(entries)} requests, retrying one at a time")
+
+        results = []
+        for entry in entries:
+            try:
+                resp, _ = self.model.predict(dataset=[entry], data_format=dict)
+                results.append(resp.to_dict("records")[0])
+            except Exception as exc:
+                results.append(exc)
+        return results
+
+
+def server(
+    model,
+    allowed_origins=None,
+    max_batch_size: int = 1,
+    max_batch_wait_ms: float = 5.0,
+    use_inference_pipeline: bool = False,
+):
+    """Returns the FastAPI app serving `model`.
+
+    With `max_batch_size > 1`, concurrent `/predict` requests are coalesced into batches of up to `max_batch_size` rows,
+    waiting at most `max_batch_wait_ms` milliseconds for a batch to fill, and batching metrics are exposed at
+    `/metrics`.
+
+    With `use_inference_pipeline`, requests are predicted through the torchscript inference stages of the model instead
+    of `model.predict`, skipping the dataset preprocessing. Responses then only contain the outputs of the torchscript
+    postprocessors.
+    """
     middleware = [Middleware(CORSMiddleware, allow_origins=allowed_origins)] if allowed_origins else None
     app = FastAPI(middleware=middleware)
 
     config = model.config
     input_features = {f[COLUMN] for f in config["input_features"]}
+    predictor = model.to_inference_pipeline() if use_inference_pipeline else model
+    predict_batcher = PredictBatcher(predictor, max_batch_size, max_batch_wait_ms) if max_batch_size > 1 else None
 
     @app.get("/")
     def check_health():
         return NumpyJSONResponse({"message": "The Flow server is up"})
 
+    if predict_batcher is not None:
+
+        @app.get("/metrics")
+        def metrics():
+            return NumpyJSONResponse(predict_batcher.metrics())
+
     @app.post("/predict")
     async def predict(request: Request):
         try:
@@ -87,8 +234,11 @@ def server(model, allowed_origins=None):
                     status_code=400,
                 )
             try:
-                resp, _ = model.predict(dataset=[entry], data_format=dict)
-                resp = resp.to_dict("records")[0]
+                if predict_batcher is not None:
+                    resp = await predict_batcher.predict(entry)
+                else:
+                    resp, _ = predictor.predict(dataset=[entry], data_format=dict)
+                    resp = resp.to_dict("records")[0]
                 return NumpyJSONResponse(resp)
             except Exception as exc:
                 logger.exception(f"Failed to run predict: {exc}")
@@ -117,7 +267,7 @@ def server(model, allowed_origins=None):
                 status_code=400,
             )
         try:
-            resp, _ = model.predict(dataset=data_df)
+            resp, _ = predictor.predict(dataset=data_df)
             resp = resp.to_dict("split")
             return NumpyJSONResponse(resp)
         except Exception:
@@ -188,6 +338,9 @@ def run_server(
     host: str,
     port: int,
     allowed_origins: list,
+    max_batch_size: int = 1,
+    max_batch_wait_ms: float = 5.0,
+    use_inference_pipeline: bool = False,
 ) -> None:
     """Loads a pre-trained model and serve it on an http server.
 
@@ -197,6 +350,12 @@ def run_server(
     :param host: (str, default: `0.0.0.0`) host ip address for the server to use.
     :param port: (int, default: `8000`) port number for the server to use.
     :param allowed_origins: (list) list of origins allowed to make cross-origin requests.
+    :param max_batch_size: (int, default: `1`) maximum number of concurrent `/predict` requests coalesced into one
+        batch. `1` disables batching.
+    :param max_batch_wait_ms: (float, default: `5.0`) maximum time in milliseconds a `/predict` request waits for
+        its batch to fill.
+    :param use_inference_pipeline: (bool, default: `False`) whether to predict through the torchscript inference
+        stages of the model, skipping the dataset preprocessing.
 
     # Return
 
@@ -204,7 +363,13 @@ def run_server(
     """
     # Use local backend for serving to use pandas DataFrames.
     model = The FlowModel.load(model_path, backend="local")
-    app = server(model, allowed_origins)
+    app = server(
+        model,
+        allowed_origins,
+        max_batch_size=max_batch_size,
+        max_batch_wait_ms=max_batch_wait_ms,
+        use_inference_pipeline=use_inference_pipeline,
+    )
     uvicorn.run(app, host=host, port=port)
 
 
@@ -247,6 +412,30 @@ def cli(sys_argv):
         'Use "*" to allow any origin. See https://www.starlette.io/middleware/#corsmiddleware.',
     )
 
+    parser.add_argument(
+        "-mbs",
+        "--max_batch_size",
+        help="maximum number of concurrent /predict requests coalesced into one batch, 1 disables batching "
+        "(default: 1)",
+        default=1,
+        type=int,
+    )
+
+    parser.add_argument(
+        "-mbw",
+        "--max_batch_wait_ms",
+        help="maximum time in milliseconds a /predict request waits for its batch to fill (default: 5)",
+        default=5.0,
+        type=float,
+    )
+
+    parser.add_argument(
+        "-ip",
+        "--use_inference_pipeline",
+        help="predict through the torchscript inference stages of the model, skipping the dataset preprocessing",
+        action="store_true",
+    )
+
     add_contrib_callback_args(parser)
     args = parser.parse_args(sys_argv)
 
@@ -261,7 +450,15 @@ def cli(sys_argv):
 
     print_theflow("Serve", LUDWIG_VERSION)
 
-    run_server(args.model_path, args.host, args.port, args.allowed_origins)
+    run_server(
+        args.model_path,
+        args.host,
+        args.port,
+        args.allowed_origins,
+        max_batch_size=args.max_batch_size,
+        max_batch_wait_ms=args.max_batch_wait_ms,
+        use_inference_pipeline=args.use_inference_pipeline,
+    )
 
 
 if __name__ == "__main__":
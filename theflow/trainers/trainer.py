@@ -15,6 +15,7 @@
 # ==============================================================================
 """This module contains the class and auxiliary methods of a model."""
 import contextlib
+import copy
 import csv
 import logging
 import math
@@ -25,15 +26,15 @@ import sys
 import tempfile
 import threading
 import time
-from typing import Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-import numpy as np
 import packaging
 import pandas as pd
 import psutil
 import torch
 from torch.utils.tensorboard import SummaryWriter
 
+from theflow.callbacks import Callback
 from theflow.constants import (
     AUTO,
     LOSS,
@@ -46,6 +47,7 @@ from theflow.constants import (
     USED_TOKENS,
     VALIDATION,
 )
+from theflow.data.batcher.prefetch import batch_array_to_tensor, PrefetchBatcher
 from theflow.data.dataset.base import Dataset
 from theflow.distributed.base import DistributedStrategy, LocalStrategy
 from theflow.globals import (
@@ -69,7 +71,7 @@ from theflow.trainers.registry import register_trainer
 from theflow.types import ModelConfigDict
 from theflow.utils import time_utils
 from theflow.utils.batch_size_tuner import BatchSizeEvaluator
-from theflow.utils.checkpoint_utils import Checkpoint, CheckpointManager
+from theflow.utils.checkpoint_utils import Checkpoint, CheckpointManager, MultiNodeCheckpoint
 from theflow.utils.config_utils import get_quantization
 from theflow.utils.data_utils import load_json
 from theflow.utils.defaults import default_random_seed
@@ -79,6 +81,7 @@ from theflow.utils.metric_utils import get_metric_names, TrainerMetric
 from theflow.utils.metrics_printed_table import print_metrics_table
 from theflow.utils.misc_utils import set_random_seed
 from theflow.utils.model_utils import contains_nan_or_inf_tensors
+from theflow.utils.sharded_checkpoint_utils import DEFAULT_MAX_SHARD_SIZE
 from theflow.utils.torch_utils import get_torch_device
 from theflow.utils.trainer_utils import (
     append_metrics,
@@ -88,7 +91,9 @@ from theflow.utils.trainer_utils import (
     get_new_progress_tracker,
     get_total_expected_checkpoints,
     get_total_steps,
+    MemorySampler,
     ProgressTracker,
+    StepSummaryBuffer,
 )
 
 logger = logging.getLogger(__name__)
@@ -96,6 +101,9 @@ logger = logging.getLogger(__name__)
 
 _TORCH210 = packaging.version.parse(torch.__version__) >= packaging.version.parse("2.1.0")
 
+# Key of the values returned by `get_host_batch_info` in the training batches.
+_HOST_BATCH_INFO = "__host_batch_info__"
+
 
 @register_trainer(MODEL_ECD, default=True)
 class Trainer(BaseTrainer):
@@ -187,6 +195,13 @@ class Trainer(BaseTrainer):
             if self.distributed.allow_gradient_accumulation() and config.gradient_accumulation_steps != AUTO
             else 1
         )
+        self.prefetch_depth = config.prefetch_depth
+        self.bucketing_field = config.bucketing_field
+        self.bucketing_trim = config.bucketing_trim
+        self.steps_per_log_sync = config.steps_per_log_sync
+        self.async_checkpoint = config.async_checkpoint
+        self.checkpoint_pin_memory = config.checkpoint_pin_memory
+        self.sharded_checkpoint = config.sharded_checkpoint
         self.resume = resume
         self.skip_save_model = skip_save_model
         self.skip_save_progress = skip_save_progress
@@ -295,6 +310,7 @@ class Trainer(BaseTrainer):
         targets: Dict[str, torch.Tensor],
         should_step: bool = True,
         profiler: Optional[torch.profiler.profile] = None,
+        host_batch_info: Optional[Dict[str, Any]] = None,
     ) -> Tuple[torch.Tensor, Dict[str, torch.Tensor], torch.Tensor]:
         """Performs a single training step.
 
@@ -302,6 +318,7 @@ class Trainer(BaseTrainer):
             inputs: A dictionary of input data, from feature name to tensor.
             targets: A dictionary of target data, from feature name to tensor.
             should_step: Whether to perform a step of the optimizer after computing gradients.
+            host_batch_info: The values computed from the host arrays of the batch by `get_host_batch_info`, if any.
 
         Returns:
             A tuple of:
@@ -431,7 +448,16 @@ class Trainer(BaseTrainer):
 
     @classmethod
     def write_step_summary(
-        cls, train_summary_writer, combined_loss, all_losses, step, used_tokens, total_tokens_used, learning_rate=None
+        cls,
+        train_summary_writer,
+        combined_loss,
+        all_losses,
+        step,
+        used_tokens,
+        total_tokens_used,
+        learning_rate=None,
+        log_cuda_memory=True,
+        step_stats=None,
     ):
         if not train_summary_writer:
             return
@@ -440,6 +466,10 @@ class Trainer(BaseTrainer):
         train_summary_writer.add_scalar("tokens/tokens", used_tokens, global_step=step)
         train_summary_writer.add_scalar("tokens/total_tokens_used", total_tokens_used, global_step=step)
 
+        # trainer specific statistics, see `get_step_stats`.
+        for stat_tag, stat_val in (step_stats or {}).items():
+            train_summary_writer.add_scalar(stat_tag, stat_val, global_step=step)
+
         # combined loss
         train_summary_writer.add_scalar("combined/step_training_loss", combined_loss, global_step=step)
 
@@ -452,7 +482,7 @@ class Trainer(BaseTrainer):
             train_summary_writer.add_scalar("combined/step_learning_rate", learning_rate, global_step=step)
 
         # Log CUDA memory stats.
-        if torch.cuda.is_available():
+        if log_cuda_memory and torch.cuda.is_available():
             for i in range(torch.cuda.device_count()):
                 device = torch.device(f"cuda:{i}")
                 memory_stats = torch.cuda.memory_stats(device=device)
@@ -800,16 +830,17 @@ class Trainer(BaseTrainer):
                 early_stopping_steps,
                 self.skip_save_model,
                 checkpoint_manager,
+                train_summary_writer,
             )
         else:
             # There's no validation, so we save the model.
             if not self.skip_save_model:
                 if self.is_coordinator():
                     logger.info("Saving model.\n")
-                checkpoint_manager.save_best(progress_tracker.steps)
-                self.callback(lambda c: c.on_save_best_checkpoint(self, progress_tracker, save_path))
+                self.save_best_checkpoint(progress_tracker, save_path, checkpoint_manager, train_summary_writer)
 
         # Trigger eval end callback after any model weights save for complete checkpoint
+        self.wait_for_checkpoint_before_callbacks(checkpoint_manager, "on_eval_end")
         self.callback(lambda c: c.on_eval_end(self, progress_tracker, save_path))
 
         # Clear the CUDA cache to free up memory
@@ -817,21 +848,75 @@ class Trainer(BaseTrainer):
 
         return should_break
 
-    def save_checkpoint(self, progress_tracker: ProgressTracker, save_path: str, checkpoint_manager: CheckpointManager):
-        """Checkpoints the model, progress tracker, and invokes the checkpoint callback."""
+    def save_checkpoint(
+        self,
+        progress_tracker: ProgressTracker,
+        save_path: str,
+        checkpoint_manager: CheckpointManager,
+        summary_writer: Optional[SummaryWriter] = None,
+    ):
+        """Checkpoints the model, progress tracker, and invokes the checkpoint callback.
+
+        The progress tracker is saved and the callback invoked once the model checkpoint is written, which for
+        asynchronous checkpoints is when the checkpoint manager waits for it, with the progress as of this checkpoint.
+        """
         progress_tracker.increment_checkpoint()
+        if checkpoint_manager.async_save:
+            progress_tracker = copy.deepcopy(progress_tracker)
 
-        checkpoint_manager.save(progress_tracker.steps)
-        if self.is_coordinator():
-            progress_tracker.save(os.path.join(save_path, TRAINING_PROGRESS_TRACKER_FILE_NAME))
+        def on_saved():
+            if self.is_coordinator():
+                progress_tracker.save(os.path.join(save_path, TRAINING_PROGRESS_TRACKER_FILE_NAME))
 
-        # Callback that the checkpoint was reached, regardless of whether the model was evaluated.
-        self.callback(lambda c: c.on_checkpoint(self, progress_tracker))
+            # Callback that the checkpoint was reached, regardless of whether the model was evaluated.
+            self.callback(lambda c: c.on_checkpoint(self, progress_tracker))
+
+        checkpoint_manager.save(progress_tracker.steps, on_saved=on_saved)
+        self.write_checkpoint_stall_time(checkpoint_manager, summary_writer, progress_tracker.steps)
+
+    def save_best_checkpoint(
+        self,
+        progress_tracker: ProgressTracker,
+        save_path: str,
+        checkpoint_manager: CheckpointManager,
+        summary_writer: Optional[SummaryWriter] = None,
+    ):
+        """Saves the model as the best checkpoint and invokes the best checkpoint callback.
+
+        Asynchronous checkpoints are only waited for if a callback handles the best checkpoint, as it may read it.
+        Otherwise the next save waits for them.
+        """
+        checkpoint_manager.save_best(progress_tracker.steps)
+        self.wait_for_checkpoint_before_callbacks(checkpoint_manager, "on_save_best_checkpoint")
+        self.callback(lambda c: c.on_save_best_checkpoint(self, progress_tracker, save_path))
+        self.write_checkpoint_stall_time(checkpoint_manager, summary_writer, progress_tracker.steps)
+
+    def wait_for_checkpoint_before_callbacks(self, checkpoint_manager: CheckpointManager, hook: str):
+        """Waits for the checkpoint being written, if any callback implements `hook`, which may read the checkpoint."""
+        if any(getattr(type(callback), hook) is not getattr(Callback, hook) for callback in self.callbacks or []):
+            checkpoint_manager.wait_for_pending_save()
+
+    @staticmethod
+    def write_checkpoint_stall_time(
+        checkpoint_manager: CheckpointManager, summary_writer: Optional[SummaryWriter], step: int
+    ):
+        """Logs the time checkpoint saves, and waits for them, blocked training for since the last logged time."""
+        if summary_writer is not None:
+            summary_writer.add_scalar("checkpoint/stall_time", checkpoint_manager.pop_stall_time(), global_step=step)
 
     def create_checkpoint_handle(self):
-        return self.distributed.create_checkpoint_handle(
+        checkpoint = self.distributed.create_checkpoint_handle(
             dist_model=self.dist_model, model=self.model, optimizer=self.optimizer, scheduler=self.scheduler
         )
+        if self.sharded_checkpoint:
+            if isinstance(checkpoint, MultiNodeCheckpoint):
+                checkpoint.max_shard_size = DEFAULT_MAX_SHARD_SIZE
+            else:
+                logger.warning(
+                    f"Sharded checkpoints are not supported by {type(checkpoint).__name__}, saving checkpoints in its "
+                    "own format."
+                )
+        return checkpoint
 
     def train(
         self,
@@ -886,7 +971,13 @@ class Trainer(BaseTrainer):
 
         # ====== Setup session =======
         checkpoint = self.create_checkpoint_handle()
-        checkpoint_manager = CheckpointManager(checkpoint, training_checkpoints_path, device=self.device)
+        checkpoint_manager = CheckpointManager(
+            checkpoint,
+            training_checkpoints_path,
+            device=self.device,
+            async_save=self.async_checkpoint,
+            pin_memory=self.checkpoint_pin_memory,
+        )
 
         # ====== Setup Tensorboard writers =======
         train_summary_writer = None
@@ -968,6 +1059,9 @@ class Trainer(BaseTrainer):
         else:
             profiler = None
 
+        # Low-overhead logging reports the memory usage sampled in the background instead of reading it every step.
+        memory_sampler = MemorySampler() if self.steps_per_log_sync > 1 else None
+
         try:
             with training_set.initialize_batcher(
                 batch_size=self.batch_size,
@@ -976,6 +1070,8 @@ class Trainer(BaseTrainer):
                 distributed=self.distributed,
                 ignore_last=True,
                 augmentation_pipeline=self.model.get_augmentation_pipelines(),
+                bucketing_field=self.bucketing_field,
+                bucketing_trim=self.bucketing_trim,
             ) as batcher:
                 # ================ Training Loop ================
                 self.steps_per_epoch = batcher.steps_per_epoch
@@ -1038,6 +1134,8 @@ class Trainer(BaseTrainer):
 
                 if profiler:
                     profiler.start()
+                if memory_sampler:
+                    memory_sampler.start()
 
                 while progress_tracker.steps < self.total_steps:
                     # note that batch size may change over epochs
@@ -1053,26 +1151,35 @@ class Trainer(BaseTrainer):
                     self.callback(lambda c: c.on_epoch_start(self, progress_tracker, save_path))
 
                     # Trains over a full epoch of data or up to the last training step, whichever is sooner.
-                    should_break, has_nan_or_inf_tensors = self._train_loop(
+                    # Batches are assembled and moved to the device ahead of time by the prefetching batcher.
+                    with PrefetchBatcher(
                         batcher,
-                        progress_tracker,
-                        save_path,
-                        train_summary_writer,
-                        progress_bar,
-                        training_set,
-                        validation_set,
-                        test_set,
-                        start_time,
-                        validation_summary_writer,
-                        test_summary_writer,
-                        model_hyperparameters_path,
-                        output_features,
-                        metrics_names,
-                        checkpoint_manager,
-                        final_steps_per_checkpoint,
-                        early_stopping_steps,
-                        profiler,
-                    )
+                        self.prefetch_depth,
+                        self._get_batch_columns(),
+                        self.device,
+                        host_fn=lambda batch: {_HOST_BATCH_INFO: self.get_host_batch_info(batch)},
+                    ) as prefetching_batcher:
+                        should_break, has_nan_or_inf_tensors = self._train_loop(
+                            prefetching_batcher,
+                            progress_tracker,
+                            save_path,
+                            train_summary_writer,
+                            progress_bar,
+                            training_set,
+                            validation_set,
+                            test_set,
+                            start_time,
+                            validation_summary_writer,
+                            test_summary_writer,
+                            model_hyperparameters_path,
+                            output_features,
+                            metrics_names,
+                            checkpoint_manager,
+                            final_steps_per_checkpoint,
+                            early_stopping_steps,
+                            profiler,
+                            memory_sampler,
+                        )
                     if self.is_coordinator():
                         # ========== Save training progress ==========
                         logger.debug(
@@ -1087,17 +1194,27 @@ class Trainer(BaseTrainer):
                         break
 
                     if not self.skip_save_progress:
-                        self.save_checkpoint(progress_tracker, save_path, checkpoint_manager)
+                        self.save_checkpoint(progress_tracker, save_path, checkpoint_manager, train_summary_writer)
 
                     if not self.skip_save_model and self.skip_all_evaluation:
                         # All evaluation was skipped, so save the current step as the best so far.
                         checkpoint_manager.save_best(progress_tracker.steps)
+                        self.write_checkpoint_stall_time(
+                            checkpoint_manager, train_summary_writer, progress_tracker.steps
+                        )
 
                     # Early stop if needed.
                     if should_break:
                         break
         finally:
             # ================ Finished Training ================
+            if not self.skip_save_model and self.skip_all_evaluation and not has_nan_or_inf_tensors:
+                # All evaluation was skipped, so save the current step as the best so far.
+                checkpoint_manager.save_best(progress_tracker.steps)
+
+            # Flush any checkpoint still being written before callbacks read it
+            checkpoint_manager.close()
+
             self.callback(
                 lambda c: c.on_trainer_train_teardown(self, progress_tracker, save_path, self.is_coordinator()),
                 coordinator_only=False,
@@ -1109,6 +1226,8 @@ class Trainer(BaseTrainer):
             # Stop the profiler.
             if profiler:
                 profiler.stop()
+            if memory_sampler:
+                memory_sampler.stop()
 
             # Close the summary writers.
             if train_summary_writer is not None:
@@ -1118,13 +1237,6 @@ class Trainer(BaseTrainer):
             if test_summary_writer is not None:
                 test_summary_writer.close()
 
-            if not self.skip_save_model and self.skip_all_evaluation and not has_nan_or_inf_tensors:
-                # All evaluation was skipped, so save the current step as the best so far.
-                checkpoint_manager.save_best(progress_tracker.steps)
-
-            if not self.skip_save_progress:
-                checkpoint_manager.close()
-
         # Load the best weights from saved checkpoint
         state_dict = None
         if self.distributed.is_coordinator():
@@ -1210,6 +1322,7 @@ class Trainer(BaseTrainer):
         final_steps_per_checkpoint: int,
         early_stopping_steps: int,
         profiler: Optional[torch.profiler.profile],
+        memory_sampler: Optional[MemorySampler] = None,
     ) -> Tuple[bool, bool]:
         """Completes up to one epoch through the data.
 
@@ -1227,6 +1340,8 @@ class Trainer(BaseTrainer):
         batch_idx = 0
         should_break = False
         has_nan_or_inf_tensors = False
+        # With low-overhead logging, the step losses stay on the device until the next sync.
+        step_summaries = StepSummaryBuffer() if self.steps_per_log_sync > 1 else None
         while not batcher.last_batch() and progress_tracker.steps < self.total_steps and not should_break:
             progress_tracker.learning_rate = self.optimizer.param_groups[0]["lr"]
             self.callback(lambda c: c.on_batch_start(self, progress_tracker, save_path))
@@ -1240,25 +1355,36 @@ class Trainer(BaseTrainer):
             should_step = should_sync_grads or is_checkpoint_step
             batch_idx += 1
 
-            # Move tensors to cuda here.
-            inputs = {
-                i_feat.feature_name: torch.from_numpy(np.array(batch[i_feat.proc_column], copy=True)).to(self.device)
-                for i_feat in self.model.input_features.values()
-            }
-            targets = {
-                o_feat.feature_name: torch.from_numpy(np.array(batch[o_feat.proc_column], copy=True)).to(self.device)
-                for o_feat in self.model.output_features.values()
-            }
+            # The prefetching batcher has already moved the tensors to the device.
+            inputs = {i_feat.feature_name: batch[i_feat.proc_column] for i_feat in self.model.input_features.values()}
+            targets = {o_feat.feature_name: batch[o_feat.proc_column] for o_feat in self.model.output_features.values()}
 
-            loss, all_losses, used_tokens = self.train_step(inputs, targets, should_step=should_step, profiler=profiler)
+            loss, all_losses, used_tokens = self.train_step(
+                inputs,
+                targets,
+                should_step=should_step,
+                profiler=profiler,
+                host_batch_info=batch[_HOST_BATCH_INFO],
+            )
 
             # Update LR schduler here instead of train loop to avoid updating during batch size tuning, etc.
             self.scheduler.step()
 
             # Update progress tracker with token information.
             progress_tracker.set_token_usage_for_this_step(used_tokens)
+            step_stats = self.get_step_stats(used_tokens)
 
-            if self.is_coordinator() and not self.skip_save_log:
+            if step_summaries is not None:
+                step_summaries.append(
+                    progress_tracker.steps,
+                    loss,
+                    all_losses,
+                    used_tokens=used_tokens,
+                    total_tokens_used=progress_tracker.total_tokens_used,
+                    learning_rate=progress_tracker.learning_rate,
+                    step_stats=step_stats,
+                )
+            elif self.is_coordinator() and not self.skip_save_log:
                 self.write_step_summary(
                     train_summary_writer=train_summary_writer,
                     combined_loss=loss.detach().float(),
@@ -1267,16 +1393,29 @@ class Trainer(BaseTrainer):
                     used_tokens=used_tokens,
                     total_tokens_used=progress_tracker.total_tokens_used,
                     learning_rate=progress_tracker.learning_rate,
+                    step_stats=step_stats,
                 )
 
             progress_tracker.steps += 1
-            progress_bar.set_postfix({"loss": float(loss)})
+            if step_summaries is None:
+                progress_bar.set_postfix({"loss": float(loss)})
+            elif (
+                progress_tracker.steps % self.steps_per_log_sync == 0
+                or progress_tracker.steps % final_steps_per_checkpoint == 0
+                or progress_tracker.steps >= self.total_steps
+                or batcher.last_batch()
+            ):
+                self._flush_step_summaries(step_summaries, train_summary_writer, progress_bar)
             progress_bar.update(1)
             if self.is_coordinator():
                 logger.debug(
                     "training: completed batch %s memory used: %.2fMB",
                     progress_bar.total_steps,
-                    psutil.Process(os.getpid()).memory_info()[0] / 1e6,
+                    (
+                        memory_sampler.memory_used_mb
+                        if memory_sampler is not None
+                        else psutil.Process(os.getpid()).memory_info()[0] / 1e6
+                    ),
                 )
 
             # Executing `on_batch_end` calls before `run_evaluation` enables more accurate
@@ -1327,14 +1466,63 @@ class Trainer(BaseTrainer):
                 # this should not make a difference, except in the unlikely event an error occurs during eval and we
                 # want to resume from the last checkpoint, in which case we will lose slightly more progress this way.
                 if not self.skip_save_progress:
-                    self.save_checkpoint(progress_tracker, save_path, checkpoint_manager)
+                    self.save_checkpoint(progress_tracker, save_path, checkpoint_manager, train_summary_writer)
 
             # If this was the last batch, then increment the epoch counter and invoke the `on_epoch_end` callback.
             if batcher.last_batch():
+                self.wait_for_checkpoint_before_callbacks(checkpoint_manager, "on_epoch_end")
                 self.callback(lambda c: c.on_epoch_end(self, progress_tracker, save_path))
 
+        if step_summaries is not None:
+            self._flush_step_summaries(step_summaries, train_summary_writer, progress_bar)
+
         return should_break, has_nan_or_inf_tensors
 
+    def get_host_batch_info(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """Returns values computed from the host arrays of a training batch, which are passed to `train_step`.
+
+        Called by the prefetching batcher ahead of the training step, before the batch is moved to the device, so that
+        the training step does not need to read them back from the device.
+        """
+        return {}
+
+    def get_step_stats(self, used_tokens: int) -> Dict[str, Any]:
+        """Returns additional statistics of the last training step to write to the step summary, from summary tag
+        to scalar value. Scalar tensors on the device are buffered along with the step losses until the next sync.
+
+        Params:
+            used_tokens: The number of tokens used by the last training step.
+        """
+        return {}
+
+    def _flush_step_summaries(
+        self, step_summaries: StepSummaryBuffer, train_summary_writer, progress_bar: The FlowProgressBar
+    ):
+        """Copies the buffered step losses to the host at once, writes their step summaries and shows the last loss
+        in the progress bar."""
+        steps = step_summaries.flush()
+        if not steps:
+            return
+
+        if self.is_coordinator() and not self.skip_save_log:
+            for step, combined_loss, all_losses, step_info in steps:
+                self.write_step_summary(
+                    train_summary_writer=train_summary_writer,
+                    combined_loss=combined_loss,
+                    all_losses=all_losses,
+                    step=step,
+                    # The memory stats are the current ones, only log them for the last step.
+                    log_cuda_memory=step == steps[-1][0],
+                    **step_info,
+                )
+        progress_bar.set_postfix({"loss": float(steps[-1][1])})
+
+    def _get_batch_columns(self) -> List[str]:
+        """Returns the processed columns of the input and output features, which are moved to the device."""
+        return [feature.proc_column for feature in self.model.input_features.values()] + [
+            feature.proc_column for feature in self.model.output_features.values()
+        ]
+
     def _has_nan_or_inf_weights(self, model: torch.nn.Module) -> bool:
         """Check for NaN or infinity (inf) values in the weights (parameters and buffers) of a PyTorch model in a
         local or distributed training environment. It is called to ensure the model's numerical stability during
@@ -1385,15 +1573,11 @@ class Trainer(BaseTrainer):
             while not batcher.last_batch():
                 batch = batcher.next_batch()
                 inputs = {
-                    i_feat.feature_name: torch.from_numpy(np.array(batch[i_feat.proc_column], copy=True)).to(
-                        self.device
-                    )
+                    i_feat.feature_name: batch_array_to_tensor(batch[i_feat.proc_column], self.device)
                     for i_feat in self.model.input_features.values()
                 }
                 targets = {
-                    o_feat.feature_name: torch.from_numpy(np.array(batch[o_feat.proc_column], copy=True)).to(
-                        self.device
-                    )
+                    o_feat.feature_name: batch_array_to_tensor(batch[o_feat.proc_column], self.device)
                     for o_feat in self.model.output_features.values()
                 }
 
@@ -1443,6 +1627,7 @@ class Trainer(BaseTrainer):
         early_stopping_steps: int,
         skip_save_model,
         checkpoint_manager: CheckpointManager,
+        summary_writer: Optional[SummaryWriter] = None,
     ) -> bool:
         """Checks the history of validation scores.
 
@@ -1504,8 +1689,7 @@ class Trainer(BaseTrainer):
             # Save the model.
             if not skip_save_model:
                 logger.info("New best model saved.\n")
-                checkpoint_manager.save_best(progress_tracker.steps)
-                self.callback(lambda c: c.on_save_best_checkpoint(self, progress_tracker, save_path))
+                self.save_best_checkpoint(progress_tracker, save_path, checkpoint_manager, summary_writer)
 
         last_improvement_in_steps = progress_tracker.steps - progress_tracker.best_eval_metric_steps
         progress_tracker.last_improvement_steps = last_improvement_in_steps
@@ -8,6 +8,7 @@ import time
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 import lightgbm as lgb
+import numpy as np
 import torch
 from torch.utils.tensorboard import SummaryWriter
 
@@ -34,13 +35,16 @@ from theflow.utils import time_utils
 from theflow.utils.checkpoint_utils import CheckpointManager
 from theflow.utils.defaults import default_random_seed
 from theflow.utils.gbm_utils import (
+    continue_training,
     get_single_output_feature,
     get_targets,
     log_loss_objective,
     logits_to_predictions,
     multiclass_objective,
+    ScalarSequence,
     store_predictions,
     store_predictions_ray,
+    to_sklearn_model,
     TrainLogits,
 )
 from theflow.utils.metric_utils import get_metric_names, TrainerMetric
@@ -148,6 +152,8 @@ class LightGBMTrainer(BaseTrainer):
         self.verbose = config.verbose
         self.max_bin = config.max_bin
         self.feature_pre_filter = config.feature_pre_filter
+        self.bin_construct_sample_cnt = config.bin_construct_sample_cnt
+        self.dataset_chunk_size = config.dataset_chunk_size
 
         if self.boosting_type == "goss" and self.bagging_freq != 0:
             logger.info(
@@ -165,6 +171,9 @@ class LightGBMTrainer(BaseTrainer):
         # and before set_steps_to_1_or_quit returns
         self.original_sigint_handler = None
 
+        # Booster trained across train steps, bound to the LightGBM datasets of the current training session.
+        self.booster: Optional[lgb.Booster] = None
+
     @staticmethod
     def get_schema_cls() -> BaseTrainerConfig:
         return GBMTrainerConfig
@@ -516,11 +525,17 @@ class LightGBMTrainer(BaseTrainer):
     ) -> lgb.LGBMModel:
         """Trains a LightGBM model.
 
+        The boosting rounds of all train steps are added to the same booster, which keeps the binned datasets and the
+        current scores of the training and evaluation data, so a train step only costs its boosting rounds.
+
         Args:
             params: parameters for LightGBM
             lgb_train: LightGBM dataset for training
             eval_sets: LightGBM datasets for evaluation
             eval_names: names of the evaluation datasets
+            init_model: model to continue training from when the booster has not been created yet
+            boost_rounds_per_train_step: number of boosting rounds of the train step
+            evals_result: dictionary filled with the evaluation results of the train step
 
         Returns:
             LightGBM Booster model
@@ -536,22 +551,40 @@ class LightGBMTrainer(BaseTrainer):
             else (lgb_train.label.size,)
         )
 
-        callbacks = [store_predictions(train_logits)]
+        callbacks = [store_predictions(train_logits), lgb.record_evaluation(evals_result)]
 
         # DART is not compatible with early stopping.
         if self.boosting_type != "dart":
+            # add early stopping callback to populate best_iteration
             callbacks.append(lgb.early_stopping(boost_rounds_per_train_step))
 
-        gbm = gbm_sklearn_cls(n_estimators=boost_rounds_per_train_step, **params).fit(
-            X=lgb_train.get_data(),
-            y=lgb_train.get_label(),
-            init_model=init_model,
-            eval_set=[(ds.get_data(), ds.get_label()) for ds in eval_sets],
-            eval_names=eval_names,
-            # add early stopping callback to populate best_iteration
-            callbacks=callbacks,
+        # Custom objectives have the scikit-learn signature, which takes the labels instead of the dataset.
+        train_params = params
+        if callable(params["objective"]):
+            objective = params["objective"]
+            train_params = {**params, "objective": lambda preds, train_data: objective(train_data.get_label(), preds)}
+
+        if self.booster is None:
+            self.booster = lgb.train(
+                train_params,
+                lgb_train,
+                num_boost_round=boost_rounds_per_train_step,
+                valid_sets=eval_sets,
+                valid_names=eval_names,
+                init_model=init_model.booster_ if init_model is not None else None,
+                callbacks=callbacks,
+                keep_training_booster=True,
+            )
+        else:
+            continue_training(self.booster, train_params, boost_rounds_per_train_step, callbacks)
+
+        # Drop the boosting rounds after the best iteration, as fitting a scikit-learn model does.
+        while 0 < self.booster.best_iteration < self.booster.current_iteration():
+            self.booster.rollback_one_iter()
+
+        gbm = to_sklearn_model(
+            gbm_sklearn_cls(n_estimators=boost_rounds_per_train_step, **params), self.booster, lgb_train, evals_result
         )
-        evals_result.update(gbm.evals_result_)
 
         if not self.evaluate_training_set:
             # Update evaluation metrics with current model params:
@@ -625,6 +658,7 @@ class LightGBMTrainer(BaseTrainer):
             params = self._construct_lgb_params()
 
             lgb_train, eval_sets, eval_names = self._construct_lgb_datasets(training_set, validation_set, test_set)
+            self.booster = None
 
             # use separate total steps variable to allow custom SIGINT logic
             self.total_steps = self.num_boost_round
@@ -824,6 +858,7 @@ class LightGBMTrainer(BaseTrainer):
             "min_data_in_leaf": self.min_data_in_leaf,
             "min_sum_hessian_in_leaf": self.min_sum_hessian_in_leaf,
             "feature_pre_filter": self.feature_pre_filter,
+            "bin_construct_sample_cnt": self.bin_construct_sample_cnt,
             "seed": self.random_seed,
             **output_params,
         }
@@ -836,13 +871,20 @@ class LightGBMTrainer(BaseTrainer):
         validation_set: Optional["Dataset"] = None,  # noqa: F821
         test_set: Optional["Dataset"] = None,  # noqa: F821
     ) -> Tuple[lgb.Dataset, List[lgb.Dataset], List[str]]:
-        X_train = training_set.to_scalar_df(self.model.input_features.values())
-        y_train = training_set.to_scalar_df(self.model.output_features.values())
+        X_train, y_train, feature_name = self._get_lgb_data(training_set)
+
+        # The datasets are binned with the training parameters, as the booster trains on them directly. Custom
+        # objective functions are passed to LightGBM as the "none" objective.
+        params = self._construct_lgb_params()
+        if callable(params["objective"]):
+            params["objective"] = "none"
 
         # create dataset for lightgbm
         # keep raw data for continued training https://github.com/microsoft/LightGBM/issues/4965#issuecomment-1019344293
         try:
-            lgb_train = lgb.Dataset(X_train, label=y_train, free_raw_data=False).construct()
+            lgb_train = lgb.Dataset(
+                X_train, label=y_train, feature_name=feature_name, params=params, free_raw_data=False
+            ).construct()
         except lgb.basic.LightGBMError as e:
             if re.search(r"special JSON characters", str(e)):
                 raise ValueError(
@@ -855,10 +897,16 @@ class LightGBMTrainer(BaseTrainer):
         eval_sets = [lgb_train]
         eval_names = [LightGBMTrainer.TRAIN_KEY]
         if validation_set is not None:
-            X_val = validation_set.to_scalar_df(self.model.input_features.values())
-            y_val = validation_set.to_scalar_df(self.model.output_features.values())
+            X_val, y_val, feature_name = self._get_lgb_data(validation_set)
             try:
-                lgb_val = lgb.Dataset(X_val, label=y_val, reference=lgb_train, free_raw_data=False).construct()
+                lgb_val = lgb.Dataset(
+                    X_val,
+                    label=y_val,
+                    feature_name=feature_name,
+                    reference=lgb_train,
+                    params=params,
+                    free_raw_data=False,
+                ).construct()
             except lgb.basic.LightGBMError as e:
                 if re.search(r"special JSON characters", str(e)):
                     raise ValueError(
@@ -874,10 +922,16 @@ class LightGBMTrainer(BaseTrainer):
             pass
 
         if test_set is not None:
-            X_test = test_set.to_scalar_df(self.model.input_features.values())
-            y_test = test_set.to_scalar_df(self.model.output_features.values())
+            X_test, y_test, feature_name = self._get_lgb_data(test_set)
             try:
-                lgb_test = lgb.Dataset(X_test, label=y_test, reference=lgb_train, free_raw_data=False).construct()
+                lgb_test = lgb.Dataset(
+                    X_test,
+                    label=y_test,
+                    feature_name=feature_name,
+                    reference=lgb_train,
+                    params=params,
+                    free_raw_data=False,
+                ).construct()
             except lgb.basic.LightGBMError as e:
                 if re.search(r"special JSON characters", str(e)):
                     raise ValueError(
@@ -891,6 +945,26 @@ class LightGBMTrainer(BaseTrainer):
 
         return lgb_train, eval_sets, eval_names
 
+    def _get_lgb_data(
+        self, dataset: "Dataset"  # noqa: F821
+    ) -> Tuple[Union[np.ndarray, ScalarSequence], np.ndarray, List[str]]:
+        """Returns the features, labels and feature names of a dataset, to construct a LightGBM dataset.
+
+        The features are a float32 matrix that LightGBM reads without copying it. If `dataset_chunk_size` is set, they
+        are a sequence of the rows instead, that LightGBM reads in chunks after binning the features from a sample of
+        the rows.
+        """
+        input_features = self.model.input_features.values()
+        label, _ = dataset.to_scalar_array(self.model.output_features.values())
+
+        # The initial scores of a model to continue training from are predicted from the whole feature matrix.
+        if self.dataset_chunk_size is not None and self.model.lgbm_model is None:
+            data = ScalarSequence(dataset.get_columns(input_features), self.dataset_chunk_size)
+            return data, label.ravel(), data.column_names
+
+        data, feature_name = dataset.to_scalar_array(input_features)
+        return data, label.ravel(), feature_name
+
     def is_coordinator(self) -> bool:
         return self.distributed.rank() == 0
 
@@ -950,6 +1024,11 @@ class LightGBMRayTrainer(LightGBMTrainer):
             **kwargs,
         )
 
+        if self.dataset_chunk_size is not None:
+            logger.warning(
+                "`dataset_chunk_size` is only supported by the local backend and will be ignored by the Ray backend."
+            )
+
         self.ray_params = _map_to_lgb_ray_params(trainer_kwargs)
         self.data_loader_kwargs = data_loader_kwargs or {}
         self.executable_kwargs = executable_kwargs or {}
@@ -1,11 +1,13 @@
 import logging
 import os
 import time
-from typing import Callable, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
+import torch
 from torch.utils.tensorboard import SummaryWriter
 
-from theflow.constants import MINIMUM_BATCH_SIZE, TEST, TRAINING, VALIDATION
+from theflow.constants import MINIMUM_BATCH_SIZE, TEST, TEXT, TRAINING, VALIDATION
+from theflow.data.batcher.prefetch import batch_array_to_tensor
 from theflow.data.dataset.base import Dataset
 from theflow.distributed.base import DistributedStrategy, LocalStrategy
 from theflow.features.feature_utils import The FlowFeatureDict
@@ -36,6 +38,9 @@ logger = logging.getLogger(__name__)
 MAX_EVALUATION_EXAMPLES = 1000
 MAX_EVALUATION_EXAMPLES_SHOWN = 5
 
+# Key of the packing layout of a batch in the values returned by `FineTuneTrainer.get_host_batch_info`.
+_PACKING_LAYOUT = "packing_layout"
+
 
 @register_llm_trainer("none")
 @register_llm_ray_trainer("none")
@@ -438,8 +443,60 @@ class FineTuneTrainer(Trainer):
             device,
             **kwargs,
         )
+        # End of the previous training step, or start of the current one after an evaluation.
+        self._step_start_time = None
+
+    def train_step(
+        self,
+        inputs: Dict[str, torch.Tensor],
+        targets: Dict[str, torch.Tensor],
+        should_step: bool = True,
+        profiler: Optional[torch.profiler.profile] = None,
+        host_batch_info: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[torch.Tensor, Dict[str, torch.Tensor], torch.Tensor]:
+        if self._step_start_time is None:
+            self._step_start_time = time.perf_counter()
+        self.model.packing_layout = (host_batch_info or {}).get(_PACKING_LAYOUT)
+        return super().train_step(
+            inputs, targets, should_step=should_step, profiler=profiler, host_batch_info=host_batch_info
+        )
+
+    def get_host_batch_info(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """Lays out the packed rows of the batch on the host when sequence packing is enabled."""
+        if not (self.model.enable_sequence_packing and self.model.output_feature_type == TEXT):
+            return {}
+        input_ids, target_ids = (
+            batch_array_to_tensor(batch[feature.proc_column], "cpu").type(torch.int32)
+            for feature in (
+                next(iter(self.model.input_features.values())),
+                next(iter(self.model.output_features.values())),
+            )
+        )
+        return {_PACKING_LAYOUT: self.model.get_packing_layout(input_ids, target_ids)}
+
+    def get_step_stats(self, used_tokens: int) -> Dict[str, Any]:
+        """Returns the throughput of the last training step in tokens per second, and the fraction of the tokens
+        processed by the model that were padding.
+
+        The throughput is measured over the whole step, from the end of the previous one: it includes loading the batch
+        and writing the summaries of the previous step. The padding ratio may be a tensor on the device, it is read
+        along with the losses of the step.
+        """
+        step_stats = {}
+        now = time.perf_counter()
+        if self._step_start_time is not None:
+            step_stats["tokens/tokens_per_sec"] = used_tokens / max(now - self._step_start_time, 1e-9)
+        self._step_start_time = now
+        if self.model.padding_ratio is not None:
+            padding_ratio = self.model.padding_ratio
+            step_stats["tokens/padding_ratio"] = (
+                padding_ratio.detach().float() if isinstance(padding_ratio, torch.Tensor) else padding_ratio
+            )
+        return step_stats
 
     def evaluation(self, dataset, dataset_name, metrics_log, batch_size, progress_tracker):
+        # The throughput of the next training step is measured from its start rather than over the evaluation.
+        self._step_start_time = None
         predictor = LlmFineTunePredictor(
             self.model, batch_size=batch_size, distributed=self.distributed, report_tqdm_to_ray=self.report_tqdm_to_ray
         )
@@ -3,17 +3,21 @@
 https://gist.github.com/kevinzakka/5d345421f7abefd5dbaf6a77f829e70a.
 """
 
+import copy
 import errno
+import functools
 import logging
 import os
 import re
 import shutil
 import signal
 import tempfile
+import time
 import uuid
 from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
 from glob import glob
-from typing import Any, Dict, Mapping, Optional, Tuple, TYPE_CHECKING
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, TYPE_CHECKING
 
 import torch
 from torch.optim import Optimizer
@@ -21,6 +25,12 @@ from torch.optim import Optimizer
 from theflow.api_annotations import DeveloperAPI
 from theflow.globals import MODEL_WEIGHTS_FILE_NAME
 from theflow.modules.lr_scheduler import LRScheduler
+from theflow.utils.sharded_checkpoint_utils import (
+    is_sharded_index,
+    LazyShardedStateDict,
+    load_sharded_state,
+    ShardedCheckpointWriter,
+)
 
 if TYPE_CHECKING:
     from theflow.distributed.base import DistributedStrategy
@@ -73,6 +83,40 @@ def get_latest_checkpoint_path(directory: str) -> str:
     return None
 
 
+@DeveloperAPI
+def copy_state_to_cpu(state: Any, pin_memory: bool = False) -> Any:
+    """Returns a copy of a (nested) state dict with every tensor copied to CPU memory.
+
+    The copy does not share memory with the original state, so it can be written while training keeps updating the model
+    and optimizer in place. If `pin_memory` is True, tensors on GPU are copied into pinned memory.
+    """
+    pinned = False
+
+    def _copy(value: Any) -> Any:
+        nonlocal pinned
+        if isinstance(value, torch.Tensor):
+            if pin_memory and value.is_cuda:
+                pinned = True
+                return torch.empty_like(value, device="cpu", pin_memory=True).copy_(value.detach(), non_blocking=True)
+            return value.detach().to("cpu", copy=True)
+        if isinstance(value, (dict, list)):
+            # Shallow copy first to keep the container type, e.g. an OrderedDict or a defaultdict
+            copied = copy.copy(value)
+            for k, v in value.items() if isinstance(value, dict) else enumerate(value):
+                copied[k] = _copy(v)
+            return copied
+        if isinstance(value, tuple):
+            values = [_copy(v) for v in value]
+            return type(value)(*values) if hasattr(value, "_fields") else type(value)(values)
+        return copy.deepcopy(value)
+
+    state = _copy(state)
+    if pinned:
+        # Wait for the non-blocking copies to finish
+        torch.cuda.synchronize()
+    return state
+
+
 @DeveloperAPI
 class Checkpoint(ABC):
     """Save and restore model and optimizer states."""
@@ -108,6 +152,20 @@ class Checkpoint(ABC):
     def save(self, save_path: str, global_step: int):
         pass
 
+    def save_async(self, save_path: str, global_step: int, pin_memory: bool = False) -> Optional[Callable[[], None]]:
+        """Snapshots the state to save and returns a function writing it to `save_path`, to be called in the
+        background.
+
+        Returns None if nothing is left to write, which is the case for checkpoints that do not support asynchronous
+        saves and are saved synchronously.
+        """
+        self.save(save_path, global_step)
+        return None
+
+    def finish_async_save(self):
+        """Called on every rank once the function returned by `save_async`, if any, has written the state."""
+        pass
+
     def _get_global_step(self, state: Dict[str, Any], save_path: str) -> int:
         global_step = state.get("global_step")
         if global_step is None:
@@ -119,6 +177,20 @@ class Checkpoint(ABC):
 
 @DeveloperAPI
 class MultiNodeCheckpoint(Checkpoint):
+    def __init__(
+        self,
+        distributed: "DistributedStrategy",
+        model: "BaseModel",
+        optimizer: Optional[Optimizer] = None,
+        scheduler: Optional[LRScheduler] = None,
+    ):
+        """Constructor."""
+        super().__init__(distributed, model, optimizer, scheduler)
+        # Maximum size in bytes of the safetensors shards to save checkpoints as, or None to save them as a single
+        # torch file. Sharded checkpoints only rewrite the shards of tensors modified since they were last saved.
+        self.max_shard_size: Optional[int] = None
+        self._sharded_writer = ShardedCheckpointWriter(self.write_state, self.safe_move_file)
+
     def prepare(self, directory: str):
         if self.is_local_rank_0():
             super().prepare(directory)
@@ -138,6 +210,8 @@ class MultiNodeCheckpoint(Checkpoint):
         """
         try:
             state = torch.load(save_path, map_location=device)
+            if is_sharded_index(state):
+                state = load_sharded_state(state, save_path, device)
             try:
                 self.global_step = self._get_global_step(state, save_path)
                 _, unexpected_keys = self.model.load_state_dict(state[MODEL_WEIGHTS_FILE_NAME], strict=False)
@@ -162,6 +236,14 @@ class MultiNodeCheckpoint(Checkpoint):
 
     def get_state_for_inference(self, save_path: str, device: Optional[torch.device] = None) -> Mapping[str, Any]:
         state = torch.load(save_path, map_location=device)
+        if is_sharded_index(state):
+            # Only read the model weights, lazily, from the memory-mapped shards.
+            return LazyShardedStateDict(
+                state["state"][MODEL_WEIGHTS_FILE_NAME],
+                state["shards"],
+                save_path,
+                device="cpu" if device is None else str(device),
+            )
         return state[MODEL_WEIGHTS_FILE_NAME]
 
     def save(self, save_path: str, global_step: int):
@@ -175,41 +257,71 @@ class MultiNodeCheckpoint(Checkpoint):
              to name the checkpoint.
         """
         if self.is_local_rank_0():
-            state = {
-                "global_step": global_step,
-                MODEL_WEIGHTS_FILE_NAME: self.get_model_state_dict(),
-            }
-            if self.optimizer is not None:
-                state["optim_state"] = self.optimizer.state_dict()
-            if self.scheduler is not None:
-                state["scheduler_state"] = self.scheduler.state_dict()
-
-            # ignore ctrl+c while saving
-            try:
-                orig_handler = signal.getsignal(signal.SIGINT)
-                signal.signal(signal.SIGINT, lambda _sig, _frame: None)
-            except ValueError:
-                # signal throws a ValueError if we're not in the main thread
-                orig_handler = None
+            self._get_write_fn(save_path, global_step)()
+        self.distributed.barrier()
 
-            try:
-                # atomic save
-                with tempfile.TemporaryDirectory() as tmpdir:
-                    # Save to a temporary directory outside of the checkpoint dir so
-                    # async processes do not try and copy a partially-written checkpoint.
-                    # See Ray Tune and MLFlow for examples of background processes that
-                    # are affected by this.
-                    tmp_path = os.path.join(tmpdir, "temp.ckpt")
-                    torch.save(state, tmp_path)
-
-                    self.safe_move_file(tmp_path, save_path)
-                    logger.debug(f"Saved checkpoint at {save_path}.")
-            finally:
-                # restore SIGINT handler
-                if orig_handler is not None:
-                    signal.signal(signal.SIGINT, orig_handler)
+    def save_async(self, save_path: str, global_step: int, pin_memory: bool = False) -> Optional[Callable[[], None]]:
+        write_fn = None
+        if self.is_local_rank_0():
+            write_fn = self._get_write_fn(
+                save_path, global_step, copy_fn=functools.partial(copy_state_to_cpu, pin_memory=pin_memory)
+            )
+        return write_fn
+
+    def finish_async_save(self):
+        # Other ranks only continue once local rank 0 has written the checkpoint, as they do after `save`
         self.distributed.barrier()
 
+    def _get_write_fn(
+        self, save_path: str, global_step: int, copy_fn: Optional[Callable[[Any], Any]] = None
+    ) -> Callable[[], None]:
+        """Returns a function writing the state at `global_step` to `save_path`, copied with `copy_fn` if given."""
+        state = self.get_state(global_step)
+        if self.max_shard_size is not None:
+            return self._sharded_writer.prepare(state, save_path, self.max_shard_size, copy_fn=copy_fn)
+        if copy_fn is not None:
+            state = copy_fn(state)
+        return functools.partial(self.write_state, state, save_path)
+
+    def get_state(self, global_step: int) -> Dict[str, Any]:
+        """Returns the model, optimizer and scheduler state to save at `global_step`."""
+        state = {
+            "global_step": global_step,
+            MODEL_WEIGHTS_FILE_NAME: self.get_model_state_dict(),
+        }
+        if self.optimizer is not None:
+            state["optim_state"] = self.optimizer.state_dict()
+        if self.scheduler is not None:
+            state["scheduler_state"] = self.scheduler.state_dict()
+        return state
+
+    def write_state(self, state: Dict[str, Any], save_path: str):
+        """Atomically writes `state` to `save_path`."""
+        # ignore ctrl+c while saving
+        try:
+            orig_handler = signal.getsignal(signal.SIGINT)
+            signal.signal(signal.SIGINT, lambda _sig, _frame: None)
+        except ValueError:
+            # signal throws a ValueError if we're not in the main thread
+            orig_handler = None
+
+        try:
+            # atomic save
+            with tempfile.TemporaryDirectory() as tmpdir:
+                # Save to a temporary directory outside of the checkpoint dir so
+                # async processes do not try and copy a partially-written checkpoint.
+                # See Ray Tune and MLFlow for examples of background processes that
+                # are affected by this.
+                tmp_path = os.path.join(tmpdir, "temp.ckpt")
+                torch.save(state, tmp_path)
+
+                self.safe_move_file(tmp_path, save_path)
+                logger.debug(f"Saved checkpoint at {save_path}.")
+        finally:
+            # restore SIGINT handler
+            if orig_handler is not None:
+                signal.signal(signal.SIGINT, orig_handler)
+
     def get_model_state_dict(self) -> Dict[str, Any]:
         state = self.model.state_dict()
 
@@ -264,7 +376,14 @@ class MultiNodeCheckpoint(Checkpoint):
 class CheckpointManager:
     """A model and optimizer checkpoint manager."""
 
-    def __init__(self, checkpoint: Checkpoint, directory: str, device: torch.device):
+    def __init__(
+        self,
+        checkpoint: Checkpoint,
+        directory: str,
+        device: torch.device,
+        async_save: bool = False,
+        pin_memory: bool = False,
+    ):
         """Constructor.
 
         Args:
@@ -272,11 +391,23 @@ class CheckpointManager:
           directory (str): The directory in which checkpoints will be saved.
           device (torch.device): The computing device on which to restore
             checkpoints.
+          async_save (bool): Whether to write checkpoints in a background thread
+            from a CPU snapshot of the state. At most one save is in flight: a
+            save waits for the previous one to be written before snapshotting.
+          pin_memory (bool): Whether to snapshot GPU tensors into pinned memory
+            for asynchronous saves.
         """
         self.checkpoint = checkpoint
         self.directory = directory
         self.device = device
         self.latest_checkpoint = None
+        self.pin_memory = pin_memory
+        # Seconds saves and waits for asynchronous saves blocked the caller for, since last reset.
+        self.stall_time = 0.0
+        self._save_executor = ThreadPoolExecutor(max_workers=1) if async_save else None
+        self._pending_save: Optional[Future] = None
+        self._save_in_flight = False
+        self._on_saved: Optional[Callable[[], None]] = None
         self.checkpoint.prepare(self.directory)
 
     def restore_or_initialize(self) -> int:
@@ -286,6 +417,7 @@ class CheckpointManager:
           The global iteration step. This is parsed from the latest
             checkpoint file if one is found, else 0 is returned.
         """
+        self.wait_for_pending_save()
         last_ckpt = get_latest_checkpoint_path(self.directory)
         if last_ckpt:
             status = self.checkpoint.load(last_ckpt, self.device)
@@ -296,16 +428,60 @@ class CheckpointManager:
             return self.checkpoint.global_step
         return 0
 
-    def save(self, global_step: int, tag: str = LATEST):
+    @property
+    def async_save(self) -> bool:
+        """Whether checkpoints are written in a background thread."""
+        return self._save_executor is not None
+
+    def save(self, global_step: int, tag: str = LATEST, on_saved: Optional[Callable[[], None]] = None):
         """Create a new checkpoint.
 
         Args:
            global_step (int): The iteration number which will be used
              to name the checkpoint.
+           on_saved (Callable): Optional function called once the checkpoint
+             is written, e.g. to record progress pointing to it. Asynchronous
+             saves call it from `wait_for_pending_save`, on the caller's thread.
         """
         save_path = os.path.join(self.directory, f"{tag}.ckpt")
-        self.checkpoint.save(save_path, global_step)
+        if self._save_executor is None:
+            start_time = time.perf_counter()
+            self.checkpoint.save(save_path, global_step)
+        else:
+            self.wait_for_pending_save()
+            start_time = time.perf_counter()
+            write_fn = self.checkpoint.save_async(save_path, global_step, pin_memory=self.pin_memory)
+            if write_fn is not None:
+                self._pending_save = self._save_executor.submit(write_fn)
+            self._save_in_flight = True
+        self.stall_time += time.perf_counter() - start_time
         self.latest_checkpoint = save_path
+        if self._save_in_flight:
+            self._on_saved = on_saved
+        elif on_saved is not None:
+            on_saved()
+
+    def wait_for_pending_save(self):
+        """Waits for the asynchronous save in flight, if any, to be written, and raises its error if it failed.
+
+        Must be called on every rank, as ranks are synchronized once the save is written.
+        """
+        if not self._save_in_flight:
+            return
+        start_time = time.perf_counter()
+        pending_save, on_saved = self._pending_save, self._on_saved
+        self._pending_save, self._on_saved, self._save_in_flight = None, None, False
+        if pending_save is not None:
+            pending_save.result()
+        self.checkpoint.finish_async_save()
+        self.stall_time += time.perf_counter() - start_time
+        if on_saved is not None:
+            on_saved()
+
+    def pop_stall_time(self) -> float:
+        """Returns the seconds saves and waits for them blocked the caller for since the last call, and resets it."""
+        stall_time, self.stall_time = self.stall_time, 0.0
+        return stall_time
 
     def save_best(self, global_step: int):
         self.save(global_step, BEST)
@@ -316,10 +492,12 @@ class CheckpointManager:
         Args:
           tag (str): The tag of the checkpoint to load.
         """
+        self.wait_for_pending_save()
         save_path = os.path.join(self.directory, f"{tag}.ckpt")
         self.checkpoint.load(save_path, self.device)
 
     def get_best_checkpoint_state_for_inference(self, device: torch.device) -> Tuple[Mapping[str, Any], None]:
+        self.wait_for_pending_save()
         save_path = os.path.join(self.directory, f"{BEST}.ckpt")
         try:
             return self.checkpoint.get_state_for_inference(save_path, device)
@@ -330,7 +508,14 @@ class CheckpointManager:
             return None
 
     def close(self):
-        pass
+        """Flushes the asynchronous save in flight, if any.
+
+        Later saves are synchronous.
+        """
+        if self._save_executor is not None:
+            self.wait_for_pending_save()
+            self._save_executor.shutdown()
+            self._save_executor = None
 
     @staticmethod
     def load_latest_checkpoint(checkpoint: Checkpoint, directory: str, device: torch.device):
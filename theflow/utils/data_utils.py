@@ -30,7 +30,7 @@ import re
 import tempfile
 import threading
 from itertools import islice
-from typing import Any, Dict, List, Tuple, Union
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -45,7 +45,7 @@ from theflow.constants import PREPROCESSING, SPLIT
 from theflow.data.cache.types import CacheableDataset
 from theflow.globals import MODEL_HYPERPARAMETERS_FILE_NAME, MODEL_WEIGHTS_FILE_NAME, TRAIN_SET_METADATA_FILE_NAME
 from theflow.utils.dataframe_utils import from_numpy_dataset, is_dask_lib, to_numpy_dataset
-from theflow.utils.fs_utils import download_h5, has_remote_protocol, open_file, upload_h5
+from theflow.utils.fs_utils import download_h5, get_fs_and_path, has_remote_protocol, open_file, upload_h5
 from theflow.utils.math_utils import cumsum
 from theflow.utils.misc_utils import get_from_registry
 from theflow.utils.types import DataFrame
@@ -109,6 +109,8 @@ CACHEABLE_FORMATS = set.union(
 
 PANDAS_DF = pd
 
+DEFAULT_DATASET_CHUNK_SIZE = 100_000
+
 
 # Lock over the entire interpreter as we can only have one set
 # of credentials scoped to the interpreter at once.
@@ -1080,6 +1082,96 @@ def load_dataset(dataset, data_format=None, df_lib=PANDAS_DF):
         raise ValueError(f"{data_format} format is not supported")
 
 
+@DeveloperAPI
+def load_dataset_chunks(
+    dataset, data_format=None, chunk_size: int = DEFAULT_DATASET_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """Yields the dataset as pandas dataframes of at most `chunk_size` rows, in order.
+
+    Csv, tsv and jsonl files are read `chunk_size` rows at a time, and parquet files or directories `chunk_size` rows of
+    row groups at a time, so only one chunk is held in memory. Other formats are loaded entirely, then split into
+    chunks.
+    """
+    if not data_format or data_format == "auto":
+        data_format = figure_data_format(dataset)
+
+    if data_format in CSV_FORMATS | TSV_FORMATS:
+        read_fn = read_csv if data_format in CSV_FORMATS else read_tsv
+        with read_fn(dataset, df_lib=PANDAS_DF, chunksize=chunk_size) as reader:
+            yield from reader
+    elif data_format in JSONL_FORMATS:
+        with read_jsonl(dataset, df_lib=PANDAS_DF, chunksize=chunk_size) as reader:
+            yield from reader
+    elif data_format in PARQUET_FORMATS:
+        import pyarrow.dataset as pa_dataset
+
+        fs, path = get_fs_and_path(dataset)
+        parquet_dataset = pa_dataset.dataset(path, format="parquet", filesystem=fs)
+        # Batches do not span row groups, so they are regrouped into chunks of exactly `chunk_size` rows
+        table = parquet_dataset.schema.empty_table()
+        for batch in parquet_dataset.to_batches(batch_size=chunk_size):
+            table = pa.concat_tables([table, pa.Table.from_batches([batch])])
+            while table.num_rows >= chunk_size:
+                yield table.slice(0, chunk_size).to_pandas()
+                table = table.slice(chunk_size)
+        if table.num_rows:
+            yield table.to_pandas()
+    else:
+        if data_format not in DATAFRAME_FORMATS | DICT_FORMATS:
+            logger.warning(f"Reading {data_format} datasets in chunks is not supported, loading the whole dataset.")
+        df = load_dataset(dataset, data_format=data_format)
+        if not isinstance(df, pd.DataFrame):
+            df = df.compute()
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start : start + chunk_size]
+
+
+@DeveloperAPI
+@contextlib.contextmanager
+def open_dataset_writer(data_fp: str, data_format=None) -> Iterator[Callable[[pd.DataFrame], None]]:
+    """Yields a function appending pandas dataframes to a single csv, tsv, jsonl or parquet file, e.g. to write a
+    dataset chunk after chunk without holding it all in memory."""
+    if not data_format or data_format == "auto":
+        data_format = figure_data_format_dataset(data_fp)
+
+    if data_format in PARQUET_FORMATS:
+        import pyarrow.parquet as pq
+
+        fs, path = get_fs_and_path(data_fp)
+        writer = None
+
+        def write_parquet(df: pd.DataFrame):
+            nonlocal writer
+            if writer is None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                writer = pq.ParquetWriter(path, table.schema, filesystem=fs)
+            else:
+                # Chunks are cast to the schema of the first one, e.g. for columns only holding nulls
+                table = pa.Table.from_pandas(df, schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+
+        try:
+            yield write_parquet
+        finally:
+            if writer is not None:
+                writer.close()
+    elif data_format in CSV_FORMATS | TSV_FORMATS | JSONL_FORMATS:
+        with open_file(data_fp, "w", encoding="utf8", newline="") as f:
+            header = True
+
+            def write_text(df: pd.DataFrame):
+                nonlocal header
+                if data_format in JSONL_FORMATS:
+                    df.to_json(f, orient="records", lines=True)
+                else:
+                    df.to_csv(f, sep="," if data_format in CSV_FORMATS else "\t", header=header, index=False)
+                header = False
+
+            yield write_text
+    else:
+        raise ValueError(f"Writing {data_format} datasets in chunks is not supported, use csv, tsv, jsonl or parquet.")
+
+
 @DeveloperAPI
 @contextlib.contextmanager
 def use_credentials(creds):
@@ -6,6 +6,7 @@ import pandas as pd
 from theflow.api_annotations import DeveloperAPI
 from theflow.constants import DASK_MODULE_NAME
 from theflow.data.dataframe.base import DataFrameEngine
+from theflow.data.dataframe.tensor_array import is_tensor_series, to_tensor_series
 from theflow.utils.types import DataFrame
 
 
@@ -36,6 +37,9 @@ def flatten_df(df: DataFrame, df_engine: DataFrameEngine) -> Tuple[DataFrame, Di
     # Workaround for: https://issues.apache.org/jira/browse/ARROW-5645
     column_shapes = {}
     for c in df.columns:
+        if is_tensor_series(df[c]):
+            # Tensor columns are written as nested fixed size lists, which keep their shape without flattening.
+            continue
         df = df_engine.persist(df)
         shape = df_engine.compute(
             df_engine.map_objects(
@@ -68,7 +72,10 @@ def to_numpy_dataset(df: DataFrame, backend: Optional["Backend"] = None) -> Dict
         res = df[col]
         if backend and is_dask_backend(backend):
             res = res.compute()
-        if len(df.index) != 0:
+        if is_tensor_series(res):
+            # Already stored as a single array, even if empty
+            dataset[col] = res.array.tensor
+        elif len(df.index) != 0:
             dataset[col] = np.stack(res.to_numpy())
         else:
             # Dataframe is empty.
@@ -79,12 +86,15 @@ def to_numpy_dataset(df: DataFrame, backend: Optional["Backend"] = None) -> Dict
 
 @DeveloperAPI
 def from_numpy_dataset(dataset) -> pd.DataFrame:
-    """Returns a pandas dataframe from the dataset."""
+    """Returns a pandas dataframe from the dataset.
+
+    Columns of 2 and more dimensions are stored as tensor columns, whose rows are the arrays of their first dimension.
+    """
     col_mapping = {}
     for k, v in dataset.items():
         if len(v.shape) > 1:
-            # unstacking, needed for ndarrays of dimension 2 and more
-            (*vals,) = v
+            # Kept as a single array instead of one array per row
+            vals = to_tensor_series(v)
         else:
             # not unstacking. Needed because otherwise pandas casts types
             # the way it wants, like converting a list of float32 scalats
@@ -122,7 +132,13 @@ def to_scalar_df(df: pd.DataFrame) -> pd.DataFrame:
     scalar_df = df
     column_ordering = []
     for c, s in df.items():
-        if s.dtype == "object":
+        if is_tensor_series(s):
+            values = s.array.tensor
+            split_cols = [f"{c}_{k}" for k in range(values.shape[1])]
+            sdf = pd.DataFrame(values, columns=split_cols, index=s.index)
+            scalar_df = pd.concat([scalar_df, sdf], axis=1)
+            column_ordering += split_cols
+        elif s.dtype == "object":
             s_list = s.to_list()
             try:
                 ncols = s_list[0].shape[0]
@@ -135,3 +151,40 @@ def to_scalar_df(df: pd.DataFrame) -> pd.DataFrame:
         else:
             column_ordering.append(c)
     return scalar_df[column_ordering]
+
+
+@DeveloperAPI
+def get_scalar_column_names(dataset: Dict[str, np.ndarray]) -> List[str]:
+    """Returns the names of the scalar columns of a dictionary of numpy columns, as named by `to_scalar_df`.
+
+    Columns of vectors are expanded into one column per element, named {column}_{index}.
+    """
+    column_names = []
+    for c, values in dataset.items():
+        values = np.asarray(values)
+        if values.ndim == 1:
+            column_names.append(c)
+        elif values.ndim == 2:
+            column_names += [f"{c}_{k}" for k in range(values.shape[1])]
+        else:
+            raise ValueError(f"Expected column {c} of scalars or vectors, but found shape {values.shape[1:]}")
+    return column_names
+
+
+@DeveloperAPI
+def to_scalar_array(dataset: Dict[str, np.ndarray], dtype: np.dtype = np.float32) -> np.ndarray:
+    """Returns a C-contiguous 2D array of the scalar columns of a dictionary of numpy columns.
+
+    The array has the columns of `to_scalar_df(from_numpy_dataset(dataset))`, in the same order, named by
+    `get_scalar_column_names`. Each column is copied once, directly into the array, without building dataframes.
+    """
+    columns = [np.asarray(values) for values in dataset.values()]
+    num_rows = len(columns[0]) if columns else 0
+    array = np.empty((num_rows, len(get_scalar_column_names(dataset))), dtype=dtype)
+    start = 0
+    for values in columns:
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+        array[:, start : start + values.shape[1]] = values
+        start += values.shape[1]
+    return array
@@ -14,11 +14,14 @@
 # limitations under the License.
 # ==============================================================================
 import time
+import warnings
 from datetime import date, datetime
-from typing import Union
+from typing import Optional, Union
 
 import numpy as np
+import pandas as pd
 from dateutil.parser import parse, ParserError
+from pandas._libs.tslibs.parsing import guess_datetime_format
 
 from theflow.api_annotations import DeveloperAPI
 
@@ -45,6 +48,81 @@ def create_vector_from_datetime_obj(datetime_obj):
     ]
 
 
+@DeveloperAPI
+def create_vectors_from_datetimes(datetimes: pd.Series) -> np.ndarray:
+    """Returns the vectors of `create_vector_from_datetime_obj` of a series of datetimes, as the rows of a 2D array
+    computed columnwise."""
+    dt = datetimes.dt
+    hour, minute, second = dt.hour.to_numpy(), dt.minute.to_numpy(), dt.second.to_numpy()
+    return np.stack(
+        [
+            dt.year.to_numpy(),
+            dt.month.to_numpy(),
+            dt.day.to_numpy(),
+            dt.weekday.to_numpy(),
+            dt.dayofyear.to_numpy(),
+            hour,
+            minute,
+            second,
+            hour * 3600 + minute * 60 + second,
+        ],
+        axis=1,
+    ).astype(np.int64)
+
+
+@DeveloperAPI
+def parse_datetime_column(column: pd.Series, datetime_format: Optional[str] = None) -> pd.Series:
+    """Parses a column of datetimes or datetime strings all at once, like `parse_datetime` would parse each value.
+
+    Strings are parsed with `datetime_format`, or else with the format of the first string if it has a year, month and
+    day. Values that cannot be parsed this way, e.g. strings of other formats, numeric timestamps or dates out of the
+    bounds of `datetime64[ns]`, are NaT and need to be parsed one by one.
+    """
+    if pd.api.types.is_datetime64_any_dtype(column.dtype):
+        return column
+    not_parsed = pd.Series(pd.NaT, index=column.index, dtype="datetime64[ns]")
+    if len(column) == 0:
+        return not_parsed
+
+    inferred_type = pd.api.types.infer_dtype(column, skipna=True)
+    if inferred_type in {"datetime", "datetime64", "date"}:
+        try:
+            datetimes = pd.to_datetime(column, errors="coerce")
+        except (TypeError, ValueError):
+            # E.g. datetimes of different time zones
+            return not_parsed
+        return datetimes if pd.api.types.is_datetime64_any_dtype(datetimes.dtype) else not_parsed
+    if inferred_type != "string":
+        return not_parsed
+
+    if datetime_format is None:
+        with warnings.catch_warnings():
+            # Formats guessed with the day first are not used anyway
+            warnings.simplefilter("ignore", UserWarning)
+            datetime_format = guess_datetime_format(column.loc[column.first_valid_index()])
+        if datetime_format is None or not _is_unambiguous_date_format(datetime_format):
+            # Values would be parsed differently than by `parse_datetime`
+            return not_parsed
+    if "%z" in datetime_format or "%Z" in datetime_format:
+        # Values of different time zones cannot be held by the same column
+        return not_parsed
+    try:
+        return pd.to_datetime(column, format=datetime_format, errors="coerce")
+    except ValueError:
+        # Formats not supported by pandas
+        return not_parsed
+
+
+def _is_unambiguous_date_format(datetime_format: str) -> bool:
+    """Returns whether the format has a year, month and day, with a numeric month before the day as `dateutil`
+    assumes by default, so that strings of this format are parsed the same way by `parse_datetime`."""
+    if "%Y" not in datetime_format or "%d" not in datetime_format:
+        return False
+    if "%m" in datetime_format:
+        return datetime_format.index("%m") < datetime_format.index("%d")
+    return "%b" in datetime_format or "%B" in datetime_format
+
+
 @DeveloperAPI
 def parse_datetime(timestamp: Union[float, int, str]) -> datetime:
     """Parse a datetime from a string or a numeric timestamp.
@@ -1,16 +1,20 @@
+import numbers
+from collections import defaultdict, OrderedDict
 from dataclasses import dataclass
-from typing import Callable, Dict, Tuple, Union
+from typing import Any, Callable, Dict, List, Tuple, Union
 
 import lightgbm as lgb
 import numpy as np
 import torch
-from lightgbm.callback import CallbackEnv
+from lightgbm.callback import CallbackEnv, EarlyStopException
 from numpy import typing as npt
+from sklearn.preprocessing import LabelEncoder
 
 from theflow.constants import NUMBER
 from theflow.features.base_feature import BaseFeatureMixin, OutputFeature
 from theflow.features.category_feature import CategoryOutputFeature
 from theflow.models.base import BaseModel
+from theflow.utils.dataframe_utils import get_scalar_column_names, to_scalar_array
 
 
 def get_single_output_feature(model: BaseModel) -> BaseFeatureMixin:
@@ -129,6 +133,129 @@ def store_predictions(train_logits_buffer: torch.Tensor) -> Callable:
     return _callback
 
 
+def continue_training(
+    booster: lgb.Booster, params: Dict[str, Any], num_boost_round: int, callbacks: List[Callable]
+) -> lgb.Booster:
+    """Trains a booster returned by ``lgb.train(..., keep_training_booster=True)`` for more boosting rounds.
+
+    Passing the booster as ``init_model`` to ``lgb.train`` instead would predict the training and evaluation data with
+    it to initialize their scores, and rebuild the booster. This adds the boosting rounds to the booster itself, the
+    same way as the training loop of ``lgb.train``.
+
+    Args:
+        booster: booster to train, with its training and evaluation datasets.
+        params: parameters for LightGBM. A callable ``objective`` is used as custom objective function.
+        num_boost_round: number of boosting rounds to add.
+        callbacks: callbacks called after each boosting round, in order.
+
+    Returns:
+        The trained booster.
+    """
+    fobj = params["objective"] if callable(params["objective"]) else None
+    if fobj is not None:
+        params = {**params, "objective": "none"}
+
+    begin_iteration = booster.current_iteration()
+    end_iteration = begin_iteration + num_boost_round
+    booster.best_iteration = 0
+    evaluation_result_list = []
+    for iteration in range(begin_iteration, end_iteration):
+        booster.update(fobj=fobj)
+
+        evaluation_result_list = booster.eval_train() + booster.eval_valid()
+        env = CallbackEnv(
+            model=booster,
+            params=params,
+            iteration=iteration,
+            begin_iteration=begin_iteration,
+            end_iteration=end_iteration,
+            evaluation_result_list=evaluation_result_list,
+        )
+        try:
+            for callback in callbacks:
+                callback(env)
+        except EarlyStopException as e:
+            booster.best_iteration = e.best_iteration + 1
+            evaluation_result_list = e.best_score
+            break
+
+    booster.best_score = defaultdict(OrderedDict)
+    for dataset_name, metric_name, metric_value, *_ in evaluation_result_list:
+        booster.best_score[dataset_name][metric_name] = metric_value
+    return booster
+
+
+def to_sklearn_model(
+    estimator: lgb.LGBMModel, booster: lgb.Booster, lgb_train: lgb.Dataset, evals_result: Dict
+) -> lgb.LGBMModel:
+    """Sets the state of a scikit-learn LightGBM model as if ``estimator.fit`` had trained ``booster`` on
+    ``lgb_train``.
+
+    Args:
+        estimator: unfitted scikit-learn LightGBM model, with the parameters of the booster.
+        booster: trained booster, copied without its datasets so that it can keep training.
+        lgb_train: LightGBM dataset the booster is trained on.
+        evals_result: evaluation results of the last training.
+
+    Returns:
+        The fitted ``estimator``.
+    """
+    model = lgb.Booster(model_str=booster.model_to_string(num_iteration=-1))
+    model.best_iteration = booster.best_iteration
+    model.best_score = booster.best_score
+
+    estimator._Booster = model
+    estimator._n_features = model.num_feature()
+    estimator._n_features_in = model.num_feature()
+    estimator._evals_result = evals_result
+    estimator._best_iteration = model.best_iteration
+    estimator._best_score = model.best_score
+    if isinstance(estimator, lgb.LGBMClassifier):
+        estimator._le = LabelEncoder().fit(lgb_train.get_label())
+        estimator._classes = estimator._le.classes_
+        estimator._n_classes = len(estimator._classes)
+        estimator._class_map = dict(zip(estimator._classes, estimator._le.transform(estimator._classes)))
+    estimator.fitted_ = True
+    return estimator
+
+
+class ScalarSequence(lgb.Sequence):
+    """Rows of the scalar columns of a dictionary of numpy columns, to construct a LightGBM dataset from.
+
+    LightGBM bins the features from a sample of the rows, read one at a time, then adds all the rows to the dataset in
+    float32 chunks of ``batch_size`` rows, so the whole feature matrix is never materialized.
+
+    Args:
+        columns: numpy columns of scalars or vectors, keyed by name.
+        batch_size: number of rows of the chunks added to the dataset.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], batch_size: int):
+        self.columns = columns
+        self.batch_size = batch_size
+        self.column_names = get_scalar_column_names(columns)
+
+        # Slice of the row of scalar columns that each column fills.
+        self._column_slices = []
+        start = 0
+        for values in columns.values():
+            width = values.shape[1] if values.ndim > 1 else 1
+            self._column_slices.append(slice(start, start + width))
+            start += width
+
+    def __getitem__(self, idx: Union[int, slice, List[int]]) -> np.ndarray:
+        if isinstance(idx, numbers.Integral):
+            # Single rows are read to sample the features, which LightGBM bins as doubles.
+            row = np.empty(len(self.column_names), dtype=np.float64)
+            for values, column_slice in zip(self.columns.values(), self._column_slices):
+                row[column_slice] = values[idx]
+            return row
+        return to_scalar_array({c: values[idx] for c, values in self.columns.items()})
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values())))
+
+
 @dataclass
 class TrainLogits:
     preds: torch.Tensor
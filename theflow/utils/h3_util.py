@@ -15,6 +15,9 @@
 # ==============================================================================
 from typing import List, NamedTuple
 
+import numpy as np
+import torch
+
 
 class H3Data(NamedTuple):
     mode: int
@@ -102,6 +105,40 @@ def h3_to_components(h3_value: int) -> H3Data:
     )
 
 
+def _h3_digit_shifts(max_resolution: int) -> List[int]:
+    return [64 - 19 - 3 * i for i in range(1, max_resolution + 1)]
+
+
+def h3_array_to_matrix(h3_values: np.ndarray, max_resolution: int, padding_value: int) -> np.ndarray:
+    """Decodes an array of H3 indexes all at once, with numpy bit shifts and masks.
+
+    Returns a uint8 matrix with a row of mode, edge, resolution, base cell and `max_resolution` cells per index, cells
+    beyond the resolution of the index set to `padding_value`, like `h3_to_components` for every index.
+    """
+    h3_values = np.asarray(h3_values).astype(np.uint64, copy=False)[:, None]
+    header_shifts = np.array([64 - 5, 64 - 8, 64 - 12, 64 - 19], dtype=np.uint64)
+    header_masks = np.array([0b1111, 0b111, 0b1111, 0b1111111], dtype=np.uint64)
+    header = (h3_values >> header_shifts) & header_masks
+    cells = (h3_values >> np.array(_h3_digit_shifts(max_resolution), dtype=np.uint64)) & np.uint64(0b111)
+    resolution = header[:, 2:3]
+    cells[np.arange(1, max_resolution + 1) > resolution] = padding_value
+    return np.concatenate([header, cells], axis=1).astype(np.uint8)
+
+
+def h3_tensor_to_matrix(h3_values: torch.Tensor, max_resolution: int, padding_value: int) -> torch.Tensor:
+    """Decodes a tensor of H3 indexes all at once, with the same bit shifts and masks as `h3_array_to_matrix`, in a
+    form that can be compiled with TorchScript."""
+    h3_values = h3_values.long().unsqueeze(1)
+    header_shifts = torch.tensor([64 - 5, 64 - 8, 64 - 12, 64 - 19], dtype=torch.long, device=h3_values.device)
+    header_masks = torch.tensor([0b1111, 0b111, 0b1111, 0b1111111], dtype=torch.long, device=h3_values.device)
+    header = torch.bitwise_and(torch.bitwise_right_shift(h3_values, header_shifts), header_masks)
+    cell_shifts = torch.tensor(_h3_digit_shifts(max_resolution), dtype=torch.long, device=h3_values.device)
+    cells = torch.bitwise_and(torch.bitwise_right_shift(h3_values, cell_shifts), 0b111)
+    cell_resolutions = torch.arange(1, max_resolution + 1, device=h3_values.device)
+    cells = torch.where(cell_resolutions > header[:, 2:3], padding_value, cells)
+    return torch.cat([header, cells], dim=1).to(torch.uint8)
+
+
 if __name__ == "__main__":
     value = 622236723497533439
     components = h3_to_components(value)
@@ -1,7 +1,7 @@
 import copy
 import logging
 import tempfile
-from typing import Dict, Optional, Tuple, TYPE_CHECKING, Union
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING, Union
 
 import torch
 import torch.nn.functional as F
@@ -338,6 +338,243 @@ def create_attention_mask(input_ids: torch.Tensor, tokenizer: PreTrainedTokenize
     return attention_mask
 
 
+def get_left_padding_lengths(input_ids: torch.Tensor, tokenizer: PreTrainedTokenizer) -> torch.Tensor:
+    """Returns the number of tokens that `remove_left_padding` removes from the start of each row of a batch.
+
+    This is the batched equivalent of `remove_left_padding`: all the tokens up to the last PAD token are removed, and
+    then all the tokens before the first remaining BOS token, if any.
+
+    Args:
+        input_ids (torch.Tensor): The input tensor of shape [batch_size, sequence_length].
+        tokenizer (PreTrainedTokenizer): The tokenizer used to encode the input.
+
+    Returns:
+        torch.Tensor: The number of leading tokens to remove from each row, of shape [batch_size].
+
+    Example:
+        >>> from types import SimpleNamespace
+        >>> tokenizer = SimpleNamespace(pad_token_id=0, bos_token_id=1, eos_token_id=2)
+        >>> input_ids = torch.tensor([[0, 0, 1, 5, 3], [4, 5, 6, 7, 8]])
+        >>> get_left_padding_lengths(input_ids, tokenizer)
+        tensor([2, 0])
+    """
+    positions = torch.arange(input_ids.shape[1], device=input_ids.device)
+
+    # Remove everything up to the last PAD token
+    padding_lengths = torch.where(input_ids == tokenizer.pad_token_id, positions + 1, 0).max(dim=1).values
+
+    # Start from the first BOS token after the padding
+    if tokenizer.bos_token_id is not None:
+        is_bos = (input_ids == tokenizer.bos_token_id) & (positions >= padding_lengths.unsqueeze(1))
+        first_bos = is_bos.to(torch.int64).argmax(dim=1)  # argmax returns the first maximal index
+        padding_lengths = torch.where(is_bos.any(dim=1), first_bos, padding_lengths)
+
+    return padding_lengths
+
+
+def merge_and_left_pad(
+    sequences: List[torch.Tensor],
+    tokenizer: PreTrainedTokenizer,
+    pad_value: int = 0,
+    max_sequence_length: Optional[int] = None,
+) -> torch.Tensor:
+    """Concatenates the rows of batches of token ids without their left padding, followed by an EOS token.
+
+    The left padding of each row of each batch is removed as in `remove_left_padding`, the rows are concatenated
+    together with an EOS token at the end, truncated to `max_sequence_length` and left-padded with `pad_value` to the
+    length of the longest merged row. All the work is done with batched tensor operations on the device of the inputs.
+
+    Args:
+        sequences (List[torch.Tensor]): The batches of token ids to merge, each of shape [batch_size, length].
+        tokenizer (PreTrainedTokenizer): The tokenizer used to encode the token ids.
+        pad_value (int, optional): The value used for padding. Defaults to 0.
+        max_sequence_length (int or None): The maximum length of the merged rows.
+
+    Returns:
+        torch.Tensor: The merged token ids, of shape [batch_size, longest merged row length].
+
+    Example:
+        >>> from types import SimpleNamespace
+        >>> tokenizer = SimpleNamespace(pad_token_id=0, bos_token_id=1, eos_token_id=2)
+        >>> input_ids = torch.tensor([[0, 0, 3], [5, 6, 7]])
+        >>> target_ids = torch.tensor([[8, 9], [0, 8]])
+        >>> merge_and_left_pad([input_ids, target_ids], tokenizer, pad_value=-100)
+        tensor([[-100, 3, 8, 9, 2], [5, 6, 7, 8, 2]])
+    """
+    device = sequences[0].device
+    starts = [get_left_padding_lengths(ids, tokenizer) for ids in sequences]
+    lengths = [ids.shape[1] - start for ids, start in zip(sequences, starts)]
+    merged_lengths = _get_merged_lengths(lengths, max_sequence_length)
+    max_length = int(merged_lengths.max()) if len(merged_lengths) else 0
+
+    # Position of each output token in its merged row, negative for the left padding
+    positions = torch.arange(max_length, device=device) - (max_length - merged_lengths).unsqueeze(1)
+
+    merged = torch.full(positions.shape, pad_value, dtype=torch.int64, device=device)
+    offsets = torch.zeros_like(merged_lengths)
+    for ids, start, length in zip(sequences, starts, lengths):
+        sequence_positions = positions - offsets.unsqueeze(1)
+        in_sequence = (sequence_positions >= 0) & (sequence_positions < length.unsqueeze(1))
+        source_positions = (start.unsqueeze(1) + sequence_positions).clamp(0, max(ids.shape[1] - 1, 0))
+        merged = torch.where(in_sequence, ids.to(device=device, dtype=torch.int64).gather(1, source_positions), merged)
+        offsets = offsets + length
+    return torch.where(positions == offsets.unsqueeze(1), tokenizer.eos_token_id, merged)
+
+
+def get_merged_lengths(
+    sequences: List[torch.Tensor], tokenizer: PreTrainedTokenizer, max_sequence_length: Optional[int] = None
+) -> torch.Tensor:
+    """Returns the length of each row merged by `merge_and_left_pad`, without its left padding.
+
+    Args:
+        sequences (List[torch.Tensor]): The batches of token ids to merge, each of shape [batch_size, length].
+        tokenizer (PreTrainedTokenizer): The tokenizer used to encode the token ids.
+        max_sequence_length (int or None): The maximum length of the merged rows.
+
+    Returns:
+        torch.Tensor: The number of tokens of each merged row, of shape [batch_size].
+    """
+    lengths = [ids.shape[1] - get_left_padding_lengths(ids, tokenizer) for ids in sequences]
+    return _get_merged_lengths(lengths, max_sequence_length)
+
+
+def _get_merged_lengths(lengths: List[torch.Tensor], max_sequence_length: Optional[int]) -> torch.Tensor:
+    # Add one for the EOS token.
+    merged_lengths = sum(lengths) + 1
+    if max_sequence_length:
+        merged_lengths = merged_lengths.clamp(max=max_sequence_length)
+    return merged_lengths
+
+
+def get_packing_layout(lengths: torch.Tensor, max_sequence_length: int) -> Tuple[torch.Tensor, torch.Tensor, int, int]:
+    """Assigns sequences to rows of at most `max_sequence_length` tokens, longest sequences first, each one to the
+    first row it fits in.
+
+    The rows are laid out one sequence at a time, so `lengths` should be on the host, e.g. computed by
+    `get_merged_lengths` from the host arrays of a batch before they are moved to the device.
+
+    Args:
+        lengths (torch.Tensor): The length of each sequence, of shape [batch_size].
+        max_sequence_length (int): The maximum number of tokens of a row.
+
+    Returns:
+        Tuple of the row of each sequence, the offset of each sequence in its row, the number of rows and the number of
+        tokens of the longest row.
+
+    Example:
+        >>> get_packing_layout(torch.tensor([3, 6, 2, 4]), 8)
+        (tensor([1, 0, 0, 1]), tensor([4, 0, 6, 0]), 2, 8)
+    """
+    row_lengths = []
+    rows = [0] * len(lengths)
+    offsets = [0] * len(lengths)
+    lengths = lengths.tolist()
+    for i in sorted(range(len(lengths)), key=lambda i: -lengths[i]):
+        row = next(
+            (row for row, row_length in enumerate(row_lengths) if row_length + lengths[i] <= max_sequence_length), None
+        )
+        if row is None:
+            row = len(row_lengths)
+            row_lengths.append(0)
+        rows[i] = row
+        offsets[i] = row_lengths[row]
+        row_lengths[row] += lengths[i]
+    return torch.tensor(rows), torch.tensor(offsets), len(row_lengths), max(row_lengths, default=0)
+
+
+def _get_packed_positions(
+    lengths: torch.Tensor, rows: torch.Tensor, offsets: torch.Tensor, max_length: int, row_length: int
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Returns the position in the flattened packed rows of each token of left-padded sequences of `max_length`
+    tokens, and whether each position of the sequences holds a token rather than padding."""
+    positions = torch.arange(max_length, device=lengths.device) - (max_length - lengths).unsqueeze(1)
+    is_token = positions >= 0
+    packed_positions = (rows * row_length + offsets).to(lengths.device).unsqueeze(1) + positions
+    return packed_positions, is_token
+
+
+def pack_sequences(
+    sequences: torch.Tensor,
+    lengths: torch.Tensor,
+    rows: torch.Tensor,
+    offsets: torch.Tensor,
+    num_rows: int,
+    row_length: int,
+    pad_value: int = 0,
+) -> torch.Tensor:
+    """Copies left-padded sequences into rows of concatenated sequences, as laid out by `get_packing_layout`.
+
+    Args:
+        sequences (torch.Tensor): The left-padded sequences, of shape [batch_size, max_length, ...].
+        lengths (torch.Tensor): The length of each sequence, of shape [batch_size].
+        rows (torch.Tensor): The row of each sequence.
+        offsets (torch.Tensor): The offset of each sequence in its row.
+        num_rows (int): The number of rows.
+        row_length (int): The number of tokens of each row.
+        pad_value (int, optional): The value used for padding the end of the rows. Defaults to 0.
+
+    Returns:
+        torch.Tensor: The packed sequences, of shape [num_rows, row_length, ...].
+    """
+    packed_positions, is_token = _get_packed_positions(lengths, rows, offsets, sequences.shape[1], row_length)
+    # Padding is written to an extra position that is dropped at the end.
+    dropped_position = num_rows * row_length
+    packed_positions = torch.where(is_token, packed_positions, dropped_position)
+
+    trailing_shape = sequences.shape[2:]
+    packed = sequences.new_full((dropped_position + 1,) + trailing_shape, pad_value)
+    packed[packed_positions.reshape(-1)] = sequences.reshape((-1,) + trailing_shape)
+    return packed[:dropped_position].view((num_rows, row_length) + trailing_shape)
+
+
+def unpack_sequences(
+    packed: torch.Tensor,
+    lengths: torch.Tensor,
+    rows: torch.Tensor,
+    offsets: torch.Tensor,
+    max_length: int,
+    pad_value: int = 0,
+) -> torch.Tensor:
+    """Copies packed sequences back into left-padded sequences of `max_length` tokens. This is the inverse of
+    `pack_sequences`.
+
+    Args:
+        packed (torch.Tensor): The packed sequences, of shape [num_rows, row_length, ...].
+        lengths (torch.Tensor): The length of each sequence, of shape [batch_size].
+        rows (torch.Tensor): The row of each sequence.
+        offsets (torch.Tensor): The offset of each sequence in its row.
+        max_length (int): The length of the left-padded sequences.
+        pad_value (int, optional): The value used for left padding. Defaults to 0.
+
+    Returns:
+        torch.Tensor: The left-padded sequences, of shape [batch_size, max_length, ...].
+    """
+    packed_positions, is_token = _get_packed_positions(lengths, rows, offsets, max_length, packed.shape[1])
+    trailing_shape = packed.shape[2:]
+    sequences = packed.reshape((-1,) + trailing_shape)[torch.where(is_token, packed_positions, 0)]
+    return torch.where(is_token.view(is_token.shape + (1,) * len(trailing_shape)), sequences, pad_value)
+
+
+def create_packed_attention_mask(sequence_ids: torch.Tensor, dtype: torch.dtype) -> torch.Tensor:
+    """Creates the causal attention mask of packed sequences, where each token only attends to the previous tokens
+    of its own sequence.
+
+    Args:
+        sequence_ids (torch.Tensor): The index of the sequence of each token of the packed rows, of shape
+            [num_rows, row_length].
+        dtype (torch.dtype): The dtype of the model.
+
+    Returns:
+        torch.Tensor: A block-diagonal 4D attention mask of shape [num_rows, 1, row_length, row_length], in the inverted
+        form expected by HuggingFace models: 0 for attended tokens and the minimum value of `dtype` for masked tokens.
+    """
+    row_length = sequence_ids.shape[1]
+    causal = torch.ones((row_length, row_length), dtype=torch.bool, device=sequence_ids.device).tril()
+    attended = (sequence_ids.unsqueeze(2) == sequence_ids.unsqueeze(1)) & causal
+    attention_mask = torch.zeros(attended.shape, dtype=dtype, device=sequence_ids.device)
+    return attention_mask.masked_fill(~attended, torch.finfo(dtype).min).unsqueeze(1)
+
+
 def find_last_matching_index(tensor_a: torch.Tensor, tensor_b: torch.Tensor):
     """Returns the last index of `tensor_a` that matches `tensor_b`. Specifically, this checks whether the tensor_b
     is in the last tensor_b.shape[0] elements of tensor_a.
@@ -409,31 +646,43 @@ def pad_target_tensor_for_fine_tuning(
     if target_length == prediction_length:
         return targets
 
-    updated_targets = []
-    for idx, target in enumerate(targets[of_name]):
-        # Remove any leading IGNORE_INDEX_TOKEN_IDs in the target that were temporarily added for alignment
-        end_index = (target != IGNORE_INDEX_TOKEN_ID).nonzero()[0]
-        target = target[end_index:]
-        target_device = target.device
-
-        # See if any part of the target was in the tensor passed into the model's forward pass
-        last_matching_index = find_last_matching_index(model_inputs[idx], target)
-
-        # If the last matching index is -1, it means that the input tensor passed into the model was truncated
-        # and did not contain the target tensor. In this case, we need to truncate the target tensors as well
-        # and just set it to a tensor of IGNORE_INDEX_TOKEN_ID so that we don't compute loss on this target tensor.
-        if last_matching_index == -1:
-            updated_targets.append(torch.full((prediction_length,), IGNORE_INDEX_TOKEN_ID).to(device=target_device))
-
-        # If the last matching index is not -1, it means that the input tensor passed into the model was not
-        # truncated and contained either a part of the target tensor or the entire target tensor. In this case,
-        # we need to set the target tensor to the part of the target tensor that was passed into the model while
-        # also padding it to the correct length with IGNORE_INDEX_TOKEN_ID.
-        else:
-            padding = torch.full((last_matching_index,), IGNORE_INDEX_TOKEN_ID).to(device=target_device)
-            updated_targets.append(torch.cat((padding, target), dim=-1)[:prediction_length])
+    target = targets[of_name]
+    device = target.device
+    target_length = target.shape[1]
+    model_inputs_length = model_inputs.shape[1]
+    model_inputs = model_inputs.to(device)
+
+    # Remove any leading IGNORE_INDEX_TOKEN_IDs in the target that were temporarily added for alignment
+    target_positions = torch.arange(target_length, device=device)
+    target_starts = torch.where(target != IGNORE_INDEX_TOKEN_ID, target_positions, target_length).min(dim=1).values
+    target_lengths = target_length - target_starts
+
+    # See if any part of the target was in the tensor passed into the model's forward pass, as in
+    # `find_last_matching_index`: for each shift i, check whether the last target_lengths - i model inputs match the
+    # first target_lengths - i target tokens. windows[b, i, x] is the model input compared to target[b, x] for shift i.
+    aligned_model_inputs = F.pad(model_inputs, (max(target_length - model_inputs_length, 0), target_length))
+    aligned_model_inputs = aligned_model_inputs[:, -2 * target_length :]  # noqa E203
+    windows = aligned_model_inputs.unfold(1, target_length, 1)[:, :target_length]
+    shifts = target_positions.view(1, -1, 1)
+    compared = (target_positions >= target_starts.view(-1, 1, 1)) & (target_positions < target_length - shifts)
+    matches = ((windows == target.unsqueeze(1)) | ~compared).all(dim=-1)
+    matches &= target_positions < target_lengths.unsqueeze(1)
+    matches &= (target_lengths <= model_inputs_length).unsqueeze(1)
+    has_match = matches.any(dim=1)
+    last_matching_index = model_inputs_length - target_lengths + matches.to(torch.int64).argmax(dim=1)
+
+    # If there is no match, the input tensor passed into the model was truncated and did not contain the target
+    # tensor, so the whole row is set to IGNORE_INDEX_TOKEN_ID so that we don't compute loss on it. Otherwise, the
+    # target is the part of the target tensor that was passed into the model, left-padded to its position in the
+    # model inputs with IGNORE_INDEX_TOKEN_ID and truncated to the prediction length.
+    prediction_positions = torch.arange(prediction_length, device=device) - last_matching_index.unsqueeze(1)
+    in_target = (
+        has_match.unsqueeze(1) & (prediction_positions >= 0) & (prediction_positions < target_lengths.unsqueeze(1))
+    )
+    source_positions = (target_starts.unsqueeze(1) + prediction_positions).clamp(0, target_length - 1)
+    updated_targets = torch.where(in_target, target.gather(1, source_positions), IGNORE_INDEX_TOKEN_ID)
 
-    targets[of_name] = torch.stack(updated_targets).to(device=targets.get(of_name).device, dtype=torch.int64)
+    targets[of_name] = updated_targets.to(dtype=torch.int64)
 
     return targets
 
@@ -456,36 +705,16 @@ def generate_merged_ids(
         torch.Tensor: The merged input and target IDs tensor.
         torch.Tensor: The attention masks for the merged tensor.
     """
-    merged_input_and_targets = []
-    lengths = []
-
-    eos_tensor = torch.tensor([tokenizer.eos_token_id]).to(target_ids[0].device)
-
-    # Merge input_ids and target_ids by concatenating them together.
-    # We remove the left padding from both input_ids and target_ids before concatenating them.
-    for input_id_sample, target_id_sample in zip(input_ids, target_ids):
-        input_id_sample_no_padding = remove_left_padding(input_id_sample, tokenizer)[0]
-        target_id_sample_no_padding = remove_left_padding(target_id_sample, tokenizer)[0]
-        target_id_sample_no_padding = torch.cat((target_id_sample_no_padding, eos_tensor), dim=-1)
-
-        merged_sample_ids = torch.cat((input_id_sample_no_padding, target_id_sample_no_padding), dim=-1)
-        # If the merged tensor is longer than the maximum sequence length, we truncate it.
-        if max_sequence_length and merged_sample_ids.shape[0] > max_sequence_length:
-            merged_sample_ids = merged_sample_ids[:max_sequence_length]
-
-        merged_input_and_targets.append(merged_sample_ids)
-        lengths.append(merged_sample_ids.shape[0])
-
-    # Since we remove the left padding from the target_ids, the merged input_ids and target_ids
-    # may not have the same lengths. We need to align them to the same length by adding left padding
-    # and generate an attention mask for just the part of the input that is not padding.
-    max_length = max(lengths)
-    attention_masks = []
-    for i, merged_sample_ids in enumerate(merged_input_and_targets):
-        merged_input_and_targets[i] = add_left_padding(merged_sample_ids, max_length)
-        attention_masks.append(create_attention_mask(merged_input_and_targets[i], tokenizer))
-
-    return torch.stack(merged_input_and_targets), torch.stack(attention_masks)
+    # Merge input_ids and target_ids by concatenating them together, after removing the left padding from both.
+    # Since the merged rows may not have the same lengths, they are aligned by adding left padding.
+    merged_input_and_targets = merge_and_left_pad([input_ids, target_ids], tokenizer, 0, max_sequence_length)
+
+    # Generate an attention mask for just the part of the input that is not padding. The last token may be padding if
+    # we've already hit the max sequence length, and is always attended to.
+    attention_masks = (merged_input_and_targets != tokenizer.pad_token_id).to(torch.int64)
+    attention_masks[:, -1] = 1
+
+    return merged_input_and_targets, attention_masks
 
 
 def _get_decoded_targets_and_predictions(
@@ -0,0 +1,266 @@
+"""Sharded checkpoint format, storing the tensors of a checkpoint state in safetensors shards.
+
+The checkpoint file itself is a small index, saved with `torch.save`, holding the state with every tensor replaced by a
+tensor reference, and the shard file of every tensor. Shards are stored in a `shards` directory next to the checkpoint
+files and shared between them, so shards of tensors left unchanged since they were last written, like buffers of frozen
+modules, are referenced again instead of being rewritten.
+
+Tensor references are plain dictionaries, so that the index can be loaded with `torch.load(weights_only=True)`, the
+default since torch 2.6.
+"""
+
+import logging
+import os
+import tempfile
+import uuid
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from glob import glob
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import torch
+from safetensors import safe_open
+from safetensors.torch import load_file, save_file
+
+from theflow.api_annotations import DeveloperAPI
+
+logger = logging.getLogger(__name__)
+
+SHARDED_CHECKPOINT_FORMAT = "sharded"
+SHARDS_DIR = "shards"
+DEFAULT_MAX_SHARD_SIZE = 1 << 30
+
+
+# Only key of the dictionaries standing for tensors in the index of a sharded checkpoint, mapping to the tensor key.
+TENSOR_REF_KEY = "__tensor_ref__"
+
+
+def _get_tensor_ref_key(value: Any) -> Optional[str]:
+    """Returns the key of the tensor that `value` stands for if it is a tensor reference, None otherwise."""
+    if isinstance(value, dict) and len(value) == 1 and TENSOR_REF_KEY in value:
+        return value[TENSOR_REF_KEY]
+    return None
+
+
+@DeveloperAPI
+def split_tensors(state: Any, prefix: str = "") -> Tuple[Any, Dict[str, torch.Tensor]]:
+    """Returns the (nested) state with every tensor replaced by a tensor reference, and the tensors keyed by their
+    path in the state."""
+    tensors = {}
+
+    def _join(path: str, key: Any) -> str:
+        return f"{path}/{key}" if path else str(key)
+
+    def _split(value: Any, path: str) -> Any:
+        if isinstance(value, torch.Tensor):
+            tensors[path] = value
+            return {TENSOR_REF_KEY: path}
+        if isinstance(value, dict):
+            return type(value)((k, _split(v, _join(path, k))) for k, v in value.items())
+        if isinstance(value, list):
+            return [_split(v, _join(path, i)) for i, v in enumerate(value)]
+        if isinstance(value, tuple) and not hasattr(value, "_fields"):
+            return tuple(_split(v, _join(path, i)) for i, v in enumerate(value))
+        return value
+
+    return _split(state, prefix), tensors
+
+
+@DeveloperAPI
+def join_tensors(state: Any, tensors: Mapping) -> Any:
+    """Returns the (nested) state with every tensor reference replaced by its tensor, the reverse of
+    `split_tensors`."""
+    key = _get_tensor_ref_key(state)
+    if key is not None:
+        return tensors[key]
+    if isinstance(state, dict):
+        return type(state)((k, join_tensors(v, tensors)) for k, v in state.items())
+    if isinstance(state, list):
+        return [join_tensors(v, tensors) for v in state]
+    if isinstance(state, tuple) and not hasattr(state, "_fields"):
+        return tuple(join_tensors(v, tensors) for v in state)
+    return state
+
+
+def is_sharded_index(state: Any) -> bool:
+    return isinstance(state, dict) and state.get("format") == SHARDED_CHECKPOINT_FORMAT
+
+
+def _get_shards_dir(save_path: str) -> str:
+    return os.path.join(os.path.dirname(save_path), SHARDS_DIR)
+
+
+def _get_tensor_version(tensor: torch.Tensor) -> Tuple[int, int]:
+    """Returns the storage and version counter of the tensor, which are unchanged until it is modified in place."""
+    return tensor.untyped_storage().data_ptr(), tensor._version
+
+
+@DeveloperAPI
+def load_sharded_state(index: Dict[str, Any], save_path: str, device: Optional[torch.device] = None) -> Dict[str, Any]:
+    """Returns the state of a sharded checkpoint index, reading its shards in parallel."""
+    shards_dir = _get_shards_dir(save_path)
+    device = "cpu" if device is None else str(device)
+    shard_files = sorted(set(index["shards"].values()))
+    with ThreadPoolExecutor() as executor:
+        shards = dict(
+            zip(shard_files, executor.map(lambda f: load_file(os.path.join(shards_dir, f), device=device), shard_files))
+        )
+    tensors = {key: shards[shard_file][key] for key, shard_file in index["shards"].items()}
+    return join_tensors(index["state"], tensors)
+
+
+@DeveloperAPI
+class LazyShardedStateDict(Mapping):
+    """Read-only state dict of a sharded checkpoint, reading every tensor from its memory-mapped shard only when it
+    is accessed."""
+
+    def __init__(self, state: Dict[str, Dict[str, str]], shards: Dict[str, str], save_path: str, device: str = "cpu"):
+        self._state = state
+        self._shards = shards
+        self._shards_dir = _get_shards_dir(save_path)
+        self._device = device
+        self._handles = {}
+
+    def __getitem__(self, name: str) -> torch.Tensor:
+        key = _get_tensor_ref_key(self._state[name])
+        shard_file = self._shards[key]
+        if shard_file not in self._handles:
+            self._handles[shard_file] = safe_open(
+                os.path.join(self._shards_dir, shard_file), framework="pt", device=self._device
+            )
+        return self._handles[shard_file].get_tensor(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._state)
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    def __reduce__(self):
+        # Shard handles cannot be pickled, and the shards may not be readable where the state dict is unpickled.
+        return dict, (dict(self.items()),)
+
+
+@DeveloperAPI
+class ShardedCheckpointWriter:
+    """Writes checkpoint states as sharded checkpoints, only writing the tensors modified since they were last
+    written."""
+
+    def __init__(self, write_index_fn: Callable[[Dict[str, Any], str], None], move_file_fn: Callable[[str, str], None]):
+        """Constructor.
+
+        Args:
+          write_index_fn: function atomically writing the index to the checkpoint path.
+          move_file_fn: function moving a written shard file to the shards directory.
+        """
+        self.write_index_fn = write_index_fn
+        self.move_file_fn = move_file_fn
+        # Storage and version of the tensors written to every shard file, keyed by tensor key.
+        self._shard_versions: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        # Shard files referenced by the index of every checkpoint path.
+        self._index_shards: Dict[str, Set[str]] = {}
+
+    def prepare(
+        self,
+        state: Dict[str, Any],
+        save_path: str,
+        max_shard_size: int = DEFAULT_MAX_SHARD_SIZE,
+        copy_fn: Optional[Callable[[Any], Any]] = None,
+    ) -> Callable[[], None]:
+        """Returns a function writing `state` to `save_path`, only rewriting the shards of tensors modified in
+        place since they were last written.
+
+        Tensors and their versions are taken when called: if `copy_fn` is given, the state to write is copied with it,
+        e.g. to snapshot it for an asynchronous write.
+        """
+        index_state, tensors = split_tensors(state)
+        shards = {}
+        for shard_file, versions in self._shard_versions.items():
+            if all(
+                key in tensors and version == _get_tensor_version(tensors[key]) for key, version in versions.items()
+            ):
+                shards.update((key, shard_file) for key in versions)
+        tensors = {key: tensor for key, tensor in tensors.items() if key not in shards}
+        versions = {key: _get_tensor_version(tensor) for key, tensor in tensors.items()}
+        if copy_fn is not None:
+            index_state, tensors = copy_fn(index_state), copy_fn(tensors)
+
+        def write():
+            self._write(index_state, tensors, shards, versions, save_path, max_shard_size)
+
+        return write
+
+    def _write(
+        self,
+        index_state: Any,
+        tensors: Dict[str, torch.Tensor],
+        shards: Dict[str, str],
+        versions: Dict[str, Tuple[int, int]],
+        save_path: str,
+        max_shard_size: int,
+    ):
+        shards_dir = _get_shards_dir(save_path)
+        os.makedirs(shards_dir, exist_ok=True)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for shard_tensors in _group_shards(tensors, max_shard_size):
+                shard_file = f"{uuid.uuid4().hex}.safetensors"
+                tmp_path = os.path.join(tmpdir, shard_file)
+                save_file(_to_savable(shard_tensors), tmp_path)
+                self.move_file_fn(tmp_path, os.path.join(shards_dir, shard_file))
+                self._shard_versions[shard_file] = {key: versions[key] for key in shard_tensors}
+                shards.update((key, shard_file) for key in shard_tensors)
+
+        old_index_shards = self._get_index_shards(save_path)
+        self.write_index_fn({"format": SHARDED_CHECKPOINT_FORMAT, "state": index_state, "shards": shards}, save_path)
+        self._index_shards[save_path] = set(shards.values())
+        self._remove_unreferenced_shards(old_index_shards, save_path)
+
+    def _get_index_shards(self, save_path: str) -> Set[str]:
+        if save_path not in self._index_shards:
+            index = torch.load(save_path) if os.path.isfile(save_path) else None
+            self._index_shards[save_path] = set(index["shards"].values()) if is_sharded_index(index) else set()
+        return self._index_shards[save_path]
+
+    def _remove_unreferenced_shards(self, shard_files: Set[str], save_path: str):
+        """Removes the shard files that are no longer referenced by the index of any checkpoint."""
+        for index_path in glob(os.path.join(os.path.dirname(save_path), "*.ckpt")):
+            self._get_index_shards(index_path)
+        referenced = set().union(*self._index_shards.values())
+        for shard_file in shard_files - referenced:
+            self._shard_versions.pop(shard_file, None)
+            try:
+                os.remove(os.path.join(_get_shards_dir(save_path), shard_file))
+            except FileNotFoundError:
+                pass
+
+
+def _group_shards(tensors: Dict[str, torch.Tensor], max_shard_size: int) -> List[Dict[str, torch.Tensor]]:
+    """Groups tensors in order into shards of at most `max_shard_size` bytes, or a single tensor if larger."""
+    shards = []
+    shard, shard_size = {}, 0
+    for key, tensor in tensors.items():
+        size = tensor.numel() * tensor.element_size()
+        if shard and shard_size + size > max_shard_size:
+            shards.append(shard)
+            shard, shard_size = {}, 0
+        shard[key] = tensor
+        shard_size += size
+    if shard:
+        shards.append(shard)
+    return shards
+
+
+def _to_savable(tensors: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+    """Returns contiguous CPU tensors, cloning tensors sharing memory with another one, e.g. tied weights, which
+    safetensors refuses to save."""
+    savable = {}
+    storages = set()
+    for key, tensor in tensors.items():
+        tensor = tensor.detach().to("cpu").contiguous()
+        storage = tensor.untyped_storage().data_ptr()
+        if storage in storages:
+            tensor = tensor.clone()
+        else:
+            storages.add(storage)
+        savable[key] = tensor
+    return savable
@@ -13,20 +13,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+import contextlib
+import hashlib
 import logging
 import re
 import unicodedata
 from collections import Counter
 from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, List, Optional, Set, Union
+from itertools import chain
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 import numpy as np
+import pandas as pd
 from dateutil.parser import parse as parse_datetime
 
 from theflow.constants import PADDING_SYMBOL, START_SYMBOL, STOP_SYMBOL, UNKNOWN_SYMBOL
 from theflow.data.dataframe.base import DataFrameEngine
 from theflow.data.dataframe.pandas import PANDAS
+from theflow.data.dataframe.tensor_array import to_tensor_series
 from theflow.utils.fs_utils import open_file
 from theflow.utils.math_utils import int_type
 from theflow.utils.tokenizers import get_tokenizer_from_registry
@@ -249,6 +254,98 @@ class Vocabulary:
     """
 
 
+@dataclass
+class TokenizedColumn:
+    """Compact representation of a tokenized column, produced once and reused for vocabulary and sequence matrix
+    building.
+
+    Every token is replaced by its index in `unique_tokens`, so the column is stored as two integer arrays instead of
+    one Python list of strings per row.
+    """
+
+    codes: np.ndarray
+    """Flat array with the index in `unique_tokens` of every token, rows concatenated."""
+
+    lengths: np.ndarray
+    """Number of tokens of each row."""
+
+    unique_tokens: np.ndarray
+    """Distinct tokens, in order of first appearance."""
+
+    def unit_counts(self) -> Counter:
+        """Returns the number of occurrences of each token."""
+        counts = np.bincount(self.codes, minlength=len(self.unique_tokens))
+        return Counter(dict(zip(self.unique_tokens.tolist(), counts.tolist())))
+
+    def document_counts(self) -> Counter:
+        """Returns the number of rows in which each token appears."""
+        row_ids = np.repeat(np.arange(len(self.lengths), dtype=np.int64), self.lengths)
+        unique_pairs = np.unique(row_ids * len(self.unique_tokens) + self.codes)
+        counts = np.bincount(unique_pairs % max(1, len(self.unique_tokens)), minlength=len(self.unique_tokens))
+        return Counter({token: count for token, count in zip(self.unique_tokens.tolist(), counts.tolist()) if count})
+
+
+def tokenize_column(
+    data: pd.Series, tokenizer, lowercase: bool, processor: DataFrameEngine = PANDAS
+) -> TokenizedColumn:
+    """Tokenizes every row of `data` and factorizes the tokens into a `TokenizedColumn`."""
+
+    def process_line(line):
+        return tokenizer(line.lower() if lowercase else line)
+
+    processed_lines = processor.map_objects(data, process_line)
+    lengths = np.fromiter((len(tokens) for tokens in processed_lines), dtype=np.int64, count=len(processed_lines))
+    flat_tokens = np.empty(int(lengths.sum()), dtype=object)
+    flat_tokens[:] = list(chain.from_iterable(processed_lines))
+    codes, unique_tokens = pd.factorize(flat_tokens)
+    return TokenizedColumn(codes=codes, lengths=lengths, unique_tokens=np.asarray(unique_tokens, dtype=object))
+
+
+# Tokenized columns kept between vocabulary and sequence matrix building while a dataset is built, keyed by a checksum
+# of the values of the column they were computed from. Missing value handling replaces the column with an equal copy
+# between the two, so the column object itself cannot be used as the key. None outside of `reuse_tokenized_columns`.
+_tokenized_columns: Optional[Dict[Tuple[str, Tuple], TokenizedColumn]] = None
+
+
+@contextlib.contextmanager
+def reuse_tokenized_columns():
+    """Keeps the columns tokenized by `create_vocabulary` for `build_sequence_matrix` to reuse within the context."""
+    global _tokenized_columns
+    previous, _tokenized_columns = _tokenized_columns, {}
+    try:
+        yield
+    finally:
+        _tokenized_columns = previous
+
+
+def _tokenization_key(
+    tokenizer_type: str,
+    lowercase: bool,
+    vocab_file: Optional[str],
+    pretrained_model_name_or_path: Optional[str],
+    ngram_size: Optional[int],
+) -> Tuple:
+    # ngram_size only affects the ngram tokenizer, which defaults to bigrams.
+    ngram_size = (ngram_size or 2) if tokenizer_type == "ngram" else None
+    return tokenizer_type, lowercase, vocab_file, pretrained_model_name_or_path, ngram_size
+
+
+def _column_checksum(data: pd.Series) -> str:
+    return hashlib.sha1(pd.util.hash_pandas_object(data, index=False).values).hexdigest()
+
+
+def _cache_tokenized_column(data: pd.Series, key: Tuple, tokenized: TokenizedColumn):
+    if _tokenized_columns is not None:
+        _tokenized_columns[_column_checksum(data), key] = tokenized
+
+
+def _get_cached_tokenized_column(data: pd.Series, key: Tuple) -> Optional[TokenizedColumn]:
+    """Returns the cached tokens of a column with the same values, and removes them from the cache."""
+    if not _tokenized_columns:
+        return None
+    return _tokenized_columns.pop((_column_checksum(data), key), None)
+
+
 def _get_vocab_from_dict(vocab: Dict[str, int]) -> List[str]:
     """Returns a vocab in list format from a vocab token=>idx dictionary."""
     vocab_values = list(vocab.values())
@@ -387,15 +484,30 @@ def create_vocabulary(
         prompt_template_num_tokens = len(tokenizer(prompt_without_bracketed_elements))
 
     # Tokenize the data.
-    def process_line(line):
-        return tokenizer(line.lower() if lowercase else line)
+    tokenized = None
+    if isinstance(data, pd.Series):
+        # In-memory columns are tokenized once into a compact form that build_sequence_matrix reuses.
+        tokenized = tokenize_column(data, tokenizer, lowercase, processor)
+        _cache_tokenized_column(
+            data,
+            _tokenization_key(tokenizer_type, lowercase, vocab_file, pretrained_model_name_or_path, ngram_size),
+            tokenized,
+        )
+        unit_counts = tokenized.unit_counts()
+        lengths = pd.Series(tokenized.lengths)
+        max_sequence_length = lengths.max()
+        sequence_length_99ptile = lengths.quantile(0.99)
+    else:
 
-    processed_lines = processor.map_objects(data, process_line)
-    processed_counts = processed_lines.explode().value_counts(sort=False)
-    processed_counts = processor.compute(processed_counts)
-    unit_counts = Counter(dict(processed_counts))
-    max_sequence_length = processor.compute(processed_lines.map(len).max())
-    sequence_length_99ptile = processor.compute(processed_lines.map(len).quantile(0.99))
+        def process_line(line):
+            return tokenizer(line.lower() if lowercase else line)
+
+        processed_lines = processor.map_objects(data, process_line)
+        processed_counts = processed_lines.explode().value_counts(sort=False)
+        processed_counts = processor.compute(processed_counts)
+        unit_counts = Counter(dict(processed_counts))
+        max_sequence_length = processor.compute(processed_lines.map(len).max())
+        sequence_length_99ptile = processor.compute(processed_lines.map(len).quantile(0.99))
 
     if tokenizer_type != "hf_tokenizer":
         # For non-HF tokenizers, add 2 for start and stop symbols.
@@ -424,9 +536,12 @@ def create_vocabulary(
     doc_unit_counts = None
     if compute_idf:
         # The document frequency used for TF-IDF. Similar to unit_counts, but de-duped by document.
-        document_counts = processed_lines.map(lambda x: set(x)).explode().value_counts(sort=False)
-        document_counts = processor.compute(document_counts)
-        doc_unit_counts = Counter(dict(document_counts))
+        if tokenized is not None:
+            doc_unit_counts = tokenized.document_counts()
+        else:
+            document_counts = processed_lines.map(lambda x: set(x)).explode().value_counts(sort=False)
+            document_counts = processor.compute(document_counts)
+            doc_unit_counts = Counter(dict(document_counts))
 
     if tokenizer_type != "hf_tokenizer":
         if add_special_symbols:
@@ -526,6 +641,63 @@ def _get_sequence_vector(
     return unit_indices_vector
 
 
+def _get_token_ids(
+    unique_tokens: np.ndarray, tokenizer_type: str, unit_to_id: Dict[str, int], unknown_symbol: str
+) -> np.ndarray:
+    """Maps each distinct token to its id, so the ids of a whole column are a single gather `ids[codes]`."""
+    if tokenizer_type == "hf_tokenizer":
+        # Huggingface tokenizers already produce ids.
+        return unique_tokens.astype(np.int64)
+
+    ids = np.fromiter((unit_to_id.get(unit, -1) for unit in unique_tokens), dtype=np.int64, count=len(unique_tokens))
+    unknown = ids < 0
+    if unknown.any():
+        ids[unknown] = unit_to_id[unknown_symbol]
+    return ids
+
+
+def _build_padded_sequence_matrix(
+    tokenized: TokenizedColumn,
+    token_ids: np.ndarray,
+    start_id: Optional[int],
+    stop_id: Optional[int],
+    pad_token_id: int,
+    max_length: int,
+    padding: str,
+    format_dtype,
+) -> np.ndarray:
+    """Writes the (optionally start/stop delimited) token ids of every row into a preallocated `(num_rows,
+    max_length)` matrix, truncating rows longer than `max_length`."""
+    num_rows = len(tokenized.lengths)
+    matrix = np.full((num_rows, max_length), pad_token_id, dtype=format_dtype)
+
+    lengths = tokenized.lengths
+    values = token_ids[tokenized.codes]
+    if start_id is not None:
+        # Interleave the start and stop symbols around each row.
+        lengths = lengths + 2
+        row_starts = np.cumsum(lengths) - lengths
+        delimited = np.empty(int(lengths.sum()), dtype=np.int64)
+        is_token = np.ones(len(delimited), dtype=bool)
+        is_token[row_starts] = False
+        is_token[row_starts + lengths - 1] = False
+        delimited[row_starts] = start_id
+        delimited[row_starts + lengths - 1] = stop_id
+        delimited[is_token] = values
+        values = delimited
+
+    truncated_lengths = np.minimum(lengths, max_length)
+    row_ids = np.repeat(np.arange(num_rows, dtype=np.int64), lengths)
+    positions = np.arange(len(values), dtype=np.int64) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    keep = positions < truncated_lengths[row_ids]
+    row_ids = row_ids[keep]
+    positions = positions[keep]
+    if padding != "right":
+        positions += (max_length - truncated_lengths)[row_ids]
+    matrix[row_ids, positions] = values[keep]
+    return matrix
+
+
 def build_sequence_matrix(
     sequences,  # pd.core.series.Series
     inverse_vocabulary,
@@ -546,6 +718,40 @@ def build_sequence_matrix(
 
     format_dtype = int_type(len(inverse_vocabulary) - 1)
 
+    if tokenizer_type == "hf_tokenizer":
+        padding_symbol = tokenizer.get_pad_token()
+        pad_token_id = tokenizer.convert_token_to_id(padding_symbol)
+    else:
+        pad_token_id = inverse_vocabulary[padding_symbol]
+
+    if isinstance(sequences, pd.Series):
+        # Reuse the tokens computed while building the vocabulary when available, and fill the padded matrix in one
+        # vectorized pass instead of one array per row.
+        tokenized = _get_cached_tokenized_column(
+            sequences,
+            _tokenization_key(tokenizer_type, lowercase, tokenizer_vocab_file, pretrained_model_name_or_path, None),
+        )
+        if tokenized is None:
+            tokenized = tokenize_column(sequences, tokenizer, lowercase, processor)
+
+        delimited = tokenizer_type != "hf_tokenizer"
+        max_length = int(tokenized.lengths.max(initial=0)) + (2 if delimited else 0)
+        if max_length < length_limit:
+            logger.debug(f"max length of {format}: {max_length} < limit: {length_limit}")
+
+        token_ids = _get_token_ids(tokenized.unique_tokens, tokenizer_type, inverse_vocabulary, unknown_symbol)
+        matrix = _build_padded_sequence_matrix(
+            tokenized,
+            token_ids,
+            start_id=inverse_vocabulary[START_SYMBOL] if delimited else None,
+            stop_id=inverse_vocabulary[STOP_SYMBOL] if delimited else None,
+            pad_token_id=pad_token_id,
+            max_length=int(length_limit),
+            padding=padding,
+            format_dtype=format_dtype,
+        )
+        return to_tensor_series(matrix, index=sequences.index, name=sequences.name)
+
     unit_vectors = sequences.map(
         lambda sequence: _get_sequence_vector(
             sequence,
@@ -563,12 +769,6 @@ def build_sequence_matrix(
         logger.debug(f"max length of {format}: {max_length} < limit: {length_limit}")
     max_length = length_limit
 
-    if tokenizer_type == "hf_tokenizer":
-        padding_symbol = tokenizer.get_pad_token()
-        pad_token_id = tokenizer.convert_token_to_id(padding_symbol)
-    else:
-        pad_token_id = inverse_vocabulary[padding_symbol]
-
     def pad(vector):
         sequence = np.full((int(max_length),), pad_token_id, dtype=format_dtype)
         limit = min(vector.shape[0], max_length)
@@ -1,7 +1,12 @@
 import logging
+import os
 import re
+import threading
 from collections import defaultdict
-from typing import Dict, List, Tuple, TYPE_CHECKING, Union
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING, Union
+
+import psutil
+import torch
 
 try:
     from typing import Literal
@@ -428,6 +433,107 @@ def get_total_expected_checkpoints(total_steps: int, final_steps_per_checkpoint:
     return total_steps // final_steps_per_checkpoint + epochs
 
 
+@DeveloperAPI
+class StepSummaryBuffer:
+    """Buffers the losses of training steps on the device until they are needed on the host.
+
+    Reading a loss on the host waits for the device to finish computing it, so doing it every step stalls the training
+    loop. The buffered losses of all steps are copied to the host with a single transfer by `flush`, along with the
+    tensors of the other values of the steps, e.g. the trainer specific step statistics.
+    """
+
+    def __init__(self):
+        self._steps: List[Tuple[int, torch.Tensor, Dict[str, torch.Tensor], Dict[str, Any]]] = []
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    def append(self, step: int, combined_loss: torch.Tensor, all_losses: Dict[str, torch.Tensor], **step_info):
+        """Buffers the losses of `step` along with any other values of the step, e.g. the learning rate.
+
+        Scalar tensors among the values, or among the values of a dictionary value, are buffered like the losses.
+        """
+        self._steps.append(
+            (step, combined_loss.detach(), {name: loss.detach() for name, loss in all_losses.items()}, step_info)
+        )
+
+    def flush(self) -> List[Tuple[int, torch.Tensor, Dict[str, torch.Tensor], Dict[str, Any]]]:
+        """Returns the buffered steps in order, as `(step, combined_loss, all_losses, step_info)` with the losses
+        and the tensors of `step_info` as float32 CPU tensors, and empties the buffer."""
+        if not self._steps:
+            return []
+
+        tensors = []
+        for _, combined_loss, all_losses, step_info in self._steps:
+            tensors.append(combined_loss)
+            tensors.extend(all_losses.values())
+            tensors.extend(_step_info_tensors(step_info).values())
+        device = tensors[0].device
+        host_tensors = iter(torch.stack([tensor.detach().float().reshape(()).to(device) for tensor in tensors]).cpu())
+
+        steps = []
+        for step, _, all_losses, step_info in self._steps:
+            combined_loss = next(host_tensors)
+            all_losses = {name: next(host_tensors) for name in all_losses}
+            step_info = dict(step_info)
+            for key, name in _step_info_tensors(step_info):
+                if name is None:
+                    step_info[key] = next(host_tensors)
+                else:
+                    step_info[key] = {**step_info[key], name: next(host_tensors)}
+            steps.append((step, combined_loss, all_losses, step_info))
+        self._steps = []
+        return steps
+
+
+def _step_info_tensors(step_info: Dict[str, Any]) -> Dict[Tuple[str, Optional[str]], torch.Tensor]:
+    """Returns the tensors of the values of `step_info` and of its dictionary values, keyed by value key and key in
+    the dictionary value, or None."""
+    tensors = {}
+    for key, value in step_info.items():
+        if isinstance(value, torch.Tensor):
+            tensors[(key, None)] = value
+        elif isinstance(value, dict):
+            tensors.update({(key, name): v for name, v in value.items() if isinstance(v, torch.Tensor)})
+    return tensors
+
+
+@DeveloperAPI
+class MemorySampler:
+    """Samples the memory used by the current process on a background timer.
+
+    Reading the memory usage is a system call, this lets the training loop report a recent value every step for free.
+    """
+
+    def __init__(self, interval_s: float = 1.0):
+        self.interval_s = interval_s
+        self.memory_used_mb: float = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._sample()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="MemorySampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self._sample()
+
+    def _sample(self):
+        self.memory_used_mb = psutil.Process(os.getpid()).memory_info()[0] / 1e6
+
+
 @DeveloperAPI
 def get_training_report(
     validation_field: str,
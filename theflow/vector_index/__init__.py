@@ -8,8 +8,10 @@ logger = logging.getLogger(__name__)
 
 
 FAISS = "faiss"
+FAISS_IVF = "faiss_ivf"
+FAISS_HNSW = "faiss_hnsw"
 
-ALL_INDICES = [FAISS]
+ALL_INDICES = [FAISS, FAISS_IVF, FAISS_HNSW]
 
 
 def get_faiss_index_cls() -> Type[VectorIndex]:
@@ -18,9 +20,22 @@ def get_faiss_index_cls() -> Type[VectorIndex]:
     return FaissIndex
 
 
-# TODO(travis): add other indexing structures
+def get_faiss_ivf_index_cls() -> Type[VectorIndex]:
+    from theflow.vector_index.faiss import FaissIVFIndex
+
+    return FaissIVFIndex
+
+
+def get_faiss_hnsw_index_cls() -> Type[VectorIndex]:
+    from theflow.vector_index.faiss import FaissHNSWIndex
+
+    return FaissHNSWIndex
+
+
 vector_index_registry = {
     FAISS: get_faiss_index_cls,
+    FAISS_IVF: get_faiss_ivf_index_cls,
+    FAISS_HNSW: get_faiss_hnsw_index_cls,
 }
 
 
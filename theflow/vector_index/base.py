@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import List
 
 import numpy as np
 
@@ -8,16 +9,20 @@ class VectorIndex(ABC):
     def search(self, query: np.ndarray, k: int) -> np.ndarray:
         pass
 
+    def search_many(self, queries: np.ndarray, k: int) -> List[List[int]]:
+        """Returns the indices of the top k results for each row of `queries`."""
+        return [self.search(query, k) for query in queries]
+
     @abstractmethod
     def save(self, path: str):
         pass
 
     @classmethod
     @abstractmethod
-    def from_path(cls, path: str) -> "VectorIndex":
+    def from_path(cls, path: str, **kwargs) -> "VectorIndex":
         pass
 
     @classmethod
     @abstractmethod
-    def from_embeddings(cls, embeddings: np.ndarray) -> "VectorIndex":
+    def from_embeddings(cls, embeddings: np.ndarray, **kwargs) -> "VectorIndex":
         pass
@@ -1,27 +1,117 @@
+from typing import List
+
 import faiss
 import numpy as np
 
 from theflow.vector_index.base import VectorIndex
 
+# Number of queries sent to faiss in a single call by `search_many`. Searching larger batches of queries has been
+# seen to segfault when the OpenMP runtime of faiss is loaded along with the one of torch, so queries are searched one
+# at a time unless a larger `search_batch_size` is set in the index parameters.
+DEFAULT_SEARCH_BATCH_SIZE = 1
+
 
 class FaissIndex(VectorIndex):
-    def __init__(self, index: faiss.Index):
+    """Exact (brute force) L2 index."""
+
+    def __init__(self, index: faiss.Index, search_batch_size: int = DEFAULT_SEARCH_BATCH_SIZE):
         self.index = index
+        self.search_batch_size = max(1, search_batch_size)
 
     def search(self, query: np.ndarray, k: int) -> np.ndarray:
-        top_k = self.index.search(query.reshape(1, -1), k)
-        return top_k[1].tolist()[0]
+        return self.search_many(query.reshape(1, -1), k)[0]
+
+    def search_many(self, queries: np.ndarray, k: int) -> List[List[int]]:
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        results = []
+        for start in range(0, queries.shape[0], self.search_batch_size):
+            _, indices = self.index.search(queries[start : start + self.search_batch_size], k)
+            # Approximate indices pad the results with -1 when fewer than k neighbors are found.
+            results.extend(row[row >= 0].tolist() for row in indices)
+        return results
 
     def save(self, path: str):
         faiss.write_index(self.index, path)
 
     @classmethod
-    def from_path(cls, path: str) -> "VectorIndex":
+    def from_path(cls, path: str, search_batch_size: int = DEFAULT_SEARCH_BATCH_SIZE, **kwargs) -> "VectorIndex":
         index = faiss.read_index(path)
-        return cls(index)
+        return cls(index, search_batch_size=search_batch_size)
 
     @classmethod
-    def from_embeddings(cls, embeddings: np.ndarray) -> "VectorIndex":
+    def from_embeddings(
+        cls, embeddings: np.ndarray, search_batch_size: int = DEFAULT_SEARCH_BATCH_SIZE, **kwargs
+    ) -> "VectorIndex":
         index = faiss.IndexFlatL2(embeddings.shape[1])
         index.add(embeddings)
-        return cls(index)
+        return cls(index, search_batch_size=search_batch_size)
+
+
+class FaissIVFIndex(FaissIndex):
+    """Approximate inverted file index.
+
+    The embeddings are partitioned into `nlist` clusters and each query only scans the `nprobe` closest ones, so
+    increasing `nprobe` trades speed for recall.
+    """
+
+    def __init__(self, index: faiss.Index, nprobe: int = 8, search_batch_size: int = DEFAULT_SEARCH_BATCH_SIZE):
+        super().__init__(index, search_batch_size=search_batch_size)
+        self.index.nprobe = nprobe
+
+    @classmethod
+    def from_path(
+        cls, path: str, nprobe: int = 8, search_batch_size: int = DEFAULT_SEARCH_BATCH_SIZE, **kwargs
+    ) -> "VectorIndex":
+        index = faiss.read_index(path)
+        return cls(index, nprobe=nprobe, search_batch_size=search_batch_size)
+
+    @classmethod
+    def from_embeddings(
+        cls,
+        embeddings: np.ndarray,
+        nlist: int = 100,
+        nprobe: int = 8,
+        search_batch_size: int = DEFAULT_SEARCH_BATCH_SIZE,
+        **kwargs,
+    ) -> "VectorIndex":
+        # Every cluster needs at least one training point.
+        nlist = max(1, min(nlist, embeddings.shape[0]))
+        quantizer = faiss.IndexFlatL2(embeddings.shape[1])
+        index = faiss.IndexIVFFlat(quantizer, embeddings.shape[1], nlist)
+        index.train(embeddings)
+        index.add(embeddings)
+        return cls(index, nprobe=nprobe, search_batch_size=search_batch_size)
+
+
+class FaissHNSWIndex(FaissIndex):
+    """Approximate hierarchical navigable small world graph index.
+
+    `m` is the number of neighbors of each node in the graph and `ef_construction` / `ef_search` the size of the
+    candidate list used when building the graph and when searching it. Larger values trade speed and memory for recall.
+    """
+
+    def __init__(self, index: faiss.Index, ef_search: int = 16, search_batch_size: int = DEFAULT_SEARCH_BATCH_SIZE):
+        super().__init__(index, search_batch_size=search_batch_size)
+        self.index.hnsw.efSearch = ef_search
+
+    @classmethod
+    def from_path(
+        cls, path: str, ef_search: int = 16, search_batch_size: int = DEFAULT_SEARCH_BATCH_SIZE, **kwargs
+    ) -> "VectorIndex":
+        index = faiss.read_index(path)
+        return cls(index, ef_search=ef_search, search_batch_size=search_batch_size)
+
+    @classmethod
+    def from_embeddings(
+        cls,
+        embeddings: np.ndarray,
+        m: int = 32,
+        ef_construction: int = 40,
+        ef_search: int = 16,
+        search_batch_size: int = DEFAULT_SEARCH_BATCH_SIZE,
+        **kwargs,
+    ) -> "VectorIndex":
+        index = faiss.IndexHNSWFlat(embeddings.shape[1], m)
+        index.hnsw.efConstruction = ef_construction
+        index.add(embeddings)
+        return cls(index, ef_search=ef_search, search_batch_size=search_batch_size)